@@ -0,0 +1,274 @@
+import bisect
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from PyEngine3D.Common import logger
+from PyEngine3D.Utilities import AutoEnum, catmullRom
+from .GameBackend import Event, Keyboard
+
+
+class FlythroughMode(AutoEnum):
+    NONE = ()
+    RECORD = ()
+    PLAYBACK = ()
+
+
+class CameraFlythrough:
+    """
+    Record the main camera transforms with the timestamps, and play them back at a fixed timestep,
+    so the performance captures of a scene are comparable run to run.
+
+    recording file)
+        dict(scene=scene name, keys=[[time, pos x, pos y, pos z, pitch, yaw, roll], ...],
+             events=[[time, 'KEYDOWN' or 'KEYUP', key symbol of Keyboard], ...])
+
+    The camera is interpolated by catmull-rom between the keys. The frame times of the playback are
+    written to json with the statistics (mean, p95, p99, worst frame and hitch count) at the end.
+    """
+    version = 1
+
+    def __init__(self, core_manager):
+        self.core_manager = core_manager
+        self.mode = FlythroughMode.NONE
+        self.record_interval = 0.1  # seconds between the keys
+        self.record_events = False
+        self.fixed_delta = 1.0 / 60.0
+        self.hitch_ratio = 2.0  # a frame is a hitch if it is slower than the median frame by the ratio.
+        self.quit_after_playback = False
+
+        self.filepath = ""
+        self.scene_name = ""
+        self.keys = []
+        self.key_times = []
+        self.events = []
+        self.time = 0.0
+        self.last_key_time = 0.0
+        self.event_index = 0
+        self.frame_times = []
+        self.cpu_times = []
+        self.gpu_times = []
+        self.last_result = None
+
+    def is_recording(self):
+        return FlythroughMode.RECORD == self.mode
+
+    def is_playing(self):
+        return FlythroughMode.PLAYBACK == self.mode
+
+    def get_camera(self):
+        return self.core_manager.scene_manager.main_camera
+
+    def get_camera_key(self, camera):
+        transform = camera.transform
+        key = [self.time, ] + [float(x) for x in transform.get_pos()] + [float(x) for x in transform.get_rotation()]
+        if self.keys:
+            # unwrap the angles, so the spline does not turn around between 0 and 2 pi.
+            for i in range(4, 7):
+                key[i] += round((self.keys[-1][i] - key[i]) / (math.pi * 2.0)) * math.pi * 2.0
+        return key
+
+    def start_record(self, filepath, record_events=False):
+        """
+        :param record_events: record the keyboard events too, they are sent to CoreManager.update_event on playback.
+        """
+        if self.mode != FlythroughMode.NONE:
+            self.stop()
+        self.mode = FlythroughMode.RECORD
+        self.filepath = filepath
+        self.scene_name = self.core_manager.scene_manager.get_current_scene_name()
+        self.record_events = record_events
+        self.time = 0.0
+        self.last_key_time = 0.0
+        self.keys = []
+        self.events = []
+        camera = self.get_camera()
+        if camera is not None:
+            self.keys.append(self.get_camera_key(camera))
+        logger.info("Start to record the camera flythrough : %s" % filepath)
+
+    def stop_record(self):
+        camera = self.get_camera()
+        if camera is not None and (not self.keys or self.keys[-1][0] < self.time):
+            self.keys.append(self.get_camera_key(camera))
+        self.mode = FlythroughMode.NONE
+
+        if len(self.keys) < 2:
+            logger.warn("The camera flythrough has no keys to save.")
+            return False
+
+        data = dict(version=self.version, scene=self.scene_name, keys=self.keys, events=self.events)
+        with open(self.filepath, 'w') as f:
+            json.dump(data, f)
+        logger.info("Save the camera flythrough : %s, %.2f seconds, %d keys" % (self.filepath, self.time, len(self.keys)))
+        return True
+
+    def record_event(self, event_type, event_value):
+        if self.is_recording() and self.record_events and event_type in (Event.KEYDOWN, Event.KEYUP):
+            # the key codes depend on the game backend, so save the symbols.
+            for symbol, value in Keyboard.__dict__.items():
+                if value == event_value and not symbol.startswith('__'):
+                    self.events.append([self.time, event_type.name, symbol])
+                    break
+
+    def load(self, filepath):
+        try:
+            with open(filepath, 'r') as f:
+                data = json.load(f)
+        except BaseException:
+            logger.error("Cannot load the camera flythrough : %s" % filepath)
+            return False
+
+        if data.get('version') != self.version or len(data.get('keys', [])) < 2:
+            logger.error("Invalid camera flythrough : %s" % filepath)
+            return False
+
+        self.filepath = filepath
+        self.scene_name = data.get('scene', "")
+        self.keys = data['keys']
+        self.key_times = [key[0] for key in self.keys]
+        self.events = data.get('events', [])
+        return True
+
+    def start_playback(self, filepath, fixed_delta=1.0 / 60.0, quit_after_playback=False):
+        """
+        :param fixed_delta: the logic of the scene is updated by the timestep on the playback.
+        :param quit_after_playback: close the app after writing the statistics.
+        """
+        if self.mode != FlythroughMode.NONE:
+            self.stop()
+
+        if not self.load(filepath):
+            return False
+
+        current_scene_name = self.core_manager.scene_manager.get_current_scene_name()
+        if self.scene_name and self.scene_name != current_scene_name:
+            logger.warn("The camera flythrough is recorded on %s, but the current scene is %s." %
+                        (self.scene_name, current_scene_name))
+
+        self.mode = FlythroughMode.PLAYBACK
+        self.fixed_delta = fixed_delta
+        self.quit_after_playback = quit_after_playback
+        self.time = 0.0
+        self.event_index = 0
+        self.frame_times = []
+        self.cpu_times = []
+        self.gpu_times = []
+        self.apply_camera(0.0)
+        logger.info("Start to play the camera flythrough : %s, %.2f seconds" % (filepath, self.keys[-1][0]))
+        return True
+
+    def stop(self):
+        if self.is_recording():
+            self.stop_record()
+        elif self.is_playing():
+            self.stop_playback()
+
+    def stop_playback(self):
+        self.mode = FlythroughMode.NONE
+        self.last_result = self.get_statistics()
+        filepath = "%s_%s.json" % (os.path.splitext(self.filepath)[0], time.strftime("%Y%m%d_%H%M%S"))
+        with open(filepath, 'w') as f:
+            json.dump(self.last_result, f, indent=4)
+
+        frame_time = self.last_result['frame_time']
+        logger.info("Save the flythrough statistics : %s" % filepath)
+        logger.info("frames %d, mean %.2f ms, p95 %.2f ms, p99 %.2f ms, worst %.2f ms, hitches %d" % (
+            self.last_result['frame_count'], frame_time['mean'], frame_time['p95'], frame_time['p99'],
+            frame_time['worst'], frame_time['hitch_count']))
+
+        if self.quit_after_playback:
+            self.core_manager.close()
+
+    def sample_key(self, key_time):
+        keys = self.keys
+        if key_time <= keys[0][0]:
+            return np.array(keys[0][1:], dtype=np.float32)
+        elif keys[-1][0] <= key_time:
+            return np.array(keys[-1][1:], dtype=np.float32)
+
+        index = bisect.bisect_left(self.key_times, key_time)
+        k0 = np.array(keys[max(0, index - 2)][1:], dtype=np.float64)
+        k1 = np.array(keys[index - 1][1:], dtype=np.float64)
+        k2 = np.array(keys[index][1:], dtype=np.float64)
+        k3 = np.array(keys[min(len(keys) - 1, index + 1)][1:], dtype=np.float64)
+        t = (key_time - keys[index - 1][0]) / max(1e-6, keys[index][0] - keys[index - 1][0])
+        return catmullRom(k0, k1, k2, k3, t).astype(np.float32)
+
+    def apply_camera(self, key_time):
+        camera = self.get_camera()
+        if camera is not None:
+            key = self.sample_key(key_time)
+            camera.transform.set_pos(key[0:3])
+            camera.transform.set_pitch(key[3])
+            camera.transform.set_yaw(key[4])
+            camera.transform.set_roll(key[5])
+
+    def update(self, delta):
+        """
+        Record or play the camera of the frame. It is called instead of the camera control by the input.
+        :return: the delta of the scene update, the fixed timestep on the playback.
+        """
+        if self.is_recording():
+            self.time += delta
+            camera = self.get_camera()
+            if camera is not None and self.record_interval <= (self.time - self.last_key_time):
+                self.last_key_time = self.time
+                self.keys.append(self.get_camera_key(camera))
+        elif self.is_playing():
+            self.time += self.fixed_delta
+            while self.event_index < len(self.events) and self.events[self.event_index][0] <= self.time:
+                event_time, event_name, symbol = self.events[self.event_index]
+                self.event_index += 1
+                if hasattr(Keyboard, symbol):
+                    self.core_manager.update_event(Event[event_name], getattr(Keyboard, symbol))
+            self.apply_camera(self.time)
+            return self.fixed_delta
+        return delta
+
+    def add_frame_time(self, frame_time, cpu_time, gpu_time):
+        """
+        :param frame_time, cpu_time, gpu_time: millisecond of the frame
+        """
+        if not self.is_playing():
+            return
+
+        self.frame_times.append(frame_time)
+        self.cpu_times.append(cpu_time)
+        self.gpu_times.append(gpu_time)
+
+        if self.keys[-1][0] <= self.time:
+            self.stop_playback()
+
+    def get_time_statistics(self, times):
+        if not times:
+            return dict(mean=0.0, median=0.0, p95=0.0, p99=0.0, worst=0.0, worst_frame=-1, hitch_count=0)
+        times = np.array(times, dtype=np.float64)
+        median = float(np.median(times))
+        return dict(mean=float(np.mean(times)),
+                    median=median,
+                    p95=float(np.percentile(times, 95.0)),
+                    p99=float(np.percentile(times, 99.0)),
+                    worst=float(np.max(times)),
+                    worst_frame=int(np.argmax(times)),
+                    hitch_count=int(np.count_nonzero(times > median * self.hitch_ratio)))
+
+    def get_statistics(self):
+        # the first frame is skipped, its delta is measured from the frame before the playback.
+        frame_times = self.frame_times[1:]
+        cpu_times = self.cpu_times[1:]
+        gpu_times = self.gpu_times[1:]
+        return dict(recording=self.filepath,
+                    scene=self.scene_name,
+                    fixed_delta=self.fixed_delta,
+                    hitch_ratio=self.hitch_ratio,
+                    frame_count=len(frame_times),
+                    frame_time=self.get_time_statistics(frame_times),
+                    cpu_time=self.get_time_statistics(cpu_times),
+                    gpu_time=self.get_time_statistics(gpu_times),
+                    frame_times=frame_times,
+                    cpu_times=cpu_times,
+                    gpu_times=gpu_times)
@@ -12,7 +12,7 @@ import numpy as np
 
 from .GameBackend import GameBackNames, Keyboard, Event
 from PyEngine3D.Common import logger, log_level, COMMAND, VIDEO_RESIZE_TIME
-from PyEngine3D.Utilities import Singleton, GetClassName, Config, Profiler
+from PyEngine3D.Utilities import Singleton, GetClassName, Config, Profiler, FrameProfiler
 
 
 class CoreManager(Singleton):
@@ -68,6 +68,7 @@ class CoreManager(Singleton):
 
         # managers
         self.opengl_context = None
+        self.frame_profiler = None
         self.script_manager = None
         self.game_backend = None
         self.resource_manager = None
@@ -79,7 +80,9 @@ class CoreManager(Singleton):
         self.viewport_manager = None
         self.effect_manager = None
         self.project_manager = None
+        self.camera_flythrough = None
         self.config = None
+        self.pick_mouse_pos = None  # the mouse position of the left button down, see update_camera
 
         self.last_game_backend = GameBackNames.PYGLET
         self.game_backend_list = [GameBackNames.PYGLET, GameBackNames.PYGAME]
@@ -89,7 +92,33 @@ class CoreManager(Singleton):
     def gc_collect(self):
         self.need_to_gc_collect = True
 
-    def initialize(self, cmdQueue, uiCmdQueue, cmdPipe, project_filename=""):
+    def export_frame_profile(self):
+        filepath = os.path.join(self.project_manager.project_dir,
+                                "FrameProfile_%s.json" % time.strftime("%Y%m%d_%H%M%S"))
+        self.frame_profiler.export_chrome_trace(filepath)
+        logger.info("Export the frame profile : %s" % filepath)
+
+    def get_flythrough_filepath(self):
+        return os.path.join(self.project_manager.project_dir,
+                            "Flythrough_%s.json" % self.scene_manager.get_current_scene_name())
+
+    def toggle_flythrough_record(self, record_events=False):
+        if self.camera_flythrough.is_recording():
+            self.camera_flythrough.stop_record()
+        else:
+            self.camera_flythrough.start_record(self.get_flythrough_filepath(), record_events)
+
+    def toggle_flythrough_playback(self):
+        if self.camera_flythrough.is_playing():
+            self.camera_flythrough.stop_playback()
+        else:
+            self.camera_flythrough.start_playback(self.get_flythrough_filepath())
+
+    def initialize(self, cmdQueue, uiCmdQueue, cmdPipe, project_filename="", game_backend=None):
+        """
+        :param game_backend: GameBackNames, the game backend of the config is used if it is None.
+            GameBackNames.NULL runs without the window and the gpu, and it is not saved in the config.
+        """
         # process start
         logger.info('Platform : %s' % platformModule.platform())
         logger.info("Process Start : %s" % GetClassName(self))
@@ -107,13 +136,15 @@ class CoreManager(Singleton):
             self.cmdPipe.SendAndRecv(COMMAND.UI_RUN, None, COMMAND.UI_RUN_OK, None)
 
         from PyEngine3D.UI import ViewportManager
-        from PyEngine3D.OpenGLContext import OpenGLContext
+        from PyEngine3D.OpenGLContext import OpenGLContext, GPUTimer
         from PyEngine3D.ResourceManager import ResourceManager
         from PyEngine3D.Render import Renderer, RenderTargetManager, FontManager, RenderOptionManager, EffectManager
         from .SceneManager import SceneManager
         from .ProjectManager import ProjectManager
+        from .CameraFlythrough import CameraFlythrough
 
         self.opengl_context = OpenGLContext
+        self.frame_profiler = FrameProfiler.instance()
         self.viewport_manager = ViewportManager.instance()
         self.render_option_manager = RenderOptionManager.instance()
         self.rendertarget_manager = RenderTargetManager.instance()
@@ -123,6 +154,7 @@ class CoreManager(Singleton):
         self.scene_manager = SceneManager.instance()
         self.effect_manager = EffectManager.instance()
         self.project_manager = ProjectManager.instance()
+        self.camera_flythrough = CameraFlythrough(self)
 
         # check invalid project
         if not self.project_manager.initialize(self, project_filename):
@@ -149,9 +181,19 @@ class CoreManager(Singleton):
             self.game_backend = GameBackend_pyglet.PyGlet(self)
             self.last_game_backend = GameBackNames.PYGLET
 
+        def run_null():
+            from .GameBackend import GameBackend_null
+            self.game_backend = GameBackend_null.Null(self)
+
+        if game_backend is not None and game_backend != GameBackNames.NULL:
+            self.last_game_backend = game_backend
+
         # try 2 times.
         for i in range(2):
-            if self.last_game_backend == GameBackNames.PYGAME:
+            if game_backend == GameBackNames.NULL:
+                run_null()
+                break
+            elif self.last_game_backend == GameBackNames.PYGAME:
                 try:
                     run_pygame()
                     break
@@ -174,6 +216,7 @@ class CoreManager(Singleton):
 
         self.game_backend.create_window(width, height, full_screen)
         self.opengl_context.initialize()
+        self.frame_profiler.initialize(GPUTimer())
         self.send_game_backend_list(self.game_backend_list)
         index = self.game_backend_list.index(self.last_game_backend) if self.last_game_backend in self.game_backend_list else 0
         self.send_current_game_backend_index(index)
@@ -237,10 +280,14 @@ class CoreManager(Singleton):
             self.config.setValue("Project", "game_backend", self.last_game_backend)
             self.config.save()  # save config
 
+        if self.camera_flythrough is not None:
+            self.camera_flythrough.stop()
+
         # save project
         self.project_manager.close_project()
         self.renderer.close()
         self.resource_manager.close()
+        self.frame_profiler.close()
         self.game_backend.quit()
 
         logger.info("Process Stop : %s" % GetClassName(self))  # process stop
@@ -551,6 +598,8 @@ class CoreManager(Singleton):
             self.video_resize_time = self.current_time + VIDEO_RESIZE_TIME
             self.notify_change_resolution(event_value)
         elif Event.KEYDOWN == event_type:
+            if event_value not in (Keyboard._5, Keyboard._6):
+                self.camera_flythrough.record_event(event_type, event_value)
             key_pressed = self.game_backend.get_keyboard_pressed()
             subkey_down = key_pressed[Keyboard.LCTRL] or key_pressed[Keyboard.LSHIFT] or key_pressed[Keyboard.LALT]
             if Keyboard.ESCAPE == event_value:
@@ -575,6 +624,13 @@ class CoreManager(Singleton):
                 self.scene_manager.reset_light_probe()
             elif Keyboard._3 == event_value:
                 self.gc_collect()
+            elif Keyboard._4 == event_value:
+                self.export_frame_profile()
+            elif Keyboard._5 == event_value:
+                # shift + 5 records the keyboard events too.
+                self.toggle_flythrough_record(record_events=subkey_down)
+            elif Keyboard._6 == event_value:
+                self.toggle_flythrough_playback()
             elif Keyboard.DELETE == event_value:
                 # Test Code
                 obj_names = set(self.scene_manager.get_object_names())
@@ -584,15 +640,39 @@ class CoreManager(Singleton):
                 for obj_name in (obj_names - current_obj_names):
                     self.notify_delete_object(obj_name)
         elif Event.KEYUP == event_type:
-            pass
+            if event_value not in (Keyboard._5, Keyboard._6):
+                self.camera_flythrough.record_event(event_type, event_value)
         elif Event.TEXT == event_type:
             pass
 
+    def select_object_from_screen(self, mouse_x, mouse_y):
+        """
+        Select the static actor under the mouse by the ray picking of the spatial index of SceneManager.
+        """
+        viewport = self.viewport_manager.main_viewport
+        screen_x = (mouse_x - viewport.world_x) / viewport.width
+        screen_y = (mouse_y - viewport.world_y) / viewport.height
+        obj = self.scene_manager.pick_object_from_screen(screen_x, screen_y)
+        self.scene_manager.set_selected_object(obj.name if obj is not None else "")
+        if obj is not None:
+            attribute = self.scene_manager.get_object_attribute(obj.name, GetClassName(obj))
+            if attribute:
+                self.send(COMMAND.TRANS_OBJECT_ATTRIBUTE, attribute)
+
     def update_camera(self):
         keydown = self.game_backend.get_keyboard_pressed()
         mouse_delta = self.game_backend.mouse_delta
         btn_left, btn_middle, btn_right = self.game_backend.get_mouse_pressed()
 
+        # the click of the left button selects the object, the drag rotates the camera.
+        mouse_pos = self.game_backend.mouse_pos
+        if self.game_backend.get_mouse_down()[0]:
+            self.pick_mouse_pos = mouse_pos.copy()
+        elif self.game_backend.get_mouse_up()[0] and self.pick_mouse_pos is not None:
+            if np.all(np.abs(mouse_pos - self.pick_mouse_pos) <= 2.0):
+                self.select_object_from_screen(*mouse_pos)
+            self.pick_mouse_pos = None
+
         # get camera
         camera = self.scene_manager.main_camera
         camera_transform = camera.transform
@@ -659,6 +739,9 @@ class CoreManager(Singleton):
 
         self.update_time = delta * 1000.0  # millisecond
 
+        self.frame_profiler.begin_frame()
+        self.frame_profiler.begin_scope("Logic", gpu=False)
+
         start_time = time.perf_counter()
 
         if self.video_resized and self.video_resize_time < self.current_time:
@@ -670,6 +753,16 @@ class CoreManager(Singleton):
 
         self.update_command()
 
+        if self.resource_manager.is_warming_up():
+            # loading screen
+            loading_text = self.resource_manager.warm_up()
+            self.renderer.render_loading_screen(loading_text)
+            self.viewport_manager.render()
+            self.opengl_context.present()
+            self.game_backend.flip()
+            self.frame_profiler.end_frame()
+            return
+
         self.resource_manager.update()
 
         if not touch_event and self.viewport_manager.main_viewport.collide(*self.get_mouse_pos()):
@@ -679,9 +772,12 @@ class CoreManager(Singleton):
                         self.script_manager.update(delta)
                     except:
                         logger.error(traceback.format_exc())
-            else:
+            elif not self.camera_flythrough.is_playing():
                 self.update_camera()
 
+        # record the camera, or play it back with the fixed timestep.
+        delta = self.camera_flythrough.update(delta)
+
         self.scene_manager.update_scene(delta)
 
         # Start Render Scene
@@ -689,35 +785,59 @@ class CoreManager(Singleton):
         end_time = time.perf_counter()
         self.logic_time = (end_time - start_time) * 1000.0  # millisecond
         start_time = end_time
+        self.frame_profiler.end_scope()
 
         if not self.video_resized:
+            self.frame_profiler.begin_scope("Render")
+
             # render_light_probe scene
-            self.renderer.render_light_probe(self.scene_manager.main_light_probe)
+            self.frame_profiler.begin_scope("Light Probe")
+            light_probe = self.scene_manager.main_light_probe
+            if not light_probe.isRendered:
+                # the light probe is rendered once, so it does not render the placeholder materials.
+                material_loader = self.resource_manager.material_loader
+                material_loader.begin_sync_compile()
+                self.renderer.render_light_probe(light_probe)
+                material_loader.end_sync_compile()
+                self.resource_manager.async_material_compile_ready = True
+            self.frame_profiler.end_scope()
 
             # render sceme
             self.renderer.render_scene()
 
             # render viewport
+            self.frame_profiler.begin_scope("Viewport")
             self.viewport_manager.render()
+            self.frame_profiler.end_scope()
 
             end_time = time.perf_counter()
             self.render_time = (end_time - start_time) * 1000.0  # millisecond
             start_time = end_time
+            self.frame_profiler.end_scope()
 
             # end of render scene
+            self.frame_profiler.begin_scope("Present")
             self.opengl_context.present()
 
             # swap buffer
             self.game_backend.flip()
+            self.frame_profiler.end_scope()
 
             end_time = time.perf_counter()
             self.present_time = (end_time - start_time) * 1000.0  # millisecond
 
+        # gpu time of the last frame which the timer queries are resolved.
+        self.gpu_time = self.frame_profiler.gpu_frame_time
+
         self.acc_logic_time += self.logic_time
         self.acc_gpu_time += self.gpu_time
         self.acc_render_time += self.render_time
         self.acc_present_time += self.present_time
 
+        self.camera_flythrough.add_frame_time(self.update_time,
+                                              self.logic_time + self.render_time + self.present_time,
+                                              self.gpu_time)
+
         if 1.0 < self.acc_time:
             self.avg_logic_time = self.acc_logic_time / self.frame_count
             self.avg_gpu_time = self.acc_gpu_time / self.frame_count
@@ -738,6 +858,8 @@ class CoreManager(Singleton):
             self.frame_count = 0
             self.acc_time = 0.0
 
+            self.frame_profiler.update_summary()
+
         # debug info
         # print(self.fps, self.update_time)
         self.font_manager.log("%.2f fps" % self.avg_fps)
@@ -747,22 +869,39 @@ class CoreManager(Singleton):
         self.font_manager.log("Render : %.2f ms" % self.avg_render_time)
         self.font_manager.log("Present : %.2f ms" % self.avg_present_time)
 
-        render_count = len(self.scene_manager.skeleton_solid_render_infos)
-        render_count += len(self.scene_manager.skeleton_translucent_render_infos)
-        render_count += len(self.scene_manager.static_solid_render_infos)
-        render_count += len(self.scene_manager.static_translucent_render_infos)
+        render_count = self.scene_manager.skeleton_render_queue.get_render_info_count()
+        render_count += self.scene_manager.static_render_queue.get_render_info_count()
         self.font_manager.log("Render Count : %d" % render_count)
+        self.font_manager.log("Draw Calls : %d (%d before batching)" % (self.renderer.draw_call_count,
+                                                                         self.renderer.unbatched_draw_call_count))
+        self.font_manager.log("GL State Calls : %d (%d skipped)" % (self.opengl_context.frame_issued_calls,
+                                                                     self.opengl_context.frame_skipped_calls))
+        uploaded_bytes = sum(x.frame_uploaded_bytes for x in self.opengl_context.streaming_buffers)
+        self.font_manager.log("Streaming Upload : %.1f KB" % (uploaded_bytes / 1024.0))
         self.font_manager.log("Point Lights : %d" % self.scene_manager.point_light_count)
         self.font_manager.log("Effect Count : %d" % len(self.effect_manager.render_effects))
         self.font_manager.log("Particle Count : %d" % self.effect_manager.alive_particle_count)
 
+        if self.camera_flythrough.is_recording():
+            self.font_manager.log("Flythrough : recording %.1f s ( press 5 to stop )" % self.camera_flythrough.time)
+        elif self.camera_flythrough.is_playing():
+            self.font_manager.log("Flythrough : playing %.1f / %.1f s" % (self.camera_flythrough.time,
+                                                                          self.camera_flythrough.key_times[-1]))
+
+        # frame profile
+        if self.frame_profiler.enable:
+            self.font_manager.log("Frame Profile ( press 4 to export ) :")
+            for profile_text in self.frame_profiler.get_summary_texts():
+                self.font_manager.log(profile_text)
+
         # selected object transform info
         selected_object = self.scene_manager.get_selected_object()
         if selected_object:
             self.font_manager.log("Selected Object : %s" % selected_object.name)
             if hasattr(selected_object, 'transform'):
                 self.font_manager.log(selected_object.transform.get_transform_infos())
-        self.gpu_time = (time.perf_counter() - start_time) * 1000.0
+
+        self.frame_profiler.end_frame()
 
         if self.need_to_gc_collect:
             self.need_to_gc_collect = False
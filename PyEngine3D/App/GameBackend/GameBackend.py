@@ -9,6 +9,7 @@ from PyEngine3D.Common import logger, log_level, COMMAND
 class GameBackNames:
     PYGLET = "pyglet"
     PYGAME = "pygame"
+    NULL = "null"  # headless, see GameBackend_null
 
 
 class Event(AutoEnum):
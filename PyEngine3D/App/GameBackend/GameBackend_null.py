@@ -0,0 +1,92 @@
+from collections import defaultdict
+
+from PyEngine3D.Common import logger, INITIAL_WIDTH, INITIAL_HEIGHT
+from PyEngine3D.OpenGLContext import OpenGLContext
+from PyEngine3D.OpenGLContext.GLRecorder import GLRecorder
+from .GameBackend import GameBackend, Keyboard, Event
+
+
+class Null(GameBackend):
+    """
+    Headless game backend which has no window and no gpu. The gl calls are recorded by GLRecorder.
+    It runs the cpu side of the frames for the benchmarks and the tests.
+    """
+    def __init__(self, core_manager, max_frame_count=0):
+        """
+        :param max_frame_count: run stops after the frames, 0 is infinite.
+        """
+        GameBackend.__init__(self, core_manager)
+
+        logger.info('GameBackend : null')
+
+        GLRecorder.install()
+        OpenGLContext.support_read_back = False
+
+        self.screen_width = INITIAL_WIDTH
+        self.screen_height = INITIAL_HEIGHT
+        self.max_frame_count = max_frame_count
+        self.frame_count = 0
+
+        # there are no key codes, so give the unique numbers.
+        for i, symbol in enumerate(sorted(key for key in Keyboard.__dict__ if not key.startswith('__'))):
+            setattr(Keyboard, symbol, i + 1)
+
+        self.key_pressed = defaultdict(bool)
+
+        self.valid = True
+
+    def set_window_title(self, title):
+        pass
+
+    def set_mouse_visible(self, visible):
+        pass
+
+    def do_change_resolution(self):
+        pass
+
+    def update_event(self):
+        self.mouse_pos_old[...] = self.mouse_pos
+        self.btn_l_down = False
+        self.btn_m_down = False
+        self.btn_r_down = False
+        self.btn_l_up = False
+        self.btn_m_up = False
+        self.btn_r_up = False
+        self.wheel_up = False
+        self.wheel_down = False
+        self.keyboard_up = False
+        self.keyboard_down = False
+        self.mouse_delta[...] = self.mouse_pos - self.mouse_pos_old
+
+    def press_key(self, symbol):
+        self.keyboard_down = True
+        self.keyboard_pressed = True
+        self.key_pressed[symbol] = True
+        self.core_manager.update_event(Event.KEYDOWN, symbol)
+
+    def release_key(self, symbol):
+        self.keyboard_up = True
+        self.keyboard_pressed = False
+        self.key_pressed[symbol] = False
+        self.core_manager.update_event(Event.KEYUP, symbol)
+
+    def get_keyboard_pressed(self):
+        return self.key_pressed
+
+    def flip(self):
+        self.frame_count += 1
+        GLRecorder.next_frame()
+
+    def run(self):
+        self.running = True
+        while self.running:
+            self.update_event()
+            self.core_manager.update()
+            if 0 < self.max_frame_count <= self.frame_count:
+                self.running = False
+
+    def close(self):
+        self.running = False
+
+    def quit(self):
+        pass
@@ -48,6 +48,16 @@ class ProjectManager(Singleton):
             self.config.setDefaultValue("Camera", "move_speed", meter_per_unit)
             self.config.setDefaultValue("Camera", "pan_speed", meter_per_unit)
             self.config.setDefaultValue("Camera", "rotation_speed", 0.3)
+            self.config.setDefaultValue("Resource", "convert_worker_count", 0)  # 0 is cpu count
+            self.config.setDefaultValue("Resource", "async_loading", True)
+            self.config.setDefaultValue("Resource", "loading_thread_count", 2)
+            self.config.setDefaultValue("Resource", "loading_time_budget", 4.0)  # millisecond per frame
+            self.config.setDefaultValue("Resource", "program_binary_cache_size", 256)  # megabytes, 0 is disabled
+            self.config.setDefaultValue("Resource", "conversion_cache_path", "")  # "" is ~/.cache/PyEngine3D
+            self.config.setDefaultValue("Resource", "conversion_cache_size", 1024)  # megabytes, 0 is disabled
+            self.config.setDefaultValue("Resource", "async_material_compile", True)
+            self.config.setDefaultValue("Resource", "shader_warm_up", True)
+            self.config.setDefaultValue("Animation", "pose_cache_sample_rate", 0.0)  # poses per second, 0 is disabled
         except BaseException:
             logger.info("Cannot open %s : %s" % (GetClassName(self), project_filename))
             return False
@@ -10,12 +10,12 @@ from PyEngine3D.Common import logger
 from PyEngine3D.Common.Constants import *
 from PyEngine3D.Render import StaticActor, SkeletonActor
 from PyEngine3D.Render import Camera, MainLight, PointLight, LightProbe
-from PyEngine3D.Render import gather_render_infos, always_pass, view_frustum_culling_geometry, shadow_culling
+from PyEngine3D.Render import GeometryBounds, LooseOctree, RenderQueue, gather_render_infos, always_pass
 from PyEngine3D.Render import Atmosphere, Ocean, Terrain
 from PyEngine3D.Render import Effect
 from PyEngine3D.Render.RenderOptions import RenderOption
 from PyEngine3D.Render.RenderTarget import RenderTargets
-from PyEngine3D.Utilities import Singleton, GetClassName
+from PyEngine3D.Utilities import Singleton, GetClassName, length, normalize
 
 
 class SceneManager(Singleton):
@@ -25,6 +25,7 @@ class SceneManager(Singleton):
         self.scene_loader = None
         self.renderer = None
         self.effect_manager = None
+        self.frame_profiler = None
         self.__current_scene_name = ""
 
         # Scene Objects
@@ -56,6 +57,21 @@ class SceneManager(Singleton):
         self.skeleton_translucent_render_infos = []
         self.skeleton_shadow_render_infos = []
 
+        # world bounds for culling
+        self.static_actor_bounds = GeometryBounds()
+        self.skeleton_actor_bounds = GeometryBounds()
+
+        # sorted render infos which persist across frames
+        self.material_version = 0
+        self.static_render_queue = RenderQueue(self.static_actor_bounds, use_instancing=True)
+        self.static_shadow_render_queue = RenderQueue(self.static_actor_bounds, use_instancing=True)
+        self.skeleton_render_queue = RenderQueue(self.skeleton_actor_bounds)
+        self.skeleton_shadow_render_queue = RenderQueue(self.skeleton_actor_bounds)
+
+        # spatial index of the static actors
+        self.static_actor_octree = LooseOctree()
+        self.updated_static_actors = set()
+
     def initialize(self, core_manager):
         logger.info("initialize " + GetClassName(self))
         self.core_manager = core_manager
@@ -63,6 +79,7 @@ class SceneManager(Singleton):
         self.scene_loader = self.resource_manager.scene_loader
         self.renderer = core_manager.renderer
         self.effect_manager = core_manager.effect_manager
+        self.frame_profiler = core_manager.frame_profiler
 
     def get_current_scene_name(self):
         return self.__current_scene_name
@@ -87,8 +104,19 @@ class SceneManager(Singleton):
 
         self.static_solid_render_infos = []
         self.static_translucent_render_infos = []
+        self.static_shadow_render_infos = []
         self.skeleton_solid_render_infos = []
         self.skeleton_translucent_render_infos = []
+        self.skeleton_shadow_render_infos = []
+
+        self.static_actor_bounds = GeometryBounds()
+        self.skeleton_actor_bounds = GeometryBounds()
+        self.static_render_queue = RenderQueue(self.static_actor_bounds, use_instancing=True)
+        self.static_shadow_render_queue = RenderQueue(self.static_actor_bounds, use_instancing=True)
+        self.skeleton_render_queue = RenderQueue(self.skeleton_actor_bounds)
+        self.skeleton_shadow_render_queue = RenderQueue(self.skeleton_actor_bounds)
+        self.static_actor_octree.clear()
+        self.updated_static_actors = set()
 
         self.renderer.set_debug_texture(None)
 
@@ -220,6 +248,10 @@ class SceneManager(Singleton):
                 object_list.append(obj)
             elif object_type is Effect:
                 self.effect_manager.add_effect(obj)
+
+            if StaticActor is object_type:
+                self.static_actor_bounds.add_actor(obj)
+                self.static_actor_octree.add_object(obj, *self.static_actor_bounds.get_actor_bound(obj))
             self.objectMap[obj.name] = obj
             self.core_manager.send_object_info(obj)
         else:
@@ -233,6 +265,10 @@ class SceneManager(Singleton):
                 object_list.remove(obj)
             elif object_type is Effect:
                 self.effect_manager.delete_effect(obj)
+
+            if StaticActor is object_type:
+                self.static_actor_bounds.remove_actor(obj)
+                self.static_actor_octree.remove_object(obj)
             self.objectMap.pop(obj.name)
             self.core_manager.notify_delete_object(obj.name)
 
@@ -387,6 +423,25 @@ class SceneManager(Singleton):
                              attribute_index):
         obj = self.get_object(object_name)
         obj and obj.set_attribute(attribute_name, attribute_value, parent_info, attribute_index)
+        if obj in self.static_actors:
+            self.update_actor_bounds(obj)
+
+    def update_actor_bounds(self, actor):
+        """
+        Refresh the bounds of the static actor in the next update. ex) the mesh or the instancing is changed.
+        """
+        self.updated_static_actors.add(actor)
+
+    def update_model_actor_bounds(self, model):
+        for static_actor in self.static_actors:
+            if static_actor.model is model:
+                self.update_actor_bounds(static_actor)
+
+    def update_material_version(self):
+        """
+        Refresh the materials and the sort keys of the render queues. ex) the material instances are changed or loaded.
+        """
+        self.material_version += 1
 
     def get_selected_object(self):
         return self.selected_object
@@ -403,55 +458,81 @@ class SceneManager(Singleton):
     def set_object_focus(self, object_name):
         obj = self.get_object(object_name)
         if obj and obj != self.main_camera:
-            self.main_camera.transform.set_pos(obj.transform.pos - self.main_camera.transform.front * 2.0)
+            distance = 2.0
+            if obj in self.static_actor_bounds.actor_ranges:
+                bound_min, bound_max = self.static_actor_bounds.get_actor_bound(obj)
+                distance = max(distance, length(bound_max - bound_min))
+            self.main_camera.transform.set_pos(obj.transform.pos - self.main_camera.transform.front * distance)
+
+    def pick_object(self, ray_origin, ray_direction):
+        """
+        :return: the nearest static actor which the ray hits its bounds, or None
+        """
+        actors = self.static_actor_octree.query_ray(ray_origin, ray_direction)
+        if not actors:
+            return None
+
+        bounds = [self.static_actor_bounds.get_actor_bound(actor) for actor in actors]
+        bound_min = np.array([bound[0] for bound in bounds])
+        bound_max = np.array([bound[1] for bound in bounds])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv_direction = 1.0 / ray_direction
+            t0 = (bound_min - ray_origin) * inv_direction
+            t1 = (bound_max - ray_origin) * inv_direction
+        t_near = np.nanmax(np.minimum(t0, t1), axis=1)
+        t_far = np.nanmin(np.maximum(t0, t1), axis=1)
+        hits = np.flatnonzero((t_near <= t_far) & (0.0 <= t_far))
+        if 0 == len(hits):
+            return None
+        return actors[hits[np.argmin(np.maximum(t_near[hits], 0.0))]]
+
+    def pick_object_from_screen(self, screen_x, screen_y):
+        """
+        :param screen_x, screen_y: normalized screen position, (0, 0) is the left bottom.
+        """
+        camera = self.main_camera
+        ndc = np.array([screen_x * 2.0 - 1.0, screen_y * 2.0 - 1.0, 1.0, 1.0], dtype=np.float32)
+        far_point = np.dot(np.dot(ndc, camera.inv_projection), camera.inv_view)
+        ray_direction = normalize(far_point[0:3] / far_point[3] - camera.transform.pos)
+        return self.pick_object(camera.transform.pos, ray_direction)
 
     def update_camera_projection_matrix(self, fov=0.0, aspect=0.0):
         for camera in self.cameras:
             camera.update_projection(fov, aspect)
 
     def update_static_render_info(self):
-        self.static_solid_render_infos = []
-        self.static_translucent_render_infos = []
-        self.static_shadow_render_infos = []
-
-        gather_render_infos(culling_func=view_frustum_culling_geometry,
-                            camera=self.main_camera,
-                            light=self.main_light,
-                            actor_list=self.static_actors,
-                            solid_render_infos=self.static_solid_render_infos,
-                            translucent_render_infos=self.static_translucent_render_infos)
-
-        gather_render_infos(culling_func=shadow_culling,
-                            camera=self.main_camera,
-                            light=self.main_light,
-                            actor_list=self.static_actors,
-                            solid_render_infos=self.static_shadow_render_infos,
-                            translucent_render_infos=None)
-
-        self.static_solid_render_infos.sort(key=lambda x: (id(x.geometry), id(x.material)))
-        self.static_translucent_render_infos.sort(key=lambda x: (id(x.geometry), id(x.material)))
+        bounds = self.static_actor_bounds
+        octree = self.static_actor_octree
+        if self.updated_static_actors:
+            bounds.update_actors(self.updated_static_actors)
+            for static_actor in self.updated_static_actors:
+                if static_actor in bounds.actor_ranges:
+                    octree.update_object(static_actor, *bounds.get_actor_bound(static_actor))
+            self.updated_static_actors = set()
+
+        # test the geometries of the actors in the visible nodes only.
+        actors = octree.query_frustum(self.main_camera.transform.pos, self.main_camera.frustum_vectors)
+        geometry_indices = bounds.view_frustum_culling(self.main_camera, bounds.get_geometry_indices(actors))
+        self.static_render_queue.update(geometry_indices, self.material_version)
+        self.static_solid_render_infos = self.static_render_queue.solid_render_infos
+        self.static_translucent_render_infos = self.static_render_queue.translucent_render_infos
+
+        # the translucent geometries do not cast the shadow.
+        actors = octree.query_view_projection(self.main_light.shadow_view_projection)
+        geometry_indices = bounds.shadow_culling(self.main_light, bounds.get_geometry_indices(actors))
+        self.static_shadow_render_queue.update(geometry_indices, self.material_version)
+        self.static_shadow_render_infos = self.static_shadow_render_queue.solid_render_infos
 
     def update_skeleton_render_info(self):
-        self.skeleton_solid_render_infos = []
-        self.skeleton_translucent_render_infos = []
-        self.skeleton_shadow_render_infos = []
+        bounds = self.skeleton_actor_bounds
+        bounds.update(self.skeleton_actors)
 
-        gather_render_infos(culling_func=view_frustum_culling_geometry,
-                            camera=self.main_camera,
-                            light=self.main_light,
-                            actor_list=self.skeleton_actors,
-                            solid_render_infos=self.skeleton_solid_render_infos,
-                            translucent_render_infos=self.skeleton_translucent_render_infos)
+        self.skeleton_render_queue.update(bounds.view_frustum_culling(self.main_camera), self.material_version)
+        self.skeleton_solid_render_infos = self.skeleton_render_queue.solid_render_infos
+        self.skeleton_translucent_render_infos = self.skeleton_render_queue.translucent_render_infos
 
-        gather_render_infos(culling_func=shadow_culling,
-                            camera=self.main_camera,
-                            light=self.main_light,
-                            actor_list=self.skeleton_actors,
-                            solid_render_infos=self.skeleton_shadow_render_infos,
-                            translucent_render_infos=None)
-
-        self.skeleton_solid_render_infos.sort(key=lambda x: (id(x.geometry), id(x.material)))
-        self.skeleton_translucent_render_infos.sort(key=lambda x: (id(x.geometry), id(x.material)))
+        self.skeleton_shadow_render_queue.update(bounds.shadow_culling(self.main_light), self.material_version)
+        self.skeleton_shadow_render_infos = self.skeleton_shadow_render_queue.solid_render_infos
 
     def update_light_render_infos(self):
         self.point_light_count = 0
@@ -476,8 +557,12 @@ class SceneManager(Singleton):
                 break
 
     def update_scene(self, dt):
+        frame_profiler = self.frame_profiler
+        frame_profiler.begin_scope("Update Scene", gpu=False)
+
         self.renderer.postprocess.update()
 
+        frame_profiler.begin_scope("Cameras & Lights", gpu=False)
         for camera in self.cameras:
             camera.update()
 
@@ -486,25 +571,38 @@ class SceneManager(Singleton):
 
         for light in self.point_lights:
             light.update()
+        frame_profiler.end_scope()
 
+        frame_profiler.begin_scope("Static Actors", gpu=False)
         for static_actor in self.static_actors:
             static_actor.update(dt)
+            if static_actor.transform.updated:
+                self.update_actor_bounds(static_actor)
+        frame_profiler.end_scope()
 
+        frame_profiler.begin_scope("Skeleton Actors", gpu=False)
         for skeleton_actor in self.skeleton_actors:
             skeleton_actor.update(dt)
+        frame_profiler.end_scope()
 
+        frame_profiler.begin_scope("Environment", gpu=False)
         self.atmosphere.update(self.main_light)
         self.ocean.update(dt)
 
         if self.terrain.is_render_terrain:
             self.terrain.update(dt)
+        frame_profiler.end_scope()
 
+        frame_profiler.begin_scope("Effect", gpu=False)
         self.effect_manager.update(dt)
+        frame_profiler.end_scope()
 
         # culling
+        frame_profiler.begin_scope("Culling", gpu=False)
         self.update_static_render_info()
         self.update_skeleton_render_info()
         self.update_light_render_infos()
+        frame_profiler.end_scope()
 
         self.selected_object_render_info = []
         if self.selected_object is not None and type(self.selected_object) in (SkeletonActor, StaticActor):
@@ -514,3 +612,5 @@ class SceneManager(Singleton):
                                 actor_list=[self.selected_object, ],
                                 solid_render_infos=self.selected_object_render_info,
                                 translucent_render_infos=self.selected_object_render_info)
+
+        frame_profiler.end_scope()
@@ -35,6 +35,7 @@ class FrameBuffer:
         self.target_face = GL_TEXTURE_CUBE_MAP_POSITIVE_X  # cubemap face
         self.target_layer = 0  # 3d texture layer
         self.target_level = 0  # mipmap level
+        self.attached_target = None  # (target_face, target_layer, target_level) of the attached textures
 
     def __del__(self):
         self.set_color_textures()
@@ -49,7 +50,7 @@ class FrameBuffer:
         logger.info("Delete %s" % GetClassName(self))
         self.set_color_textures()
         self.set_depth_texture(None)
-        glDeleteFramebuffers(1, [self.buffer, ])
+        OpenGLContext.delete_framebuffer(self.buffer)
 
     def set_color_textures(self, *textures):
         texture_count = len(textures)
@@ -83,7 +84,7 @@ class FrameBuffer:
         self.viewport_width = max(1, int(width * scale))
         self.viewport_height = max(1, int(height * scale))
         self.viewport_scale = scale
-        glViewport(x, y, self.viewport_width, self.viewport_height)
+        OpenGLContext.set_viewport(x, y, self.viewport_width, self.viewport_height)
 
     def func_bind_framebuffer(self, attachment, target, texture_buffer, offset=0):
         if GL_RENDERBUFFER == target:
@@ -102,7 +103,7 @@ class FrameBuffer:
 
     def build_command(self):
         self.commands.clear()
-        self.add_command(glBindFramebuffer, GL_FRAMEBUFFER, self.buffer)
+        self.attached_target = None
 
         # bind color textures
         layer_offset = 0
@@ -144,24 +145,35 @@ class FrameBuffer:
         elif self.depth_texture is not None:
             self.set_viewport(0, 0, self.depth_texture.width, self.depth_texture.height, viewport_scale)
 
-        # run command
-        for cmd in self.commands:
-            cmd()
+        OpenGLContext.bind_framebuffer(GL_FRAMEBUFFER, self.buffer)
 
-        gl_error = glCheckFramebufferStatus(GL_FRAMEBUFFER)
-        if gl_error != GL_FRAMEBUFFER_COMPLETE:
-            error_message = "glCheckFramebufferStatus error %s." % self.get_error(gl_error)
-            logger.error(error_message)
-            raise BaseException(error_message)
+        # the attachments are kept by the framebuffer object, so run the commands only when they are changed.
+        attached_target = (target_face, target_layer, target_level)
+        if OpenGLContext.count_call(attached_target != self.attached_target):
+            self.attached_target = attached_target
+
+            # run command
+            for cmd in self.commands:
+                cmd()
+
+            gl_error = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+            if gl_error != GL_FRAMEBUFFER_COMPLETE:
+                self.attached_target = None
+                error_message = "glCheckFramebufferStatus error %s." % self.get_error(gl_error)
+                logger.error(error_message)
+                raise BaseException(error_message)
 
     def unbind_framebuffer(self):
         self.set_color_textures()
         self.set_depth_texture(None)
-        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        OpenGLContext.bind_framebuffer(GL_FRAMEBUFFER, 0)
 
     def copy_framebuffer(self, src, src_x=0, src_y=0, src_w=0, src_h=0, dst_x=0, dst_y=0, dst_w=0, dst_h=0, target=GL_COLOR_BUFFER_BIT, filter_type=GL_LINEAR):
-        glBindFramebuffer(GL_READ_FRAMEBUFFER, src.buffer)
-        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, self.buffer)
+        OpenGLContext.bind_framebuffer(GL_READ_FRAMEBUFFER, src.buffer)
+        OpenGLContext.bind_framebuffer(GL_DRAW_FRAMEBUFFER, self.buffer)
+        # the read buffer and the draw buffers are changed.
+        src.attached_target = None
+        self.attached_target = None
 
         if GL_COLOR_BUFFER_BIT == target:
             glDrawBuffers(1, (GL_COLOR_ATTACHMENT0,))
@@ -176,8 +188,11 @@ class FrameBuffer:
                           target, filter_type)
 
     def mirror_framebuffer(self, src, src_x=0, src_y=0, src_w=0, src_h=0, dst_x=0, dst_y=0, dst_w=0, dst_h=0, target=GL_COLOR_BUFFER_BIT, filter_type=GL_LINEAR):
-        glBindFramebuffer(GL_READ_FRAMEBUFFER, src.buffer)
-        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, self.buffer)
+        OpenGLContext.bind_framebuffer(GL_READ_FRAMEBUFFER, src.buffer)
+        OpenGLContext.bind_framebuffer(GL_DRAW_FRAMEBUFFER, self.buffer)
+        # the read buffer and the draw buffers are changed.
+        src.attached_target = None
+        self.attached_target = None
 
         if GL_COLOR_BUFFER_BIT == target:
             glDrawBuffers(1, (GL_COLOR_ATTACHMENT0,))
@@ -193,7 +208,7 @@ class FrameBuffer:
 
     def blit_framebuffer(self, src_x=0, src_y=0, src_w=0, src_h=0, dst_x=0, dst_y=0, dst_w=0, dst_h=0, filter_type=GL_LINEAR):
         # active default frame buffer
-        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, 0)
+        OpenGLContext.bind_framebuffer(GL_DRAW_FRAMEBUFFER, 0)
         glBlitFramebuffer(src_x, src_y, src_w or self.viewport_width, src_h or self.viewport_height,
                           dst_x, dst_y, dst_w or self.viewport_width, dst_h or self.viewport_height,
                           GL_COLOR_BUFFER_BIT, filter_type)
@@ -252,7 +267,6 @@ class FrameBufferManager(Singleton):
 
     def bind_framebuffer(self, *textures, depth_texture=None,
                          target_face=GL_TEXTURE_CUBE_MAP_POSITIVE_X, target_layer=0, target_level=0):
-        glBindFramebuffer(GL_FRAMEBUFFER, 0)
         self.current_framebuffer = self.get_framebuffer(*textures, depth_texture=depth_texture)
         self.current_framebuffer.run_bind_framebuffer(target_face=target_face,
                                                       target_layer=target_layer,
@@ -260,7 +274,7 @@ class FrameBufferManager(Singleton):
         return self.current_framebuffer
 
     def unbind_framebuffer(self):
-        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        OpenGLContext.bind_framebuffer(GL_FRAMEBUFFER, 0)
 
     def copy_rendertarget(self, src_render_target, dst_render_target,
                            src_x=0, src_y=0, src_w=0, src_h=0,
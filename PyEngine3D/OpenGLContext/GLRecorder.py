@@ -0,0 +1,209 @@
+import sys
+from collections import Counter
+
+import numpy as np
+import OpenGL.GLU
+from OpenGL.GL import *
+
+from PyEngine3D.Common import logger
+
+
+class GLRecorder:
+    """
+    Null gl for the headless game backend. The gl functions are replaced by the recorders,
+    which count the calls and keep the arguments instead of executing them.
+
+    usage)
+        GLRecorder.install()
+        ...
+        GLRecorder.next_frame()
+        print(GLRecorder.frame_calls.most_common(10))
+    """
+    installed = False
+    originals = {}  # { (module name, function name) : original function }
+    calls = Counter()  # { function name : count } of the current frame
+    frame_calls = Counter()  # calls of the last frame
+    total_calls = Counter()
+    record_arguments = False
+    max_records = 100000
+    records = []  # [(function name, arguments), ] of the current frame if record_arguments is True
+    frame_records = []
+    last_object = 0
+
+    # the values of the queries
+    extensions = [b'GL_KHR_parallel_shader_compile', ]  # the async material compile path runs headless too.
+    integers = {
+        GL_MAJOR_VERSION: 4,
+        GL_MINOR_VERSION: 3,
+        GL_NUM_EXTENSIONS: len(extensions),
+        GL_MAX_DRAW_BUFFERS: 8,
+        GL_UNIFORM_BUFFER_OFFSET_ALIGNMENT: 256,
+        GL_SHADER_STORAGE_BUFFER_OFFSET_ALIGNMENT: 256,
+    }
+    default_integer = 1024
+    object_status = {
+        GL_COMPILE_STATUS: GL_TRUE,
+        GL_LINK_STATUS: GL_TRUE,
+        GL_VALIDATE_STATUS: GL_TRUE,
+        GL_INFO_LOG_LENGTH: 0,
+        GL_PROGRAM_BINARY_LENGTH: 0,
+    }
+
+    @staticmethod
+    def gen_objects(count, *args):
+        objects = [GLRecorder.gen_object() for i in range(count)]
+        return objects[0] if 1 == count else objects
+
+    @staticmethod
+    def gen_object(*args):
+        GLRecorder.last_object += 1
+        return GLRecorder.last_object
+
+    @staticmethod
+    def get_integer(pname, *args):
+        return GLRecorder.integers.get(pname, GLRecorder.default_integer)
+
+    @staticmethod
+    def get_integer_i(pname, index, *args):
+        return [GLRecorder.default_integer, ]
+
+    @staticmethod
+    def get_integer64(pname, data=None, *args):
+        if data is not None:
+            data[...] = 0
+        return 0
+
+    @staticmethod
+    def get_object_status(obj, pname, params=None, *args):
+        status = GLRecorder.object_status.get(pname, GL_TRUE)
+        if params is not None and hasattr(params, 'value'):
+            params.value = status
+        return status
+
+    @staticmethod
+    def get_string(name, *args):
+        return b"PyEngine3D Null GL"
+
+    @staticmethod
+    def get_string_i(name, index, *args):
+        if GL_EXTENSIONS == name and index < len(GLRecorder.extensions):
+            return GLRecorder.extensions[index]
+        return GLRecorder.get_string(name)
+
+    @staticmethod
+    def get_info_log(*args):
+        return b""
+
+    @staticmethod
+    def get_location(*args):
+        return GLRecorder.gen_object()
+
+    @staticmethod
+    def get_tex_image(target, level, format, type, *args):
+        return b""
+
+    results = {
+        'glGenBuffers': gen_objects.__func__,
+        'glGenTextures': gen_objects.__func__,
+        'glGenVertexArrays': gen_objects.__func__,
+        'glGenFramebuffers': gen_objects.__func__,
+        'glGenRenderbuffers': gen_objects.__func__,
+        'glGenSamplers': gen_objects.__func__,
+        'glGenQueries': lambda count, *args: np.array([GLRecorder.gen_object() for i in range(count)], dtype=np.uint32),
+        'glCreateProgram': gen_object.__func__,
+        'glCreateShader': gen_object.__func__,
+        'glFenceSync': gen_object.__func__,
+        'glGetUniformLocation': get_location.__func__,
+        'glGetAttribLocation': get_location.__func__,
+        'glGetUniformBlockIndex': get_location.__func__,
+        'glGetIntegerv': get_integer.__func__,
+        'glGetInteger': get_integer.__func__,
+        'glGetIntegeri_v': get_integer_i.__func__,
+        'glGetInteger64v': get_integer64.__func__,
+        'glGetQueryObjecti64v': lambda query, pname, params=None, *args: GLRecorder.get_integer64(pname, params),
+        'glGetShaderiv': get_object_status.__func__,
+        'glGetProgramiv': get_object_status.__func__,
+        'glGetShaderInfoLog': get_info_log.__func__,
+        'glGetProgramInfoLog': get_info_log.__func__,
+        'glGetString': get_string.__func__,
+        'glGetStringi': get_string_i.__func__,
+        'glGetTexImage': get_tex_image.__func__,
+        'glReadPixels': lambda *args: b"",
+        'glCheckFramebufferStatus': lambda *args: GL_FRAMEBUFFER_COMPLETE,
+        'glClientWaitSync': lambda *args: GL_ALREADY_SIGNALED,
+        'glMapBufferRange': lambda *args: None,
+        'glGetError': lambda *args: GL_NO_ERROR,
+        'glIsTexture': lambda *args: GL_TRUE,
+    }
+
+    @staticmethod
+    def create_recorder(function_name):
+        result = GLRecorder.results.get(function_name)
+        calls = GLRecorder.calls
+
+        def recorder(*args, **kwargs):
+            calls[function_name] += 1
+            if GLRecorder.record_arguments and len(GLRecorder.records) < GLRecorder.max_records:
+                GLRecorder.records.append((function_name, args))
+            if result is not None:
+                return result(*args)
+            return None
+        recorder.__name__ = function_name
+        recorder.__module__ = __name__
+        return recorder
+
+    @staticmethod
+    def is_gl_function(name, value):
+        return name.startswith('gl') and callable(value) and \
+            str(getattr(value, '__module__', '')).startswith('OpenGL')
+
+    @staticmethod
+    def patch_module(module):
+        recorders = {}
+        for name, value in list(vars(module).items()):
+            if GLRecorder.is_gl_function(name, value):
+                GLRecorder.originals[(module.__name__, name)] = value
+                recorders[name] = GLRecorder.create_recorder(name)
+        for name, recorder in recorders.items():
+            setattr(module, name, recorder)
+
+    @staticmethod
+    def install():
+        """
+        Replace the gl functions of the loaded engine modules and of the OpenGL modules,
+        so the engine modules which are imported later get the recorders too.
+        """
+        if GLRecorder.installed:
+            return
+        GLRecorder.installed = True
+
+        for module_name, module in list(sys.modules.items()):
+            if module is None:
+                continue
+            if module_name.startswith('PyEngine3D') or module_name.startswith('OpenGL.GL') or \
+                    module_name.startswith('OpenGL.GLU') or module_name.startswith('OpenGL.raw.GL'):
+                GLRecorder.patch_module(module)
+        logger.info("Install the null gl : %d functions" % len(GLRecorder.originals))
+
+    @staticmethod
+    def uninstall():
+        if not GLRecorder.installed:
+            return
+        for (module_name, name), value in GLRecorder.originals.items():
+            module = sys.modules.get(module_name)
+            if module is not None:
+                setattr(module, name, value)
+        GLRecorder.originals = {}
+        GLRecorder.installed = False
+
+    @staticmethod
+    def next_frame():
+        GLRecorder.total_calls.update(GLRecorder.calls)
+        GLRecorder.frame_calls = Counter(GLRecorder.calls)
+        GLRecorder.frame_records = GLRecorder.records
+        GLRecorder.calls.clear()
+        GLRecorder.records = []
+
+    @staticmethod
+    def get_frame_call_count():
+        return sum(GLRecorder.frame_calls.values())
@@ -0,0 +1,60 @@
+import numpy as np
+from OpenGL.GL import *
+
+
+class GPUTimer:
+    """
+    GL_TIMESTAMP queries of the frames. The queries of a frame are read after buffer_count frames,
+    so the cpu does not wait for the gpu.
+
+    The timestamps are recorded with glQueryCounter instead of GL_TIME_ELAPSED,
+    because GL_TIME_ELAPSED queries can not be nested.
+    """
+    buffer_count = 2
+    query_pool_size = 64
+
+    def __init__(self):
+        self.free_queries = []
+        self.frame_queries = [[] for i in range(self.buffer_count)]
+        self.frame_index = 0
+        self.result = np.zeros(1, dtype=np.int64)
+
+    def delete(self):
+        queries = self.free_queries + sum(self.frame_queries, [])
+        if queries:
+            glDeleteQueries(len(queries), queries)
+        self.free_queries = []
+        self.frame_queries = [[] for i in range(self.buffer_count)]
+
+    def get_current_timestamp(self):
+        """
+        :return: nanoseconds of the gpu clock when all the previous commands have reached the gpu.
+        """
+        glGetInteger64v(GL_TIMESTAMP, self.result)
+        return int(self.result[0])
+
+    def query_timestamp(self):
+        """
+        :return: query of the timestamp when all the previous commands are finished by the gpu.
+        """
+        if not self.free_queries:
+            self.free_queries = [int(query) for query in glGenQueries(self.query_pool_size)]
+        query = self.free_queries.pop()
+        glQueryCounter(query, GL_TIMESTAMP)
+        self.frame_queries[self.frame_index].append(query)
+        return query
+
+    def next_frame(self):
+        """
+        Move to the queries of the next frame. The queries of the oldest frame are read and reused.
+        :return: { query : nanoseconds } of the oldest frame
+        """
+        self.frame_index = (self.frame_index + 1) % self.buffer_count
+        queries = self.frame_queries[self.frame_index]
+        results = {}
+        for query in queries:
+            glGetQueryObjecti64v(query, GL_QUERY_RESULT, self.result)
+            results[query] = int(self.result[0])
+        self.free_queries.extend(queries)
+        self.frame_queries[self.frame_index] = []
+        return results
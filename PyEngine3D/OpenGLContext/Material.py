@@ -1,5 +1,4 @@
 import re
-import pickle
 import copy
 import traceback
 from collections import OrderedDict
@@ -7,6 +6,7 @@ from collections import OrderedDict
 from OpenGL.GL import *
 from OpenGL.GL.shaders import *
 from OpenGL.GL.shaders import glDeleteShader
+from OpenGL.GL.KHR.parallel_shader_compile import GL_COMPLETION_STATUS_KHR
 
 import numpy as np
 
@@ -18,7 +18,11 @@ from .UniformBuffer import CreateUniformBuffer, UniformTextureBase
 
 
 class Material:
-    def __init__(self, material_name, material_datas={}):
+    def __init__(self, material_name, material_datas={}, placeholder=None):
+        """
+        :param placeholder: If it is not None, the shaders are compiled asynchronously and the placeholder is rendered
+            until finish_compile is called. see is_compile_completed
+        """
         self.valid = False
         logger.info("Load %s material." % material_name)
 
@@ -34,24 +38,32 @@ class Material:
         self.name = material_name
         self.shader_name = material_datas.get('shader_name', '')
         self.program = -1
+        self.is_compiled_from_binary = False
+        self.placeholder = None
+        self.shaders = []  # the shaders which are being compiled. [(shader type, shader, shader code), ]
+        self.uniforms = uniforms
         self.uniform_buffers = dict()  # OrderedDict()  # Declaration order is important.
         self.Attributes = Attributes()
 
         if binary_format is not None and binary_data is not None:
             self.compile_from_binary(binary_format, binary_data)
             self.valid = self.check_validate() and self.check_linked()
-            if not self.valid:
+            if self.valid:
+                self.is_compiled_from_binary = True
+            else:
                 logger.error("%s material has been failed to compile from binary" % self.name)
+                glDeleteProgram(self.program)
+                self.program = -1
 
         self.compile_message = ""
 
         if not self.valid:
             self.compile_from_source(shader_codes)
-            self.valid = self.check_validate() and self.check_linked()
-            if not self.valid:
-                logger.error("%s material has been failed to compile from source" % self.name)
-
-        if self.valid:
+            if placeholder is not None:
+                self.placeholder = placeholder
+                return
+            self.finish_compile()
+        elif self.valid:
             self.create_uniform_buffers(uniforms)
 
     def get_attribute(self):
@@ -70,6 +82,9 @@ class Material:
 
     def delete(self):
         OpenGLContext.use_program(0)
+        for shader_type, shader, shader_code in self.shaders:
+            glDeleteShader(shader)
+        self.shaders = []
         glDeleteProgram(self.program)
         logger.info("Deleted %s material." % self.name)
 
@@ -77,6 +92,9 @@ class Material:
         OpenGLContext.use_program(self.program)
 
     def save_to_binary(self):
+        """
+        :return: binary format, binary data(bytes)
+        """
         size = GLint()
         glGetProgramiv(self.program, GL_PROGRAM_BINARY_LENGTH, size)
         # very important - check data dtype np.ubyte
@@ -84,36 +102,61 @@ class Material:
         binary_size = GLint()
         binary_format = GLenum()
         glGetProgramBinary(self.program, size.value, binary_size, binary_format, binary_data)
-        binary_data = pickle.dumps(binary_data)
-        return binary_format, binary_data
+        return binary_format.value, binary_data[:binary_size.value].tobytes()
 
     def compile_from_binary(self, binary_format, binary_data):
-        binary_data = pickle.loads(binary_data)
+        binary_data = np.frombuffer(binary_data, dtype=np.ubyte)
         self.program = glCreateProgram()
         glProgramParameteri(self.program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
-        glProgramBinary(self.program, binary_format.value, binary_data, len(binary_data))
+        glProgramBinary(self.program, binary_format, binary_data, len(binary_data))
 
     def compile_from_source(self, shader_codes: dict):
-        shaders = []
+        """
+        Submit all shaders and link the program without querying the status, so the driver can compile them in parallel.
+        """
         for shader_type in shader_codes:
             shader = self.compile(shader_type, shader_codes[shader_type])
             if shader is not None:
-                logger.info("Compile %s %s." % (self.name, shader_type))
-                shaders.append(shader)
+                self.shaders.append((shader_type, shader, shader_codes[shader_type]))
 
         self.program = glCreateProgram()
 
         # glProgramParameteri(self.program, GL_PROGRAM_SEPARABLE, GL_TRUE)
         glProgramParameteri(self.program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
 
-        for shader in shaders:
+        for shader_type, shader, shader_code in self.shaders:
             glAttachShader(self.program, shader)
 
         glLinkProgram(self.program)
 
-        for shader in shaders:
+    def is_compile_completed(self):
+        """
+        :return: False while the driver compiles the program in the background. see GL_KHR_parallel_shader_compile
+        """
+        if self.shaders and OpenGLContext.support_parallel_shader_compile:
+            status = GLint()
+            glGetProgramiv(self.program, GL_COMPLETION_STATUS_KHR, status)
+            return GL_TRUE == status.value
+        return True
+
+    def finish_compile(self):
+        """
+        Query the status of the submitted shaders and the program. This waits until the program is linked.
+        """
+        for shader_type, shader, shader_code in self.shaders:
+            if self.check_compile_status(shader_type, shader, shader_code):
+                logger.info("Compile %s %s." % (self.name, shader_type))
             glDetachShader(self.program, shader)
             glDeleteShader(shader)
+        self.shaders = []
+        self.placeholder = None
+
+        self.valid = self.check_validate() and self.check_linked()
+        if self.valid:
+            self.create_uniform_buffers(self.uniforms)
+        else:
+            logger.error("%s material has been failed to compile from source" % self.name)
+        return self.valid
 
     def create_uniform_buffers(self, uniforms):
         # create uniform buffers from source code
@@ -140,10 +183,16 @@ class Material:
             return None
 
         try:
-            # Compile shaders
             shader = glCreateShader(shaderType)
             glShaderSource(shader, shader_code)
             glCompileShader(shader)
+            return shader
+        except BaseException:
+            logger.error(traceback.format_exc())
+        return None
+
+    def check_compile_status(self, shaderType, shader, shader_code):
+        try:
             compile_status = glGetShaderiv(shader, GL_COMPILE_STATUS)
             if compile_status != 1:
                 infoLogs = glGetShaderInfoLog(shader)
@@ -173,10 +222,10 @@ class Material:
             else:
                 # complete
                 logger.log(Logger.MINOR_INFO, "Complete %s %s compile." % (self.name, shaderType.name))
-                return shader
+                return True
         except BaseException:
             logger.error(traceback.format_exc())
-        return None
+        return False
 
     def check_validate(self):
         if self.program >= 0:
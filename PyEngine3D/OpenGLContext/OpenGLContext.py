@@ -6,6 +6,7 @@ import numpy as np
 from OpenGL.GL import *
 from OpenGL.raw.GL.VERSION import GL_1_1, GL_1_2, GL_3_0
 from OpenGL.raw.GL import _types
+from OpenGL.GL.KHR.parallel_shader_compile import glMaxShaderCompilerThreadsKHR
 from OpenGL import images, arrays
 
 from PyEngine3D.Common import logger
@@ -19,9 +20,33 @@ reCheckGLExtention = re.compile("GL_(.+?)_(.+)")
 class OpenGLContext:
     last_vertex_array = -1
     last_program = 0
+    # shadow states to skip the redundant gl calls, None is unknown. see reset_state
+    last_active_texture = None
+    last_textures = {}  # { (texture unit, target) : texture buffer }
+    last_samplers = {}  # { texture unit : sampler }
+    last_enabled = {}  # { capability : enabled }
+    last_blend_equation = None
+    last_blend_func = None
+    last_depth_func = None
+    last_depth_mask = None
+    last_front_face = None
+    last_polygon_mode = None
+    last_framebuffers = {}  # { GL_READ_FRAMEBUFFER, GL_DRAW_FRAMEBUFFER : framebuffer }
+    last_viewport = None
+    samplers = {}  # { (wrap, min_filter, mag_filter) : sampler }
+    # counters of the state calls, the frame counters are updated by present.
+    issued_calls = 0
+    skipped_calls = 0
+    frame_issued_calls = 0
+    frame_skipped_calls = 0
     GL_MAX_COMPUTE_WORK_GROUP_COUNT = None
     GL_MAX_COMPUTE_WORK_GROUP_SIZE = None
     GL_MAX_COMPUTE_WORK_GROUP_INVOCATIONS = None
+    GL_SHADER_STORAGE_BUFFER_OFFSET_ALIGNMENT = 256
+    support_parallel_shader_compile = False
+    support_buffer_storage = False
+    support_read_back = True  # False if the gpu datas can not be read back, such as the null game backend.
+    streaming_buffers = []  # see StreamingBuffer
 
     @staticmethod
     def initialize():
@@ -52,7 +77,7 @@ class OpenGLContext:
                      GL_MAX_VERTEX_SHADER_STORAGE_BLOCKS, GL_MAX_FRAGMENT_SHADER_STORAGE_BLOCKS,
                      GL_MAX_GEOMETRY_SHADER_STORAGE_BLOCKS, GL_MAX_TESS_CONTROL_SHADER_STORAGE_BLOCKS,
                      GL_MAX_TESS_EVALUATION_SHADER_STORAGE_BLOCKS, GL_MAX_COMPUTE_SHADER_STORAGE_BLOCKS,
-                     GL_MAX_COMBINED_SHADER_STORAGE_BLOCKS]
+                     GL_MAX_COMBINED_SHADER_STORAGE_BLOCKS, GL_SHADER_STORAGE_BUFFER_OFFSET_ALIGNMENT]
             for info in infos:
                 logger.info("%s : %s" % (info.name, glGetIntegerv(info)))
                 # set value
@@ -69,6 +94,19 @@ class OpenGLContext:
             #   GL_MAX_COMPUTE_WORK_GROUP_INVOCATIONS.name, OpenGLContext.GL_MAX_COMPUTE_WORK_GROUP_INVOCATIONS
             # ))
 
+            # compile the shaders in the driver threads. see Material.is_compile_completed
+            extensions = [glGetStringi(GL_EXTENSIONS, i) for i in range(glGetIntegerv(GL_NUM_EXTENSIONS))]
+            if b'GL_KHR_parallel_shader_compile' in extensions:
+                glMaxShaderCompilerThreadsKHR(0xFFFFFFFF)
+                OpenGLContext.support_parallel_shader_compile = True
+            logger.info("GL_KHR_parallel_shader_compile : %s" % OpenGLContext.support_parallel_shader_compile)
+
+            # persistent mapped buffers. see StreamingBuffer
+            OpenGLContext.support_buffer_storage = bool(glBufferStorage) and \
+                (b'GL_ARB_buffer_storage' in extensions or (4, 4) <= (glGetIntegerv(GL_MAJOR_VERSION),
+                                                                    glGetIntegerv(GL_MINOR_VERSION)))
+            logger.info("GL_ARB_buffer_storage : %s" % OpenGLContext.support_buffer_storage)
+
             logger.info("=" * 30)
 
         except BaseException:
@@ -103,12 +141,42 @@ class OpenGLContext:
             return GL_DEPTH_STENCIL_ATTACHMENT
         return GL_DEPTH_ATTACHMENT
 
+    @staticmethod
+    def reset_state():
+        """
+        Forget the shadow states. Call this after the gl states are changed without OpenGLContext.
+        """
+        OpenGLContext.last_vertex_array = -1
+        OpenGLContext.last_program = -1
+        OpenGLContext.last_active_texture = None
+        OpenGLContext.last_textures = {}
+        OpenGLContext.last_samplers = {}
+        OpenGLContext.last_enabled = {}
+        OpenGLContext.last_blend_equation = None
+        OpenGLContext.last_blend_func = None
+        OpenGLContext.last_depth_func = None
+        OpenGLContext.last_depth_mask = None
+        OpenGLContext.last_front_face = None
+        OpenGLContext.last_polygon_mode = None
+        OpenGLContext.last_framebuffers = {}
+        OpenGLContext.last_viewport = None
+
+    @staticmethod
+    def count_call(issued):
+        if issued:
+            OpenGLContext.issued_calls += 1
+        else:
+            OpenGLContext.skipped_calls += 1
+        return issued
+
     @staticmethod
     def use_program(program):
         if program != OpenGLContext.last_program:
             OpenGLContext.last_program = program
             glUseProgram(program)
+            OpenGLContext.issued_calls += 1
             return True
+        OpenGLContext.skipped_calls += 1
         return False
 
     @staticmethod
@@ -116,7 +184,204 @@ class OpenGLContext:
         if vertex_array != OpenGLContext.last_vertex_array:
             OpenGLContext.last_vertex_array = vertex_array
             glBindVertexArray(vertex_array)
+            OpenGLContext.issued_calls += 1
+            return True
+        OpenGLContext.skipped_calls += 1
+        return False
+
+    @staticmethod
+    def active_texture(texture_unit):
+        if texture_unit != OpenGLContext.last_active_texture:
+            OpenGLContext.last_active_texture = texture_unit
+            glActiveTexture(GL_TEXTURE0 + texture_unit)
+            OpenGLContext.issued_calls += 1
+            return True
+        OpenGLContext.skipped_calls += 1
+        return False
+
+    @staticmethod
+    def bind_texture(target, texture, texture_unit=None):
+        """
+        :param texture_unit: If it is None, the texture is bound to the active texture unit.
+        """
+        if texture_unit is None:
+            texture_unit = OpenGLContext.last_active_texture
+        key = (texture_unit, target)
+        if texture_unit is None or texture != OpenGLContext.last_textures.get(key):
+            if texture_unit is not None:
+                OpenGLContext.active_texture(texture_unit)
+            OpenGLContext.last_textures[key] = texture
+            glBindTexture(target, texture)
+            OpenGLContext.issued_calls += 1
+            return True
+        OpenGLContext.skipped_calls += 1
+        return False
+
+    @staticmethod
+    def delete_texture(texture):
+        # the deleted texture is unbound and the name can be reused.
+        for key, bound_texture in OpenGLContext.last_textures.items():
+            if texture == bound_texture:
+                OpenGLContext.last_textures[key] = 0
+        glDeleteTextures([texture, ])
+
+    @staticmethod
+    def get_sampler(wrap, min_filter, mag_filter):
+        """
+        :return: the cached sampler object to override the parameters of the textures without glTexParameter.
+        """
+        key = (wrap, min_filter, mag_filter)
+        sampler = OpenGLContext.samplers.get(key)
+        if sampler is None:
+            sampler = glGenSamplers(1)
+            glSamplerParameteri(sampler, GL_TEXTURE_WRAP_S, wrap)
+            glSamplerParameteri(sampler, GL_TEXTURE_WRAP_T, wrap)
+            glSamplerParameteri(sampler, GL_TEXTURE_WRAP_R, wrap)
+            glSamplerParameteri(sampler, GL_TEXTURE_MIN_FILTER, min_filter)
+            glSamplerParameteri(sampler, GL_TEXTURE_MAG_FILTER, mag_filter)
+            OpenGLContext.samplers[key] = sampler
+        return sampler
+
+    @staticmethod
+    def bind_sampler(texture_unit, sampler):
+        if sampler != OpenGLContext.last_samplers.get(texture_unit, 0):
+            OpenGLContext.last_samplers[texture_unit] = sampler
+            glBindSampler(texture_unit, sampler)
+            OpenGLContext.issued_calls += 1
+            return True
+        OpenGLContext.skipped_calls += 1
+        return False
+
+    @staticmethod
+    def set_enable(capability, enable):
+        if enable != OpenGLContext.last_enabled.get(capability):
+            OpenGLContext.last_enabled[capability] = enable
+            if enable:
+                glEnable(capability)
+            else:
+                glDisable(capability)
+            OpenGLContext.issued_calls += 1
+            return True
+        OpenGLContext.skipped_calls += 1
+        return False
+
+    @staticmethod
+    def set_enablei(capability, index, enable):
+        # the indexed state is not tracked, so the state of the capability becomes unknown.
+        OpenGLContext.last_enabled[capability] = None
+        if enable:
+            glEnablei(capability, index)
+        else:
+            glDisablei(capability, index)
+        OpenGLContext.issued_calls += 1
+
+    @staticmethod
+    def set_blend_state(blend_enable=True, equation=GL_FUNC_ADD, func_src=GL_SRC_ALPHA,
+                        func_dst=GL_ONE_MINUS_SRC_ALPHA):
+        OpenGLContext.set_enable(GL_BLEND, blend_enable)
+        if blend_enable:
+            OpenGLContext.set_blend_equation(equation)
+            OpenGLContext.set_blend_func(func_src, func_dst)
+
+    @staticmethod
+    def set_blend_equation(equation):
+        if equation != OpenGLContext.last_blend_equation:
+            OpenGLContext.last_blend_equation = equation
+            glBlendEquation(equation)
+            OpenGLContext.issued_calls += 1
+            return True
+        OpenGLContext.skipped_calls += 1
+        return False
+
+    @staticmethod
+    def set_blend_func(func_src, func_dst):
+        blend_func = (func_src, func_dst)
+        if blend_func != OpenGLContext.last_blend_func:
+            OpenGLContext.last_blend_func = blend_func
+            glBlendFunc(func_src, func_dst)
+            OpenGLContext.issued_calls += 1
+            return True
+        OpenGLContext.skipped_calls += 1
+        return False
+
+    @staticmethod
+    def set_depth_func(depth_func):
+        if depth_func != OpenGLContext.last_depth_func:
+            OpenGLContext.last_depth_func = depth_func
+            glDepthFunc(depth_func)
+            OpenGLContext.issued_calls += 1
+            return True
+        OpenGLContext.skipped_calls += 1
+        return False
+
+    @staticmethod
+    def set_depth_mask(depth_mask):
+        if depth_mask != OpenGLContext.last_depth_mask:
+            OpenGLContext.last_depth_mask = depth_mask
+            glDepthMask(depth_mask)
+            OpenGLContext.issued_calls += 1
+            return True
+        OpenGLContext.skipped_calls += 1
+        return False
+
+    @staticmethod
+    def set_front_face(front_face):
+        if front_face != OpenGLContext.last_front_face:
+            OpenGLContext.last_front_face = front_face
+            glFrontFace(front_face)
+            OpenGLContext.issued_calls += 1
             return True
+        OpenGLContext.skipped_calls += 1
+        return False
+
+    @staticmethod
+    def set_polygon_mode(polygon_mode):
+        if polygon_mode != OpenGLContext.last_polygon_mode:
+            OpenGLContext.last_polygon_mode = polygon_mode
+            glPolygonMode(GL_FRONT_AND_BACK, polygon_mode)
+            OpenGLContext.issued_calls += 1
+            return True
+        OpenGLContext.skipped_calls += 1
+        return False
+
+    @staticmethod
+    def bind_framebuffer(target, framebuffer):
+        """
+        :param target: GL_FRAMEBUFFER binds both of GL_READ_FRAMEBUFFER and GL_DRAW_FRAMEBUFFER.
+        """
+        last_framebuffers = OpenGLContext.last_framebuffers
+        if GL_FRAMEBUFFER == target:
+            if framebuffer == last_framebuffers.get(GL_READ_FRAMEBUFFER) and \
+                    framebuffer == last_framebuffers.get(GL_DRAW_FRAMEBUFFER):
+                OpenGLContext.skipped_calls += 1
+                return False
+            last_framebuffers[GL_READ_FRAMEBUFFER] = framebuffer
+            last_framebuffers[GL_DRAW_FRAMEBUFFER] = framebuffer
+        elif framebuffer == last_framebuffers.get(target):
+            OpenGLContext.skipped_calls += 1
+            return False
+        else:
+            last_framebuffers[target] = framebuffer
+        glBindFramebuffer(target, framebuffer)
+        OpenGLContext.issued_calls += 1
+        return True
+
+    @staticmethod
+    def delete_framebuffer(framebuffer):
+        for target, bound_framebuffer in OpenGLContext.last_framebuffers.items():
+            if framebuffer == bound_framebuffer:
+                OpenGLContext.last_framebuffers[target] = 0
+        glDeleteFramebuffers(1, [framebuffer, ])
+
+    @staticmethod
+    def set_viewport(x, y, width, height):
+        viewport = (x, y, width, height)
+        if viewport != OpenGLContext.last_viewport:
+            OpenGLContext.last_viewport = viewport
+            glViewport(x, y, width, height)
+            OpenGLContext.issued_calls += 1
+            return True
+        OpenGLContext.skipped_calls += 1
         return False
 
     @staticmethod
@@ -125,6 +390,20 @@ class OpenGLContext:
         OpenGLContext.last_vertex_array = -1
         glFlush()
 
+        for streaming_buffer in OpenGLContext.streaming_buffers:
+            streaming_buffer.next_frame()
+
+        OpenGLContext.frame_issued_calls = OpenGLContext.issued_calls
+        OpenGLContext.frame_skipped_calls = OpenGLContext.skipped_calls
+        OpenGLContext.issued_calls = 0
+        OpenGLContext.skipped_calls = 0
+
+    @staticmethod
+    def delete_streaming_buffers():
+        # the buffers are deleted while the context is alive. ex) the instance buffer, the draw data buffer
+        for streaming_buffer in OpenGLContext.streaming_buffers:
+            streaming_buffer.delete()
+
     @staticmethod
     def _get_texture_level_dims(target, level):
         dim = _types.GLuint()
@@ -50,6 +50,120 @@ class ShaderCompileMessage:
 
 default_compile_option = [ShaderCompileOption.USE_GLOBAL_TEXTURE_FUNCTION, ]
 
+# preprocessor caches
+include_tokens_cache = dict()  # { include file : (modify time, tokens) }
+macro_variables_cache = dict()  # { macro expression : sorted variables }
+macro_result_cache = dict()  # { (macro expression, macro values) : result }
+compiled_expression_cache = dict()  # { python expression : code object }
+
+
+def tokenize_shader_line(code):
+    """
+    :return: (code, macro type, macro expression, version code, include file name)
+    """
+    # remove comment
+    if "//" in code:
+        code = code.split("//")[0]
+
+    macro = expression = version_code = include_name = None
+    m = re.search(reMacroStart, code)
+    if m is not None:
+        macro, expression = m.groups()
+        expression = expression.strip()
+
+    m = re.search(reVersion, code)
+    if m is not None:
+        version_code = m.groups()[0].strip()
+
+    m = re.search(reInclude, code)
+    if m is not None:
+        include_name = m.groups()[0]
+    return code, macro, expression, version_code, include_name
+
+
+def tokenize_shader_code(shader_code):
+    # remove comment block
+    shader_code = re.sub(reComment, "", shader_code)
+    return [tokenize_shader_line(code) for code in shader_code.splitlines()]
+
+
+def get_modify_time(filepath):
+    return os.path.getmtime(filepath) if os.path.exists(filepath) else None
+
+
+def get_include_tokens(include_file):
+    """
+    Tokenize the include file once until it is modified.
+    :return: tokens wrapped with the include guard, None if the file cannot be read.
+    """
+    modify_time = get_modify_time(include_file)
+    if modify_time is None:
+        return None
+
+    cache_data = include_tokens_cache.get(include_file)
+    if cache_data is not None and modify_time == cache_data[0]:
+        return cache_data[1]
+
+    try:
+        f = codecs.open(include_file, mode='r', encoding='utf-8')
+        include_source = f.read()
+        f.close()
+    except BaseException:
+        logger.error(traceback.format_exc())
+        return None
+
+    unique_id = "UUID_" + str(uuid.uuid3(uuid.NAMESPACE_DNS, include_file)).replace("-", "_")
+    include_tokens = [tokenize_shader_line("#ifndef %s" % unique_id), tokenize_shader_line("#define %s" % unique_id)]
+    include_tokens.extend(tokenize_shader_code(include_source))
+    include_tokens.append(tokenize_shader_line("#endif /* %s */" % unique_id))
+    include_tokens_cache[include_file] = (modify_time, include_tokens)
+    return include_tokens
+
+
+def evaluate_macro_expression(expression, macros):
+    variables = macro_variables_cache.get(expression)
+    if variables is None:
+        variables = re.findall(reVariable, expression)
+        variables.sort(key=lambda x: len(x), reverse=True)
+        macro_variables_cache[expression] = variables
+
+    macro_values = []
+    for variable in variables:
+        if variable in macros:
+            while True:
+                final_value = macros[variable]
+                if final_value not in macros:
+                    break
+                variable = final_value
+            macro_values.append(str(final_value))
+
+    macro_values = tuple(macro_values)
+    result = macro_result_cache.get((expression, macro_values))
+    if result is None:
+        final_expression = expression
+        for macro_value in macro_values:
+            final_expression = re.sub(reVariable, macro_value, final_expression, 1)
+        final_expression = final_expression.replace('&&', ' and ')
+        final_expression = final_expression.replace('||', ' or ')
+        # Important : To avoid errors, convert the undecalred variables to zero.
+        final_expression = re.sub(reVariable, '0', final_expression)
+
+        compiled_expression = compiled_expression_cache.get(final_expression)
+        if compiled_expression is None:
+            compiled_expression = compile(final_expression, '<macro>', 'eval')
+            compiled_expression_cache[final_expression] = compiled_expression
+
+        result = True if eval(compiled_expression, {'__builtins__': {}}) else False
+        macro_result_cache[(expression, macro_values)] = result
+    return result
+
+
+def clear_shader_caches():
+    include_tokens_cache.clear()
+    macro_variables_cache.clear()
+    macro_result_cache.clear()
+    compiled_expression_cache.clear()
+
 
 def parsing_macros(shader_code_list):
     shader_macros = []
@@ -158,6 +272,8 @@ class Shader:
         self.shader_code = shader_code
         self.include_files = []
         self.attribute = Attributes()
+        self.code_tokens = None
+        self.final_code_cache = {}  # { (shader type, version, compile option, macros) : (include files, final code) }
 
     def get_save_data(self):
         return self.shader_code
@@ -180,9 +296,20 @@ class Shader:
         if self.shader_code == "" or self.shader_code is None:
             return ""
 
-        # remove comment block
-        shader_code = re.sub(reComment, "", self.shader_code)
-        code_lines = shader_code.splitlines()
+        # external macro
+        if external_macros is None:
+            external_macros = {}
+
+        # reuse the final code if the include files are not modified.
+        cache_key = (shader_type_name, shader_version, tuple(compile_option), tuple(external_macros.items()))
+        cache_data = self.final_code_cache.get(cache_key)
+        if cache_data is not None:
+            include_modify_times, final_code = cache_data
+            if all(get_modify_time(include_file) == modify_time for include_file, modify_time in include_modify_times):
+                return final_code
+
+        if self.code_tokens is None:
+            self.code_tokens = tokenize_shader_code(self.shader_code)
 
         # combine macro
         combined_macros = OrderedDict()
@@ -192,12 +319,8 @@ class Shader:
         # shader type macro
         combined_macros[shader_type_name] = "1"
 
-        # external macro
-        if external_macros is None:
-            external_macros = {}
-
         for macro in external_macros:
-            if external_macros[macro] is None or external_macros[macro] is '':
+            if external_macros[macro] is None or external_macros[macro] == '':
                 combined_macros[macro] = 0
             else:
                 combined_macros[macro] = external_macros[macro]
@@ -223,28 +346,25 @@ class Shader:
             final_code_lines.append("#endif")
 
         # insert version as comment
-        include_files = dict()  # { 'filename': uuid }
+        include_files = dict()  # { 'filename': modify time }
         resource_manager = CoreManager.instance().resource_manager
         shader_file_dir = resource_manager.shader_loader.resource_path
 
         # do parsing
-        line_num = 0
         macro_depth = 0
         macro_result = [True, ]
         macro_code_remove = True
-        while line_num < len(code_lines):
-            code = code_lines[line_num]
-            line_num += 1
+        token_iterators = [iter(self.code_tokens), ]
+        while token_iterators:
+            token = next(token_iterators[-1], None)
+            if token is None:
+                token_iterators.pop()
+                continue
 
-            # remove comment
-            if "//" in code:
-                code = code.split("//")[0]
+            code, macro, expression, version_code, include_name = token
 
             # macro parsing
-            m = re.search(reMacroStart, code)
-            if m is not None:
-                macro, expression = m.groups()
-                expression = expression.strip()
+            if macro is not None:
                 if macro == 'define' or macro == 'undef':
                     define_expression = expression.split('(')[0].strip()
                     if ' ' in define_expression:
@@ -262,33 +382,12 @@ class Shader:
                         combined_macros.pop(define_name)
                 elif macro == 'ifdef':
                     macro_depth += 1
-                    if expression in combined_macros:
-                        macro_result.append(True)
-                    else:
-                        macro_result.append(False)
+                    macro_result.append(expression in combined_macros)
                 elif macro == 'ifndef':
                     macro_depth += 1
-                    if expression not in combined_macros:
-                        macro_result.append(True)
-                    else:
-                        macro_result.append(False)
+                    macro_result.append(expression not in combined_macros)
                 elif macro == 'if' or macro == 'elif' and not macro_result[macro_depth]:
-                    variables = re.findall(reVariable, expression)
-                    variables.sort(key=lambda x: len(x), reverse=True)
-                    for variable in variables:
-                        if variable in combined_macros:
-                            while True:
-                                final_value = combined_macros[variable]
-                                if final_value not in combined_macros:
-                                    break
-                                variable = final_value
-                            expression = re.sub(reVariable, str(final_value), expression, 1)
-                    expression = expression.replace('&&', ' and ')
-                    expression = expression.replace('||', ' or ')
-                    # expression = re.sub('\!?!\=', 'not ', expression)
-                    # Important : To avoid errors, convert the undecalred variables to zero.
-                    expression = re.sub(reVariable, '0', expression)
-                    result = True if eval(expression) else False
+                    result = evaluate_macro_expression(expression, combined_macros)
                     if macro == 'if':
                         macro_depth += 1
                         macro_result.append(result)
@@ -307,53 +406,31 @@ class Shader:
                 continue
 
             # is version code?
-            m = re.search(reVersion, code)
-            if m is not None:
-                version_code = m.groups()[0].strip()
+            if version_code is not None:
                 if final_code_lines[0] == "" or version_code > final_code_lines[0]:
                     final_code_lines[0] = version_code
                 continue
 
             # find include block
-            m = re.search(reInclude, code)
-            if m is not None:
-                valid = False
-                include_file = os.path.join(shader_file_dir, m.groups()[0])
-
-                # insert include code
-                if os.path.exists(include_file):
-                    try:
-                        f = codecs.open(include_file, mode='r', encoding='utf-8')
-                        include_source = f.read()
-                        # remove comment block
-                        include_source = re.sub(reComment, "", include_source)
-                        include_code_lines = include_source.splitlines()
-                        f.close()
-                        valid = True
-                    except BaseException:
-                        logger.error(traceback.format_exc())
-
-                    if valid:
-                        if include_file in include_files:
-                            unique_id = include_files[include_file]
-                        else:
-                            unique_id = "UUID_" + str(uuid.uuid3(uuid.NAMESPACE_DNS, include_file)).replace("-", "_")
-                            include_files[include_file] = unique_id
-
-                            if include_file not in self.include_files:
-                                self.include_files.append(include_file)
-                        # insert included code
-                        final_code_lines.append("//------------ INCLUDE -------------//")
-                        final_code_lines.append("// " + code)  # include comment
-                        include_code_lines.insert(0, "#ifndef %s" % unique_id)
-                        include_code_lines.insert(1, "#define %s" % unique_id)
-                        include_code_lines.append("#endif /* %s */" % unique_id)
-                        code_lines = include_code_lines + code_lines[line_num:]
-                        line_num = 0
-
-                if not valid:
+            if include_name is not None:
+                include_file = os.path.join(shader_file_dir, include_name)
+                include_tokens = get_include_tokens(include_file)
+                if include_file not in include_files:
+                    include_files[include_file] = get_modify_time(include_file)
+
+                if include_tokens is not None:
+                    if include_file not in self.include_files:
+                        self.include_files.append(include_file)
+                    # insert included code
+                    final_code_lines.append("//------------ INCLUDE -------------//")
+                    final_code_lines.append("// " + code)  # include comment
+                    token_iterators.append(iter(include_tokens))
+                else:
                     logger.error("Shader parsing error.\n\t--> Cannot open %s file." % include_file)
                 continue
             # append code block
             final_code_lines.append(code)
-        return '\n'.join(final_code_lines)
+
+        final_code = '\n'.join(final_code_lines)
+        self.final_code_cache[cache_key] = (tuple(include_files.items()), final_code)
+        return final_code
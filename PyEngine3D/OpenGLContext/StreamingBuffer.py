@@ -0,0 +1,195 @@
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+from PyEngine3D.Common import logger
+from .OpenGLContext import OpenGLContext
+
+
+class StreamingBuffer:
+    """
+    Ring buffer for the data which is uploaded every frame, such as the instance data.
+
+    The buffer is divided into the regions of frame_count frames and the data of a frame is sub-allocated in its region.
+    If glBufferStorage is supported, the buffer is persistently mapped and a region is reused after the fence of the
+    frame which used it is signaled. Otherwise the buffer is orphaned when the ring wraps around.
+
+    The buffer which is replaced by resize is kept alive until the gpu has finished it,
+    so the ranges which are bound in the current pass stay valid.
+    """
+    frame_count = 3
+
+    def __init__(self, name, target=GL_ARRAY_BUFFER, frame_size=4 * 1024 * 1024, alignment=16):
+        """
+        :param alignment: byte alignment of the sub-allocations, such as GL_SHADER_STORAGE_BUFFER_OFFSET_ALIGNMENT.
+        """
+        self.name = name
+        self.target = target
+        self.frame_size = frame_size
+        self.alignment = alignment
+        self.buffer = -1
+        self.use_persistent_map = False
+        self.mapped_data = None
+        self.fences = [None, ] * self.frame_count
+        self.retired_buffers = []  # [[buffer, fence], ] the buffers replaced by resize, see next_frame
+        self.frame_index = 0
+        self.offset = 0
+        # bytes uploaded in the current frame and the last frame
+        self.uploaded_bytes = 0
+        self.frame_uploaded_bytes = 0
+        OpenGLContext.streaming_buffers.append(self)
+
+    def create_buffer(self):
+        self.buffer = glGenBuffers(1)
+        buffer_size = self.frame_size * self.frame_count
+        glBindBuffer(self.target, self.buffer)
+
+        self.use_persistent_map = OpenGLContext.support_buffer_storage
+        if self.use_persistent_map:
+            flags = GL_MAP_WRITE_BIT | GL_MAP_PERSISTENT_BIT | GL_MAP_COHERENT_BIT
+            glBufferStorage(self.target, buffer_size, None, flags)
+            address = glMapBufferRange(self.target, 0, buffer_size, flags)
+            if address:
+                self.mapped_data = np.frombuffer((ctypes.c_ubyte * buffer_size).from_address(address), dtype=np.uint8)
+            else:
+                logger.error("%s failed to map the buffer persistently." % self.name)
+                glDeleteBuffers(1, [self.buffer, ])
+                self.buffer = glGenBuffers(1)
+                glBindBuffer(self.target, self.buffer)
+                self.use_persistent_map = False
+
+        if not self.use_persistent_map:
+            glBufferData(self.target, buffer_size, None, GL_STREAM_DRAW)
+
+        logger.info("Create %s streaming buffer : %d bytes x %d frames, persistent map : %s" % (
+            self.name, self.frame_size, self.frame_count, self.use_persistent_map))
+
+    def delete_fences(self):
+        for i, fence in enumerate(self.fences):
+            if fence is not None:
+                glDeleteSync(fence)
+                self.fences[i] = None
+
+    def delete_retired_buffers(self, wait=False):
+        retired_buffers = []
+        for buffer, fence in self.retired_buffers:
+            if fence is not None and not wait and GL_TIMEOUT_EXPIRED == glClientWaitSync(fence, 0, 0):
+                retired_buffers.append([buffer, fence])
+                continue
+            if fence is not None:
+                glDeleteSync(fence)
+            # the mapped buffer is unmapped by glDeleteBuffers.
+            glDeleteBuffers(1, [buffer, ])
+        self.retired_buffers = retired_buffers
+
+    def delete(self):
+        self.delete_fences()
+        self.delete_retired_buffers(wait=True)
+
+        if self.buffer != -1:
+            if self.mapped_data is not None:
+                glBindBuffer(self.target, self.buffer)
+                glUnmapBuffer(self.target)
+                self.mapped_data = None
+            glDeleteBuffers(1, [self.buffer, ])
+            self.buffer = -1
+
+    def resize(self, data_size):
+        frame_size = self.frame_size
+        while frame_size < data_size:
+            frame_size *= 2
+        logger.info("Resize %s streaming buffer : %d bytes" % (self.name, frame_size))
+
+        # deleting the buffer would reset the bindings of the ranges uploaded in this frame.
+        # the old buffer is deleted after the fence of this frame is signaled, see next_frame.
+        self.delete_fences()
+        if self.buffer != -1:
+            self.retired_buffers.append([self.buffer, None])
+            self.buffer = -1
+            self.mapped_data = None
+        self.frame_size = frame_size
+        self.frame_index = 0
+        self.offset = 0
+        self.create_buffer()
+
+    def next_frame(self):
+        """
+        Move to the region of the next frame. This is called by OpenGLContext.present.
+        """
+        self.frame_uploaded_bytes = self.uploaded_bytes
+        self.uploaded_bytes = 0
+
+        for retired_buffer in self.retired_buffers:
+            if retired_buffer[1] is None:
+                retired_buffer[1] = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        self.delete_retired_buffers()
+
+        if self.buffer == -1:
+            return
+
+        if self.use_persistent_map:
+            self.fences[self.frame_index] = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+
+        self.frame_index = (self.frame_index + 1) % self.frame_count
+        self.offset = 0
+
+        if self.use_persistent_map:
+            # wait until the gpu has finished reading the region, it has been the frames before.
+            fence = self.fences[self.frame_index]
+            if fence is not None:
+                glClientWaitSync(fence, GL_SYNC_FLUSH_COMMANDS_BIT, 1000000000)
+                glDeleteSync(fence)
+                self.fences[self.frame_index] = None
+        elif 0 == self.frame_index:
+            # orphaning
+            glBindBuffer(self.target, self.buffer)
+            glBufferData(self.target, self.frame_size * self.frame_count, None, GL_STREAM_DRAW)
+
+    def upload(self, datas):
+        """
+        Sub-allocate the datas contiguously in the region of the current frame and bind the buffer.
+        :return: byte offset of the first data in the buffer
+        """
+        return self.upload_datas(datas, [data.nbytes for data in datas])[0]
+
+    def upload_ranges(self, datas):
+        """
+        Sub-allocate the datas in the region of the current frame, each data starts at the alignment boundary.
+        :return: byte offsets of the datas in the buffer, see bind_buffer_range
+        """
+        return self.upload_datas(datas, [self.align(data.nbytes) for data in datas])
+
+    def align(self, size):
+        return (size + self.alignment - 1) // self.alignment * self.alignment
+
+    def upload_datas(self, datas, strides):
+        data_size = sum(strides)
+        if self.buffer == -1:
+            self.create_buffer()
+
+        if self.frame_size < self.offset + data_size:
+            # the region of this frame is full, so grow the buffer.
+            self.resize(self.offset + data_size)
+
+        data_offset = self.frame_size * self.frame_index + self.offset
+        self.offset += self.align(data_size)
+        self.uploaded_bytes += data_size
+
+        glBindBuffer(self.target, self.buffer)
+        offsets = []
+        for data, stride in zip(datas, strides):
+            if self.use_persistent_map:
+                self.mapped_data[data_offset:data_offset + data.nbytes] = \
+                    np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+            else:
+                glBufferSubData(self.target, data_offset, data.nbytes, data)
+            offsets.append(data_offset)
+            data_offset += stride
+        return offsets
+
+    def bind_buffer_range(self, binding, offset, size):
+        """
+        Bind the sub-allocated range which is returned by upload to the indexed binding point of the target.
+        """
+        glBindBufferRange(self.target, binding, self.buffer, offset, size)
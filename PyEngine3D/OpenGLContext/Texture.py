@@ -191,7 +191,7 @@ class Texture:
 
     def delete(self):
         logger.info("Delete %s : %s" % (GetClassName(self), self.name))
-        glDeleteTextures([self.buffer, ])
+        OpenGLContext.delete_texture(self.buffer)
         self.buffer = -1
 
     def get_texture_info(self):
@@ -226,23 +226,23 @@ class Texture:
         dtype = get_numpy_dtype(self.data_type)
 
         try:
-            glBindTexture(self.target, self.buffer)
+            OpenGLContext.bind_texture(self.target, self.buffer)
             data = OpenGLContext.glGetTexImage(self.target, 0, self.texture_format, self.data_type)
             # convert to numpy array
             if type(data) is bytes:
-                data = np.fromstring(data, dtype=dtype)
+                data = np.frombuffer(data, dtype=dtype)
             else:
                 data = np.array(data, dtype=dtype)
-            glBindTexture(self.target, 0)
+            OpenGLContext.bind_texture(self.target, 0)
             return data
         except:
             logger.error(traceback.format_exc())
             logger.error('%s failed to get image data.' % self.name)
             logger.info('Try to glReadPixels.')
 
-        glBindTexture(self.target, self.buffer)
+        OpenGLContext.bind_texture(self.target, self.buffer)
         fb = glGenFramebuffers(1)
-        glBindFramebuffer(GL_FRAMEBUFFER, fb)
+        OpenGLContext.bind_framebuffer(GL_FRAMEBUFFER, fb)
 
         data = []
         for layer in range(self.depth):
@@ -256,12 +256,12 @@ class Texture:
             pixels = glReadPixels(0, 0, self.width, self.height, self.texture_format, self.data_type)
             # convert to numpy array
             if type(pixels) is bytes:
-                pixels = np.fromstring(pixels, dtype=dtype)
+                pixels = np.frombuffer(pixels, dtype=dtype)
             data.append(pixels)
         data = np.array(data, dtype=dtype)
-        glBindTexture(self.target, 0)
-        glBindFramebuffer(GL_FRAMEBUFFER, 0)
-        glDeleteFramebuffers(1, [fb, ])
+        OpenGLContext.bind_texture(self.target, 0)
+        OpenGLContext.bind_framebuffer(GL_FRAMEBUFFER, 0)
+        OpenGLContext.delete_framebuffer(fb)
         return data
 
     def get_mipmap_count(self):
@@ -270,7 +270,7 @@ class Texture:
 
     def generate_mipmap(self):
         if self.enable_mipmap:
-            glBindTexture(self.target, self.buffer)
+            OpenGLContext.bind_texture(self.target, self.buffer)
             glGenerateMipmap(self.target)
         else:
             logger.warn('%s disable to generate mipmap.' % self.name)
@@ -280,14 +280,23 @@ class Texture:
         glTexParameteri(self.target, GL_TEXTURE_WRAP_T, wrap)
         glTexParameteri(self.target, GL_TEXTURE_WRAP_R, wrap)
 
-    def bind_texture(self, wrap=None):
+    def bind_texture(self, wrap=None, texture_unit=None):
+        """
+        :param wrap: If the texture unit is given, the wrap is overridden by the sampler instead of glTexParameter.
+        """
         if self.buffer == -1:
             logger.warn("%s texture is invalid." % self.name)
             return
 
-        glBindTexture(self.target, self.buffer)
+        OpenGLContext.bind_texture(self.target, self.buffer, texture_unit)
 
-        if wrap is not None:
+        if texture_unit is not None:
+            if wrap is None:
+                OpenGLContext.bind_sampler(texture_unit, 0)
+            else:
+                OpenGLContext.bind_sampler(texture_unit, OpenGLContext.get_sampler(wrap, self.min_filter,
+                                                                                   self.mag_filter))
+        elif wrap is not None:
             self.texure_wrap(wrap)
 
     def bind_image(self, image_unit, level=0, access=GL_READ_WRITE):
@@ -327,11 +336,11 @@ class Texture:
             setattr(self, attribute_name, eval(attribute_value))
 
         if 'wrap' in attribute_name:
-            glBindTexture(self.target, self.buffer)
+            OpenGLContext.bind_texture(self.target, self.buffer)
             glTexParameteri(self.target, GL_TEXTURE_WRAP_S, self.wrap_s or self.wrap)
             glTexParameteri(self.target, GL_TEXTURE_WRAP_T, self.wrap_t or self.wrap)
             glTexParameteri(self.target, GL_TEXTURE_WRAP_R, self.wrap_r or self.wrap)
-            glBindTexture(self.target, 0)
+            OpenGLContext.bind_texture(self.target, 0)
 
         return self.attribute
 
@@ -345,7 +354,7 @@ class Texture2D(Texture):
         data = texture_data.get('data')
 
         self.buffer = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, self.buffer)
+        OpenGLContext.bind_texture(GL_TEXTURE_2D, self.buffer)
 
         if self.use_glTexStorage:
             glTexStorage2D(GL_TEXTURE_2D,
@@ -383,7 +392,7 @@ class Texture2D(Texture):
         if self.clear_color is not None:
             glClearTexImage(self.buffer, 0, self.texture_format, self.data_type, self.clear_color)
 
-        glBindTexture(GL_TEXTURE_2D, 0)
+        OpenGLContext.bind_texture(GL_TEXTURE_2D, 0)
 
 
 class Texture2DArray(Texture):
@@ -395,7 +404,7 @@ class Texture2DArray(Texture):
         data = texture_data.get('data')
 
         self.buffer = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D_ARRAY, self.buffer)
+        OpenGLContext.bind_texture(GL_TEXTURE_2D_ARRAY, self.buffer)
 
         if self.use_glTexStorage:
             glTexStorage3D(GL_TEXTURE_2D_ARRAY,
@@ -429,7 +438,7 @@ class Texture2DArray(Texture):
         glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_T, self.wrap_t or self.wrap)
         glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MIN_FILTER, self.min_filter)
         glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, self.mag_filter)
-        glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+        OpenGLContext.bind_texture(GL_TEXTURE_2D_ARRAY, 0)
 
 
 class Texture3D(Texture):
@@ -441,7 +450,7 @@ class Texture3D(Texture):
         data = texture_data.get('data')
 
         self.buffer = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_3D, self.buffer)
+        OpenGLContext.bind_texture(GL_TEXTURE_3D, self.buffer)
 
         if self.use_glTexStorage:
             glTexStorage3D(GL_TEXTURE_3D,
@@ -476,7 +485,7 @@ class Texture3D(Texture):
         glTexParameteri(GL_TEXTURE_3D, GL_TEXTURE_WRAP_R, self.wrap_r or self.wrap)
         glTexParameteri(GL_TEXTURE_3D, GL_TEXTURE_MIN_FILTER, self.min_filter)
         glTexParameteri(GL_TEXTURE_3D, GL_TEXTURE_MAG_FILTER, self.mag_filter)
-        glBindTexture(GL_TEXTURE_3D, 0)
+        OpenGLContext.bind_texture(GL_TEXTURE_3D, 0)
 
 
 class Texture2DMultiSample(Texture):
@@ -489,7 +498,7 @@ class Texture2DMultiSample(Texture):
         self.multisample_count = multisample_count - (multisample_count % 4)
 
         self.buffer = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D_MULTISAMPLE, self.buffer)
+        OpenGLContext.bind_texture(GL_TEXTURE_2D_MULTISAMPLE, self.buffer)
 
         if self.use_glTexStorage:
             glTexStorage2DMultisample(GL_TEXTURE_2D_MULTISAMPLE,
@@ -506,7 +515,7 @@ class Texture2DMultiSample(Texture):
                                     self.height,
                                     GL_TRUE)
 
-        glBindTexture(GL_TEXTURE_2D_MULTISAMPLE, 0)
+        OpenGLContext.bind_texture(GL_TEXTURE_2D_MULTISAMPLE, 0)
 
 
 class TextureCube(Texture):
@@ -545,7 +554,7 @@ class TextureCube(Texture):
             'texture_negative_z', CreateTexture(name=self.name + "_back", **face_texture_datas))
 
         self.buffer = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_CUBE_MAP, self.buffer)
+        OpenGLContext.bind_texture(GL_TEXTURE_CUBE_MAP, self.buffer)
 
         if self.use_glTexStorage:
             glTexStorage2D(GL_TEXTURE_CUBE_MAP, self.get_mipmap_count(), self.internal_format, self.width, self.height)
@@ -571,7 +580,7 @@ class TextureCube(Texture):
         glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_R, self.wrap_r or self.wrap)
         glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MIN_FILTER, self.min_filter)
         glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MAG_FILTER, self.mag_filter)
-        glBindTexture(GL_TEXTURE_CUBE_MAP, 0)
+        OpenGLContext.bind_texture(GL_TEXTURE_CUBE_MAP, 0)
 
     @staticmethod
     def createTexImage2D(target_face, texture):
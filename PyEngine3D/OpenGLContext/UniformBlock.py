@@ -4,6 +4,7 @@ import numpy as np
 from OpenGL.GL import *
 
 from PyEngine3D.Common import logger
+from .OpenGLContext import OpenGLContext
 
 
 class UniformBlock:
@@ -16,6 +17,8 @@ class UniformBlock:
         glUniformBlockBinding(program, self.buffer_index, binding)
 
         self.buffer = glGenBuffers(1)
+        # the uploaded data, the upload is skipped if the data is not changed.
+        self.last_data = None
         self.bind_uniform_block(data)
 
     def delete(self):
@@ -25,6 +28,11 @@ class UniformBlock:
         if data.nbytes % 16 != 0:
             raise BaseException("Uniform buffer data must start on a 16-byte padding.")
 
+        data_bytes = data.tobytes()
+        if not OpenGLContext.count_call(data_bytes != self.last_data):
+            return
+        self.last_data = data_bytes
+
         glBindBuffer(GL_UNIFORM_BUFFER, self.buffer)
         glBindBufferBase(GL_UNIFORM_BUFFER, self.buffer_bind, self.buffer)
         glBufferData(GL_UNIFORM_BUFFER, data.nbytes, data, GL_DYNAMIC_DRAW)
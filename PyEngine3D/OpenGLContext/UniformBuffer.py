@@ -5,6 +5,7 @@ from OpenGL.GL import *
 
 from PyEngine3D.Common import logger
 from PyEngine3D.App import CoreManager
+from PyEngine3D.OpenGLContext import OpenGLContext
 
 
 ignore_uniform_types = ["atomic_bool", "atomic_uint", "atomic_int", "atomic_float"]
@@ -82,17 +83,22 @@ def CreateUniformDataFromString(data_type, strValue=None):
         else:
             return np.eye(componentCount, dtype=dtype)
     elif data_type in ('sampler2D', 'image2D'):
-        texture = CoreManager.instance().resource_manager.get_texture(strValue or 'common.flat_gray')
+        # the default texture is used until the texture is loaded by the loading thread.
+        texture = CoreManager.instance().resource_manager.get_texture_async(strValue or 'common.flat_gray',
+                                                                            'common.flat_gray')
         return texture
     elif data_type == 'sampler2DMS':
         logger.warn('sampler2DMS need multisample texture.')
         return CoreManager.instance().resource_manager.get_texture(strValue or 'common.flat_gray')
     elif data_type == 'sampler2DArray':
-        return CoreManager.instance().resource_manager.get_texture(strValue or 'common.default_2d_array')
+        return CoreManager.instance().resource_manager.get_texture_async(strValue or 'common.default_2d_array',
+                                                                         'common.default_2d_array')
     elif data_type in ('sampler3D', 'image3D'):
-        return CoreManager.instance().resource_manager.get_texture(strValue or 'common.default_3d')
+        return CoreManager.instance().resource_manager.get_texture_async(strValue or 'common.default_3d',
+                                                                         'common.default_3d')
     elif data_type == 'samplerCube':
-        texture = CoreManager.instance().resource_manager.get_texture(strValue or 'common.default_cube')
+        texture = CoreManager.instance().resource_manager.get_texture_async(strValue or 'common.default_cube',
+                                                                            'common.default_cube')
         return texture
 
     error_message = 'Cannot find uniform data of %s.' % data_type
@@ -108,12 +114,29 @@ class UniformVariable:
     def __init__(self, program, variable_name):
         self.name = variable_name
         self.location = glGetUniformLocation(program, variable_name)
+        self.last_value = None  # the uniform value is the state of the program.
         self.show_message = True
         self.valid = True
         if self.location == -1:
             self.valid = False
             # logger.warn("%s location is -1" % variable_name)
 
+    def is_changed(self, value):
+        """
+        :return: False if the program has the value already, then the gl call is skipped.
+        """
+        if isinstance(value, np.ndarray):
+            value = value.tobytes()
+        elif isinstance(value, (list, tuple)):
+            value = np.asarray(value).tobytes()
+
+        if type(value) is type(self.last_value) and value == self.last_value:
+            OpenGLContext.skipped_calls += 1
+            return False
+        self.last_value = value
+        OpenGLContext.issued_calls += 1
+        return True
+
     def bind_uniform(self, value):
         raise BaseException("You must implement bind function.")
 
@@ -127,154 +150,176 @@ class UniformBool(UniformVariable):
     uniform_type = "bool"
 
     def bind_uniform(self, value):
-        glUniform1i(self.location, value)
+        if self.is_changed(value):
+            glUniform1i(self.location, value)
 
 
 class UniformInt(UniformVariable):
     uniform_type = "int"
 
     def bind_uniform(self, value):
-        glUniform1i(self.location, value)
+        if self.is_changed(value):
+            glUniform1i(self.location, value)
 
 
 class UniformUint(UniformVariable):
     uniform_type = "uint"
 
     def bind_uniform(self, value):
-        glUniform1ui(self.location, value)
+        if self.is_changed(value):
+            glUniform1ui(self.location, value)
 
 
 class UniformFloat(UniformVariable):
     uniform_type = "float"
 
     def bind_uniform(self, value):
-        glUniform1f(self.location, value)
+        if self.is_changed(value):
+            glUniform1f(self.location, value)
 
 
 class UniformVector2(UniformVariable):
     uniform_type = "vec2"
 
     def bind_uniform(self, value, num=1):
-        glUniform2fv(self.location, num, value)
+        if self.is_changed(value):
+            glUniform2fv(self.location, num, value)
 
 
 class UniformVector3(UniformVariable):
     uniform_type = "vec3"
 
     def bind_uniform(self, value, num=1):
-        glUniform3fv(self.location, num, value)
+        if self.is_changed(value):
+            glUniform3fv(self.location, num, value)
 
 
 class UniformVector4(UniformVariable):
     uniform_type = "vec4"
 
     def bind_uniform(self, value, num=1):
-        glUniform4fv(self.location, num, value)
+        if self.is_changed(value):
+            glUniform4fv(self.location, num, value)
 
 
 class UniformBoolVector2(UniformVariable):
     uniform_type = "bvec2"
 
     def bind_uniform(self, value, num=1):
-        glUniform2iv(self.location, num, value)
+        if self.is_changed(value):
+            glUniform2iv(self.location, num, value)
 
 
 class UniformBoolVector3(UniformVariable):
     uniform_type = "bvec3"
 
     def bind_uniform(self, value, num=1):
-        glUniform3iv(self.location, num, value)
+        if self.is_changed(value):
+            glUniform3iv(self.location, num, value)
 
 
 class UniformBoolVector4(UniformVariable):
     uniform_type = "bvec4"
 
     def bind_uniform(self, value, num=1):
-        glUniform4iv(self.location, num, value)
+        if self.is_changed(value):
+            glUniform4iv(self.location, num, value)
 
 
 class UniformIntVector2(UniformVariable):
     uniform_type = "ivec2"
 
     def bind_uniform(self, value, num=1):
-        glUniform2iv(self.location, num, value)
+        if self.is_changed(value):
+            glUniform2iv(self.location, num, value)
 
 
 class UniformIntVector3(UniformVariable):
     uniform_type = "ivec3"
 
     def bind_uniform(self, value, num=1):
-        glUniform3iv(self.location, num, value)
+        if self.is_changed(value):
+            glUniform3iv(self.location, num, value)
 
 
 class UniformIntVector4(UniformVariable):
     uniform_type = "ivec4"
 
     def bind_uniform(self, value, num=1):
-        glUniform4iv(self.location, num, value)
+        if self.is_changed(value):
+            glUniform4iv(self.location, num, value)
 
 
 class UniformUintVector2(UniformVariable):
     uniform_type = "uvec2"
 
     def bind_uniform(self, value, num=1):
-        glUniform2uiv(self.location, num, value)
+        if self.is_changed(value):
+            glUniform2uiv(self.location, num, value)
 
 
 class UniformUintVector3(UniformVariable):
     uniform_type = "uvec3"
 
     def bind_uniform(self, value, num=1):
-        glUniform3uiv(self.location, num, value)
+        if self.is_changed(value):
+            glUniform3uiv(self.location, num, value)
 
 
 class UniformUintVector4(UniformVariable):
     uniform_type = "uvec4"
 
     def bind_uniform(self, value, num=1):
-        glUniform4uiv(self.location, num, value)
+        if self.is_changed(value):
+            glUniform4uiv(self.location, num, value)
 
 
 class UniformMatrix2(UniformVariable):
     uniform_type = "mat2"
 
     def bind_uniform(self, value, num=1, transpose=False):
-        glUniformMatrix2fv(self.location, num, GL_TRUE if transpose else GL_FALSE, value)
+        if self.is_changed(value):
+            glUniformMatrix2fv(self.location, num, GL_TRUE if transpose else GL_FALSE, value)
 
 
 class UniformMatrix3(UniformVariable):
     uniform_type = "mat3"
 
     def bind_uniform(self, value, num=1, transpose=False):
-        glUniformMatrix3fv(self.location, num, GL_TRUE if transpose else GL_FALSE, value)
+        if self.is_changed(value):
+            glUniformMatrix3fv(self.location, num, GL_TRUE if transpose else GL_FALSE, value)
 
 
 class UniformMatrix4(UniformVariable):
     uniform_type = "mat4"
 
     def bind_uniform(self, value, num=1, transpose=False):
-        glUniformMatrix4fv(self.location, num, GL_TRUE if transpose else GL_FALSE, value)
+        if self.is_changed(value):
+            glUniformMatrix4fv(self.location, num, GL_TRUE if transpose else GL_FALSE, value)
 
 
 class UniformDoubleMatrix2(UniformVariable):
     uniform_type = "dmat2"
 
     def bind_uniform(self, value, num=1, transpose=False):
-        glUniformMatrix2dv(self.location, num, GL_TRUE if transpose else GL_FALSE, value)
+        if self.is_changed(value):
+            glUniformMatrix2dv(self.location, num, GL_TRUE if transpose else GL_FALSE, value)
 
 
 class UniformDoubleMatrix3(UniformVariable):
     uniform_type = "dmat3"
 
     def bind_uniform(self, value, num=1, transpose=False):
-        glUniformMatrix3dv(self.location, num, GL_TRUE if transpose else GL_FALSE, value)
+        if self.is_changed(value):
+            glUniformMatrix3dv(self.location, num, GL_TRUE if transpose else GL_FALSE, value)
 
 
 class UniformDoubleMatrix4(UniformVariable):
     uniform_type = "dmat4"
 
     def bind_uniform(self, value, num=1, transpose=False):
-        glUniformMatrix4dv(self.location, num, GL_TRUE if transpose else GL_FALSE, value)
+        if self.is_changed(value):
+            glUniformMatrix4dv(self.location, num, GL_TRUE if transpose else GL_FALSE, value)
 
 
 class UniformTextureBase(UniformVariable):
@@ -290,9 +335,9 @@ class UniformTextureBase(UniformVariable):
 
     def bind_uniform(self, texture, wrap=None):
         if texture is not None:
-            glActiveTexture(GL_TEXTURE0 + self.textureIndex)
-            texture.bind_texture(wrap)
-            glUniform1i(self.location, self.textureIndex)
+            texture.bind_texture(wrap, self.textureIndex)
+            if self.is_changed(self.textureIndex):
+                glUniform1i(self.location, self.textureIndex)
         elif self.show_message:
             self.show_message = False
             logger.error("%s %s is None" % (self.name, self.__class__.__name__))
@@ -9,6 +9,7 @@ from PyEngine3D.Common import logger
 from PyEngine3D.Common.Constants import *
 from PyEngine3D.Utilities import compute_tangent
 from .OpenGLContext import OpenGLContext
+from .StreamingBuffer import StreamingBuffer
 
 
 def CreateVertexArrayBuffer(geometry_data):
@@ -35,6 +36,8 @@ def CreateVertexArrayBuffer(geometry_data):
 
     if not isinstance(indices, np.ndarray):
         indices = np.array(indices, dtype=np.uint32)
+    elif indices.dtype not in (np.uint16, np.uint32):
+        indices = indices.astype(np.uint32)
 
     if not isinstance(bone_indicies, np.ndarray):
         bone_indicies = np.array(bone_indicies, dtype=np.float32)
@@ -78,6 +81,9 @@ def CreateVertexArrayBuffer(geometry_data):
 
 #  Reference : https://learnopengl.com/Advanced-OpenGL/Instancing
 class InstanceBuffer:
+    # the instance datas of all instance buffers are sub-allocated in this ring buffer every frame.
+    streaming_buffer = None
+
     def __init__(self, name, location_offset, element_datas):
         self.name = name
         self.location_offset = location_offset
@@ -111,18 +117,26 @@ class InstanceBuffer:
             self.instance_buffer_offset.append(offset)
             offset += data_element_size
 
-        self.instance_buffer = glGenBuffers(1)
+        if InstanceBuffer.streaming_buffer is None:
+            InstanceBuffer.streaming_buffer = StreamingBuffer("instance_data")
 
-    def bind_instance_buffer(self, datas, divisor=1):
-        instance_buffer_size = sum(data.nbytes for data in datas)
-        glBindBuffer(GL_ARRAY_BUFFER, self.instance_buffer)
-        glBufferData(GL_ARRAY_BUFFER, instance_buffer_size, None, GL_STATIC_DRAW)
+    def bind_instance_buffer(self, datas, divisor=1, instance_count=None):
+        """
+        :param instance_count: If it is given, the datas of the instances after it are not uploaded.
+        """
+        if instance_count is not None:
+            upload_datas = []
+            for i, data in enumerate(datas):
+                data_count = data.nbytes // self.data_element_size[i]
+                if instance_count < data_count and data.flags.c_contiguous:
+                    data = data.reshape(data_count, -1)[:instance_count]
+                upload_datas.append(data)
+            datas = upload_datas
+
+        offset = InstanceBuffer.streaming_buffer.upload(datas)
 
-        offset = 0
         location = self.location_offset
         for i, data in enumerate(datas):
-            glBufferSubData(GL_ARRAY_BUFFER, offset, data.nbytes, data)
-
             divide_count = self.divide_counts[i]
             for j in range(divide_count):
                 glEnableVertexAttribArray(location + j)
@@ -150,7 +164,7 @@ class VertexArrayBuffer:
         self.data_types = []
 
         self.vertex_array = glGenVertexArrays(1)
-        glBindVertexArray(self.vertex_array)
+        OpenGLContext.bind_vertex_array(self.vertex_array)
 
         # NOTE : Just one array buffer
         vertex_buffer_size = sum([data.nbytes for data in datas])
@@ -175,29 +189,34 @@ class VertexArrayBuffer:
             glVertexAttribDivisor(location, 0)
             offset += data.nbytes
 
+        # 16-bit indices are used for the small meshes, see MeshOptimizer.
+        self.index_type = OpenGLContext.get_gl_dtype(index_data.dtype)
+        self.index_count = index_data.size
         self.index_buffer_size = index_data.nbytes
         self.index_buffer = glGenBuffers(1)
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.index_buffer)
         glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.index_buffer_size, index_data, GL_STATIC_DRAW)
 
-        glBindVertexArray(0)
+        OpenGLContext.bind_vertex_array(0)
 
     def delete(self):
         logger.info("Delete %s geometry." % self.name)
+        if self.vertex_array == OpenGLContext.last_vertex_array:
+            OpenGLContext.last_vertex_array = -1
         glDeleteVertexArrays(1, GLuint(self.vertex_array))
         glDeleteBuffers(1, GLuint(self.vertex_buffer))
         glDeleteBuffers(1, GLuint(self.index_buffer))
 
     def draw_elements(self):
         OpenGLContext.bind_vertex_array(self.vertex_array)
-        glDrawElements(self.mode, self.index_buffer_size, GL_UNSIGNED_INT, NULL_POINTER)
+        glDrawElements(self.mode, self.index_count, self.index_type, NULL_POINTER)
 
     def draw_elements_instanced(self, instance_count, instance_buffer=None, instance_datas=[]):
         OpenGLContext.bind_vertex_array(self.vertex_array)
         if instance_buffer is not None:
-            instance_buffer.bind_instance_buffer(datas=instance_datas)
-        glDrawElementsInstanced(self.mode, self.index_buffer_size, GL_UNSIGNED_INT, NULL_POINTER, instance_count)
+            instance_buffer.bind_instance_buffer(datas=instance_datas, instance_count=instance_count)
+        glDrawElementsInstanced(self.mode, self.index_count, self.index_type, NULL_POINTER, instance_count)
 
     def draw_elements_indirect(self, offset=0):
         OpenGLContext.bind_vertex_array(self.vertex_array)
-        glDrawElementsIndirect(self.mode, GL_UNSIGNED_INT, c_void_p(offset))
+        glDrawElementsIndirect(self.mode, self.index_type, c_void_p(offset))
@@ -12,6 +12,9 @@ from .UniformBuffer import CreateUniformBuffer, CreateUniformDataFromString, \
                             UniformMatrix2, UniformMatrix3, UniformMatrix4, \
                             UniformTextureBase, UniformTexture2D, UniformTexture2DMultiSample, UniformTexture2DArray,  \
                             UniformTexture3D, UniformTextureCube
+from .StreamingBuffer import StreamingBuffer
+from .GPUTimer import GPUTimer
+from .GLRecorder import GLRecorder
 from .VertexArrayBuffer import VertexArrayBuffer, CreateVertexArrayBuffer, InstanceBuffer
 from .ShaderBuffer import DispatchIndirectCommand, DrawElementsIndirectCommand
 from .ShaderBuffer import AtomicCounterBuffer, DispatchIndirectBuffer, DrawElementIndirectBuffer, ShaderStorageBuffer
@@ -180,8 +180,7 @@ class SkeletonActor(StaticActor):
                     frame_count = animation.frame_count
                     if frame_count > 1:
                         self.animation_time = math.fmod(self.animation_time + dt, animation.animation_length)
-                        frame = animation.get_time_to_frame(self.animation_time)
-                    else:
-                        frame = 0.0
-                    self.prev_animation_buffers[i][...] = self.animation_buffers[i]
-                    self.animation_buffers[i][...] = animation.get_animation_transforms(frame)
+                    # swap the buffers instead of copying
+                    self.prev_animation_buffers[i], self.animation_buffers[i] = \
+                        self.animation_buffers[i], self.prev_animation_buffers[i]
+                    self.animation_buffers[i][...] = animation.get_pose(self.animation_time)
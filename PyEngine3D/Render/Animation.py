@@ -1,10 +1,19 @@
 import copy
+import math
 
 from PyEngine3D.Common import logger
 from PyEngine3D.Utilities import *
 
+# the maximum rotation of a bone between the baked poses. The linear interpolation of the baked poses deviates from
+# the exact pose by about distance * (1 - cos(angle / 2)), 0.1 unit at a distance of 100 units.
+MAX_BAKED_ROTATION_ANGLE = math.radians(5.0)
+
 
 class Animation:
+    """
+    The animation tracks of the bones are stored as the arrays of (frames x bones), all bones are sampled at once.
+    The poses can be baked at the key frames and a sample rate, then the actors which play the animation share them.
+    """
     def __init__(self, name, index, skeleton, animation_data):
         self.name = name
         self.index = index
@@ -22,36 +31,124 @@ class Animation:
             self.nodes.append(animation_node)
         if 0 < self.frame_count:
             self.animation_length = max(self.frame_times)
-        self.last_frame = 0.0
-        self.current_frame = 0
-        self.animation_time = 0.0
+        self.frame_times = np.array(self.frame_times, dtype=np.float32)
+        self.last_frame = -1.0
+
+        # tracks of (frames x bones), the shorter tracks are repeated.
+        bone_count = len(self.nodes)
+        track_frame_count = max(1, self.frame_count)
+        self.bone_indices = np.arange(bone_count)
+        self.animated_bones = np.zeros(bone_count, dtype=np.bool_)
+        self.inv_bind_matrices = np.array([MATRIX4_IDENTITY, ] * bone_count, dtype=np.float32).reshape(-1, 4, 4)
+        self.rotations = np.zeros((track_frame_count, bone_count, 4), dtype=np.float32)
+        self.locations = np.zeros((track_frame_count, bone_count, 3), dtype=np.float32)
+        self.scales = np.ones((track_frame_count, bone_count, 3), dtype=np.float32)
+        self.next_frames = np.zeros((track_frame_count, bone_count), dtype=np.int64)
+        for i, node in enumerate(self.nodes):
+            self.inv_bind_matrices[i][...] = node.bone.inv_bind_matrix
+            if 0 < node.frame_count:
+                frames = np.arange(track_frame_count) % node.frame_count
+                self.rotations[:, i] = np.array(node.rotations, dtype=np.float32)[frames]
+                self.locations[:, i] = np.array(node.locations, dtype=np.float32)[frames]
+                self.scales[:, i] = np.array(node.scales, dtype=np.float32)[frames]
+                self.next_frames[:, i] = (frames + 1) % node.frame_count
+                self.animated_bones[i] = True
+        self.not_animated_bones = np.logical_not(self.animated_bones)
+
+        # baked poses
+        self.pose_cache_sample_rate = 0.0
+        self.baked_poses = None
+        self.baked_times = None
+        self.pose = np.zeros((bone_count, 4, 4), dtype=np.float32)  # interpolated baked poses, see get_pose
 
         # just update animation transforms
         self.animation_transforms = np.array([Matrix4() for i in range(len(self.nodes))], dtype=np.float32)
         self.get_animation_transforms(0.0)
 
-    def get_time_to_frame(self, deltaTime):
+    def get_time_to_frame(self, animation_time):
         if 1 < self.frame_count:
-            current_time = self.animation_time + deltaTime
+            current_frame = int(np.searchsorted(self.frame_times, animation_time, side='right')) - 1
+            current_frame = min(max(0, current_frame), self.frame_count - 2)
+            frame_time = self.frame_times[current_frame]
+            next_frame_time = self.frame_times[current_frame + 1]
+            ratio = (animation_time - frame_time) / (next_frame_time - frame_time)
+            return float(current_frame) + ratio
+        return 0.0
 
-            while True:
-                if self.frame_times[self.current_frame] <= current_time <= self.frame_times[self.current_frame + 1]:
-                    break
-                self.current_frame = (self.current_frame + 1) % (self.frame_count - 1)
+    def sample_transforms(self, frame, transforms):
+        rate = frame - int(frame)
+        frame = int(frame) % len(self.rotations)
+        next_frames = self.next_frames[frame]
+        bone_indices = self.bone_indices
 
-            frame_time = self.frame_times[self.current_frame]
-            next_frame_time = self.frame_times[self.current_frame + 1]
-            ratio = (current_time - frame_time) / (next_frame_time - frame_time)
-            return float(self.current_frame) + ratio
-        return 0.0
+        rotations = slerp_array(self.rotations[frame], self.rotations[next_frames, bone_indices], rate)
+        locations = lerp(self.locations[frame], self.locations[next_frames, bone_indices], rate)
+        scales = lerp(self.scales[frame], self.scales[next_frames, bone_indices], rate)
+
+        quaternions_to_matrices(rotations, transforms)
+        transforms[:, 0:3, :] *= scales[:, :, np.newaxis]
+        transforms[:, 3, 0:3] = locations
+        transforms[...] = np.matmul(self.inv_bind_matrices, transforms)
+        transforms[self.not_animated_bones] = MATRIX4_IDENTITY
 
     def get_animation_transforms(self, frame=0.0):
-        if self.last_frame == frame:
-            return self.animation_transforms
-        else:
-            for i, node in enumerate(self.nodes):
-                self.animation_transforms[i][...] = node.get_transform(frame)
-            return self.animation_transforms
+        if self.last_frame != frame:
+            self.last_frame = frame
+            self.sample_transforms(frame, self.animation_transforms)
+        return self.animation_transforms
+
+    def set_pose_cache_sample_rate(self, sample_rate):
+        """
+        :param sample_rate: the number of the baked poses per second at least, 0 is not baked.
+            The key frame intervals are subdivided by the rotation of the bones too, see bake_poses.
+        """
+        self.pose_cache_sample_rate = sample_rate
+        self.baked_poses = None
+        self.baked_times = None
+
+    def get_key_frame_subdivisions(self):
+        """
+        :return: the number of the baked intervals of each key frame interval, see MAX_BAKED_ROTATION_ANGLE
+        """
+        frames = np.arange(self.frame_count - 1)
+        next_rotations = self.rotations[self.next_frames[frames], self.bone_indices]
+        cos_half_angles = np.abs(np.sum(self.rotations[frames] * next_rotations, axis=2))
+        cos_half_angles[:, self.not_animated_bones] = 1.0
+        angles = 2.0 * np.arccos(np.minimum(np.min(cos_half_angles, axis=1), 1.0))
+        return np.maximum(1, np.ceil(angles / MAX_BAKED_ROTATION_ANGLE)).astype(np.int64)
+
+    def bake_poses(self):
+        """
+        The key frames are baked with the samples at the sample rate, and the key frame intervals are subdivided
+        so a bone does not rotate more than MAX_BAKED_ROTATION_ANGLE between the baked poses.
+        """
+        sample_rate = self.pose_cache_sample_rate
+        sample_count = int(math.ceil(self.animation_length * sample_rate)) + 1
+        baked_times = [np.minimum(np.arange(sample_count) / sample_rate, self.animation_length), self.frame_times]
+        for i, subdivision in enumerate(self.get_key_frame_subdivisions().tolist()):
+            ratios = np.arange(1, subdivision) / subdivision
+            baked_times.append(self.frame_times[i] + (self.frame_times[i + 1] - self.frame_times[i]) * ratios)
+        self.baked_times = np.unique(np.concatenate(baked_times))
+        self.baked_poses = np.zeros((len(self.baked_times), len(self.nodes), 4, 4), dtype=np.float32)
+        for i, baked_time in enumerate(self.baked_times):
+            self.sample_transforms(self.get_time_to_frame(baked_time), self.baked_poses[i])
+
+    def get_pose(self, animation_time):
+        """
+        :return: the transforms of the bones at the animation time. It is shared, so do not modify it.
+        """
+        if 0.0 < self.pose_cache_sample_rate and 1 < self.frame_count and 0.0 < self.animation_length:
+            if self.baked_poses is None:
+                self.bake_poses()
+            # interpolate the neighbouring baked poses.
+            animation_time = min(max(0.0, animation_time), self.animation_length)
+            sample_index = int(np.searchsorted(self.baked_times, animation_time, side='right')) - 1
+            sample_index = min(max(0, sample_index), len(self.baked_poses) - 2)
+            sample_time = self.baked_times[sample_index]
+            rate = (animation_time - sample_time) / (self.baked_times[sample_index + 1] - sample_time)
+            self.pose[...] = lerp(self.baked_poses[sample_index], self.baked_poses[sample_index + 1], rate)
+            return self.pose
+        return self.get_animation_transforms(self.get_time_to_frame(animation_time))
 
 
 class AnimationNode:
@@ -196,7 +196,10 @@ class Atmosphere:
                           self.num_precomputed_wavelengths,
                           Luminance.PRECOMPUTED == self.luminance_type,
                           self.use_combined_textures)
+            # the precompute runs once, so it does not use the placeholder materials.
+            resource_manager.material_loader.begin_sync_compile()
             model.generate()
+            resource_manager.material_loader.end_sync_compile()
 
         self.transmittance_texture = resource_manager.get_texture('precomputed_atmosphere.transmittance')
         self.scattering_texture = resource_manager.get_texture('precomputed_atmosphere.scattering')
@@ -5,7 +5,7 @@ from OpenGL.GL import *
 
 from PyEngine3D.Utilities import *
 from PyEngine3D.App import CoreManager
-from PyEngine3D.OpenGLContext import CreateTexture, Texture2D, Texture3D, FrameBuffer
+from PyEngine3D.OpenGLContext import OpenGLContext, CreateTexture, Texture2D, Texture3D, FrameBuffer
 from PyEngine3D.Render import ScreenQuad
 
 from .Constants import *
@@ -402,14 +402,14 @@ class Model:
         shaderLoader.save_resource(shader_name)
         shaderLoader.load_resource(shader_name)
 
-        glEnable(GL_BLEND)
-        glBlendEquation(GL_FUNC_ADD)
-        glBlendFunc(GL_ONE, GL_ONE)
+        OpenGLContext.set_enable(GL_BLEND, True)
+        OpenGLContext.set_blend_equation(GL_FUNC_ADD)
+        OpenGLContext.set_blend_func(GL_ONE, GL_ONE)
 
         # compute_transmittance
         framebuffer_manager.bind_framebuffer(self.transmittance_texture)
 
-        glDisablei(GL_BLEND, 0)
+        OpenGLContext.set_enablei(GL_BLEND, 0, False)
 
         compute_transmittance_mi = resource_manager.get_material_instance(
             'precomputed_atmosphere.compute_transmittance',
@@ -420,11 +420,11 @@ class Model:
         # compute_direct_irradiance
         framebuffer_manager.bind_framebuffer(self.delta_irradiance_texture, self.irradiance_texture)
 
-        glDisablei(GL_BLEND, 0)
+        OpenGLContext.set_enablei(GL_BLEND, 0, False)
         if blend:
-            glEnablei(GL_BLEND, 1)
+            OpenGLContext.set_enablei(GL_BLEND, 1, True)
         else:
-            glDisablei(GL_BLEND, 1)
+            OpenGLContext.set_enablei(GL_BLEND, 1, False)
 
         compute_direct_irradiance_mi = resource_manager.get_material_instance(
             'precomputed_atmosphere.compute_direct_irradiance',
@@ -451,14 +451,14 @@ class Model:
         compute_single_scattering_mi.bind_uniform_data('luminance_from_radiance', luminance_from_radiance)
         compute_single_scattering_mi.bind_uniform_data('transmittance_texture', self.transmittance_texture)
 
-        glDisablei(GL_BLEND, 0)
-        glDisablei(GL_BLEND, 1)
+        OpenGLContext.set_enablei(GL_BLEND, 0, False)
+        OpenGLContext.set_enablei(GL_BLEND, 1, False)
         if blend:
-            glEnablei(GL_BLEND, 2)
-            glEnablei(GL_BLEND, 3)
+            OpenGLContext.set_enablei(GL_BLEND, 2, True)
+            OpenGLContext.set_enablei(GL_BLEND, 3, True)
         else:
-            glDisablei(GL_BLEND, 2)
-            glDisablei(GL_BLEND, 3)
+            OpenGLContext.set_enablei(GL_BLEND, 2, False)
+            OpenGLContext.set_enablei(GL_BLEND, 3, False)
 
         for layer in range(SCATTERING_TEXTURE_DEPTH):
             current_framebuffer.run_bind_framebuffer(target_layer=layer)
@@ -468,7 +468,7 @@ class Model:
         for scattering_order in range(2, num_scattering_orders + 1):
             # compute_scattering_density
             framebuffer = framebuffer_manager.get_framebuffer(self.delta_scattering_density_texture)
-            glDisablei(GL_BLEND, 0)
+            OpenGLContext.set_enablei(GL_BLEND, 0, False)
 
             compute_scattering_density_mi = resource_manager.get_material_instance(
                 'precomputed_atmosphere.compute_scattering_density',
@@ -492,8 +492,8 @@ class Model:
 
             # compute_indirect_irradiance
             framebuffer_manager.bind_framebuffer(self.delta_irradiance_texture, self.irradiance_texture)
-            glDisablei(GL_BLEND, 0)
-            glEnablei(GL_BLEND, 1)
+            OpenGLContext.set_enablei(GL_BLEND, 0, False)
+            OpenGLContext.set_enablei(GL_BLEND, 1, True)
 
             compute_indirect_irradiance_mi = resource_manager.get_material_instance(
                 'precomputed_atmosphere.compute_indirect_irradiance',
@@ -512,8 +512,8 @@ class Model:
             # compute_multiple_scattering
             framebuffer = framebuffer_manager.get_framebuffer(self.delta_multiple_scattering_texture,
                                                               self.scattering_texture)
-            glDisablei(GL_BLEND, 0)
-            glEnablei(GL_BLEND, 1)
+            OpenGLContext.set_enablei(GL_BLEND, 0, False)
+            OpenGLContext.set_enablei(GL_BLEND, 1, True)
 
             compute_multiple_scattering_mi = resource_manager.get_material_instance(
                 'precomputed_atmosphere.compute_multiple_scattering',
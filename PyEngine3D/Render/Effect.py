@@ -9,7 +9,7 @@ from OpenGL.GL import *
 from OpenGL.GLU import *
 
 from PyEngine3D.Common import logger
-from PyEngine3D.OpenGLContext import DispatchIndirectCommand, DispatchIndirectBuffer
+from PyEngine3D.OpenGLContext import OpenGLContext, DispatchIndirectCommand, DispatchIndirectBuffer
 from PyEngine3D.OpenGLContext import DrawElementsIndirectCommand, DrawElementIndirectBuffer
 from PyEngine3D.OpenGLContext import ShaderStorageBuffer, InstanceBuffer, UniformBlock
 from PyEngine3D.Utilities import *
@@ -117,7 +117,6 @@ class EffectManager(Singleton):
     def render(self):
         prev_blend_mode = None
         main_camera = CoreManager.instance().scene_manager.main_camera
-        cameara_position = main_camera.transform.get_pos()
 
         for effect in self.render_effects:
             for emitter in effect.emitters:
@@ -128,17 +127,17 @@ class EffectManager(Singleton):
                 # set blend mode
                 if prev_blend_mode != particle_info.blend_mode:
                     if particle_info.blend_mode is BlendMode.BLEND:
-                        glBlendEquation(GL_FUNC_ADD)
-                        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+                        OpenGLContext.set_blend_equation(GL_FUNC_ADD)
+                        OpenGLContext.set_blend_func(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
                     elif particle_info.blend_mode is BlendMode.ADDITIVE:
-                        glBlendEquation(GL_FUNC_ADD)
-                        glBlendFunc(GL_ONE, GL_ONE)
+                        OpenGLContext.set_blend_equation(GL_FUNC_ADD)
+                        OpenGLContext.set_blend_func(GL_ONE, GL_ONE)
                     elif particle_info.blend_mode is BlendMode.MULTIPLY:
-                        glBlendEquation(GL_FUNC_ADD)
-                        glBlendFunc(GL_ZERO, GL_SRC_COLOR)
+                        OpenGLContext.set_blend_equation(GL_FUNC_ADD)
+                        OpenGLContext.set_blend_func(GL_ZERO, GL_SRC_COLOR)
                     elif particle_info.blend_mode is BlendMode.SUBTRACT:
-                        glBlendEquation(GL_FUNC_SUBTRACT)
-                        glBlendFunc(GL_ONE, GL_ONE)
+                        OpenGLContext.set_blend_equation(GL_FUNC_SUBTRACT)
+                        OpenGLContext.set_blend_func(GL_ONE, GL_ONE)
                     prev_blend_mode = particle_info.blend_mode
 
                 geometry = particle_info.mesh.get_geometry()
@@ -260,30 +259,7 @@ class EffectManager(Singleton):
                     material_instance.bind_material_instance()
                     material_instance.bind_uniform_data('texture_diffuse', particle_info.texture_diffuse)
 
-                    draw_count = 0
-                    for particle in emitter.particles:
-                        if particle.is_renderable():
-                            if AlignMode.BILLBOARD == particle_info.align_mode:
-                                particle_info.world_matrix_data[draw_count][...] = np.dot(particle.transform.matrix, main_camera.inv_view_origin)
-                                particle_info.world_matrix_data[draw_count][3][...] = np.dot(particle.transform.matrix, particle.parent_matrix)[3]
-                            elif AlignMode.VELOCITY_ALIGN == particle_info.align_mode:
-                                world_velocity = np.dot(particle.velocity_position, particle.parent_matrix[0:3, 0:3])
-                                velocity_length = length(world_velocity)
-                                if 0.0 < velocity_length:
-                                    direction = normalize(particle.parent_matrix[3][0:3] - cameara_position)
-                                    world_velocity /= velocity_length
-                                    world_matrix = particle_info.world_matrix_data[draw_count]
-                                    world_matrix[0][0:3] = np.cross(world_velocity, direction)
-                                    world_matrix[1][0:3] = world_velocity * (1.0 + velocity_length * particle_info.velocity_stretch * 0.1)
-                                    world_matrix[2][0:3] = np.cross(world_matrix[0][0:3], world_velocity)
-                                    world_matrix[3][...] = np.dot(particle.transform.matrix, particle.parent_matrix)[3]
-                            else:
-                                particle_info.world_matrix_data[draw_count][...] = np.dot(particle.transform.matrix, particle.parent_matrix)
-                            particle_info.uvs_data[draw_count][0:2] = particle.sequence_uv
-                            particle_info.uvs_data[draw_count][2:4] = particle.next_sequence_uv
-                            particle_info.sequence_opacity_data[draw_count][0] = particle.sequence_ratio
-                            particle_info.sequence_opacity_data[draw_count][1] = particle.final_opacity
-                            draw_count += 1
+                    draw_count = emitter.update_instance_data(main_camera)
 
                     if 0 < draw_count:
                         geometry.draw_elements_instanced(draw_count,
@@ -407,6 +383,27 @@ class Emitter:
         self.alive_particle_count = 0
         self.particles = []
 
+        # cpu particle data, the alive particles are packed at the front of the arrays.
+        self.particle_arrays = []
+        self.delay = None
+        self.life_time = None
+        self.particle_elapsed_time = None
+        self.position = None
+        self.rotation = None
+        self.scale = None
+        self.velocity_position = None
+        self.velocity_rotation = None
+        self.velocity_scale = None
+        self.force = None
+        self.parent_matrix = None
+        self.opacity = None
+        self.sequence_ratio = None
+        self.sequence_index = None
+        self.next_sequence_index = None
+        self.sequence_uv = None
+        self.next_sequence_uv = None
+        self.local_matrix = None
+
         # gpu data
         self.need_to_initialize_gpu_buffer = True
         self.index_range_buffer = None
@@ -500,6 +497,32 @@ class Emitter:
             self.particle_buffer.delete()
             self.particle_buffer = None
 
+    def create_particle_data(self, count):
+        # the times are accumulated every frame, so they are kept in double precision.
+        self.delay = np.zeros(count, dtype=np.float64)
+        self.life_time = np.zeros(count, dtype=np.float64)
+        self.particle_elapsed_time = np.zeros(count, dtype=np.float64)
+        self.position = np.zeros((count, 3), dtype=np.float32)
+        self.rotation = np.zeros((count, 3), dtype=np.float32)
+        self.scale = np.zeros((count, 3), dtype=np.float32)
+        self.velocity_position = np.zeros((count, 3), dtype=np.float32)
+        self.velocity_rotation = np.zeros((count, 3), dtype=np.float32)
+        self.velocity_scale = np.zeros((count, 3), dtype=np.float32)
+        self.force = np.zeros((count, 3), dtype=np.float32)
+        self.parent_matrix = np.zeros((count, 4, 4), dtype=np.float32)
+        self.opacity = np.zeros(count, dtype=np.float32)
+        self.sequence_ratio = np.zeros(count, dtype=np.float32)
+        self.sequence_index = np.zeros(count, dtype=np.int32)
+        self.next_sequence_index = np.zeros(count, dtype=np.int32)
+        self.sequence_uv = np.zeros((count, 2), dtype=np.float32)
+        self.next_sequence_uv = np.zeros((count, 2), dtype=np.float32)
+        self.particle_arrays = [self.delay, self.life_time, self.particle_elapsed_time, self.position, self.rotation,
+                                self.scale, self.velocity_position, self.velocity_rotation, self.velocity_scale,
+                                self.force, self.parent_matrix, self.opacity, self.sequence_ratio, self.sequence_index,
+                                self.next_sequence_index, self.sequence_uv, self.next_sequence_uv]
+        # temporary local matrices for rendering
+        self.local_matrix = np.zeros((count, 4, 4), dtype=np.float32)
+
     def is_infinite_emitter(self):
         return self.particle_info.spawn_end_time < 0.0
 
@@ -530,7 +553,7 @@ class Emitter:
             # self.gpu_particle_spawn_count = self.particle_info.spawn_count
         else:
             # CPU Particle
-            self.particles = [Particle(self.parent_effect, self, self.particle_info) for i in range(self.particle_info.max_particle_count)]
+            self.create_particle_data(self.particle_info.max_particle_count)
             # spawn at first time
             # self.spawn_particle(self.particle_info.spawn_count)
 
@@ -538,10 +561,78 @@ class Emitter:
         spawn_count = min(spawn_count, self.particle_info.max_particle_count - self.alive_particle_count)
         if 0 < spawn_count:
             begin_index = self.alive_particle_count
-            for i in range(spawn_count):
-                self.particles[begin_index + i].spawn()
+            if self.particle_info.enable_gpu_particle:
+                for i in range(spawn_count):
+                    self.particles[begin_index + i].spawn()
+            else:
+                self.spawn_particle_data(begin_index, spawn_count)
             self.alive_particle_count += spawn_count
 
+    def spawn_particle_data(self, begin_index, spawn_count):
+        particle_info = self.particle_info
+        end_index = begin_index + spawn_count
+
+        self.delay[begin_index:end_index] = particle_info.delay.get_uniforms(spawn_count)
+        self.life_time[begin_index:end_index] = particle_info.life_time.get_uniforms(spawn_count)
+        self.particle_elapsed_time[begin_index:end_index] = 0.0
+
+        random_factor = np.random.uniform(size=(spawn_count, 4)).astype(np.float32)
+        spawn_volume_info = particle_info.spawn_volume_info
+        spawn_position = np.zeros((spawn_count, 3), dtype=np.float32)
+        if SpawnVolume.BOX == particle_info.spawn_volume_type:
+            spawn_position[...] = spawn_volume_info * (random_factor[:, 0:3] - 0.5)
+        elif SpawnVolume.SPHERE == particle_info.spawn_volume_type:
+            vector = normalize_array(random_factor[:, 0:3] - 0.5)
+            radius = lerp(spawn_volume_info[1], spawn_volume_info[0], random_factor[:, 3] * random_factor[:, 3]) * 0.5
+            spawn_position[...] = vector * radius[:, np.newaxis]
+        elif SpawnVolume.CONE == particle_info.spawn_volume_type:
+            vector = normalize_array(random_factor[:, 0:2] - 0.5)
+            ratio = random_factor[:, 2] * random_factor[:, 2]
+            l = lerp(spawn_volume_info[1], spawn_volume_info[0], ratio) * np.sqrt(random_factor[:, 3]) * 0.5
+            spawn_position[:, 0] = l * vector[:, 0]
+            spawn_position[:, 1] = spawn_volume_info[2] * (ratio - 0.5)
+            spawn_position[:, 2] = l * vector[:, 1]
+        elif SpawnVolume.CYLINDER == particle_info.spawn_volume_type:
+            vector = normalize_array(random_factor[:, 0:2] - 0.5)
+            l = lerp(spawn_volume_info[1], spawn_volume_info[0], random_factor[:, 2] * random_factor[:, 2]) * 0.5
+            spawn_position[:, 0] = l * vector[:, 0]
+            spawn_position[:, 1] = spawn_volume_info[2] * (random_factor[:, 2] - 0.5)
+            spawn_position[:, 2] = l * vector[:, 1]
+
+        for i, is_abs_axis in enumerate(particle_info.spawn_volume_abs_axis):
+            if is_abs_axis:
+                spawn_position[:, i] = np.abs(spawn_position[:, i])
+
+        spawn_volume_matrix = particle_info.spawn_volume_transform.matrix
+        spawn_position[...] = np.dot(spawn_position, spawn_volume_matrix[0:3, 0:3]) + spawn_volume_matrix[3, 0:3]
+
+        self.position[begin_index:end_index] = spawn_position
+        self.rotation[begin_index:end_index] = particle_info.transform_rotation.get_uniforms(spawn_count)
+        self.scale[begin_index:end_index] = particle_info.transform_scale.get_uniforms(spawn_count)
+
+        # Store metrics at the time of spawn.
+        self.parent_matrix[begin_index:end_index] = self.parent_effect.transform.matrix
+
+        # We will apply inverse_matrix here because we will apply parent_matrix later.
+        self.force[begin_index:end_index] = np.dot([0.0, -particle_info.force_gravity, 0.0],
+                                                   self.parent_effect.transform.inverse_matrix[0:3, 0:3])
+
+        velocity_position = particle_info.velocity_position.get_uniforms(spawn_count)
+        if VelocityType.SPAWN_DIRECTION == particle_info.velocity_type:
+            velocity_position = np.abs(velocity_position) * normalize_array(spawn_position)
+        elif VelocityType.HURRICANE == particle_info.velocity_type:
+            velocity_position = np.abs(velocity_position) * np.cross(WORLD_UP, normalize_array(spawn_position))
+        self.velocity_position[begin_index:end_index] = velocity_position
+        self.velocity_rotation[begin_index:end_index] = particle_info.velocity_rotation.get_uniforms(spawn_count)
+        self.velocity_scale[begin_index:end_index] = particle_info.velocity_scale.get_uniforms(spawn_count)
+
+        self.opacity[begin_index:end_index] = particle_info.opacity
+        self.sequence_ratio[begin_index:end_index] = 0.0
+        self.sequence_index[begin_index:end_index] = 0
+        self.next_sequence_index[begin_index:end_index] = 0
+        self.sequence_uv[begin_index:end_index] = 0.0
+        self.next_sequence_uv[begin_index:end_index] = 0.0
+
     def destroy(self):
         self.alive = False
 
@@ -557,22 +648,25 @@ class Emitter:
         self.elapsed_time += dt
 
         # update particles
-        index = 0
-        alive_count = self.alive_particle_count
-        for n in range(alive_count):
-            particle = self.particles[index]
-            particle.update(dt)
-
-            if not particle.alive:
-                self.alive_particle_count -= 1
-                last_particle_index = self.alive_particle_count
-                if 0 < self.alive_particle_count:
-                    # swap the present and the last.
-                    if index != last_particle_index:
-                        self.particles[index] = self.particles[last_particle_index]
-                        self.particles[last_particle_index] = particle
-                        continue
-            index += 1
+        if self.particle_info.enable_gpu_particle:
+            index = 0
+            alive_count = self.alive_particle_count
+            for n in range(alive_count):
+                particle = self.particles[index]
+                particle.update(dt)
+
+                if not particle.alive:
+                    self.alive_particle_count -= 1
+                    last_particle_index = self.alive_particle_count
+                    if 0 < self.alive_particle_count:
+                        # swap the present and the last.
+                        if index != last_particle_index:
+                            self.particles[index] = self.particles[last_particle_index]
+                            self.particles[last_particle_index] = particle
+                            continue
+                index += 1
+        elif 0 < self.alive_particle_count:
+            self.update_particle_data(dt)
 
         if self.has_vector_field_rotation:
             self.vector_field_transform.rotation(self.particle_info.vector_field_rotation * dt)
@@ -612,115 +706,181 @@ class Emitter:
 
         return self.gpu_particle_max_count if self.particle_info.enable_gpu_particle else self.alive_particle_count
 
+    def update_particle_data(self, dt):
+        particle_info = self.particle_info
+        alive_count = self.alive_particle_count
+
+        # delay
+        delay = self.delay[:alive_count]
+        delayed = 0.0 < delay
+        if delayed.any():
+            delay[delayed] -= dt
+            delay_end = delayed & (delay < 0.0)
+            self.particle_elapsed_time[:alive_count][delay_end] -= delay[delay_end]
+            delay[delay_end] = 0.0
+            updatable = np.logical_not(delayed) | delay_end
+        else:
+            updatable = None
+
+        # destroy the particles, the alive particles are kept in order.
+        dead = self.life_time[:alive_count] < self.particle_elapsed_time[:alive_count]
+        if updatable is not None:
+            dead &= updatable
+        if dead.any():
+            alive = np.logical_not(dead)
+            self.alive_particle_count = int(np.count_nonzero(alive))
+            for particle_array in self.particle_arrays:
+                particle_array[:self.alive_particle_count] = particle_array[:alive_count][alive]
+            alive_count = self.alive_particle_count
+            if updatable is not None:
+                updatable = updatable[alive]
+
+        if 0 == alive_count:
+            return
+
+        if updatable is None or updatable.all():
+            indices = slice(0, alive_count)
+        else:
+            indices = np.flatnonzero(updatable)
+            if 0 == len(indices):
+                return
+
+        life_time = self.life_time[indices]
+        elapsed_time = self.particle_elapsed_time[indices]
+        life_ratio = np.where(0.0 < life_time, np.minimum(1.0, elapsed_time / np.where(0.0 < life_time, life_time, 1.0)), 0.0)
+        left_life_time = life_time - elapsed_time
+        self.particle_elapsed_time[indices] += dt
+
+        # sequence
+        cell_count = particle_info.cell_count
+        total_cell_count = cell_count[0] * cell_count[1]
+        if 1 < total_cell_count and 0 < particle_info.play_speed:
+            ratio = life_ratio * particle_info.play_speed
+            ratio = (total_cell_count - 1) * (ratio - np.floor(ratio))
+            index = np.floor(ratio)
+            next_index = np.minimum(index + 1, total_cell_count - 1).astype(np.int32)
+            self.sequence_ratio[indices] = ratio - index
+
+            changed = next_index != self.next_sequence_index[indices]
+            if changed.any():
+                rows = np.arange(alive_count)[indices][changed]
+                next_index = next_index[changed]
+                self.sequence_index[rows] = self.next_sequence_index[rows]
+                self.sequence_uv[rows] = self.next_sequence_uv[rows]
+                self.next_sequence_index[rows] = next_index
+                self.next_sequence_uv[rows, 0] = (next_index % cell_count[0]) / cell_count[0]
+                self.next_sequence_uv[rows, 1] = (cell_count[1] - 1 - next_index // cell_count[0]) / cell_count[1]
+
+        # update transform
+        velocity_position = self.velocity_position[indices]
+        if particle_info.force_gravity != 0.0:
+            velocity_position += self.force[indices] * dt
+
+        if 0.0 != particle_info.velocity_acceleration:
+            velocity_length = np.linalg.norm(velocity_position, axis=1)
+            moving = 0.0 < velocity_length
+            new_velocity_length = velocity_length + particle_info.velocity_acceleration * dt
+            if 0.0 < particle_info.velocity_limit.value[1]:
+                new_velocity_length = np.minimum(new_velocity_length, particle_info.velocity_limit.value[1])
+            new_velocity_length = np.maximum(new_velocity_length, particle_info.velocity_limit.value[0])
+            velocity_position[moving] *= (new_velocity_length[moving] / velocity_length[moving])[:, np.newaxis]
+
+        self.velocity_position[indices] = velocity_position
+        self.position[indices] += velocity_position * dt
+
+        velocity_rotation = self.velocity_rotation[indices]
+        rotating = np.any(0.0 != velocity_rotation, axis=1)
+        if rotating.any():
+            rotation = self.rotation[indices]
+            rotation += velocity_rotation * dt
+            wrap = rotating[:, np.newaxis] & ((TWO_PI < rotation) | (rotation < 0.0))
+            rotation[wrap] %= TWO_PI
+            self.rotation[indices] = rotation
+
+        self.scale[indices] += self.velocity_scale[indices] * dt
+
+        if 0.0 != particle_info.fade_in or 0.0 != particle_info.fade_out:
+            opacity = np.full(len(life_time), particle_info.opacity, dtype=np.float32)
+
+            if 0.0 < particle_info.fade_in:
+                fade_in = life_time < particle_info.fade_in
+                opacity[fade_in] *= life_time[fade_in] / particle_info.fade_in
+
+            if 0.0 < particle_info.fade_out:
+                fade_out = left_life_time < particle_info.fade_out
+                opacity[fade_out] *= left_life_time[fade_out] / particle_info.fade_out
+
+            self.opacity[indices] = opacity
+
+    def update_instance_data(self, main_camera):
+        """
+        Fill the instance buffer data of the particle info with the renderable particles.
+        :return: draw count
+        """
+        particle_info = self.particle_info
+        alive_count = self.alive_particle_count
+        renderable = self.delay[:alive_count] <= 0.0
+        draw_count = int(np.count_nonzero(renderable))
+        if 0 == draw_count:
+            return 0
+
+        indices = slice(0, alive_count) if draw_count == alive_count else np.flatnonzero(renderable)
+        parent_matrix = self.parent_matrix[indices]
+
+        local_matrix = self.local_matrix[:draw_count]
+        matrix_rotation_array(local_matrix, self.rotation[indices])
+        local_matrix[:, 0:3, 0:3] *= self.scale[indices][:, :, np.newaxis]
+        local_matrix[:, 3, 0:3] = self.position[indices]
+
+        world_matrix = particle_info.world_matrix_data[:draw_count]
+        if AlignMode.BILLBOARD == particle_info.align_mode:
+            world_matrix[...] = np.matmul(local_matrix, main_camera.inv_view_origin)
+            world_matrix[:, 3] = np.einsum('ni,nij->nj', local_matrix[:, 3], parent_matrix)
+        else:
+            world_matrix[...] = np.matmul(local_matrix, parent_matrix)
+            if AlignMode.VELOCITY_ALIGN == particle_info.align_mode:
+                world_velocity = np.einsum('ni,nij->nj', self.velocity_position[indices], parent_matrix[:, 0:3, 0:3])
+                velocity_length = np.linalg.norm(world_velocity, axis=1)
+                moving = 0.0 < velocity_length
+                velocity_length = velocity_length[moving][:, np.newaxis]
+                world_velocity = world_velocity[moving] / velocity_length
+                direction = normalize_array(parent_matrix[moving, 3, 0:3] - main_camera.transform.get_pos())
+                axis_x = np.cross(world_velocity, direction)
+                world_matrix[moving, 0, 0:3] = axis_x
+                world_matrix[moving, 1, 0:3] = world_velocity * (1.0 + velocity_length * particle_info.velocity_stretch * 0.1)
+                world_matrix[moving, 2, 0:3] = np.cross(axis_x, world_velocity)
+
+        particle_info.uvs_data[:draw_count, 0:2] = self.sequence_uv[indices]
+        particle_info.uvs_data[:draw_count, 2:4] = self.next_sequence_uv[indices]
+        particle_info.sequence_opacity_data[:draw_count, 0] = self.sequence_ratio[indices]
+        particle_info.sequence_opacity_data[:draw_count, 1] = self.opacity[indices]
+        return draw_count
+
 
 class Particle:
+    """
+    The life of the gpu particles, the cpu particles are stored in the arrays of the Emitter.
+    """
     def __init__(self, parent_effect, parent_emitter, particle_info):
         self.parent_effect = parent_effect
         self.parent_emitter = parent_emitter
         self.particle_info = particle_info
         self.alive = False
         self.elapsed_time = 0.0
-
-        # sequence
-        self.total_cell_count = 0
-        self.sequence_uv = [0.0, 0.0]
-        self.next_sequence_uv = [0.0, 0.0]
-        self.sequence_ratio = 0.0
-        self.sequence_index = 0
-        self.next_sequence_index = 0
-
         self.delay = 0.0
         self.life_time = 0.0
-        self.velocity_position = Float3()
-        self.velocity_rotation = Float3()
-        self.velocity_scale = Float3()
-
-        self.has_velocity_position = False
-        self.has_velocity_rotation = False
-        self.has_velocity_scale = False
-
-        self.final_opacity = 1.0
-        self.force = Float3()
-
-        self.transform = TransformObject()
-        self.parent_matrix = MATRIX4_IDENTITY.copy()
 
     def initialize(self):
-        self.total_cell_count = self.particle_info.cell_count[0] * self.particle_info.cell_count[1]
-
-        if self.particle_info.enable_gpu_particle:
-            # GPU Particle
-            self.delay = self.particle_info.delay.get_max()
-            self.life_time = self.particle_info.life_time.get_max()
-            if not self.parent_emitter.is_infinite_emitter():
-                self.life_time += self.particle_info.spawn_end_time
-        else:
-            # CPU Particle
-            self.delay = self.particle_info.delay.get_uniform()
-            self.life_time = self.particle_info.life_time.get_uniform()
-
-            random_factor = np.array([np.random.uniform() for i in range(4)], dtype=np.float32)
-            spawn_volume_info = self.particle_info.spawn_volume_info
-            if SpawnVolume.BOX == self.particle_info.spawn_volume_type:
-                spawn_position = spawn_volume_info * (random_factor[0:3] - 0.5)
-            elif SpawnVolume.SPHERE == self.particle_info.spawn_volume_type:
-                vector = normalize(random_factor[0:3] - 0.5)
-                spawn_position = vector * lerp(spawn_volume_info[1], spawn_volume_info[0], random_factor[3] * random_factor[3]) * 0.5
-            elif SpawnVolume.CONE == self.particle_info.spawn_volume_type:
-                vector = normalize(random_factor[0:2] - 0.5)
-                ratio = random_factor[2] * random_factor[2]
-                y = spawn_volume_info[2] * (ratio - 0.5)
-                l = lerp(spawn_volume_info[1], spawn_volume_info[0], ratio) * sqrt(random_factor[3]) * 0.5
-                x = l * vector[0]
-                z = l * vector[1]
-                spawn_position = Float3(x, y, z)
-            elif SpawnVolume.CYLINDER == self.particle_info.spawn_volume_type:
-                vector = normalize(random_factor[0:2] - 0.5)
-                y = spawn_volume_info[2] * (random_factor[2] - 0.5)
-                l = lerp(spawn_volume_info[1], spawn_volume_info[0], random_factor[2] * random_factor[2]) * 0.5
-                x = l * vector[0]
-                z = l * vector[1]
-                spawn_position = Float3(x, y, z)
-
-            for i, is_abs_axis in enumerate(self.particle_info.spawn_volume_abs_axis):
-                if is_abs_axis:
-                    spawn_position[i] = abs(spawn_position[i])
-
-            spawn_position[...] = np.dot([spawn_position[0], spawn_position[1], spawn_position[2], 1.0], self.particle_info.spawn_volume_transform.matrix)[:3]
-
-            self.transform.set_pos(spawn_position)
-            self.transform.set_rotation(self.particle_info.transform_rotation.get_uniform())
-            self.transform.set_scale(self.particle_info.transform_scale.get_uniform())
-
-            # Store metrics at the time of spawn.
-            self.parent_matrix[...] = self.parent_effect.transform.matrix
-
-            # We will apply inverse_matrix here because we will apply parent_matrix later.
-            self.force[...] = np.dot([0.0, -self.particle_info.force_gravity, 0.0], self.parent_effect.transform.inverse_matrix[0:3, 0:3])
-
-            self.velocity_position[...] = self.particle_info.velocity_position.get_uniform()
-            if VelocityType.SPAWN_DIRECTION == self.particle_info.velocity_type:
-                self.velocity_position[...] = abs(self.velocity_position) * normalize(spawn_position)
-            elif VelocityType.HURRICANE == self.particle_info.velocity_type:
-                self.velocity_position[...] = abs(self.velocity_position) * np.cross(WORLD_UP, normalize(spawn_position))
-
-            self.velocity_rotation[...] = self.particle_info.velocity_rotation.get_uniform()
-            self.velocity_scale[...] = self.particle_info.velocity_scale.get_uniform()
-
-            self.has_velocity_position = any([v != 0.0 for v in self.velocity_position]) or self.particle_info.force_gravity != 0.0
-            self.has_velocity_rotation = any([v != 0.0 for v in self.velocity_rotation])
-            self.has_velocity_scale = any([v != 0.0 for v in self.velocity_scale])
-
-            self.final_opacity = self.particle_info.opacity
+        self.delay = self.particle_info.delay.get_max()
+        self.life_time = self.particle_info.life_time.get_max()
+        if not self.parent_emitter.is_infinite_emitter():
+            self.life_time += self.particle_info.spawn_end_time
 
     def spawn(self):
         self.initialize()
 
         self.alive = True
         self.elapsed_time = 0.0
-        self.sequence_ratio = 0.0
-        self.sequence_index = 0
-        self.next_sequence_index = 0
 
     def destroy(self):
         self.alive = False
@@ -731,25 +891,6 @@ class Particle:
     def is_infinite_particle(self):
         return self.particle_info.life_time.get_max() <= 0.0
 
-    def update_sequence(self, life_ratio):
-        if 1 < self.total_cell_count and 0 < self.particle_info.play_speed:
-            ratio = life_ratio * self.particle_info.play_speed
-            ratio = (self.total_cell_count - 1) * (ratio - math.floor(ratio))
-            index = math.floor(ratio)
-            next_index = min(index + 1, self.total_cell_count - 1)
-            self.sequence_ratio = ratio - index
-
-            if next_index == self.next_sequence_index:
-                return
-
-            cell_count = self.particle_info.cell_count
-            self.sequence_index = self.next_sequence_index
-            self.sequence_uv[0] = self.next_sequence_uv[0]
-            self.sequence_uv[1] = self.next_sequence_uv[1]
-            self.next_sequence_index = next_index
-            self.next_sequence_uv[0] = (next_index % cell_count[0]) / cell_count[0]
-            self.next_sequence_uv[1] = (cell_count[1] - 1 - int(math.floor(next_index / cell_count[0]))) / cell_count[1]
-
     def update(self, dt):
         if not self.alive:
             return
@@ -766,53 +907,9 @@ class Particle:
             self.destroy()
             return
 
-        life_ratio = 0.0
-        if 0.0 < self.life_time:
-            life_ratio = min(1.0, self.elapsed_time / self.life_time)
-
-        left_life_time = self.life_time - self.elapsed_time
-
+        # gpu particle, the simulation is done by the compute shader.
         self.elapsed_time += dt
 
-        if self.particle_info.enable_gpu_particle:
-            # gpu particle, just return.
-            return
-
-        self.update_sequence(life_ratio)
-
-        # update transform
-        if self.particle_info.force_gravity != 0.0:
-            self.velocity_position += self.force * dt
-
-        if self.has_velocity_position:
-            if any(self.velocity_position != 0.0) and 0.0 != self.particle_info.velocity_acceleration:
-                velocity_length = length(self.velocity_position)
-                self.velocity_position /= velocity_length
-                velocity_length += self.particle_info.velocity_acceleration * dt
-                if 0.0 < self.particle_info.velocity_limit.value[1]:
-                    velocity_length = min(velocity_length, self.particle_info.velocity_limit.value[1])
-                velocity_length = max(velocity_length, self.particle_info.velocity_limit.value[0])
-                self.velocity_position *= velocity_length
-
-            self.transform.move(self.velocity_position * dt)
-
-        if self.has_velocity_rotation:
-            self.transform.rotation(self.velocity_rotation * dt)
-
-        if self.has_velocity_scale:
-            self.transform.scaling(self.velocity_scale * dt)
-
-        self.transform.update_transform()
-
-        if 0.0 != self.particle_info.fade_in or 0.0 != self.particle_info.fade_out:
-            self.final_opacity = self.particle_info.opacity
-
-            if 0.0 < self.particle_info.fade_in and self.life_time < self.particle_info.fade_in:
-                self.final_opacity *= self.life_time / self.particle_info.fade_in
-
-            if 0.0 < self.particle_info.fade_out and left_life_time < self.particle_info.fade_out:
-                self.final_opacity *= left_life_time / self.particle_info.fade_out
-
 
 class EffectInfo:
     def __init__(self, name, **effect_info):
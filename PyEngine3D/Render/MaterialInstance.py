@@ -23,6 +23,8 @@ class MaterialInstance:
         self.name = material_instance_name
         self.shader_name = data.get('shader_name', 'default')
         self.material = None
+        self.pending_material = None  # the material which is being compiled, self.material is the placeholder.
+        self.pending_uniform_datas = dict()  # the uniform datas which are set after the pending material is compiled.
         self.material_name = data.get('material_name', 'default')
         self.macros = copy.copy(data.get('macros', OrderedDict()))
         self.linked_uniform_map = dict()
@@ -38,8 +40,12 @@ class MaterialInstance:
         if self.material:
             # and set the loaded uniform data.
             uniform_datas = data.get('uniform_datas', {})
-            for data_name, data_value in uniform_datas.items():
-                self.set_uniform_data_from_string(data_name, data_value)
+            if self.pending_material is not None:
+                for data_name, data_value in uniform_datas.items():
+                    self.pending_uniform_datas[data_name] = (True, data_value)
+            else:
+                for data_name, data_value in uniform_datas.items():
+                    self.set_uniform_data_from_string(data_name, data_value)
         else:
             logger.error("%s material instance has no material." % self.name)
             return
@@ -53,6 +59,12 @@ class MaterialInstance:
     def is_translucent(self):
         return self.material.is_translucent
 
+    def get_material(self):
+        """
+        :return: the pending material if it is being compiled, otherwise the rendered material.
+        """
+        return self.pending_material or self.material
+
     def get_save_data(self):
         uniform_datas = {}
         for uniform_name in self.linked_uniform_map:
@@ -62,15 +74,49 @@ class MaterialInstance:
             else:
                 uniform_datas[uniform_name] = uniform_data
 
+        for uniform_name, (is_string_data, uniform_data) in self.pending_uniform_datas.items():
+            if not is_string_data and hasattr(uniform_data, 'name'):
+                uniform_datas[uniform_name] = uniform_data.name
+            else:
+                uniform_datas[uniform_name] = uniform_data
+
+        material = self.get_material()
         save_data = dict(
-            shader_name=self.material.shader_name if self.material else 'default',
-            material_name=self.material.name if self.material else 'default',
+            shader_name=material.shader_name if material else 'default',
+            material_name=material.name if material else 'default',
             macros=self.macros,
             uniform_datas=uniform_datas,
         )
         return save_data
 
     def set_material(self, material):
+        if material is None or (material is self.pending_material and material.placeholder is not None):
+            return
+
+        if material.placeholder is not None:
+            # render the placeholder until the material is compiled. see MaterialLoader.update
+            for uniform_name, (uniform_buffer, uniform_data) in self.linked_uniform_map.items():
+                if uniform_name not in self.pending_uniform_datas:
+                    self.pending_uniform_datas[uniform_name] = (False, uniform_data)
+            self.link_material(material.placeholder)
+            self.pending_material = material
+            self.isNeedToSave = self.material_name != material.name
+            self.material_name = material.name
+            self.macros = copy.copy(material.macros)
+        else:
+            self.pending_material = None
+            self.link_material(material)
+
+            # restore the uniform datas of the previous material.
+            pending_uniform_datas = self.pending_uniform_datas
+            self.pending_uniform_datas = dict()
+            for uniform_name, (is_string_data, uniform_data) in pending_uniform_datas.items():
+                if is_string_data:
+                    self.set_uniform_data_from_string(uniform_name, uniform_data)
+                elif uniform_name in self.linked_uniform_map:
+                    self.linked_uniform_map[uniform_name][1] = uniform_data
+
+    def link_material(self, material):
         if material and self.material != material:
             self.isNeedToSave = self.material_name != material.name
 
@@ -87,7 +133,10 @@ class MaterialInstance:
                 if uniform_name in old_uniform_names:
                     old_uniform_names.remove(uniform_name)
                 uniform_buffer = material.uniform_buffers[uniform_name]
-                if uniform_name not in self.linked_uniform_map:
+                if uniform_name in self.linked_uniform_map:
+                    # keep the uniform data, the uniform buffer is of the new program.
+                    self.linked_uniform_map[uniform_name][0] = uniform_buffer
+                else:
                     # cannot found uniform data. just set default uniform data.
                     uniform_data = CreateUniformDataFromString(uniform_buffer.uniform_type)
                     if uniform_data is not None:
@@ -121,11 +170,16 @@ class MaterialInstance:
         return uniform[1] if uniform else None
 
     def set_uniform_data(self, uniform_name, uniform_data):
+        if uniform_name in self.pending_uniform_datas:
+            self.pending_uniform_datas[uniform_name] = (False, uniform_data)
         uniform = self.linked_uniform_map.get(uniform_name)
         if uniform:
             uniform[1] = uniform_data
 
     def set_uniform_data_from_string(self, uniform_name, str_uniform_data):
+        if uniform_name in self.pending_uniform_datas:
+            self.pending_uniform_datas[uniform_name] = (True, str_uniform_data)
+            return True
         uniform = self.linked_uniform_map.get(uniform_name)
         if uniform:
             uniform_buffer = uniform[0]
@@ -159,14 +213,15 @@ class MaterialInstance:
                 material = CoreManager.instance().resource_manager.get_material(attribute_value, self.macros)
                 self.set_material(material)
         elif attribute_name in 'material_name':
-            if self.material:
-                material = CoreManager.instance().resource_manager.get_material(self.material.shader_name)
+            if self.get_material():
+                material = CoreManager.instance().resource_manager.get_material(self.get_material().shader_name)
                 self.set_material(material)
         elif attribute_name in self.linked_material_component_map:
             self.set_uniform_data_from_string(attribute_name, attribute_value)
         elif attribute_name in self.macros:
             if self.macros[attribute_name] != attribute_value:
                 self.macros[attribute_name] = attribute_value
-                material = CoreManager.instance().resource_manager.get_material(self.material.shader_name, self.macros)
+                material = CoreManager.instance().resource_manager.get_material(self.get_material().shader_name,
+                                                                                self.macros)
                 self.set_material(material)
         return self.Attributes
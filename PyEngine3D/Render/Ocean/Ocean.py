@@ -5,7 +5,7 @@ from OpenGL.GL import *
 
 from PyEngine3D.Common import logger
 from PyEngine3D.App import CoreManager
-from PyEngine3D.OpenGLContext import CreateTexture, Texture2D, Texture2DArray, Texture3D, FrameBuffer
+from PyEngine3D.OpenGLContext import OpenGLContext, CreateTexture, Texture2D, Texture2DArray, Texture3D, FrameBuffer
 from PyEngine3D.Render import RenderTarget, ScreenQuad, Plane
 from PyEngine3D.Utilities import *
 from .Constants import *
@@ -292,13 +292,13 @@ class Ocean:
             resource.set_data(texture)
 
     def generate_texture(self):
-        glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
-        glDepthFunc(GL_LEQUAL)
-        glEnable(GL_CULL_FACE)
-        glFrontFace(GL_CCW)
-        glEnable(GL_DEPTH_TEST)
-        glDepthMask(True)
-        glDisable(GL_BLEND)
+        OpenGLContext.set_polygon_mode(GL_FILL)
+        OpenGLContext.set_depth_func(GL_LEQUAL)
+        OpenGLContext.set_enable(GL_CULL_FACE, True)
+        OpenGLContext.set_front_face(GL_CCW)
+        OpenGLContext.set_enable(GL_DEPTH_TEST, True)
+        OpenGLContext.set_depth_mask(True)
+        OpenGLContext.set_enable(GL_BLEND, False)
         glClearColor(0.0, 0.0, 0.0, 1.0)
         glClearDepth(1.0)
 
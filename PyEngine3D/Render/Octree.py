@@ -0,0 +1,184 @@
+import math
+
+import numpy as np
+
+from PyEngine3D.Utilities import *
+
+
+class OctreeNode:
+    def __init__(self, parent, depth, center, size):
+        self.parent = parent
+        self.depth = depth
+        self.center = center
+        self.center_tuple = tuple(center.tolist())
+        self.size = size
+        self.children = [None] * 8
+        self.objects = []
+        self.object_count = 0  # count of objects in this node and children
+
+
+class LooseOctree:
+    """
+    Loose octree of the objects with the bounding box.
+    The bounds of a node is twice the size of the cell, an object is stored in the deepest cell which contains
+    the center of the object and is larger than the object, so the object stays in the node while it moves in the cell.
+    The objects out of the root cell are stored in the root node and always returned by the queries.
+    """
+    def __init__(self, size=16384.0, center=(0.0, 0.0, 0.0), min_size=64.0):
+        self.root = OctreeNode(None, 0, Float3(*center), size)
+        # the small cells are not created, because the cost of the traversal is larger than the culling.
+        self.max_depth = max(0, int(math.log2(size / min_size)))
+        self.object_nodes = {}  # { object : node }
+
+    def clear(self):
+        self.root = OctreeNode(None, 0, self.root.center, self.root.size)
+        self.object_nodes = {}
+
+    def get_object_count(self):
+        return len(self.object_nodes)
+
+    def find_node(self, center, radius, create=False):
+        node = self.root
+        half_size = node.size * 0.5
+        if np.any(np.abs(center - node.center) > half_size):
+            return node
+
+        if 0.0 < radius:
+            depth = min(self.max_depth, int(math.log2(node.size * 0.5 / radius))) if radius < half_size else 0
+        else:
+            depth = self.max_depth
+
+        for i in range(depth):
+            child_index = int(center[0] >= node.center[0]) | (int(center[1] >= node.center[1]) << 1) | \
+                          (int(center[2] >= node.center[2]) << 2)
+            child = node.children[child_index]
+            if child is None:
+                if not create:
+                    return None
+                quarter_size = node.size * 0.25
+                child_center = node.center + Float3(quarter_size if child_index & 1 else -quarter_size,
+                                                    quarter_size if child_index & 2 else -quarter_size,
+                                                    quarter_size if child_index & 4 else -quarter_size)
+                child = OctreeNode(node, node.depth + 1, child_center, node.size * 0.5)
+                node.children[child_index] = child
+            node = child
+        return node
+
+    def add_object(self, obj, bound_min, bound_max):
+        if obj in self.object_nodes:
+            self.update_object(obj, bound_min, bound_max)
+            return
+
+        center = (bound_min + bound_max) * 0.5
+        radius = max(bound_max - center)
+        node = self.find_node(center, radius, create=True)
+        node.objects.append(obj)
+        self.object_nodes[obj] = node
+
+        while node is not None:
+            node.object_count += 1
+            node = node.parent
+
+    def remove_object(self, obj):
+        node = self.object_nodes.pop(obj, None)
+        if node is not None:
+            node.objects.remove(obj)
+            while node is not None:
+                node.object_count -= 1
+                parent = node.parent
+                if 0 == node.object_count and parent is not None:
+                    parent.children[parent.children.index(node)] = None
+                node = parent
+
+    def update_object(self, obj, bound_min, bound_max):
+        prev_node = self.object_nodes.get(obj)
+        center = (bound_min + bound_max) * 0.5
+        radius = max(bound_max - center)
+        if prev_node is None or prev_node is not self.find_node(center, radius):
+            self.remove_object(obj)
+            self.add_object(obj, bound_min, bound_max)
+
+    @staticmethod
+    def gather_objects(node, objects):
+        nodes = [node, ]
+        while nodes:
+            node = nodes.pop()
+            objects.extend(node.objects)
+            nodes.extend(child for child in node.children if child is not None)
+
+    def query(self, test_func):
+        """
+        :param test_func: test_func(center tuple, half_size) returns 0 (outside), 1 (intersect) or 2 (inside)
+        :return: the objects of the nodes which are not outside
+        """
+        objects = list(self.root.objects)
+        nodes = [child for child in self.root.children if child is not None]
+        while nodes:
+            node = nodes.pop()
+            # loose bounds
+            result = test_func(node.center_tuple, node.size)
+            if 2 == result:
+                self.gather_objects(node, objects)
+            elif 1 == result:
+                objects.extend(node.objects)
+                nodes.extend(child for child in node.children if child is not None)
+        return objects
+
+    def query_frustum(self, frustum_pos, frustum_vectors):
+        """
+        :param frustum_vectors: outward normals of the planes which pass through frustum_pos. ex) Camera.frustum_vectors
+        """
+        # plane equations. (normal, distance, extent of the unit box)
+        px, py, pz = frustum_pos.tolist()
+        planes = [(nx, ny, nz, nx * px + ny * py + nz * pz, abs(nx) + abs(ny) + abs(nz))
+                  for nx, ny, nz in frustum_vectors.tolist()]
+
+        def test_func(center, half_size):
+            cx, cy, cz = center
+            inside = True
+            for nx, ny, nz, distance, extent in planes:
+                d = nx * cx + ny * cy + nz * cz - distance
+                extent *= half_size
+                if extent < d:
+                    return 0
+                inside = inside and d < -extent
+            return 2 if inside else 1
+        return self.query(test_func)
+
+    def query_view_projection(self, view_projection):
+        """
+        Query with the orthogonal view projection matrix. ex) MainLight.shadow_view_projection, shadow cascades
+        """
+        m = view_projection.tolist()
+        axes = [(m[0][i], m[1][i], m[2][i], m[3][i], abs(m[0][i]) + abs(m[1][i]) + abs(m[2][i])) for i in range(3)]
+
+        def test_func(center, half_size):
+            cx, cy, cz = center
+            inside = True
+            for mx, my, mz, mw, extent in axes:
+                projected_center = mx * cx + my * cy + mz * cz + mw
+                extent *= half_size
+                if projected_center + extent < -1.0 or 1.0 < projected_center - extent:
+                    return 0
+                inside = inside and -1.0 <= projected_center - extent and projected_center + extent <= 1.0
+            return 2 if inside else 1
+        return self.query(test_func)
+
+    def query_ray(self, ray_origin, ray_direction):
+        origin = ray_origin.tolist()
+        direction = ray_direction.tolist()
+
+        def test_func(center, half_size):
+            t_near = -math.inf
+            t_far = math.inf
+            for i in range(3):
+                if 0.0 == direction[i]:
+                    if abs(center[i] - origin[i]) > half_size:
+                        return 0
+                else:
+                    t0 = (center[i] - half_size - origin[i]) / direction[i]
+                    t1 = (center[i] + half_size - origin[i]) / direction[i]
+                    t_near = max(t_near, min(t0, t1))
+                    t_far = min(t_far, max(t0, t1))
+            return 1 if t_near <= t_far and 0.0 <= t_far else 0
+        return self.query(test_func)
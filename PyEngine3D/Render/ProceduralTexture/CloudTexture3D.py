@@ -7,7 +7,7 @@ from OpenGL.GL import *
 from PyEngine3D.Common import logger
 from PyEngine3D.App import CoreManager
 from PyEngine3D.Utilities import Attributes
-from PyEngine3D.OpenGLContext import CreateTexture, Material, Texture2D, Texture3D, TextureCube
+from PyEngine3D.OpenGLContext import OpenGLContext, CreateTexture, Material, Texture2D, Texture3D, TextureCube
 
 
 class CloudTexture3D:
@@ -53,12 +53,12 @@ class CloudTexture3D:
             old_texture.delete()
             resource.set_data(texture)
 
-        glPolygonMode(GL_FRONT_AND_BACK, renderer.view_mode)
-        glDepthFunc(GL_LEQUAL)
-        glEnable(GL_CULL_FACE)
-        glFrontFace(GL_CCW)
-        glEnable(GL_DEPTH_TEST)
-        glDepthMask(True)
+        OpenGLContext.set_polygon_mode(renderer.view_mode)
+        OpenGLContext.set_depth_func(GL_LEQUAL)
+        OpenGLContext.set_enable(GL_CULL_FACE, True)
+        OpenGLContext.set_front_face(GL_CCW)
+        OpenGLContext.set_enable(GL_DEPTH_TEST, True)
+        OpenGLContext.set_depth_mask(True)
         glClearColor(0.0, 0.0, 0.0, 1.0)
         glClearDepth(1.0)
 
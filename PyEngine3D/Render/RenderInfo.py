@@ -2,6 +2,15 @@ import math
 
 from PyEngine3D.Utilities import *
 
+# the bits of the fields of the sort key of GeometryBounds, (geometry, material, material instance)
+SORT_GEOMETRY_BITS = 23
+SORT_MATERIAL_BITS = 20
+SORT_MATERIAL_INSTANCE_BITS = 20
+SORT_MATERIAL_SHIFT = SORT_MATERIAL_INSTANCE_BITS
+SORT_GEOMETRY_SHIFT = SORT_MATERIAL_SHIFT + SORT_MATERIAL_BITS
+# the sort key is a positive int64, the negative keys are used by RenderQueue.batch_render_infos.
+assert SORT_GEOMETRY_SHIFT + SORT_GEOMETRY_BITS < 64
+
 
 def always_pass(*args):
     return False
@@ -90,3 +99,437 @@ class RenderInfo:
         self.geometry = None
         self.material = None
         self.material_instance = None
+        # the render infos of the actors are batched into an instanced draw call if instance_count is not 0.
+        self.instance_count = 0
+        self.instance_matrices = None
+
+
+class SortIdMap:
+    """
+    Dense ids of the objects of a field of the sort key. ex) geometry, material, material instance
+    """
+    def __init__(self, bits):
+        self.bits = bits
+        self.ids = {}
+
+    def clear(self):
+        self.ids = {}
+
+    def is_full(self, count):
+        """
+        :param count: the number of the ids which may be added.
+        """
+        return (1 << self.bits) < len(self.ids) + count
+
+    def get_id(self, obj):
+        sort_id = self.ids.get(obj)
+        if sort_id is None:
+            sort_id = len(self.ids)
+            assert sort_id < (1 << self.bits), "The sort id overflows %d bits." % self.bits
+            self.ids[obj] = sort_id
+        return sort_id
+
+
+class GeometryBounds:
+    """
+    Structure of arrays of the world bounds of the geometries of the actors for the batched culling.
+    The world bounds of an actor are refreshed only when its transform has been updated.
+    The rows of the removed actors are culled always, and they are compacted when the half of rows are removed.
+    """
+    def __init__(self):
+        self.actor_ranges = {}  # { actor : (first geometry index, last geometry index + 1) }
+        self.actor_layouts = {}
+        self.render_infos = []  # render info of each geometry
+        # the fields of the sort key, (geometry, material, material instance) are packed into an int64.
+        self.geometry_sort_ids = SortIdMap(SORT_GEOMETRY_BITS)
+        self.material_sort_ids = SortIdMap(SORT_MATERIAL_BITS)
+        self.material_instance_sort_ids = SortIdMap(SORT_MATERIAL_INSTANCE_BITS)
+        self.sort_id_version = -1  # the material version which the sort ids are assigned at.
+        self.geometry_count = 0
+        self.removed_geometry_count = 0
+        self.capacity = 0
+
+        # sort key of each geometry, it is valid while key_versions equals to the material version of RenderQueue.
+        self.sort_keys = np.zeros(0, dtype=np.int64)
+        self.key_versions = np.zeros(0, dtype=np.int64)
+        self.translucents = np.zeros(0, dtype=np.bool_)
+        self.batchables = np.zeros(0, dtype=np.bool_)
+
+        # local bounds, the range of instances is included.
+        self.local_centers = np.zeros((0, 4), dtype=np.float32)
+        self.local_radius = np.zeros(0, dtype=np.float32)
+        self.local_corners = np.zeros((0, 2, 4), dtype=np.float32)
+
+        # world bounds
+        self.world_version = 0
+        self.world_matrices = np.zeros((0, 4, 4), dtype=np.float32)
+        self.world_centers = np.zeros((0, 3), dtype=np.float32)
+        self.world_radius = np.zeros(0, dtype=np.float32)
+        self.world_corners = np.zeros((0, 2, 4), dtype=np.float32)
+
+    def clear(self):
+        self.actor_ranges = {}
+        self.actor_layouts = {}
+        self.render_infos = []
+        self.clear_sort_ids()
+        self.geometry_count = 0
+        self.removed_geometry_count = 0
+
+    def get_geometry_count(self):
+        return self.geometry_count - self.removed_geometry_count
+
+    def resize(self, capacity):
+        def resize_array(array):
+            new_array = np.zeros((capacity, ) + array.shape[1:], dtype=array.dtype)
+            new_array[:self.geometry_count] = array[:self.geometry_count]
+            return new_array
+
+        self.local_centers = resize_array(self.local_centers)
+        self.local_radius = resize_array(self.local_radius)
+        self.local_corners = resize_array(self.local_corners)
+        self.world_matrices = resize_array(self.world_matrices)
+        self.world_centers = resize_array(self.world_centers)
+        self.world_radius = resize_array(self.world_radius)
+        self.world_corners = resize_array(self.world_corners)
+        self.sort_keys = resize_array(self.sort_keys)
+        self.key_versions = resize_array(self.key_versions)
+        self.translucents = resize_array(self.translucents)
+        self.batchables = resize_array(self.batchables)
+        self.capacity = capacity
+
+    @staticmethod
+    def get_actor_layout(actor):
+        return actor.get_geometries(), actor.instance_count, actor.instance_radius_scale, actor.instance_radius_offset
+
+    @staticmethod
+    def is_same_layout(actor, layout):
+        # the geometries are replaced when the mesh is loaded asynchronously.
+        geometries, instance_count, instance_radius_scale, instance_radius_offset = layout
+        return actor.get_geometries() is geometries and actor.instance_count == instance_count and \
+            actor.instance_radius_scale == instance_radius_scale and \
+            actor.instance_radius_offset == instance_radius_offset
+
+    def is_changed(self, actor_list):
+        if len(actor_list) != len(self.actor_ranges):
+            return True
+
+        for actor, prev_actor in zip(actor_list, self.actor_ranges):
+            if actor is not prev_actor or not self.is_same_layout(actor, self.actor_layouts[actor]):
+                return True
+        return False
+
+    def append_geometries(self, actor):
+        geometries = actor.get_geometries() or []
+        first_index = self.geometry_count
+        last_index = first_index + len(geometries)
+        if self.capacity < last_index:
+            self.resize(max(last_index, self.capacity * 2, 64))
+
+        for i, geometry in enumerate(geometries):
+            render_info = RenderInfo()
+            render_info.actor = actor
+            render_info.geometry = geometry
+            self.render_infos.append(render_info)
+
+            if 1 < actor.instance_count:
+                # instancing
+                scale = actor.instance_radius_scale
+                offset = actor.instance_radius_offset
+                radius = geometry.radius * scale + offset
+                boundMin = geometry.boundMin * scale - offset
+                boundMax = geometry.boundMax * scale + offset
+            else:
+                radius = geometry.radius
+                boundMin = geometry.boundMin
+                boundMax = geometry.boundMax
+
+            index = first_index + i
+            self.local_centers[index][0:3] = geometry.boundCenter
+            self.local_centers[index][3] = 1.0
+            self.local_radius[index] = radius
+            self.local_corners[index][0][0:3] = boundMin
+            self.local_corners[index][1][0:3] = boundMax
+            self.local_corners[index][:, 3] = 1.0
+            self.key_versions[index] = -1
+
+        self.geometry_count = last_index
+        self.actor_ranges[actor] = (first_index, last_index)
+        self.actor_layouts[actor] = self.get_actor_layout(actor)
+
+    def build(self, actor_list):
+        self.clear()
+        for actor in actor_list:
+            self.append_geometries(actor)
+        self.update_world_bounds(actor_list)
+
+    def add_actor(self, actor):
+        if actor in self.actor_ranges:
+            self.remove_actor(actor)
+        self.append_geometries(actor)
+        self.update_world_bounds([actor, ])
+
+    def remove_actor(self, actor):
+        if actor not in self.actor_ranges:
+            return
+
+        first_index, last_index = self.actor_ranges.pop(actor)
+        self.actor_layouts.pop(actor)
+        # the removed geometries do not pass the culling.
+        self.world_radius[first_index:last_index] = -np.inf
+        self.world_corners[first_index:last_index] = np.nan
+        self.render_infos[first_index:last_index] = [None] * (last_index - first_index)
+        self.removed_geometry_count += last_index - first_index
+
+        if self.geometry_count < self.removed_geometry_count * 2:
+            self.build(list(self.actor_ranges.keys()))
+
+    def update(self, actor_list):
+        """
+        Find the changes by scanning the actor list.
+        """
+        if self.is_changed(actor_list):
+            self.build(actor_list)
+        else:
+            self.update_world_bounds([actor for actor in actor_list if actor.transform.updated])
+
+    def update_actors(self, updated_actors):
+        """
+        Refresh the bounds of the actors which are added by add_actor.
+        """
+        actors = []
+        for actor in updated_actors:
+            layout = self.actor_layouts.get(actor)
+            if layout is not None:
+                if self.is_same_layout(actor, layout):
+                    actors.append(actor)
+                else:
+                    self.add_actor(actor)
+        self.update_world_bounds(actors)
+
+    def update_world_bounds(self, actors):
+        geometry_indices = []
+        matrices = []
+        max_scales = []
+        for actor in actors:
+            first_index, last_index = self.actor_ranges[actor]
+            if first_index < last_index:
+                transform = actor.transform
+                geometry_indices.append(np.arange(first_index, last_index))
+                matrices.append(np.broadcast_to(transform.matrix, (last_index - first_index, 4, 4)))
+                max_scales.append(np.full(last_index - first_index, max(transform.scale), dtype=np.float32))
+
+        if geometry_indices:
+            geometry_indices = np.concatenate(geometry_indices)
+            matrices = np.concatenate(matrices)
+            max_scales = np.concatenate(max_scales)
+            self.world_matrices[geometry_indices] = matrices
+            self.world_version += 1
+            self.world_centers[geometry_indices] = \
+                np.einsum('ni,nij->nj', self.local_centers[geometry_indices], matrices)[:, 0:3]
+            self.world_radius[geometry_indices] = self.local_radius[geometry_indices] * max_scales
+            self.world_corners[geometry_indices] = \
+                np.einsum('nki,nij->nkj', self.local_corners[geometry_indices], matrices)
+
+    def get_geometry_indices(self, actors):
+        geometry_indices = [np.arange(*self.actor_ranges[actor]) for actor in actors if actor in self.actor_ranges]
+        return np.concatenate(geometry_indices) if geometry_indices else np.zeros(0, dtype=np.int64)
+
+    def get_actor_bound(self, actor):
+        """
+        :return: world bound min, world bound max of the bounding spheres of the geometries
+        """
+        first_index, last_index = self.actor_ranges[actor]
+        if first_index < last_index:
+            centers = self.world_centers[first_index:last_index]
+            radius = self.world_radius[first_index:last_index, np.newaxis]
+            return np.min(centers - radius, axis=0), np.max(centers + radius, axis=0)
+        return actor.transform.pos.copy(), actor.transform.pos.copy()
+
+    def view_frustum_culling(self, camera, geometry_indices=None):
+        """
+        :param geometry_indices: test the geometries of geometry_indices only, or test all geometries.
+        :return: the indices of the geometries which pass the culling
+        """
+        if geometry_indices is None:
+            geometry_indices = np.arange(self.geometry_count)
+        to_geometry = self.world_centers[geometry_indices] - camera.transform.pos
+        d = np.dot(to_geometry, camera.frustum_vectors.T)
+        return geometry_indices[np.all(d <= self.world_radius[geometry_indices, np.newaxis], axis=1)]
+
+    def shadow_culling(self, light, geometry_indices=None):
+        """
+        :param geometry_indices: test the geometries of geometry_indices only, or test all geometries.
+        :return: the indices of the geometries which pass the culling
+        """
+        if geometry_indices is None:
+            geometry_indices = np.arange(self.geometry_count)
+        corners = np.dot(self.world_corners[geometry_indices], light.shadow_view_projection)[:, :, 0:3]
+        minimum = np.min(corners, axis=1)
+        maximum = np.max(corners, axis=1)
+        return geometry_indices[np.all(-1.0 <= maximum, axis=1) & np.all(minimum <= 1.0, axis=1)]
+
+    def clear_sort_ids(self):
+        self.geometry_sort_ids.clear()
+        self.material_sort_ids.clear()
+        self.material_instance_sort_ids.clear()
+        self.sort_id_version = -1
+
+    def prepare_sort_ids(self, geometry_count, version):
+        """
+        Release the sort ids when the materials are changed or the ids may overflow the fields of the sort key,
+        so the ids of the unloaded materials are not kept. The sort keys of all geometries are refreshed then.
+        :param geometry_count: the number of the geometries whose sort keys may be refreshed.
+        :param version: the material version
+        """
+        if self.sort_id_version != version or self.geometry_sort_ids.is_full(geometry_count) or \
+                self.material_sort_ids.is_full(geometry_count) or \
+                self.material_instance_sort_ids.is_full(geometry_count):
+            self.clear_sort_ids()
+            self.sort_id_version = version
+            self.key_versions[:] = -1
+
+    def update_sort_keys(self, geometry_indices, version):
+        """
+        Refresh the material of the render infos and the sort keys,
+        (geometry, material, material instance) are packed into an integer. (23, 20, 20 bits)
+        """
+        render_infos = self.render_infos
+        geometry_sort_ids = self.geometry_sort_ids
+        material_sort_ids = self.material_sort_ids
+        material_instance_sort_ids = self.material_instance_sort_ids
+        for i in geometry_indices.tolist():
+            render_info = render_infos[i]
+            material_instance = render_info.actor.get_material_instance(render_info.geometry.index)
+            render_info.material = material_instance.material if material_instance else None
+            render_info.material_instance = material_instance
+            self.sort_keys[i] = \
+                (geometry_sort_ids.get_id(render_info.geometry) << SORT_GEOMETRY_SHIFT) | \
+                (material_sort_ids.get_id(render_info.material) << SORT_MATERIAL_SHIFT) | \
+                material_instance_sort_ids.get_id(material_instance)
+            self.translucents[i] = material_instance is not None and material_instance.is_translucent()
+            # the actors which have own instances are not batched.
+            self.batchables[i] = render_info.actor.instance_count <= 1
+        self.key_versions[geometry_indices] = version
+
+    def gather_render_infos(self, geometry_indices, solid_render_infos, translucent_render_infos):
+        render_infos = self.render_infos
+        for i in geometry_indices.tolist():
+            render_info = render_infos[i]
+            material_instance = render_info.actor.get_material_instance(render_info.geometry.index)
+            render_info.material = material_instance.material if material_instance else None
+            render_info.material_instance = material_instance
+            if material_instance is not None and material_instance.is_translucent():
+                if translucent_render_infos is not None:
+                    translucent_render_infos.append(render_info)
+            elif solid_render_infos is not None:
+                solid_render_infos.append(render_info)
+
+
+class RenderQueue:
+    """
+    Sorted render infos of the visible geometries of GeometryBounds which persist across frames.
+    The render infos are sorted by the packed integer keys, and only when the visible geometries or the materials
+    are changed, so a static view costs a comparison of the geometry indices.
+    The render infos which have the same geometry and material instance are batched into an instanced draw call,
+    the world matrices of the actors are packed into instance_matrices.
+    """
+    def __init__(self, geometry_bounds, use_instancing=False, min_instance_count=2):
+        self.geometry_bounds = geometry_bounds
+        self.use_instancing = use_instancing
+        self.min_instance_count = min_instance_count
+        self.geometry_indices = np.zeros(0, dtype=np.int64)
+        self.solid_render_infos = []
+        self.translucent_render_infos = []
+        self.instance_indices = np.zeros(0, dtype=np.int64)
+        self.instance_matrices = np.zeros((0, 4, 4), dtype=np.float32)
+        self.world_version = -1
+        self.sort_count = 0
+
+    def clear(self):
+        self.geometry_indices = np.zeros(0, dtype=np.int64)
+        self.solid_render_infos = []
+        self.translucent_render_infos = []
+        self.instance_indices = np.zeros(0, dtype=np.int64)
+        self.instance_matrices = np.zeros((0, 4, 4), dtype=np.float32)
+        self.world_version = -1
+
+    def get_render_info_count(self):
+        return len(self.geometry_indices)
+
+    def get_draw_count(self):
+        return len(self.solid_render_infos) + len(self.translucent_render_infos)
+
+    def update(self, geometry_indices, version):
+        """
+        :param geometry_indices: the indices of the visible geometries. ex) GeometryBounds.view_frustum_culling
+        :param version: the material version, the sort keys of the other versions are refreshed.
+        :return: True if the render infos are sorted again
+        """
+        bounds = self.geometry_bounds
+        bounds.prepare_sort_ids(len(geometry_indices), version)
+        stale_indices = geometry_indices[bounds.key_versions[geometry_indices] != version]
+        if 0 < len(stale_indices):
+            bounds.update_sort_keys(stale_indices, version)
+            is_sorted = True
+        else:
+            is_sorted = not np.array_equal(geometry_indices, self.geometry_indices)
+
+        if is_sorted:
+            self.sort(geometry_indices)
+
+        # the world matrices of the batched actors
+        if self.world_version != bounds.world_version:
+            self.world_version = bounds.world_version
+            if 0 < len(self.instance_indices):
+                np.take(bounds.world_matrices, self.instance_indices, axis=0, out=self.instance_matrices)
+        return is_sorted
+
+    def sort(self, geometry_indices):
+        bounds = self.geometry_bounds
+        self.geometry_indices = geometry_indices
+        sorted_indices = geometry_indices[np.argsort(bounds.sort_keys[geometry_indices], kind='stable')]
+        translucents = bounds.translucents[sorted_indices]
+
+        instance_indices = []
+        batches = []
+        self.solid_render_infos = self.batch_render_infos(sorted_indices[~translucents], instance_indices, batches)
+        self.translucent_render_infos = self.batch_render_infos(sorted_indices[translucents], instance_indices, batches)
+
+        self.instance_indices = np.array(instance_indices, dtype=np.int64)
+        self.instance_matrices = np.zeros((len(instance_indices), 4, 4), dtype=np.float32)
+        for batch, instance_offset in batches:
+            batch.instance_matrices = self.instance_matrices[instance_offset:instance_offset + batch.instance_count]
+        self.world_version = -1
+        self.sort_count += 1
+
+    def batch_render_infos(self, sorted_indices, instance_indices, batches):
+        render_infos = self.geometry_bounds.render_infos
+        if not self.use_instancing or len(sorted_indices) < self.min_instance_count:
+            return [render_infos[i] for i in sorted_indices.tolist()]
+
+        # the runs of the same sort key, the sort keys of the actors which are not batchable are unique.
+        bounds = self.geometry_bounds
+        keys = np.where(bounds.batchables[sorted_indices],
+                        bounds.sort_keys[sorted_indices],
+                        -1 - np.arange(len(sorted_indices), dtype=np.int64))
+        first_indices = np.flatnonzero(np.concatenate(([True, ], keys[1:] != keys[:-1])))
+        last_indices = np.append(first_indices[1:], len(sorted_indices))
+
+        result = []
+        sorted_indices = sorted_indices.tolist()
+        for first_index, last_index in zip(first_indices.tolist(), last_indices.tolist()):
+            if last_index - first_index < self.min_instance_count:
+                result.extend(render_infos[i] for i in sorted_indices[first_index:last_index])
+                continue
+
+            render_info = render_infos[sorted_indices[first_index]]
+            batch = RenderInfo()
+            batch.actor = render_info.actor
+            batch.geometry = render_info.geometry
+            batch.material = render_info.material
+            batch.material_instance = render_info.material_instance
+            batch.instance_count = last_index - first_index
+            batches.append((batch, len(instance_indices)))
+            instance_indices.extend(sorted_indices[first_index:last_index])
+            result.append(batch)
+        return result
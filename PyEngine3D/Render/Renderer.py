@@ -10,6 +10,8 @@ from PyEngine3D.Common import logger, COMMAND
 from PyEngine3D.Common.Constants import *
 from PyEngine3D.Utilities import *
 from PyEngine3D.OpenGLContext import InstanceBuffer, FrameBufferManager, RenderBuffer, UniformBlock, CreateTexture
+from PyEngine3D.OpenGLContext import StreamingBuffer
+from PyEngine3D.OpenGLContext import OpenGLContext
 from .PostProcess import AntiAliasing, PostProcess
 from . import RenderTargets, RenderOption, RenderingType, RenderGroup, RenderMode
 from . import SkeletonActor, StaticActor
@@ -37,6 +39,7 @@ class Renderer(Singleton):
         self.render_option_manager = None
         self.rendertarget_manager = None
         self.framebuffer_manager = None
+        self.frame_profiler = None
         self.postprocess = None
 
         # components
@@ -84,12 +87,25 @@ class Renderer(Singleton):
 
         self.actor_instance_buffer = None
 
+        # per draw datas of the actors, see bind_draw_datas
+        self.draw_data_buffer = None
+        self.draw_datas = np.zeros(0, dtype=[('model', np.float32, (4, 4)),
+                                             ('is_instancing', np.int32),
+                                             ('bone_offset', np.int32),
+                                             ('prev_bone_offset', np.int32),
+                                             ('DRAW_DATA_DUMMY_0', np.int32)])
+
+        # draw call stats of the actors
+        self.draw_call_count = 0
+        self.unbatched_draw_call_count = 0
+
         self.debug_lines_2d = []
         self.debug_lines_3d = []
 
     def initialize(self, core_manager):
         logger.info("Initialize Renderer")
         self.core_manager = core_manager
+        self.frame_profiler = core_manager.frame_profiler
         self.viewport_manager = core_manager.viewport_manager
         self.viewport = self.viewport_manager.main_viewport
         self.resource_manager = core_manager.resource_manager
@@ -126,6 +142,12 @@ class Renderer(Singleton):
         # instance buffer
         self.actor_instance_buffer = InstanceBuffer(name="actor_instance_buffer", location_offset=7, element_datas=[MATRIX4_IDENTITY, ])
 
+        # draw data storage buffer
+        self.draw_data_buffer = StreamingBuffer("draw_data",
+                                                target=GL_SHADER_STORAGE_BUFFER,
+                                                frame_size=1024 * 1024,
+                                                alignment=int(OpenGLContext.GL_SHADER_STORAGE_BUFFER_OFFSET_ALIGNMENT))
+
         # scene constants uniform buffer
         program = self.scene_constants_material.get_program()
 
@@ -233,7 +255,7 @@ class Renderer(Singleton):
         self.core_manager.send_rendering_type_list(rendering_type_list)
 
     def close(self):
-        pass
+        OpenGLContext.delete_streaming_buffers()
 
     def set_blend_state(self, blend_enable=True, equation=GL_FUNC_ADD, func_src=GL_SRC_ALPHA, func_dst=GL_ONE_MINUS_SRC_ALPHA):
         self.blend_enable_prev = self.blend_enable
@@ -246,11 +268,7 @@ class Renderer(Singleton):
             self.blend_equation = equation
             self.blend_func_src = func_src
             self.blend_func_dst = func_dst
-            glEnable(GL_BLEND)
-            glBlendEquation(equation)
-            glBlendFunc(func_src, func_dst)
-        else:
-            glDisable(GL_BLEND)
+        OpenGLContext.set_blend_state(blend_enable, equation, func_src, func_dst)
 
     def restore_blend_state_prev(self):
         self.set_blend_state(self.blend_enable_prev,
@@ -528,7 +546,7 @@ class Renderer(Singleton):
         # static shadow
         self.framebuffer_manager.bind_framebuffer(depth_texture=RenderTargets.STATIC_SHADOWMAP)
         glClear(GL_DEPTH_BUFFER_BIT)
-        glFrontFace(GL_CW)
+        OpenGLContext.set_front_face(GL_CW)
 
         if self.scene_manager.terrain.is_render_terrain:
             self.scene_manager.terrain.render_terrain(RenderMode.SHADOW)
@@ -538,7 +556,7 @@ class Renderer(Singleton):
         # dyanmic shadow
         self.framebuffer_manager.bind_framebuffer(depth_texture=RenderTargets.DYNAMIC_SHADOWMAP)
         glClear(GL_DEPTH_BUFFER_BIT)
-        glFrontFace(GL_CW)
+        OpenGLContext.set_front_face(GL_CW)
 
         if RenderOption.RENDER_SKELETON_ACTOR:
             self.render_actors(RenderGroup.SKELETON_ACTOR, RenderMode.SHADOW, self.scene_manager.skeleton_shadow_render_infos, self.shadowmap_skeletal_material)
@@ -547,7 +565,7 @@ class Renderer(Singleton):
         self.framebuffer_manager.bind_framebuffer(RenderTargets.COMPOSITE_SHADOWMAP)
         glClearColor(1.0, 1.0, 1.0, 1.0)
         glClear(GL_COLOR_BUFFER_BIT)
-        glDisable(GL_CULL_FACE)
+        OpenGLContext.set_enable(GL_CULL_FACE, False)
 
         self.postprocess.render_composite_shadowmap(RenderTargets.STATIC_SHADOWMAP, RenderTargets.DYNAMIC_SHADOWMAP)
 
@@ -615,11 +633,77 @@ class Renderer(Singleton):
     def render_effect(self):
         self.scene_manager.effect_manager.render()
 
+    def bind_draw_datas(self, render_group, render_infos):
+        """
+        Pack the per draw datas of the render infos into a structured array and upload it at once.
+        The vertex shader reads the draw data at draw_index. see default_vs.glsl
+        :return: draw index of each render info
+        """
+        draw_count = len(render_infos)
+        if len(self.draw_datas) < draw_count:
+            self.draw_datas = np.zeros(max(draw_count, len(self.draw_datas) * 2), dtype=self.draw_datas.dtype)
+        draw_datas = self.draw_datas[:draw_count]
+
+        models = []
+        is_instancing = []
+        bone_offsets = []
+        prev_bone_offsets = []
+        bone_matrices = []
+        bone_count = 0
+        draw_indices = []
+        last_actor = None
+
+        for render_info in render_infos:
+            actor = render_info.actor
+            if 0 < render_info.instance_count:
+                # the world matrices of the batched actors are the instance matrices.
+                models.append(MATRIX4_IDENTITY)
+                is_instancing.append(True)
+                actor = None
+            elif last_actor is actor:
+                # the same actor with the other geometry uses the same draw data.
+                draw_indices.append(len(models) - 1)
+                continue
+            else:
+                models.append(actor.transform.matrix)
+                is_instancing.append(1 < actor.instance_count)
+
+            if render_group == RenderGroup.SKELETON_ACTOR and actor is not None:
+                skeleton_index = render_info.geometry.skeleton.index
+                animation_buffer = actor.get_animation_buffer(skeleton_index)
+                prev_animation_buffer = actor.get_prev_animation_buffer(skeleton_index)
+                bone_matrices.append(animation_buffer)
+                bone_matrices.append(prev_animation_buffer)
+                bone_offsets.append(bone_count)
+                prev_bone_offsets.append(bone_count + len(animation_buffer))
+                bone_count += len(animation_buffer) + len(prev_animation_buffer)
+            else:
+                bone_offsets.append(0)
+                prev_bone_offsets.append(0)
+
+            draw_indices.append(len(models) - 1)
+            last_actor = actor
+
+        draw_datas = draw_datas[:len(models)]
+        draw_datas['model'] = models
+        draw_datas['is_instancing'] = is_instancing
+        draw_datas['bone_offset'] = bone_offsets
+        draw_datas['prev_bone_offset'] = prev_bone_offsets
+
+        # upload at once, so the both ranges are in the same buffer even if the buffer grows.
+        if bone_matrices:
+            bone_matrices = np.concatenate(bone_matrices).astype(np.float32, copy=False)
+            offsets = self.draw_data_buffer.upload_ranges([draw_datas, bone_matrices])
+            self.draw_data_buffer.bind_buffer_range(3, offsets[1], bone_matrices.nbytes)
+        else:
+            offsets = self.draw_data_buffer.upload_ranges([draw_datas])
+        self.draw_data_buffer.bind_buffer_range(2, offsets[0], draw_datas.nbytes)
+        return draw_indices
+
     def render_actors(self, render_group, render_mode, render_infos, scene_material_instance=None):
         if len(render_infos) < 1:
             return
 
-        last_actor = None
         last_actor_material = None
         last_actor_material_instance = None
 
@@ -627,16 +711,16 @@ class Renderer(Singleton):
             scene_material_instance.use_program()
             scene_material_instance.bind_material_instance()
 
+        # upload the per draw datas of this pass at once
+        draw_indices = self.bind_draw_datas(render_group, render_infos)
+
         # render
-        for render_info in render_infos:
+        for render_info, draw_index in zip(render_infos, draw_indices):
             actor = render_info.actor
             geometry = render_info.geometry
             actor_material = render_info.material
             actor_material_instance = render_info.material_instance
 
-            instance_count = actor.instance_count
-            is_instancing = 1 < instance_count
-
             if RenderMode.GBUFFER == render_mode or RenderMode.FORWARD_SHADING == render_mode:
                 if last_actor_material != actor_material and actor_material is not None:
                     actor_material.use_program()
@@ -659,22 +743,24 @@ class Renderer(Singleton):
                     data_diffuse = actor_material_instance.get_uniform_data('texture_diffuse')
                     scene_material_instance.bind_uniform_data('texture_diffuse', data_diffuse)
 
-            if last_actor != actor:
-                material_instance = scene_material_instance or actor_material_instance
-                material_instance.bind_uniform_data('is_instancing', is_instancing)
-                material_instance.bind_uniform_data('model', actor.transform.matrix)
-                if render_group == RenderGroup.SKELETON_ACTOR:
-                    animation_buffer = actor.get_animation_buffer(geometry.skeleton.index)
-                    prev_animation_buffer = actor.get_prev_animation_buffer(geometry.skeleton.index)
-                    material_instance.bind_uniform_data('bone_matrices', animation_buffer, num=len(animation_buffer))
-                    material_instance.bind_uniform_data('prev_bone_matrices', prev_animation_buffer, num=len(prev_animation_buffer))
-            # draw
-            if is_instancing:
-                geometry.draw_elements_instanced(instance_count, self.actor_instance_buffer, [actor.instance_matrix, ])
+            material_instance = scene_material_instance or actor_material_instance
+            material_instance.bind_uniform_data('draw_index', draw_index)
+
+            if 0 < render_info.instance_count:
+                geometry.draw_elements_instanced(render_info.instance_count,
+                                                 self.actor_instance_buffer,
+                                                 [render_info.instance_matrices, ])
+                self.unbatched_draw_call_count += render_info.instance_count
             else:
-                geometry.draw_elements()
+                # draw
+                instance_count = actor.instance_count
+                if 1 < instance_count:
+                    geometry.draw_elements_instanced(instance_count, self.actor_instance_buffer, [actor.instance_matrix, ])
+                else:
+                    geometry.draw_elements()
+                self.unbatched_draw_call_count += 1
+            self.draw_call_count += 1
 
-            last_actor = actor
             last_actor_material = actor_material
             last_actor_material_instance = actor_material_instance
 
@@ -708,8 +794,8 @@ class Renderer(Singleton):
             self.postprocess.draw_elements()
 
     def render_bones(self):
-        glDisable(GL_DEPTH_TEST)
-        glDisable(GL_CULL_FACE)
+        OpenGLContext.set_enable(GL_DEPTH_TEST, False)
+        OpenGLContext.set_enable(GL_CULL_FACE, False)
         mesh = self.resource_manager.get_mesh("Cube")
         static_actors = self.scene_manager.static_actors[:]
 
@@ -831,6 +917,17 @@ class Renderer(Singleton):
         self.framebuffer_manager.bind_framebuffer(RenderTargets.BACKBUFFER)
         self.font_manager.render_log(self.viewport.width, self.viewport.height)
 
+    def render_loading_screen(self, text):
+        self.framebuffer_manager.bind_framebuffer(RenderTargets.BACKBUFFER)
+        glClearColor(0.0, 0.0, 0.0, 1.0)
+        glClear(GL_COLOR_BUFFER_BIT)
+
+        self.set_blend_state(True, GL_FUNC_ADD, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        text_render_data = self.font_manager.text_render_data
+        text_render_data.set_text(text, self.font_manager.ascii, font_size=12, skip_check=True)
+        self.render_text(text_render_data, 0.0, self.viewport.height - text_render_data.font_size,
+                         self.viewport.width, self.viewport.height)
+
     def render_text(self, text_render_data, offset_x, offset_y, canvas_width, canvas_height):
         if 0 < text_render_data.render_count:
             self.font_shader.use_program()
@@ -884,6 +981,10 @@ class Renderer(Singleton):
 
     def render_scene(self):
         main_camera = self.scene_manager.main_camera
+        frame_profiler = self.frame_profiler
+
+        self.draw_call_count = 0
+        self.unbatched_draw_call_count = 0
 
         # bind scene constants uniform blocks
         self.bind_uniform_blocks()
@@ -891,15 +992,15 @@ class Renderer(Singleton):
         self.set_blend_state(False)
 
         glHint(GL_PERSPECTIVE_CORRECTION_HINT, GL_NICEST)
-        glPolygonMode(GL_FRONT_AND_BACK, self.view_mode)
-        # glEnable(GL_FRAMEBUFFER_SRGB)
-        glEnable(GL_MULTISAMPLE)
-        glEnable(GL_TEXTURE_CUBE_MAP_SEAMLESS)
-        glDepthFunc(GL_LEQUAL)
-        glEnable(GL_CULL_FACE)
-        glFrontFace(GL_CCW)
-        glEnable(GL_DEPTH_TEST)
-        glDepthMask(True)
+        OpenGLContext.set_polygon_mode(self.view_mode)
+        # OpenGLContext.set_enable(GL_FRAMEBUFFER_SRGB, True)
+        OpenGLContext.set_enable(GL_MULTISAMPLE, True)
+        OpenGLContext.set_enable(GL_TEXTURE_CUBE_MAP_SEAMLESS, True)
+        OpenGLContext.set_depth_func(GL_LEQUAL)
+        OpenGLContext.set_enable(GL_CULL_FACE, True)
+        OpenGLContext.set_front_face(GL_CCW)
+        OpenGLContext.set_enable(GL_DEPTH_TEST, True)
+        OpenGLContext.set_depth_mask(True)
         glClearColor(0.0, 0.0, 0.0, 1.0)
         glClearDepth(1.0)
 
@@ -909,7 +1010,9 @@ class Renderer(Singleton):
             self.framebuffer_manager.bind_framebuffer(RenderTargets.BACKBUFFER)
             glClear(GL_COLOR_BUFFER_BIT)
 
+            frame_profiler.begin_scope("Debug Shader")
             self.postprocess.render_material_instance()
+            frame_profiler.end_scope()
 
         elif RenderOption.RENDER_ONLY_ATMOSPHERE and RenderOption.RENDER_LIGHT_PROBE:
             """ render light probe preprocess """
@@ -939,7 +1042,9 @@ class Renderer(Singleton):
             return
         else:
             """ render normal scene """
+            frame_profiler.begin_scope("Ocean Simulation")
             self.scene_manager.ocean.simulateFFTWaves()
+            frame_profiler.end_scope()
 
             # render gbuffer & preprocess
             camera = self.scene_manager.main_camera
@@ -947,11 +1052,17 @@ class Renderer(Singleton):
             self.uniform_view_projection_data['PREV_VIEW_PROJECTION'][...] = camera.prev_view_projection_jitter
             self.uniform_view_projection_buffer.bind_uniform_block(data=self.uniform_view_projection_data)
 
+            frame_profiler.begin_scope("GBuffer")
             self.render_gbuffer()
+            frame_profiler.end_scope()
 
+            frame_profiler.begin_scope("Preprocess")
             self.render_preprocess()
+            frame_profiler.end_scope()
 
+            frame_profiler.begin_scope("Shadow")
             self.render_shadow()
+            frame_profiler.end_scope()
 
             # render solid
             camera = self.scene_manager.main_camera
@@ -959,14 +1070,16 @@ class Renderer(Singleton):
             self.uniform_view_projection_data['PREV_VIEW_PROJECTION'][...] = camera.prev_view_projection_jitter
             self.uniform_view_projection_buffer.bind_uniform_block(data=self.uniform_view_projection_data)
 
-            glFrontFace(GL_CCW)
+            OpenGLContext.set_front_face(GL_CCW)
 
-            glDepthMask(False)  # cause depth prepass and gbuffer
+            OpenGLContext.set_depth_mask(False)  # cause depth prepass and gbuffer
 
             self.framebuffer_manager.bind_framebuffer(RenderTargets.HDR, depth_texture=RenderTargets.DEPTHSTENCIL)
             glClear(GL_COLOR_BUFFER_BIT)
 
+            frame_profiler.begin_scope("Solid")
             self.render_solid()
+            frame_profiler.end_scope()
 
             # copy HDR Target
             src_framebuffer = self.framebuffer_manager.bind_framebuffer(RenderTargets.HDR)
@@ -983,10 +1096,11 @@ class Renderer(Singleton):
 
             # render ocean
             if self.scene_manager.ocean.is_render_ocean:
+                frame_profiler.begin_scope("Ocean")
                 self.framebuffer_manager.bind_framebuffer(RenderTargets.HDR, depth_texture=RenderTargets.DEPTHSTENCIL)
-                glDisable(GL_CULL_FACE)
-                glEnable(GL_DEPTH_TEST)
-                glDepthMask(True)
+                OpenGLContext.set_enable(GL_CULL_FACE, False)
+                OpenGLContext.set_enable(GL_DEPTH_TEST, True)
+                OpenGLContext.set_depth_mask(True)
 
                 self.scene_manager.ocean.render_ocean(atmosphere=self.scene_manager.atmosphere,
                                                       texture_scene=RenderTargets.HDR_TEMP,
@@ -997,21 +1111,25 @@ class Renderer(Singleton):
                 # re copy Linear depth
                 self.framebuffer_manager.bind_framebuffer(RenderTargets.LINEAR_DEPTH)
                 self.postprocess.render_linear_depth(RenderTargets.DEPTHSTENCIL, RenderTargets.LINEAR_DEPTH)
+                frame_profiler.end_scope()
 
             # render atmosphere
             if self.scene_manager.atmosphere.is_render_atmosphere:
+                frame_profiler.begin_scope("Atmosphere")
                 self.framebuffer_manager.bind_framebuffer(RenderTargets.ATMOSPHERE,
                                                           RenderTargets.ATMOSPHERE_INSCATTER)
                 self.scene_manager.atmosphere.render_precomputed_atmosphere(RenderTargets.LINEAR_DEPTH,
                                                                             RenderTargets.COMPOSITE_SHADOWMAP,
                                                                             RenderOption.RENDER_LIGHT_PROBE)
+                frame_profiler.end_scope()
 
-            glEnable(GL_CULL_FACE)
-            glEnable(GL_DEPTH_TEST)
-            glDepthMask(False)
+            OpenGLContext.set_enable(GL_CULL_FACE, True)
+            OpenGLContext.set_enable(GL_DEPTH_TEST, True)
+            OpenGLContext.set_depth_mask(False)
 
             # Composite Atmosphere
             if self.scene_manager.atmosphere.is_render_atmosphere:
+                frame_profiler.begin_scope("Composite Atmosphere")
                 self.framebuffer_manager.bind_framebuffer(RenderTargets.HDR)
 
                 self.set_blend_state(True, GL_FUNC_ADD, GL_ONE, GL_ONE_MINUS_SRC_ALPHA)
@@ -1024,39 +1142,48 @@ class Renderer(Singleton):
                 composite_atmosphere.bind_uniform_data("texture_inscatter", RenderTargets.ATMOSPHERE_INSCATTER)
                 composite_atmosphere.bind_uniform_data("texture_linear_depth", RenderTargets.LINEAR_DEPTH)
                 self.postprocess.draw_elements()
+                frame_profiler.end_scope()
 
             # set blend state
             self.set_blend_state(True, GL_FUNC_ADD, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
             self.framebuffer_manager.bind_framebuffer(RenderTargets.HDR, depth_texture=RenderTargets.DEPTHSTENCIL)
-            glEnable(GL_DEPTH_TEST)
+            OpenGLContext.set_enable(GL_DEPTH_TEST, True)
 
             # Translucent
+            frame_profiler.begin_scope("Translucent")
             self.render_translucent()
+            frame_profiler.end_scope()
 
             # render particle
             if RenderOption.RENDER_EFFECT:
-                glDisable(GL_CULL_FACE)
-                glEnable(GL_BLEND)
+                OpenGLContext.set_enable(GL_CULL_FACE, False)
+                OpenGLContext.set_enable(GL_BLEND, True)
 
+                frame_profiler.begin_scope("Effect")
                 self.render_effect()
+                frame_profiler.end_scope()
 
-                glDisable(GL_BLEND)
-                glEnable(GL_CULL_FACE)
+                OpenGLContext.set_enable(GL_BLEND, False)
+                OpenGLContext.set_enable(GL_CULL_FACE, True)
 
             # render probe done
             if RenderOption.RENDER_LIGHT_PROBE:
                 return
 
-            glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
+            OpenGLContext.set_polygon_mode(GL_FILL)
 
             self.set_blend_state(False)
 
             # PostProcess
+            frame_profiler.begin_scope("PostProcess")
             self.render_postprocess()
+            frame_profiler.end_scope()
 
         # selected object
+        frame_profiler.begin_scope("Selected Object")
         self.render_selected_object()
+        frame_profiler.end_scope()
 
         # debug render target
         if self.debug_texture is not None:
@@ -1067,7 +1194,11 @@ class Renderer(Singleton):
 
         if RenderOption.RENDER_FONT:
             self.set_blend_state(True, GL_FUNC_ADD, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+            frame_profiler.begin_scope("Font")
             self.render_log()
+            frame_profiler.end_scope()
 
         # draw line
+        frame_profiler.begin_scope("Debug Line")
         self.render_debug_line()
+        frame_profiler.end_scope()
@@ -1,4 +1,5 @@
-from .RenderInfo import RenderInfo, gather_render_infos
+from .RenderInfo import RenderInfo, GeometryBounds, RenderQueue, gather_render_infos
+from .Octree import LooseOctree
 from .RenderInfo import view_frustum_culling_geometry, cone_sphere_culling_actor, always_pass, shadow_culling
 from .RenderOptions import BlendMode, RenderOption, RenderingType, RenderGroup, RenderMode, RenderOptionManager
 
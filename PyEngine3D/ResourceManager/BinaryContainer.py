@@ -0,0 +1,125 @@
+"""
+Versioned binary container of the resource data. ex) .mesh, .texture
+
+    header : magic(8 bytes), container version(uint32), index size(uint32), data offset(uint64)
+    index : pickled structure of the resource data. numpy arrays are replaced by ArrayReference.
+    data : raw arrays, each array starts at ALIGNMENT bytes boundary.
+
+The arrays are loaded as views of np.memmap, so the data is not copied until it is uploaded to OpenGL.
+"""
+
+import pickle
+import struct
+
+import numpy as np
+
+
+CONTAINER_MAGIC = b'PE3DRES\x00'
+CONTAINER_VERSION = 1
+CONTAINER_HEADER = struct.Struct('<8sIIQ')
+ALIGNMENT = 64
+
+
+class ArrayReference:
+    def __init__(self, offset, dtype, shape):
+        self.offset = offset
+        self.dtype = dtype
+        self.shape = shape
+
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def is_binary_container_file(filepath):
+    with open(filepath, 'rb') as f:
+        return f.read(len(CONTAINER_MAGIC)) == CONTAINER_MAGIC
+
+
+def is_mapped_array(value):
+    while isinstance(value, np.ndarray):
+        if isinstance(value, np.memmap):
+            return True
+        value = value.base
+    return False
+
+
+def copy_mapped_arrays(data):
+    """
+    Copy the arrays which are the views of the memory-mapped file into the memory.
+    The file is unmapped when the loaded data is replaced by the copied data, then the file can be rewritten.
+    """
+    if isinstance(data, np.ndarray):
+        return np.array(data) if is_mapped_array(data) else data
+    elif isinstance(data, dict):
+        return type(data)((key, copy_mapped_arrays(child)) for key, child in data.items())
+    elif type(data) in (list, tuple):
+        return type(data)(copy_mapped_arrays(child) for child in data)
+    return data
+
+
+def save_binary_container(filepath, data):
+    """
+    numpy arrays and bytes in the data are written as raw arrays, bytes are loaded as uint8 array.
+    The file must not be mapped by load_binary_container, use copy_mapped_arrays to release it.
+    """
+    arrays = []
+    data_size = 0
+
+    def pack(value):
+        nonlocal data_size
+        if isinstance(value, (bytes, bytearray)):
+            value = np.frombuffer(value, dtype=np.uint8)
+
+        if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+            value = np.array(value) if is_mapped_array(value) else np.ascontiguousarray(value)
+            offset = align(data_size)
+            arrays.append((offset, value))
+            data_size = offset + value.nbytes
+            return ArrayReference(offset, value.dtype.str, value.shape)
+        elif isinstance(value, dict):
+            return type(value)((key, pack(child)) for key, child in value.items())
+        elif type(value) in (list, tuple):
+            return type(value)(pack(child) for child in value)
+        return value
+
+    index = pickle.dumps(pack(data), protocol=pickle.HIGHEST_PROTOCOL)
+    data_offset = align(CONTAINER_HEADER.size + len(index))
+
+    with open(filepath, 'wb') as f:
+        f.write(CONTAINER_HEADER.pack(CONTAINER_MAGIC, CONTAINER_VERSION, len(index), data_offset))
+        f.write(index)
+        for offset, array in arrays:
+            f.seek(data_offset + offset)
+            array.tofile(f)
+        f.truncate(data_offset + data_size)
+
+
+def unpack_array_references(value, buffer, data_offset):
+    if isinstance(value, ArrayReference):
+        dtype = np.dtype(value.dtype)
+        offset = data_offset + value.offset
+        nbytes = int(np.prod(value.shape, dtype=np.int64)) * dtype.itemsize
+        return buffer[offset:offset + nbytes].view(dtype=dtype, type=np.ndarray).reshape(value.shape)
+    elif isinstance(value, dict):
+        return type(value)((key, unpack_array_references(child, buffer, data_offset)) for key, child in value.items())
+    elif type(value) in (list, tuple):
+        return type(value)(unpack_array_references(child, buffer, data_offset) for child in value)
+    return value
+
+
+def load_binary_container(filepath):
+    """
+    The file stays mapped while the returned arrays are referenced.
+    """
+    buffer = np.memmap(filepath, dtype=np.uint8, mode='c')
+    magic, version, index_size, data_offset = CONTAINER_HEADER.unpack(buffer[:CONTAINER_HEADER.size].tobytes())
+    if CONTAINER_MAGIC != magic:
+        raise ValueError("%s is not a binary container file." % filepath)
+    if CONTAINER_VERSION < version:
+        raise ValueError("%s is a newer container version. (%d)" % (filepath, version))
+
+    index_offset = CONTAINER_HEADER.size
+    index = pickle.loads(buffer[index_offset:index_offset + index_size].tobytes())
+    # unpack is not a closure of the buffer, the closure would keep the file mapped until the garbage collection.
+    return unpack_array_references(index, buffer, data_offset)
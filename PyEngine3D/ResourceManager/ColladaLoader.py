@@ -6,6 +6,7 @@ import re
 import traceback
 import copy
 from collections import OrderedDict
+from xml.etree import ElementTree
 
 import numpy as np
 
@@ -41,10 +42,59 @@ def convert_list(data, data_type=float, stride=1):
         return [data_list[i * stride:i * stride + stride] for i in range(int(len(data_list) / stride))]
 
 
-def parsing_source_data(xml_element):
+# the texts of these elements are parsed to the numpy arrays while streaming, see load_collada_xml
+NUMBER_ARRAY_TAGS = {
+    'float_array': np.float32,
+    'int_array': np.int64,
+    'p': np.int64,
+    'v': np.int64,
+    'vcount': np.int64,
+}
+
+
+def parsing_number_array(text, dtype=np.float32):
+    if text:
+        return np.fromstring(text, dtype=dtype, sep=' ')
+    return np.zeros(0, dtype=dtype)
+
+
+def load_collada_xml(filepath):
+    """
+    Stream the document with iterparse. The namespace is removed from the tags,
+    and the number arrays are parsed as soon as their elements end, so the large texts are released early.
+    :return: root element, { element : numpy array }
+    """
+    arrays = {}
+    context = ElementTree.iterparse(filepath, events=('end',))
+    for event, xml_element in context:
+        tag = xml_element.tag
+        if '}' in tag:
+            tag = tag.split('}', 1)[1]
+            xml_element.tag = tag
+        dtype = NUMBER_ARRAY_TAGS.get(tag)
+        if dtype is not None:
+            arrays[xml_element] = parsing_number_array(xml_element.text, dtype)
+            xml_element.text = None
+    return context.root, arrays
+
+
+def get_xml_array(xml_element, arrays, dtype=np.float32):
+    """
+    :param arrays: { element : numpy array } of load_collada_xml
+    :return: 1d numpy array of the numbers of the element
+    """
+    if xml_element is None:
+        return np.zeros(0, dtype=dtype)
+    if xml_element in arrays:
+        return arrays[xml_element]
+    return parsing_number_array(xml_element.text, dtype)
+
+
+def parsing_source_data(xml_element, arrays):
     """
     :param xml_element:
-    :return: {'source_id':source_data}
+    :param arrays: { element : numpy array } of load_collada_xml
+    :return: {'source_id':source_data}, source_data is (count x stride) numpy array or list of names.
     """
     sources = {}
     for xml_source in xml_element.findall('source'):
@@ -52,17 +102,47 @@ def parsing_source_data(xml_element):
         stride = get_xml_attrib(xml_source.find('technique_common/accessor'), 'stride')
         stride = convert_int(stride, 0)
         source_data = None
-        for tag, data_type in [('float_array', float), ('Name_array', str)]:
-            xml_array = xml_source.find(tag)
+        xml_array = xml_source.find('float_array')
+        if xml_array is not None:
+            source_data = get_xml_array(xml_array, arrays, np.float32)
+            if 1 < stride:
+                source_data = source_data[:len(source_data) // stride * stride].reshape(-1, stride)
+        else:
+            xml_array = xml_source.find('Name_array')
             if xml_array is not None:
                 source_text = get_xml_text(xml_array)
                 if source_text:
-                    source_data = convert_list(source_text, data_type, stride)
-                break
+                    source_data = convert_list(source_text, str, stride)
         sources[source_id] = source_data
     return sources
 
 
+def get_semantic_stride(semantics):
+    """
+    :return: count of the indices per vertex. the inputs can share the offset.
+    """
+    return max([semantic['offset'] for semantic in semantics.values()], default=-1) + 1
+
+
+def triangulate_polygons(vertex_counts):
+    """
+    Triangulate the polygons as the fans around the second vertex, (0, 1, 2), (2, 1, 3), (3, 1, 4) ...
+    :param vertex_counts: vertex count of each polygon
+    :return: corner indices of the triangles into the flattened vertices of the polygons
+    """
+    vertex_counts = np.asarray(vertex_counts, dtype=np.int64)
+    polygon_starts = np.cumsum(vertex_counts) - vertex_counts
+    triangle_counts = np.maximum(vertex_counts - 2, 0)
+    polygons = np.repeat(np.arange(len(vertex_counts)), triangle_counts)
+    triangles = np.arange(len(polygons)) - np.repeat(np.cumsum(triangle_counts) - triangle_counts, triangle_counts)
+    starts = polygon_starts[polygons]
+    corners = np.empty((len(polygons), 3), dtype=np.int64)
+    corners[:, 0] = np.where(0 == triangles, starts, starts + triangles + 1)
+    corners[:, 1] = starts + 1
+    corners[:, 2] = starts + triangles + 2
+    return corners.reshape(-1)
+
+
 def parsing_sematic(xml_element):
     """
     :param xml_element:
@@ -113,22 +193,21 @@ class ColladaNode:
         xml_matrix = xml_node.find('matrix')
         if xml_matrix is not None:
             # transform matrix
-            matrix = get_xml_text(xml_matrix)
-            matrix = [eval(x) for x in matrix.split()]
+            matrix = parsing_number_array(get_xml_text(xml_matrix))
             if len(matrix) == 16:
                 self.matrix = np.array(matrix, dtype=np.float32).reshape(4, 4)
         else:
             # location, rotation, scale
             xml_translate = xml_node.find('translate')
             if xml_translate is not None:
-                translation = [eval(x) for x in get_xml_text(xml_translate).split()]
+                translation = parsing_number_array(get_xml_text(xml_translate))
                 if len(translation) == 3:
                     matrix_translate(self.matrix, *translation)
                 else:
                     logger.error('%s node has a invalid translate.' % self.name)
             xml_rotates = xml_node.findall('rotate')
             for xml_rotate in xml_rotates:
-                rotation = [eval(x) for x in get_xml_text(xml_rotate).split()]
+                rotation = parsing_number_array(get_xml_text(xml_rotate))
                 if len(rotation) == 4:
                     axis = get_xml_attrib(xml_rotate, 'sid')
                     if axis == 'rotationX':
@@ -141,7 +220,7 @@ class ColladaNode:
                         logger.error('%s node has a invalid rotate.' % self.name)
             xml_scale = xml_node.find('scale')
             if xml_scale is not None:
-                scale = [eval(x) for x in get_xml_text(xml_scale).split()]
+                scale = parsing_number_array(get_xml_text(xml_scale))
                 if len(scale) == 3:
                     matrix_scale(self.matrix, *scale)
                 else:
@@ -149,7 +228,7 @@ class ColladaNode:
 
 
 class ColladaContoller:
-    def __init__(self, xml_controller):
+    def __init__(self, xml_controller, arrays):
         self.valid = False
         self.name = get_xml_attrib(xml_controller, 'name').replace('.', '_')
         self.id = get_xml_attrib(xml_controller, 'id').replace('.', '_')
@@ -157,13 +236,13 @@ class ColladaContoller:
         self.bind_shape_matrix = Matrix4()
 
         self.bone_names = []
-        self.bone_indicies = []
-        self.bone_weights = []
+        self.bone_indicies = np.zeros((0, 4), dtype=np.float32)
+        self.bone_weights = np.zeros((0, 4), dtype=np.float32)
         self.inv_bind_matrices = []
 
-        self.parsing(xml_controller)
+        self.parsing(xml_controller, arrays)
 
-    def parsing(self, xml_controller):
+    def parsing(self, xml_controller, arrays):
         xml_skin = xml_controller.find('skin')
         if xml_skin is not None:
             self.skin_source = get_xml_attrib(xml_skin, 'source', "")
@@ -173,12 +252,12 @@ class ColladaContoller:
             # parsing bind_shape_matrix
             bind_shape_matrix = get_xml_text(xml_skin.find('bind_shape_matrix'), None)
             if bind_shape_matrix:
-                self.bind_shape_matrix = np.array(convert_list(bind_shape_matrix), dtype=np.float32).reshape(4, 4)
+                self.bind_shape_matrix = parsing_number_array(bind_shape_matrix).reshape(4, 4)
             else:
                 self.bind_shape_matrix = Matrix4()
 
             # parse sources
-            sources = parsing_source_data(xml_skin)
+            sources = parsing_source_data(xml_skin, arrays)
 
             # get vertex position source id
             xml_joints = xml_skin.find('joints')
@@ -193,42 +272,49 @@ class ColladaContoller:
                 weights_semantics = parsing_sematic(xml_vertex_weights)
 
                 # parse vertex weights
-                vcount_text = get_xml_text(xml_vertex_weights.find('vcount'))
-                v_text = get_xml_text(xml_vertex_weights.find('v'))
-                vcount_list = convert_list(vcount_text, int)
-                v_list = convert_list(v_text, int)
+                vcount_list = get_xml_array(xml_vertex_weights.find('vcount'), arrays, np.int64)
+                v_list = get_xml_array(xml_vertex_weights.find('v'), arrays, np.int64)
 
                 # make geomtry data
                 self.build(sources, joins_semantics, weights_semantics, vcount_list, v_list)
                 return  # done
 
     def build(self, sources, joins_semantics, weights_semantics, vcount_list, v_list):
-        semantic_stride = len(weights_semantics)
-        # build weights and indicies
+        """
+        Pack the influences of the vertices to the (vertex count x max_bone) arrays.
+        The vertices which have more influences keep the largest weights, and the weights are normalized.
+        """
+        semantic_stride = get_semantic_stride(weights_semantics)
         max_bone = 4  # max influence bone count per vertex
+        vertex_count = len(vcount_list)
         weight_source_id = weights_semantics['WEIGHT']['source']
         weight_sources = sources[weight_source_id]
-        index = 0
-        for vcount in vcount_list:
-            bone_indicies = []
-            bone_weights = []
-            indicies = v_list[index: index + vcount * semantic_stride]
-            index += vcount * semantic_stride
-            for v in range(max_bone):
-                if 'JOINT' in weights_semantics:
-                    offset = weights_semantics['JOINT']['offset']
-                    if v < vcount:
-                        bone_indicies.append(indicies[offset + v * semantic_stride])
-                    else:
-                        bone_indicies.append(0)
-                if 'WEIGHT' in weights_semantics:
-                    offset = weights_semantics['WEIGHT']['offset']
-                    if v < vcount:
-                        bone_weights.append(weight_sources[indicies[offset + v * semantic_stride]])
-                    else:
-                        bone_weights.append(0.0)
-            self.bone_indicies.append(bone_indicies)
-            self.bone_weights.append(bone_weights)
+
+        # (vertex count x max influence count) matrix of the rows of v_list, the empty influences are masked.
+        influence_count = max(max_bone, int(vcount_list.max())) if 0 < vertex_count else max_bone
+        influence_rows = np.arange(influence_count)
+        valid = influence_rows < vcount_list[:, np.newaxis]
+        influence_rows = (influence_rows + (np.cumsum(vcount_list) - vcount_list)[:, np.newaxis])[valid]
+        v_rows = v_list[:len(v_list) // semantic_stride * semantic_stride].reshape(-1, semantic_stride)[influence_rows]
+
+        bone_indicies = np.zeros(valid.shape, dtype=np.float32)
+        if 'JOINT' in weights_semantics:
+            bone_indicies[valid] = v_rows[:, weights_semantics['JOINT']['offset']]
+
+        bone_weights = np.zeros(valid.shape, dtype=np.float32)
+        weight_sources = np.asarray(weight_sources, dtype=np.float32)
+        bone_weights[valid] = weight_sources[v_rows[:, weights_semantics['WEIGHT']['offset']]]
+
+        # top influences in the order of the document
+        if max_bone < influence_count:
+            top_influences = np.sort(np.argsort(-bone_weights, axis=1, kind='stable')[:, :max_bone], axis=1)
+            bone_indicies = np.take_along_axis(bone_indicies, top_influences, axis=1)
+            bone_weights = np.take_along_axis(bone_weights, top_influences, axis=1)
+
+        weight_sums = np.sum(bone_weights, axis=1, keepdims=True)
+        self.bone_indicies = bone_indicies
+        self.bone_weights = bone_weights / np.where(0.0 < weight_sums, weight_sums, 1.0)
+
         # joints
         if 'JOINT' in joins_semantics:
             joints_source = joins_semantics['JOINT'].get('source', '')
@@ -236,14 +322,13 @@ class ColladaContoller:
         # INV_BIND_MATRIX
         if 'INV_BIND_MATRIX' in joins_semantics:
             inv_bind_matrix_source = joins_semantics['INV_BIND_MATRIX'].get('source', '')
-            self.inv_bind_matrices = sources.get(inv_bind_matrix_source, [])
-            self.inv_bind_matrices = [np.array(inv_bind_matrix, dtype=np.float32).reshape(4, 4) for inv_bind_matrix in
-                                      self.inv_bind_matrices]
+            inv_bind_matrices = sources.get(inv_bind_matrix_source, [])
+            self.inv_bind_matrices = list(np.array(inv_bind_matrices, dtype=np.float32).reshape(-1, 4, 4))
         self.valid = True
 
 
 class ColladaAnimation:
-    def __init__(self, xml_animation):
+    def __init__(self, xml_animation, arrays):
         self.valid = False
         self.id = get_xml_attrib(xml_animation, 'id').replace('.', '_')
 
@@ -255,10 +340,15 @@ class ColladaAnimation:
         self.in_tangents = []
         self.out_tangents = []
 
-        self.parsing(xml_animation)
+        self.parsing(xml_animation, arrays)
 
-    def parsing(self, xml_animation):
-        sources = parsing_source_data(xml_animation)
+    @staticmethod
+    def get_source_list(sources, source_name):
+        source_data = sources.get(source_name)
+        return [] if source_data is None else list(source_data)
+
+    def parsing(self, xml_animation, arrays):
+        sources = parsing_source_data(xml_animation, arrays)
 
         joins_semantics = {}
         xml_sampler = xml_animation.find('sampler')
@@ -272,23 +362,23 @@ class ColladaAnimation:
 
         if 'INPUT' in joins_semantics:
             source_name = joins_semantics['INPUT'].get('source', '')
-            self.inputs = sources.get(source_name, [])
+            self.inputs = self.get_source_list(sources, source_name)
 
         if 'OUTPUT' in joins_semantics:
             source_name = joins_semantics['OUTPUT'].get('source', '')
-            self.outputs = sources.get(source_name, [])
+            self.outputs = self.get_source_list(sources, source_name)
 
         if 'INTERPOLATION' in joins_semantics:
             source_name = joins_semantics['INTERPOLATION'].get('source', '')
-            self.interpolations = sources.get(source_name, [])
+            self.interpolations = self.get_source_list(sources, source_name)
 
         if 'IN_TANGENT' in joins_semantics:
             source_name = joins_semantics['IN_TANGENT'].get('source', '')
-            self.in_tangents = sources.get(source_name, [])
+            self.in_tangents = self.get_source_list(sources, source_name)
 
         if 'OUT_TANGENT' in joins_semantics:
             source_name = joins_semantics['OUT_TANGENT'].get('source', '')
-            self.out_tangents = sources.get(source_name, [])
+            self.out_tangents = self.get_source_list(sources, source_name)
         self.valid = True
 
         # print()
@@ -297,18 +387,18 @@ class ColladaAnimation:
 
 
 class ColladaGeometry:
-    def __init__(self, xml_geometry, controllers, nodes):
+    def __init__(self, xml_geometry, arrays, controllers, nodes):
         self.valid = False
         self.name = get_xml_attrib(xml_geometry, 'name').replace('.', '_')
         self.id = get_xml_attrib(xml_geometry, 'id').replace('.', '_')
 
-        self.positions = []
-        self.bone_indicies = []
-        self.bone_weights = []
-        self.normals = []
-        self.colors = []
-        self.texcoords = []
-        self.indices = []
+        self.positions = np.zeros(0, dtype=np.float32)
+        self.bone_indicies = np.zeros(0, dtype=np.float32)
+        self.bone_weights = np.zeros(0, dtype=np.float32)
+        self.normals = np.zeros(0, dtype=np.float32)
+        self.colors = np.zeros(0, dtype=np.float32)
+        self.texcoords = np.zeros(0, dtype=np.float32)
+        self.indices = np.zeros(0, dtype=np.uint32)
 
         # find matched controller
         self.controller = None
@@ -328,13 +418,13 @@ class ColladaGeometry:
             # precompute bind_shape_matrix as coulmn-major matrix calculation.
             self.bind_shape_matrix = np.dot(controller.bind_shape_matrix, self.bind_shape_matrix)
 
-        self.parsing(xml_geometry)
+        self.parsing(xml_geometry, arrays)
 
-    def parsing(self, xml_geometry):
+    def parsing(self, xml_geometry, arrays):
         xml_mesh = xml_geometry.find('mesh')
         if xml_mesh is not None:
             # parse sources
-            sources = parsing_source_data(xml_mesh)
+            sources = parsing_source_data(xml_mesh, arrays)
 
             # get vertex position source id
             position_source_id = ""
@@ -351,91 +441,100 @@ class ColladaGeometry:
                 if xml_polygons is not None:
                     # parse semantic
                     semantics = parsing_sematic(xml_polygons)
-                    semantic_stride = len(semantics)
+                    semantic_stride = get_semantic_stride(semantics)
+                    if semantic_stride < 1:
+                        return
 
-                    # parse polygon indices
-                    vertex_index_list = []  # flatten vertex list as triangle
+                    # parse polygon indices as (vertex count x semantic stride) matrix
                     if tag == 'triangles':
-                        vertex_index_list = get_xml_text(xml_polygons.find('p'))
-                        vertex_index_list = convert_list(vertex_index_list, int)
-                    elif tag == 'polylist' or tag == 'polygons':
-                        vcount_list = []
-                        polygon_index_list = []
+                        vertex_index_list = get_xml_array(xml_polygons.find('p'), arrays, np.int64)
+                        vertex_count = len(vertex_index_list) // semantic_stride // 3 * 3
+                        vertex_index_list = vertex_index_list[:vertex_count * semantic_stride]
+                        vertex_index_list = vertex_index_list.reshape(vertex_count, semantic_stride)
+                    else:
                         if tag == 'polylist':
-                            vcount_list = convert_list(get_xml_text(xml_polygons.find('vcount')), int)
-                            # flatten list
-                            polygon_index_list = convert_list(get_xml_text(xml_polygons.find('p')), int)
-                        elif tag == 'polygons':
-                            for xml_p in xml_polygons.findall('p'):
-                                polygon_indices = convert_list(get_xml_text(xml_p), int)
-                                # flatten list
-                                polygon_index_list += polygon_indices
-                                vcount_list.append(int(len(polygon_indices) / semantic_stride))
+                            vcount_list = get_xml_array(xml_polygons.find('vcount'), arrays, np.int64)
+                            polygon_index_list = get_xml_array(xml_polygons.find('p'), arrays, np.int64)
+                        else:
+                            polygon_index_lists = [get_xml_array(xml_p, arrays, np.int64)
+                                                   for xml_p in xml_polygons.findall('p')]
+                            vcount_list = np.array([len(polygon_indices) // semantic_stride
+                                                    for polygon_indices in polygon_index_lists], dtype=np.int64)
+                            polygon_index_lists = [polygon_indices[:len(polygon_indices) // semantic_stride *
+                                                                   semantic_stride]
+                                                   for polygon_indices in polygon_index_lists]
+                            polygon_index_list = np.concatenate(polygon_index_lists) if polygon_index_lists else \
+                                np.zeros(0, dtype=np.int64)
+                        polygon_index_list = polygon_index_list.reshape(-1, semantic_stride)
                         # triangulate
-                        elapsed_vindex = 0
-                        for vcount in vcount_list:
-                            if vcount == 3:
-                                vertex_index_list += polygon_index_list[
-                                                     elapsed_vindex: elapsed_vindex + vcount * semantic_stride]
-                            else:
-                                polygon_indices = polygon_index_list[
-                                                  elapsed_vindex: elapsed_vindex + vcount * semantic_stride]
-                                vertex_index_list += convert_triangulate(polygon_indices, vcount, semantic_stride)
-                            elapsed_vindex += vcount * semantic_stride
+                        vertex_index_list = polygon_index_list[triangulate_polygons(vcount_list)]
                     # make geomtry data
-                    self.build(sources, position_source_id, semantics, semantic_stride, vertex_index_list)
+                    self.build(sources, position_source_id, semantics, vertex_index_list)
                     return  # done
 
-    def build(self, sources, position_source_id, semantics, semantic_stride, vertex_index_list):
+    def build(self, sources, position_source_id, semantics, vertex_index_list):
+        """
+        :param vertex_index_list: (vertex count x semantic stride) indices of the triangles
+        """
         # check vertex count with bone weight count
         if self.controller:
-            vertex_count = len(sources[position_source_id]) if position_source_id  else 0
+            vertex_count = len(sources[position_source_id]) if position_source_id else 0
             bone_weight_count = len(self.controller.bone_indicies)
             if vertex_count != bone_weight_count:
                 logger.error(
                     "Different count. vertex_count : %d, bone_weight_count : %d" % (vertex_count, bone_weight_count))
                 return
 
-        indexMap = {}
-        for i in range(int(len(vertex_index_list) / semantic_stride)):
-            vertIndices = tuple(vertex_index_list[i * semantic_stride: i * semantic_stride + semantic_stride])
-            if vertIndices in indexMap:
-                self.indices.append(indexMap[vertIndices])
+        # unique the index tuples, and keep the order of first appearance.
+        if 0 == len(vertex_index_list):
+            index_keys = vertex_index_list
+            vertex_indices = np.zeros(0, dtype=np.int64)
+        else:
+            key_sizes = vertex_index_list.max(axis=0) + 1
+            if 0 <= vertex_index_list.min() and np.prod(key_sizes.astype(np.float64)) < np.iinfo(np.int64).max:
+                # pack the index tuple into one integer key, it is much faster than unique of rows.
+                packed_keys = np.zeros(len(vertex_index_list), dtype=np.int64)
+                for i, key_size in enumerate(key_sizes):
+                    packed_keys = packed_keys * key_size + vertex_index_list[:, i]
+                packed_keys, first_indices, inverse = np.unique(packed_keys, return_index=True, return_inverse=True)
+                index_keys = vertex_index_list[first_indices]
             else:
-                self.indices.append(len(indexMap))
-                indexMap[vertIndices] = len(indexMap)
-
-                if 'VERTEX' in semantics:
-                    source_id = position_source_id
-                    offset = semantics['VERTEX']['offset']
-                    posisiton = sources[source_id][vertIndices[offset]]
-                    self.positions.append(posisiton)
-                    if self.controller:
-                        self.bone_indicies.append(self.controller.bone_indicies[vertIndices[offset]])
-                        self.bone_weights.append(self.controller.bone_weights[vertIndices[offset]])
-
-                if 'NORMAL' in semantics:
-                    source_id = semantics['NORMAL']['source']
-                    offset = semantics['NORMAL']['offset']
-                    normal = sources[source_id][vertIndices[offset]]
-                    self.normals.append(normal)
-
-                if 'COLOR' in semantics:
-                    source_id = semantics['COLOR']['source']
-                    offset = semantics['COLOR']['offset']
-                    self.colors.append(sources[source_id][vertIndices[offset]])
-
-                if 'TEXCOORD' in semantics:
-                    source_id = semantics['TEXCOORD']['source']
-                    offset = semantics['TEXCOORD']['offset']
-                    self.texcoords.append(sources[source_id][vertIndices[offset]])
+                index_keys, first_indices, inverse = np.unique(vertex_index_list, axis=0, return_index=True,
+                                                               return_inverse=True)
+            order = np.argsort(first_indices)
+            vertex_indices = np.empty_like(order)
+            vertex_indices[order] = np.arange(len(order))
+            index_keys = index_keys[order]
+            vertex_indices = vertex_indices[inverse.reshape(-1)]
+        self.indices = vertex_indices.astype(np.uint32)
+
+        def get_source_data(semantic):
+            source_id = position_source_id if 'VERTEX' == semantic else semantics[semantic]['source']
+            source_data = sources[source_id]
+            return source_data[index_keys[:, semantics[semantic]['offset']]]
+
+        if 'VERTEX' in semantics:
+            self.positions = get_source_data('VERTEX').astype(np.float32)
+            if self.controller:
+                position_indices = index_keys[:, semantics['VERTEX']['offset']]
+                self.bone_indicies = self.controller.bone_indicies[position_indices]
+                self.bone_weights = self.controller.bone_weights[position_indices]
+
+        if 'NORMAL' in semantics:
+            self.normals = get_source_data('NORMAL').astype(np.float32)
+
+        if 'COLOR' in semantics:
+            self.colors = get_source_data('COLOR').astype(np.float32)
+
+        if 'TEXCOORD' in semantics:
+            self.texcoords = get_source_data('TEXCOORD').astype(np.float32)
         self.valid = True
 
 
 class Collada:
     def __init__(self, filepath):
         try:
-            xml_root = load_xml(filepath)
+            xml_root, arrays = load_collada_xml(filepath)
         except:
             logger.error(traceback.format_exc())
             return
@@ -461,15 +560,15 @@ class Collada:
             self.nodes.append(node)
 
         for xml_controller in xml_root.findall('library_controllers/controller'):
-            controller = ColladaContoller(xml_controller)
+            controller = ColladaContoller(xml_controller, arrays)
             self.controllers.append(controller)
 
         for xml_animation in xml_root.findall('library_animations/animation'):
-            animation = ColladaAnimation(xml_animation)
+            animation = ColladaAnimation(xml_animation, arrays)
             self.animations.append(animation)
 
         for xml_geometry in xml_root.findall('library_geometries/geometry'):
-            geometry = ColladaGeometry(xml_geometry, self.controllers, self.nodes)
+            geometry = ColladaGeometry(xml_geometry, arrays, self.controllers, self.nodes)
             self.geometries.append(geometry)
 
     def get_mesh_data(self):
@@ -531,37 +630,44 @@ class Collada:
             )
 
         def get_animation_node_data(animation_node_name, animation_node):
+            transforms = np.array(animation_node.outputs, dtype=np.float32).reshape(-1, 4, 4)
             return dict(
                 name=animation_node_name,
                 target=animation_node.target,
                 times=animation_node.inputs,
                 # transforms=[matrix for matrix in transforms],
-                locations=[extract_location(matrix) for matrix in animation_node.outputs],
-                rotations=[extract_rotation(matrix) for matrix in animation_node.outputs],
-                scales=[np.array([1.0, 1.0, 1.0], dtype=np.float32) for matrix in animation_node.outputs],
+                locations=list(extract_locations(transforms)),
+                rotations=list(extract_rotations(transforms)),
+                scales=list(np.ones((len(transforms), 3), dtype=np.float32)),
                 interpoations=animation_node.interpolations,
                 in_tangents=animation_node.in_tangents,
                 out_tangents=animation_node.out_tangents
             )
 
-        def precompute_animation(children_hierachy, bone_names, inv_bind_matrices, parent_matrix, frame=0):
+        def get_transforms(animation_node, frame_count):
+            # (frame count x 4 x 4) stack of the transposed matrices of the frames
+            transforms = np.array(animation_node.outputs[:frame_count], dtype=np.float32)
+            return transforms.reshape(-1, 4, 4).transpose(0, 2, 1)
+
+        def precompute_animation(children_hierachy, bone_names, inv_bind_matrices, parent_transforms):
             for child in children_hierachy:
                 for child_anim in self.animations:
                     if child_anim.target == child:
+                        frame_count = min(len(child_anim.outputs), len(parent_transforms))
                         # just Transpose child bones, no swap y-z.
-                        child_transform = np.array(child_anim.outputs[frame], dtype=np.float32).reshape(4, 4).T
+                        child_transforms = get_transforms(child_anim, frame_count)
                         if use_accumulated_transform:
-                            child_transform = np.dot(child_transform, parent_matrix)
+                            child_transforms = np.matmul(child_transforms, parent_transforms[:frame_count])
 
                         if use_relative_matrix:
                             child_bone_index = bone_names.index(child_anim.target)
                             child_inv_bind_matrix = inv_bind_matrices[child_bone_index]
-                            child_anim.outputs[frame] = np.dot(child_inv_bind_matrix, child_transform)
+                            child_anim.outputs[:frame_count] = list(np.matmul(child_inv_bind_matrix, child_transforms))
                         else:
-                            child_anim.outputs[frame] = child_transform
+                            child_anim.outputs[:frame_count] = list(child_transforms)
                         # recursive precompute animation
                         precompute_animation(children_hierachy[child_anim.target], bone_names, inv_bind_matrices,
-                                             child_transform, frame)
+                                             child_transforms)
                         break
 
         # precompute_animation
@@ -578,20 +684,19 @@ class Collada:
 
                 # Find root bone and skeleton data
                 if animation.target in hierachy:
-                    # precompute all animation frames
-                    for frame, transform in enumerate(animation.outputs):
-                        # only root bone adjust convert_matrix for swap Y-Z Axis
-                        transform = swap_up_axis_matrix(np.array(transform, dtype=np.float32).reshape(4, 4), True,
-                                                        False, self.up_axis)
-                        if use_relative_matrix:
-                            bone_index = bone_names.index(animation.target)
-                            inv_bind_matrix = inv_bind_matrices[bone_index]
-                            animation.outputs[frame] = np.dot(inv_bind_matrix, transform)
-                        else:
-                            animation.outputs[frame] = transform
-                        # recursive precompute animation
-                        precompute_animation(hierachy[animation.target], bone_names, inv_bind_matrices, transform,
-                                             frame)
+                    # precompute all animation frames, only root bone adjust convert_matrix for swap Y-Z Axis
+                    transforms = get_transforms(animation, len(animation.outputs))
+                    if self.up_axis == 'Z_UP':
+                        transforms = np.matmul(transforms, get_rotation_matrix_x(-HALF_PI))
+
+                    if use_relative_matrix:
+                        bone_index = bone_names.index(animation.target)
+                        inv_bind_matrix = inv_bind_matrices[bone_index]
+                        animation.outputs[:] = list(np.matmul(inv_bind_matrix, transforms))
+                    else:
+                        animation.outputs[:] = list(transforms)
+                    # recursive precompute animation
+                    precompute_animation(hierachy[animation.target], bone_names, inv_bind_matrices, transforms)
             # generate animation data
             animation_data = []  # bone animation data list order by bone index
             animation_datas.append(animation_data)
@@ -612,45 +717,47 @@ class Collada:
         geometry_datas = []
         for geometry in self.geometries:
             skeleton_name = ""
-            bone_indicies = []
-            bone_weights = []
+            bone_indicies = np.zeros(0, dtype=np.float32)
+            bone_weights = np.zeros(0, dtype=np.float32)
 
             if geometry.controller:
                 skeleton_name = geometry.controller.name
-                bone_indicies = copy.deepcopy(geometry.bone_indicies)
-                bone_weights = copy.deepcopy(geometry.bone_weights)
+                bone_indicies = geometry.bone_indicies.copy()
+                bone_weights = geometry.bone_weights.copy()
 
             # swap y and z
             geometry.bind_shape_matrix = swap_up_axis_matrix(geometry.bind_shape_matrix, True, False, self.up_axis)
 
-            # precompute bind_shape_matrix
-            boundMin = Float3(FLOAT32_MAX, FLOAT32_MAX, FLOAT32_MAX)
-            boundMax = Float3(FLOAT32_MIN, FLOAT32_MIN, FLOAT32_MIN)
-            for i, position in enumerate(geometry.positions):
-                geometry.positions[i] = np.dot([position[0], position[1], position[2], 1.0], geometry.bind_shape_matrix)[:3]
-                position = geometry.positions[i]
-                for j in range(3):
-                    if boundMin[j] > position[j]:
-                        boundMin[j] = position[j]
-                    if boundMax[j] < position[j]:
-                        boundMax[j] = position[j]
-
-            for i, normal in enumerate(geometry.normals):
-                geometry.normals[i] = np.dot([normal[0], normal[1], normal[2], 0.0], geometry.bind_shape_matrix)[:3]
-                geometry.normals[i] = normalize(geometry.normals[i])
+            # precompute bind_shape_matrix, the vectors are the rows.
+            bind_shape_matrix = np.array(geometry.bind_shape_matrix, dtype=np.float64)
+            positions = geometry.positions.copy()
+            if 0 < len(positions):
+                positions = np.dot(positions[:, :3], bind_shape_matrix[:3, :3]) + bind_shape_matrix[3, :3]
+                positions = positions.astype(np.float32)
+
+            normals = geometry.normals.copy()
+            if 0 < len(normals):
+                normals = normalize_array(np.dot(normals[:, :3], bind_shape_matrix[:3, :3])).astype(np.float32)
+
+            if 0 < len(positions):
+                boundMin = positions.min(axis=0)
+                boundMax = positions.max(axis=0)
+            else:
+                boundMin = Float3(FLOAT32_MAX, FLOAT32_MAX, FLOAT32_MAX)
+                boundMax = Float3(FLOAT32_MIN, FLOAT32_MIN, FLOAT32_MIN)
 
             geometry_data = dict(
                 name=geometry.name,
-                positions=copy.deepcopy(geometry.positions),
-                normals=copy.deepcopy(geometry.normals),
-                colors=copy.deepcopy(geometry.colors),
-                texcoords=copy.deepcopy(geometry.texcoords),
-                indices=copy.deepcopy(geometry.indices),
+                positions=positions,
+                normals=normals,
+                colors=geometry.colors.copy(),
+                texcoords=geometry.texcoords.copy(),
+                indices=geometry.indices.copy(),
                 skeleton_name=skeleton_name,
-                bone_indicies=copy.deepcopy(bone_indicies),
-                bone_weights=copy.deepcopy(bone_weights),
-                bound_min=copy.deepcopy(boundMin),
-                bound_max=copy.deepcopy(boundMax),
+                bone_indicies=bone_indicies,
+                bone_weights=bone_weights,
+                bound_min=boundMin,
+                bound_max=boundMax,
                 radius=length(np.maximum(abs(boundMax), abs(boundMin)))
             )
 
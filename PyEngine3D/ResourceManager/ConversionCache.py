@@ -0,0 +1,154 @@
+"""
+Content addressed cache of the converted resource files, shared by the projects and the clones on the machine.
+
+    key : sha1 of the source file bytes, the loader, the resource version and the import options,
+          so an unchanged source file is not converted again even if its modify time is changed,
+          and the identical source files share one converted result.
+    file : the converted resource file as it is saved by the loader.
+
+The least recently used entries are deleted when the total size exceeds max_size.
+"""
+
+from collections import OrderedDict
+import hashlib
+import os
+import shutil
+import traceback
+
+from PyEngine3D.Common import logger
+from PyEngine3D.Utilities import check_directory_and_mkdir
+
+
+CONVERSION_CACHE_EXT = '.cache'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_default_conversion_cache_path():
+    return os.path.join(os.path.expanduser("~"), ".cache", "PyEngine3D", "ConversionCache")
+
+
+class ConversionCache:
+    def __init__(self, cache_path, max_size):
+        self.cache_path = cache_path or get_default_conversion_cache_path()
+        self.max_size = max_size
+        self.entries = OrderedDict()  # { key : file size }, from the least recently used
+        self.total_size = 0
+
+        if self.is_enabled():
+            try:
+                check_directory_and_mkdir(self.cache_path)
+            except BaseException:
+                logger.error("Cannot create the conversion cache : %s" % self.cache_path)
+                self.max_size = 0
+                return
+
+            entries = []
+            for filename in os.listdir(self.cache_path):
+                if filename.endswith(CONVERSION_CACHE_EXT):
+                    stat = os.stat(os.path.join(self.cache_path, filename))
+                    entries.append((stat.st_mtime, filename[:-len(CONVERSION_CACHE_EXT)], stat.st_size))
+            for modify_time, key, size in sorted(entries):
+                self.entries[key] = size
+                self.total_size += size
+            self.evict()
+
+    def is_enabled(self):
+        return 0 < self.max_size
+
+    @staticmethod
+    def get_source_hash(source_filepath):
+        """
+        :return: sha1 of the file bytes, "" if the file can not be read.
+        """
+        sha1 = hashlib.sha1()
+        try:
+            with open(source_filepath, 'rb') as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                    sha1.update(chunk)
+        except BaseException:
+            logger.error(traceback.format_exc())
+            return ""
+        return sha1.hexdigest()
+
+    @staticmethod
+    def get_key(source_hash, loader_name, resource_version, import_options):
+        """
+        :param import_options: dict of the options which change the converted result.
+        """
+        sha1 = hashlib.sha1()
+        for info in (source_hash, loader_name, resource_version):
+            sha1.update(str(info).encode('utf-8'))
+            sha1.update(b'\x00')
+        for option_name in sorted(import_options):
+            sha1.update(("%s=%r" % (option_name, import_options[option_name])).encode('utf-8'))
+            sha1.update(b'\x00')
+        return sha1.hexdigest()
+
+    def get_filepath(self, key):
+        return os.path.join(self.cache_path, key + CONVERSION_CACHE_EXT)
+
+    def has(self, key):
+        return key in self.entries
+
+    def load(self, key, save_filepath):
+        """
+        Copy the cached resource file to save_filepath.
+        :return: True if there is the entry.
+        """
+        if key not in self.entries:
+            return False
+
+        filepath = self.get_filepath(key)
+        temp_filepath = save_filepath + '.tmp'
+        try:
+            save_dir = os.path.dirname(save_filepath)
+            if save_dir and not os.path.exists(save_dir):
+                os.makedirs(save_dir)
+            shutil.copyfile(filepath, temp_filepath)
+            os.replace(temp_filepath, save_filepath)
+            # mark as the most recently used
+            os.utime(filepath)
+            self.entries.move_to_end(key)
+            return True
+        except BaseException:
+            logger.error(traceback.format_exc())
+            self.remove(key)
+        return False
+
+    def save(self, key, save_filepath):
+        """
+        Copy the converted resource file to the cache.
+        """
+        if not self.is_enabled() or not os.path.exists(save_filepath):
+            return False
+
+        filepath = self.get_filepath(key)
+        temp_filepath = filepath + '.tmp'
+        try:
+            shutil.copyfile(save_filepath, temp_filepath)
+            os.replace(temp_filepath, filepath)
+        except BaseException:
+            logger.error(traceback.format_exc())
+            return False
+
+        self.total_size -= self.entries.pop(key, 0)
+        self.entries[key] = os.path.getsize(filepath)
+        self.total_size += self.entries[key]
+        self.evict()
+        return True
+
+    def remove(self, key):
+        self.total_size -= self.entries.pop(key, 0)
+        filepath = self.get_filepath(key)
+        if os.path.exists(filepath):
+            try:
+                os.remove(filepath)
+            except BaseException:
+                logger.error(traceback.format_exc())
+
+    def evict(self):
+        # keep the most recently used entry even if it is larger than max_size.
+        while self.max_size < self.total_size and 1 < len(self.entries):
+            key = next(iter(self.entries))
+            logger.info("Evict the converted resource %s" % key)
+            self.remove(key)
@@ -15,6 +15,7 @@ import numpy as np
 from PyEngine3D.Common import logger
 from PyEngine3D.Common.Constants import *
 from PyEngine3D.Utilities import *
+from PyEngine3D.OpenGLContext import OpenGLContext
 
 SIMPLE_VERTEX_SHADER = '''
 #version 430 core
@@ -251,6 +252,9 @@ def DistanceField(font_size, image_width, image_height, image_mode, image_data):
     save_image_data = glGetTexImage(GL_TEXTURE_2D, 0, GL_RGB, GL_UNSIGNED_BYTE)
     glBindTexture(GL_TEXTURE_2D, 0)
 
+    # the gl states are changed without OpenGLContext.
+    OpenGLContext.reset_state()
+
     return save_image_data
 
 
@@ -274,7 +278,11 @@ def generate_font_data(resource_name, distance_field_font, anti_aliasing, font_s
     max_font_size = font_size
     for unicode_index in range(range_min, range_max + 1):
         unicode_text = chr(unicode_index)  # u"\u2605" + u"\u2606" + u"Текст на русском" + u"파이썬"
-        width, height = unicode_font.getsize(unicode_text)
+        if hasattr(unicode_font, 'getsize'):
+            width, height = unicode_font.getsize(unicode_text)
+        else:
+            # Pillow 10 removed getsize.
+            left, top, width, height = unicode_font.getbbox(unicode_text)
         max_font_size = max(max_font_size, max(width, height))
 
     font_size = max_font_size
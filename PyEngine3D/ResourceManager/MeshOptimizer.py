@@ -0,0 +1,218 @@
+"""
+Import time optimization of the triangle meshes for the gpu.
+
+    vertex cache : the triangles are reordered by Tipsify, so the post-transform cache reuses the vertices.
+    overdraw : the clusters of the reordered triangles are sorted to draw the outward facing clusters first.
+    vertex fetch : the vertices are reordered by their first use in the indices.
+    index width : the indices are 16-bit when the vertex count allows.
+
+The effect is measured on the cpu by simulating a FIFO post-transform cache.
+    ACMR : average cache miss ratio, the transformed vertices per triangle. 0.5 is the best for the large grids.
+    ATVR : average transform to vertex ratio, the transformed vertices per referenced vertex. 1.0 is the best.
+
+reference - Sander, Nehab, Barczak, "Fast Triangle Reordering for Vertex Locality and Reduced Overdraw", 2007
+"""
+
+import numpy as np
+
+from PyEngine3D.Utilities import normalize_array
+
+
+VERTEX_CACHE_SIZE = 16
+OVERDRAW_THRESHOLD = 1.05  # the overdraw sort is used if it does not increase ACMR more than the ratio.
+MAX_UINT16_VERTEX_COUNT = 65536
+VERTEX_ATTRIBUTE_NAMES = ('positions', 'colors', 'normals', 'tangents', 'texcoords', 'bone_indicies', 'bone_weights')
+
+
+def get_vertex_cache_statistics(indices, vertex_count, cache_size=VERTEX_CACHE_SIZE):
+    """
+    :return: ACMR, ATVR of the triangle list with the FIFO vertex cache
+    """
+    indices = np.asarray(indices).reshape(-1)
+    triangle_count = len(indices) // 3
+    if 0 == triangle_count:
+        return 0.0, 0.0
+
+    # a vertex is in the cache if it was transformed in the last cache_size misses.
+    cached_at = [-cache_size] * vertex_count
+    misses = 0
+    for index in indices[:triangle_count * 3].tolist():
+        if cache_size <= misses - cached_at[index]:
+            cached_at[index] = misses
+            misses += 1
+    return misses / triangle_count, misses / len(np.unique(indices))
+
+
+def get_cache_flush_triangles(indices, vertex_count, cache_size=VERTEX_CACHE_SIZE):
+    """
+    :return: bool array, the triangles whose all vertices miss the FIFO vertex cache.
+    """
+    triangles = np.asarray(indices).reshape(-1, 3).tolist()
+    cached_at = [-cache_size] * vertex_count
+    misses = 0
+    flushes = []
+    for triangle in triangles:
+        triangle_misses = 0
+        for index in triangle:
+            if cache_size <= misses - cached_at[index]:
+                cached_at[index] = misses
+                misses += 1
+                triangle_misses += 1
+        flushes.append(3 == triangle_misses)
+    return np.array(flushes, dtype=bool)
+
+
+def optimize_vertex_cache(indices, vertex_count, cache_size=VERTEX_CACHE_SIZE):
+    """
+    Tipsify : fan the triangles around the vertices which are still in the cache.
+    :return: order of the triangles
+    """
+    triangles = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    triangle_count = len(triangles)
+    corners = triangles.reshape(-1)
+
+    # triangles adjacent to the vertices
+    live_counts = np.bincount(corners, minlength=vertex_count)
+    offsets = np.concatenate([[0], np.cumsum(live_counts)]).tolist()
+    adjacency = (np.argsort(corners, kind='stable') // 3).tolist()
+    live_counts = live_counts.tolist()
+    triangles = triangles.tolist()
+
+    cache_time = [0] * vertex_count
+    emitted = [False] * triangle_count
+    dead_end_stack = []
+    triangle_order = []
+    timestamp = cache_size + 1
+    cursor = 0
+    fanning_vertex = 0 if 0 < triangle_count else -1
+    while 0 <= fanning_vertex:
+        candidates = []
+        for triangle_index in adjacency[offsets[fanning_vertex]:offsets[fanning_vertex + 1]]:
+            if not emitted[triangle_index]:
+                emitted[triangle_index] = True
+                triangle_order.append(triangle_index)
+                for index in triangles[triangle_index]:
+                    dead_end_stack.append(index)
+                    candidates.append(index)
+                    live_counts[index] -= 1
+                    if cache_size < timestamp - cache_time[index]:
+                        cache_time[index] = timestamp
+                        timestamp += 1
+
+        # the vertex which stays in the cache after fanning its remaining triangles
+        fanning_vertex = -1
+        best_priority = -1
+        for index in candidates:
+            if 0 < live_counts[index]:
+                priority = 0
+                if timestamp - cache_time[index] + 2 * live_counts[index] <= cache_size:
+                    priority = timestamp - cache_time[index]
+                if best_priority < priority:
+                    best_priority = priority
+                    fanning_vertex = index
+
+        # dead end
+        if fanning_vertex < 0:
+            while dead_end_stack:
+                index = dead_end_stack.pop()
+                if 0 < live_counts[index]:
+                    fanning_vertex = index
+                    break
+            else:
+                while cursor < vertex_count:
+                    if 0 < live_counts[cursor]:
+                        fanning_vertex = cursor
+                        break
+                    cursor += 1
+    return np.array(triangle_order, dtype=np.int64)
+
+
+def optimize_overdraw(indices, positions, vertex_count, cache_size=VERTEX_CACHE_SIZE,
+                      overdraw_threshold=OVERDRAW_THRESHOLD):
+    """
+    Split the cache optimized triangles into the clusters at the cache flushes, and sort the clusters
+    by how much they face outward from the center of the mesh, so the front clusters occlude the others.
+    :return: order of the triangles
+    """
+    triangles = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    triangle_count = len(triangles)
+    identity_order = np.arange(triangle_count)
+    cluster_starts = np.flatnonzero(get_cache_flush_triangles(triangles, vertex_count, cache_size))
+    if len(cluster_starts) < 2:
+        return identity_order
+    if 0 != cluster_starts[0]:
+        cluster_starts = np.concatenate([[0], cluster_starts])
+
+    vertices = np.asarray(positions, dtype=np.float64)[:, 0:3][triangles]
+    face_normals = np.cross(vertices[:, 1] - vertices[:, 0], vertices[:, 2] - vertices[:, 0])
+    face_areas = np.linalg.norm(face_normals, axis=1)
+    face_centers = np.mean(vertices, axis=1)
+    mesh_center = np.mean(face_centers, axis=0)
+
+    # area weighted normal and center of the clusters
+    cluster_normals = np.add.reduceat(face_normals, cluster_starts, axis=0)
+    cluster_areas = np.add.reduceat(face_areas, cluster_starts)
+    cluster_centers = np.add.reduceat(face_centers * face_areas[:, np.newaxis], cluster_starts, axis=0)
+    cluster_centers /= np.where(0.0 < cluster_areas, cluster_areas, 1.0)[:, np.newaxis]
+    sort_keys = np.einsum('ij,ij->i', cluster_centers - mesh_center, normalize_array(cluster_normals))
+
+    cluster_sizes = np.diff(np.concatenate([cluster_starts, [triangle_count]]))
+    cluster_order = np.argsort(-sort_keys, kind='stable')
+    cluster_ids = np.repeat(np.arange(len(cluster_starts)), cluster_sizes)
+    triangle_order = np.argsort(np.argsort(cluster_order)[cluster_ids], kind='stable')
+
+    acmr = get_vertex_cache_statistics(triangles, vertex_count, cache_size)[0]
+    sorted_acmr = get_vertex_cache_statistics(triangles[triangle_order], vertex_count, cache_size)[0]
+    if acmr * overdraw_threshold < sorted_acmr:
+        return identity_order
+    return triangle_order
+
+
+def optimize_vertex_fetch(indices, vertex_count):
+    """
+    :return: remapped indices, order of the vertices. the unused vertices are placed at the end.
+    """
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+    used_vertices, first_uses = np.unique(indices, return_index=True)
+    used_vertices = used_vertices[np.argsort(first_uses)]
+    unused = np.ones(vertex_count, dtype=bool)
+    unused[used_vertices] = False
+    vertex_order = np.concatenate([used_vertices, np.flatnonzero(unused)])
+    remap = np.empty(vertex_count, dtype=np.int64)
+    remap[vertex_order] = np.arange(vertex_count)
+    return remap[indices], vertex_order
+
+
+def optimize_geometry_data(geometry_data, is_triangle_mode=True, cache_size=VERTEX_CACHE_SIZE,
+                           overdraw_threshold=OVERDRAW_THRESHOLD):
+    """
+    Reorder the triangles and the vertices of the geometry data in place, and use the 16-bit indices if possible.
+    :param is_triangle_mode: the triangles are reordered only for GL_TRIANGLES.
+    :return: dict(acmr=(before, after), atvr=(before, after), index_type=dtype name)
+    """
+    positions = geometry_data.get('positions', [])
+    vertex_count = len(positions)
+    indices = np.asarray(geometry_data.get('indices', []), dtype=np.int64).reshape(-1)
+    if 0 == vertex_count or 0 == len(indices):
+        return None
+
+    acmr, atvr = get_vertex_cache_statistics(indices, vertex_count, cache_size) if is_triangle_mode else (0.0, 0.0)
+
+    if is_triangle_mode and 0 == len(indices) % 3:
+        triangles = indices.reshape(-1, 3)
+        triangles = triangles[optimize_vertex_cache(triangles, vertex_count, cache_size)]
+        triangles = triangles[optimize_overdraw(triangles, positions, vertex_count, cache_size, overdraw_threshold)]
+        indices = triangles.reshape(-1)
+
+    indices, vertex_order = optimize_vertex_fetch(indices, vertex_count)
+    for key in VERTEX_ATTRIBUTE_NAMES:
+        data = geometry_data.get(key)
+        if data is not None and len(data) == vertex_count:
+            geometry_data[key] = np.asarray(data)[vertex_order]
+
+    index_type = np.uint16 if vertex_count <= MAX_UINT16_VERTEX_COUNT else np.uint32
+    geometry_data['indices'] = indices.astype(index_type)
+
+    optimized_acmr, optimized_atvr = get_vertex_cache_statistics(indices, vertex_count, cache_size) \
+        if is_triangle_mode else (0.0, 0.0)
+    return dict(acmr=(acmr, optimized_acmr), atvr=(atvr, optimized_atvr), index_type=np.dtype(index_type).name)
@@ -1,6 +1,5 @@
-import copy
-import os, traceback
-from collections import OrderedDict
+import os
+import traceback
 
 import numpy as np
 
@@ -11,13 +10,170 @@ from PyEngine3D.Utilities import *
 defaultTexCoord = [0.0, 0.0]
 defaultNormal = [0.0, 1.0, 0.0]
 
+# record types of the lines in the wavefront file
+RECORD_IGNORE = 0
+RECORD_POSITION = 1
+RECORD_TEXCOORD = 2
+RECORD_NORMAL = 3
+RECORD_FACE = 4
+RECORD_SMOOTH = 5
+RECORD_OTHER = 6
+
+CHAR_TAB = 9
+CHAR_NEWLINE = 10
+CHAR_RETURN = 13
+CHAR_SPACE = 32
+
+
+def is_whitespace(chars):
+    return (chars == CHAR_SPACE) | (chars == CHAR_TAB) | (chars == CHAR_RETURN)
+
+
+def split_lines(data):
+    """
+    :return: start offset, end offset of each line
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    line_ends = np.flatnonzero(buffer == CHAR_NEWLINE)
+    if 0 == len(buffer) or CHAR_NEWLINE != buffer[-1]:
+        line_ends = np.append(line_ends, len(buffer))
+    line_starts = np.zeros_like(line_ends)
+    line_starts[1:] = line_ends[:-1] + 1
+    return line_starts, line_ends
+
+
+def classify_lines(data, line_starts, line_ends):
+    """
+    Classify all lines at once by their first three characters.
+    :return: record type of each line
+    """
+    buffer = np.frombuffer(data + b'\0\0\0', dtype=np.uint8)
+    c0 = buffer[line_starts]
+    c1 = buffer[line_starts + 1]
+    c2 = buffer[line_starts + 2]
+    line_lengths = line_ends - line_starts
+
+    records = np.full(len(line_starts), RECORD_OTHER, dtype=np.uint8)
+    records[(c0 == ord('v')) & is_whitespace(c1)] = RECORD_POSITION
+    records[(c0 == ord('v')) & (c1 == ord('t')) & is_whitespace(c2)] = RECORD_TEXCOORD
+    records[(c0 == ord('v')) & (c1 == ord('n')) & is_whitespace(c2)] = RECORD_NORMAL
+    records[(c0 == ord('f')) & is_whitespace(c1)] = RECORD_FACE
+    records[(c0 == ord('s')) & is_whitespace(c1)] = RECORD_SMOOTH
+    records[(c0 == ord('#')) | (0 == line_lengths) | ((1 == line_lengths) & (c0 == CHAR_RETURN))] = RECORD_IGNORE
+    return records
+
+
+def gather_lines(data, lines, line_starts, line_ends, keyword):
+    """
+    Join the lines without the keyword. Lines of the same record are contiguous in most files,
+    so each contiguous run of lines is sliced at once.
+    """
+    breaks = np.flatnonzero(np.diff(lines) != 1)
+    run_starts = line_starts[lines[np.append(0, breaks + 1)]].tolist()
+    run_ends = line_ends[lines[np.append(breaks, len(lines) - 1)]].tolist()
+    return b'\n'.join([data[start:end] for start, end in zip(run_starts, run_ends)]).replace(keyword, b'')
+
+
+def parsing_vectors(data, lines, line_starts, line_ends, keyword, component_count, scale=1.0):
+    """
+    Parsing the values of all 'v', 'vt', 'vn' lines in one block.
+    """
+    line_count = len(lines)
+    if 0 == line_count:
+        return np.zeros((0, component_count), dtype=np.float32)
+
+    vector_data = gather_lines(data, lines, line_starts, line_ends, keyword)
+    values = np.fromstring(vector_data, dtype=np.float32, sep=' ')
+    if values.size == line_count * component_count:
+        values = values.reshape(line_count, component_count)
+    else:
+        # There are optional components such as 'w' or vertex colors.
+        values = np.array([line.split()[:component_count] for line in vector_data.split(b'\n')], dtype=np.float32)
+    if 1.0 != scale:
+        values *= scale
+    return values
+
+
+def parsing_faces(data, lines, line_starts, line_ends):
+    """
+    Parsing the 'v/vt/vn' tokens of all face lines in one block.
+    :return: vertex count of each face, (token count x 3) array of raw (position, texcoord, normal) indices.
+        Omitted index is 0.
+    """
+    face_count = len(lines)
+    if 0 == face_count:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 3), dtype=np.int64)
+
+    face_data = gather_lines(data, lines, line_starts, line_ends, b'f').replace(b'//', b'/0/')
+    buffer = np.frombuffer(face_data, dtype=np.uint8)
+    separators = is_whitespace(buffer) | (buffer == CHAR_NEWLINE)
+    token_starts = ~separators
+    token_starts[1:] &= separators[:-1]
+    token_starts = np.flatnonzero(token_starts)
+    token_count = len(token_starts)
+
+    # vertex count of each face
+    token_lines = np.searchsorted(np.flatnonzero(buffer == CHAR_NEWLINE), token_starts)
+    vertex_counts = np.bincount(token_lines, minlength=face_count)
+
+    # count of '/' of each token
+    slash_tokens = np.searchsorted(token_starts, np.flatnonzero(buffer == ord('/')), side='right') - 1
+    slash_counts = np.bincount(slash_tokens, minlength=token_count)
+
+    component_count = int(slash_counts[0]) + 1
+    if component_count <= 3 and np.all(slash_counts == component_count - 1):
+        values = np.fromstring(face_data.replace(b'/', b' '), dtype=np.int64, sep=' ')
+    else:
+        # mixed formats, fill the omitted indices.
+        component_count = 3
+        values = b' '.join([token + b'/0' * (2 - token.count(b'/')) for token in face_data.split()])
+        values = np.fromstring(values.replace(b'/', b' '), dtype=np.int64, sep=' ')
+    values = values.reshape(token_count, component_count)
+
+    indices = np.zeros((token_count, 3), dtype=np.int64)
+    indices[:, :component_count] = values
+    return vertex_counts, indices
+
+
+def resolve_indices(raw_indices, element_counts):
+    """
+    Convert the 1-based obj indices to 0-based indices. Negative indices refer to the elements defined before the face.
+    """
+    indices = raw_indices - 1
+    indices[0 == raw_indices] = 0
+    relative = raw_indices < 0
+    if np.any(relative):
+        indices[relative] = element_counts[relative] + raw_indices[relative]
+    return indices
+
+
+def triangulate(vertex_counts):
+    """
+    Triangulate polygons as triangle fan. A quad (0, 1, 2, 3) becomes (0, 1, 2), (2, 3, 0).
+    :return: (triangle count x 3) token indices, face index of each triangle
+    """
+    triangle_counts = np.maximum(vertex_counts - 2, 0)
+    face_offsets = np.cumsum(vertex_counts) - vertex_counts
+    triangle_faces = np.repeat(np.arange(len(vertex_counts)), triangle_counts)
+    triangle_offsets = np.cumsum(triangle_counts) - triangle_counts
+    fan_index = np.arange(len(triangle_faces)) - triangle_offsets[triangle_faces]
+
+    first = (0 == fan_index)
+    triangles = np.empty((len(triangle_faces), 3), dtype=np.int64)
+    triangles[:, 0] = np.where(first, 0, fan_index + 1)
+    triangles[:, 1] = np.where(first, 1, fan_index + 2)
+    triangles[:, 2] = np.where(first, 2, 0)
+    triangles += face_offsets[triangle_faces][:, np.newaxis]
+    return triangles, triangle_faces
+
 
 class MeshObject:
     def __init__(self, default_name):
         self.name = default_name
         self.group_name = ''
         self.mtl_name = ''
-        self.indices = []
+        # (vertex count x 3) array of (position, normal, texcoord) index
+        self.indices = np.zeros((0, 3), dtype=np.int64)
 
 
 class OBJ:
@@ -26,137 +182,149 @@ class OBJ:
         Loads a wavefront OBJ file.
         """
         self.meshes = []
-        self.positions = []
-        self.normals = []
-        self.texcoords = []
+        self.positions = np.zeros((0, 3), dtype=np.float32)
+        self.normals = np.zeros((0, 3), dtype=np.float32)
+        self.texcoords = np.zeros((0, 2), dtype=np.float32)
         self.glList = None
         self.filename = filename
 
         # check is exist file
         if os.path.exists(filename):
-            # load OBJ file
-            default_name = os.path.splitext(os.path.split(filename)[-1])[0]
-            preFix = None
-            mesh_object = None
-            for line in open(filename, "r"):
-                # is comment?
-                line = line.strip()
-                if line == '' or line.startswith('#'):
-                    continue
-
-                values = [value.strip() for value in line.split()]
-                if len(values) < 2:
-                    continue
-
-                # start to paring a new mesh.
-                if mesh_object is None or (preFix == 'f' and values[0] not in ('f', 's')):
-                    mesh_object = MeshObject(default_name)
-                    self.meshes.append(mesh_object)
-
-                # first strings
-                preFix = values[0]
-                values = values[1:]
-
-                if preFix == 'o':
-                    mesh_object.name = ' '.join(values)
-                elif preFix == 'g':
-                    mesh_object.group_name = ' '.join(values)
-                    if mesh_object.name == '':
-                        mesh_object.name = mesh_object.group_name
-                elif preFix == 'mtllib':
-                    # TODO : Parsing mtllib
-                    pass
-                # vertex position
-                elif preFix == 'v' and len(values) >= 3:
-                    # apply scale
-                    self.positions.append(list(map(lambda x: float(x) * scale, values[:3])))
-                # vertex normal
-                elif preFix == 'vn' and len(values) >= 3:
-                    self.normals.append(list(map(float, values[:3])))
-                # texture coordinate
-                elif preFix == 'vt' and len(values) >= 2:
-                    self.texcoords.append(list(map(float, values[:2])))
-                # material name
-                elif preFix in ('usemtl', 'usemat'):
-                    mesh_object.material = ' '.join(values)
-                    if mesh_object.name == '':
-                        mesh_object.name = mesh_object.material
-                # faces
-                elif preFix == 'f':
-                    pos_indices = []
-                    normal_indices = []
-                    tex_indices = []
-
-                    # If texcoord is empty, add the default texcoord.
-                    if len(self.texcoords) < 1:
-                        self.texcoords.append(copy.copy(defaultTexCoord))
-                    # If normal is empty, add the default normal.
-                    if len(self.normals) < 1:
-                        self.normals.append(copy.copy(defaultNormal))
-
-                    # parsing index data
-                    for indices in values:
-                        pos_index, tex_index, normal_index = list(
-                            map(lambda x: int(x) - 1 if x else 0, indices.split('/')))
-                        # insert vertex, texcoord, normal index
-                        pos_indices.append(pos_index)
-                        tex_indices.append(tex_index)
-                        normal_indices.append(normal_index)
-
-                    # append face list
-                    if len(pos_indices) == 3:
-                        mesh_object.indices.append((pos_indices, normal_indices, tex_indices))
-                    # Quad to Two Triangles.
-                    elif len(pos_indices) == 4:
-                        mesh_object.indices.append((pos_indices[:3], normal_indices[:3], tex_indices[:3]))
-                        mesh_object.indices.append(([pos_indices[2], pos_indices[3], pos_indices[0]],
-                                                    [normal_indices[2], normal_indices[3], normal_indices[0]],
-                                                    [tex_indices[2], tex_indices[3], tex_indices[0]]))
+            with open(filename, 'rb') as f:
+                data = f.read()
+            self.parsing(data, scale)
+
+    def parsing(self, data, scale):
+        default_name = os.path.splitext(os.path.split(self.filename)[-1])[0]
+
+        line_starts, line_ends = split_lines(data)
+        buffer = np.frombuffer(data + b'\0', dtype=np.uint8)
+        first_chars = buffer[line_starts]
+        if np.any(is_whitespace(first_chars) & (first_chars != CHAR_RETURN)):
+            # strip indented lines
+            data = b'\n'.join([line.strip() for line in data.split(b'\n')])
+            line_starts, line_ends = split_lines(data)
+
+        records = classify_lines(data, line_starts, line_ends)
+
+        # parsing the rest of lines. ex) o, g, usemtl
+        other_lines = {}
+        for line_index in np.flatnonzero(RECORD_OTHER == records).tolist():
+            values = data[line_starts[line_index]:line_ends[line_index]].decode('utf-8', 'ignore').split()
+            if len(values) < 2:
+                records[line_index] = RECORD_IGNORE
+            else:
+                other_lines[line_index] = values
+
+        # start to parsing a new mesh when the first record after the faces is not a face.
+        record_lines = np.flatnonzero(RECORD_IGNORE != records)
+        record_types = records[record_lines]
+        new_mesh = np.zeros(len(record_lines), dtype=bool)
+        new_mesh[1:] = (RECORD_FACE == record_types[:-1]) & (RECORD_FACE != record_types[1:]) & \
+            (RECORD_SMOOTH != record_types[1:])
+        record_meshes = np.cumsum(new_mesh)
+        mesh_count = int(record_meshes[-1]) + 1 if 0 < len(record_lines) else 0
+        self.meshes = [MeshObject(default_name) for i in range(mesh_count)]
+        line_meshes = np.zeros(len(records), dtype=np.int64)
+        line_meshes[record_lines] = record_meshes
+
+        for line_index, values in other_lines.items():
+            mesh_object = self.meshes[line_meshes[line_index]]
+            preFix = values[0]
+            values = values[1:]
+            if preFix == 'o':
+                mesh_object.name = ' '.join(values)
+            elif preFix == 'g':
+                mesh_object.group_name = ' '.join(values)
+                if mesh_object.name == '':
+                    mesh_object.name = mesh_object.group_name
+            elif preFix == 'mtllib':
+                # TODO : Parsing mtllib
+                pass
+            # material name
+            elif preFix in ('usemtl', 'usemat'):
+                mesh_object.mtl_name = ' '.join(values)
+                if mesh_object.name == '':
+                    mesh_object.name = mesh_object.mtl_name
+
+        def parsing_record(record_type, keyword, component_count, scale=1.0):
+            lines = np.flatnonzero(record_type == records)
+            return parsing_vectors(data, lines, line_starts, line_ends, keyword, component_count, scale)
+
+        # vertex position, texture coordinate, vertex normal
+        self.positions = parsing_record(RECORD_POSITION, b'v', 3, scale)
+        self.texcoords = parsing_record(RECORD_TEXCOORD, b'vt', 2)
+        self.normals = parsing_record(RECORD_NORMAL, b'vn', 3)
+
+        # faces
+        face_lines = np.flatnonzero(RECORD_FACE == records)
+        vertex_counts, raw_indices = parsing_faces(data, face_lines, line_starts, line_ends)
+        if 0 == len(raw_indices):
+            return
+
+        # If texcoord or normal is empty, add the default texcoord and normal.
+        if 0 == len(self.texcoords):
+            self.texcoords = np.array([defaultTexCoord], dtype=np.float32)
+        if 0 == len(self.normals):
+            self.normals = np.array([defaultNormal], dtype=np.float32)
+
+        # count of the positions, texcoords, normals defined before each face, for the negative indices.
+        token_lines = np.repeat(face_lines, vertex_counts)
+        pos_indices = resolve_indices(raw_indices[:, 0], np.cumsum(RECORD_POSITION == records)[token_lines])
+        tex_indices = resolve_indices(raw_indices[:, 1], np.cumsum(RECORD_TEXCOORD == records)[token_lines])
+        normal_indices = resolve_indices(raw_indices[:, 2], np.cumsum(RECORD_NORMAL == records)[token_lines])
+        vertex_indices = np.stack([pos_indices, normal_indices, tex_indices], axis=1)
+
+        triangles, triangle_faces = triangulate(vertex_counts)
+        vertex_indices = vertex_indices[triangles.reshape(-1)]
+        vertex_meshes = np.repeat(line_meshes[face_lines][triangle_faces], 3)
+
+        # faces of a mesh are contiguous.
+        mesh_offsets = np.searchsorted(vertex_meshes, np.arange(mesh_count + 1))
+        for i, mesh_object in enumerate(self.meshes):
+            mesh_object.indices = vertex_indices[mesh_offsets[i]:mesh_offsets[i + 1]]
 
     def get_geometry_data(self):
         geometry_datas = []
         for mesh in self.meshes:
-            positions = []
-            normals = []
-            texcoords = []
-            indices = []
-
-            indexMap = {}
-
-            boundMin = Float3(FLOAT32_MAX, FLOAT32_MAX, FLOAT32_MAX)
-            boundMax = Float3(FLOAT32_MIN, FLOAT32_MIN, FLOAT32_MIN)
-            for n, mesh_indices in enumerate(mesh.indices):
-                # exclude material
-                postionIndicies, normalIndicies, texcoordIndicies = mesh_indices
-                for i in range(len(postionIndicies)):
-                    index_key = (postionIndicies[i], normalIndicies[i], texcoordIndicies[i])
-                    if index_key in indexMap:
-                        indices.append(indexMap[index_key])
-                    else:
-                        indices.append(len(indexMap))
-                        indexMap[index_key] = len(indexMap)
-                        positions.append(self.positions[postionIndicies[i]])
-                        normals.append(self.normals[normalIndicies[i]])
-                        texcoords.append(self.texcoords[texcoordIndicies[i]])
-                        # bounding box
-                        position = positions[-1]
-                        for j in range(3):
-                            if boundMin[j] > position[j]:
-                                boundMin[j] = position[j]
-                            if boundMax[j] < position[j]:
-                                boundMax[j] = position[j]
-
-            if len(positions) == 0:
+            if len(mesh.indices) == 0:
                 logger.info('%s has a empty mesh. %s' % (self.filename, mesh.name))
                 continue
 
+            # unique (position, normal, texcoord), and keep the order of first appearance.
+            normal_count = len(self.normals)
+            texcoord_count = len(self.texcoords)
+            if len(self.positions) * normal_count * texcoord_count < np.iinfo(np.int64).max:
+                # pack the index triple into one integer key, it is much faster than unique of rows.
+                packed_keys = (mesh.indices[:, 0] * normal_count + mesh.indices[:, 1]) * texcoord_count + \
+                    mesh.indices[:, 2]
+                packed_keys, first_indices, inverse = np.unique(packed_keys, return_index=True,
+                                                                return_inverse=True)
+                index_keys = mesh.indices[first_indices]
+            else:
+                index_keys, first_indices, inverse = np.unique(mesh.indices, axis=0, return_index=True,
+                                                               return_inverse=True)
+            order = np.argsort(first_indices)
+            vertex_indices = np.empty_like(order)
+            vertex_indices[order] = np.arange(len(order))
+            index_keys = index_keys[order]
+
+            positions = self.positions[index_keys[:, 0]]
+            normals = self.normals[index_keys[:, 1]]
+            texcoords = self.texcoords[index_keys[:, 2]]
+            indices = vertex_indices[inverse.reshape(-1)].astype(np.uint32)
+
+            # bounding box
+            boundMin = positions.min(axis=0)
+            boundMax = positions.max(axis=0)
+
             geometry_data = dict(name=mesh.name,
-                                 positions=copy.deepcopy(positions),
-                                 normals=copy.deepcopy(normals),
-                                 texcoords=copy.deepcopy(texcoords),
-                                 indices=copy.deepcopy(indices),
-                                 bound_min=copy.deepcopy(boundMin),
-                                 bound_max=copy.deepcopy(boundMax),
+                                 positions=positions,
+                                 normals=normals,
+                                 texcoords=texcoords,
+                                 indices=indices,
+                                 bound_min=boundMin,
+                                 bound_max=boundMax,
                                  radius=length(np.maximum(abs(boundMax), abs(boundMin))))
             geometry_datas.append(geometry_data)
         return geometry_datas
@@ -0,0 +1,126 @@
+"""
+Cache of the linked program binaries, separated from the material files.
+
+    key : sha1 of the driver info (GL_VENDOR, GL_RENDERER, GL_VERSION) and the final shader codes,
+          so a program is compiled from the sources only once per driver.
+    file : magic(8 bytes), binary format(uint32), binary data
+
+The least recently used entries are deleted when the total size exceeds max_size.
+"""
+
+from collections import OrderedDict
+import hashlib
+import os
+import struct
+import traceback
+
+from PyEngine3D.Common import logger
+from PyEngine3D.Utilities import check_directory_and_mkdir
+
+
+PROGRAM_BINARY_MAGIC = b'PE3DPRG\x00'
+PROGRAM_BINARY_HEADER = struct.Struct('<8sI')
+PROGRAM_BINARY_EXT = '.bin'
+
+
+class ProgramBinaryCache:
+    def __init__(self, cache_path, max_size):
+        self.cache_path = cache_path
+        self.max_size = max_size
+        self.entries = OrderedDict()  # { key : file size }, from the least recently used
+        self.total_size = 0
+
+        if self.is_enabled():
+            check_directory_and_mkdir(self.cache_path)
+            entries = []
+            for filename in os.listdir(self.cache_path):
+                if filename.endswith(PROGRAM_BINARY_EXT):
+                    stat = os.stat(os.path.join(self.cache_path, filename))
+                    entries.append((stat.st_mtime, filename[:-len(PROGRAM_BINARY_EXT)], stat.st_size))
+            for modify_time, key, size in sorted(entries):
+                self.entries[key] = size
+                self.total_size += size
+            self.evict()
+
+    def is_enabled(self):
+        return 0 < self.max_size
+
+    @staticmethod
+    def get_key(shader_codes, driver_info):
+        """
+        :param shader_codes: { shader type : final shader code }
+        :param driver_info: ex) (GL_VENDOR, GL_RENDERER, GL_VERSION)
+        """
+        sha1 = hashlib.sha1()
+        for info in driver_info:
+            sha1.update(str(info).encode('utf-8'))
+            sha1.update(b'\x00')
+        for shader_type in sorted(shader_codes, key=int):
+            sha1.update(str(int(shader_type)).encode('utf-8'))
+            sha1.update(b'\x00')
+            sha1.update(shader_codes[shader_type].encode('utf-8'))
+            sha1.update(b'\x00')
+        return sha1.hexdigest()
+
+    def get_filepath(self, key):
+        return os.path.join(self.cache_path, key + PROGRAM_BINARY_EXT)
+
+    def load(self, key):
+        """
+        :return: binary format, binary data. (None, None) if there is no entry.
+        """
+        if key not in self.entries:
+            return None, None
+
+        filepath = self.get_filepath(key)
+        try:
+            with open(filepath, 'rb') as f:
+                data = f.read()
+            magic, binary_format = PROGRAM_BINARY_HEADER.unpack_from(data)
+            if magic != PROGRAM_BINARY_MAGIC:
+                raise ValueError("%s is not a program binary file." % filepath)
+            # mark as the most recently used
+            os.utime(filepath)
+            self.entries.move_to_end(key)
+            return binary_format, data[PROGRAM_BINARY_HEADER.size:]
+        except BaseException:
+            logger.error(traceback.format_exc())
+            self.remove(key)
+        return None, None
+
+    def save(self, key, binary_format, binary_data):
+        if not self.is_enabled() or not binary_data:
+            return False
+
+        filepath = self.get_filepath(key)
+        temp_filepath = filepath + '.tmp'
+        try:
+            with open(temp_filepath, 'wb') as f:
+                f.write(PROGRAM_BINARY_HEADER.pack(PROGRAM_BINARY_MAGIC, binary_format))
+                f.write(binary_data)
+            os.replace(temp_filepath, filepath)
+        except BaseException:
+            logger.error(traceback.format_exc())
+            return False
+
+        self.total_size -= self.entries.pop(key, 0)
+        self.entries[key] = PROGRAM_BINARY_HEADER.size + len(binary_data)
+        self.total_size += self.entries[key]
+        self.evict()
+        return True
+
+    def remove(self, key):
+        self.total_size -= self.entries.pop(key, 0)
+        filepath = self.get_filepath(key)
+        if os.path.exists(filepath):
+            try:
+                os.remove(filepath)
+            except BaseException:
+                logger.error(traceback.format_exc())
+
+    def evict(self):
+        # keep the most recently used entry even if it is larger than max_size.
+        while self.max_size < self.total_size and 1 < len(self.entries):
+            key = next(iter(self.entries))
+            logger.info("Evict the program binary %s" % key)
+            self.remove(key)
@@ -19,10 +19,12 @@ import traceback
 import uuid
 
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from ctypes import *
 from distutils.dir_util import copy_tree
+from enum import Enum
 from importlib.machinery import SourceFileLoader
-from threading import Thread
+from threading import Event, Thread
 
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 import numpy as np
@@ -36,40 +38,99 @@ from PyEngine3D.Render import EffectInfo, ParticleInfo
 from PyEngine3D.Render import FontData
 from PyEngine3D.Render.Ocean.Constants import GRID_VERTEX_COUNT
 from PyEngine3D.OpenGLContext import CreateTexture, Material, Texture2D, Texture2DArray, Texture3D, TextureCube
+from PyEngine3D.OpenGLContext import OpenGLContext
 from PyEngine3D.OpenGLContext import Shader, ShaderCompileOption, ShaderCompileMessage, default_compile_option
 from PyEngine3D.OpenGLContext import parsing_macros, parsing_uniforms, parsing_material_components
 from PyEngine3D.Utilities import Attributes, Singleton, Config, Logger, Profiler
 from PyEngine3D.Utilities import GetClassName, is_gz_compressed_file, check_directory_and_mkdir, get_modify_time_of_file
+from PyEngine3D.Utilities import compute_tangent
 from . import Collada, OBJ, loadDDS, generate_font_data, TextureGenerator
+from . import is_binary_container_file, load_binary_container, save_binary_container, copy_mapped_arrays
+from . import ProgramBinaryCache, ShaderPermutationManifest, ConversionCache
+from . import optimize_geometry_data
+from .MeshOptimizer import VERTEX_CACHE_SIZE, OVERDRAW_THRESHOLD
 
 
-class LoadingThread(Thread):
-    def __init__(self, resource_manager):
-        Thread.__init__(self)
-        self.resource_manager = resource_manager
-        self.running = True
-        self.loading_queue = queue.Queue()
-        self.complete_queue = queue.Queue()
+def convert_external_file(loader_class, source_filepath, save_filepath):
+    """
+    Job of the convert worker process. Convert the external file and save it without OpenGL.
+    """
+    save_data = loader_class.convert_source_data(source_filepath)
+    if save_data is not None:
+        check_directory_and_mkdir(os.path.dirname(save_filepath))
+        return loader_class.save_data_to_file(save_filepath, save_data)
+    return False
 
-    def push_loading(self, resource_name):
-        self.loading_queue.put(resource_name)
 
-    def run(self):
-        while self.running:
-            time.sleep(0.001)
+def convert_external_files(convert_jobs, worker_count, progress_callback=None):
+    """
+    Run the convert jobs in the process pool.
+    :param convert_jobs: [(loader_class, source_filepath, save_filepath), ...]
+    :param progress_callback: progress_callback(completed_count, total_count, source_filepath)
+    :return: [result of each job]
+    """
+    results = [False] * len(convert_jobs)
+    with ProcessPoolExecutor(max_workers=worker_count) as executor:
+        futures = {executor.submit(convert_external_file, *convert_job): i for i, convert_job in enumerate(convert_jobs)}
+        for completed_count, future in enumerate(as_completed(futures)):
+            index = futures[future]
+            source_filepath = convert_jobs[index][1]
+            try:
+                results[index] = future.result()
+            except:
+                logger.error(traceback.format_exc())
+                logger.error("Failed to convert resource : %s" % source_filepath)
+            if progress_callback is not None:
+                progress_callback(completed_count + 1, len(convert_jobs), source_filepath)
+    return results
 
-            if not self.loading_queue.empty():
-                resource_name = self.loading_queue.get()
-                resource = self.resource_manager.mesh_loader.get_resource(resource_name)
-                data = self.resource_manager.mesh_loader.load_resource_data(resource)
-                if data is not None:
-                    self.complete_queue.put((resource_name, data))
 
-    def set_data(self):
-        while not self.complete_queue.empty():
-            resource_name, data = self.complete_queue.get()
-            resource = self.resource_manager.mesh_loader.get_resource(resource_name)
-            resource.set_data(data)
+class LoadingPriority(Enum):
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+class LoadingRequest:
+    def __init__(self, resource_loader, resource, priority, sequence):
+        self.resource_loader = resource_loader
+        self.resource = resource
+        self.priority = priority
+        self.sequence = sequence
+        self.started = False
+        self.canceled = False
+        self.load_data = None
+        self.complete_event = Event()
+
+    def __lt__(self, other):
+        return (self.priority.value, self.sequence) < (other.priority.value, other.sequence)
+
+
+class LoadingThread(Thread):
+    """
+    Worker of the asynchronous loading. It does the file I/O and the decoding of the resource data only,
+    OpenGL objects are created by ResourceManager.update on the main thread.
+    """
+    def __init__(self, loading_queue, complete_queue):
+        Thread.__init__(self, daemon=True)
+        self.loading_queue = loading_queue
+        self.complete_queue = complete_queue
+
+    def run(self):
+        while True:
+            request = self.loading_queue.get()
+            if request.resource_loader is None:
+                break
+
+            request.started = True
+            if not request.canceled:
+                try:
+                    # the migration of the old resource file is done by ResourceManager.update on the main thread.
+                    request.load_data = request.resource_loader.load_resource_data(request.resource, migrate=False)
+                except:
+                    logger.error(traceback.format_exc())
+                self.complete_queue.put(request)
+            request.complete_event.set()
 
 
 # -----------------------#
@@ -86,8 +147,8 @@ class MetaData:
         self.resource_filepath = resource_filepath
         self.resource_modify_time = get_modify_time_of_file(resource_filepath)
         self.source_filepath = ""
-        self.source_filepath = ""
         self.source_modify_time = ""
+        self.source_hash = ""  # sha1 of the source file, see ConversionCache
         self.version_updated = False
         self.changed = False
 
@@ -131,6 +192,13 @@ class MetaData:
         if self.changed and save:
             self.save_meta_file()
 
+    def set_source_hash(self, source_hash, save=True):
+        self.changed |= self.source_hash != source_hash
+        self.source_hash = source_hash
+
+        if self.changed and save:
+            self.save_meta_file()
+
     def load_meta_file(self):
         if os.path.exists(self.filepath):
             with open(self.filepath, 'r') as f:
@@ -140,12 +208,14 @@ class MetaData:
                 resource_modify_time = load_data.get("resource_modify_time", None)
                 source_filepath = load_data.get("source_filepath", None)
                 source_modify_time = load_data.get("source_modify_time", None)
+                source_hash = load_data.get("source_hash", None)
 
                 self.changed |= self.resource_version != resource_version
                 self.changed |= self.resource_filepath != resource_filepath
                 self.changed |= self.resource_modify_time != resource_modify_time
                 self.changed |= self.source_filepath != source_filepath
                 self.changed |= self.source_modify_time != source_modify_time
+                self.changed |= self.source_hash != source_hash
 
                 if resource_version is not None:
                     self.resource_version = resource_version
@@ -153,6 +223,8 @@ class MetaData:
                     self.source_filepath = source_filepath
                 if source_modify_time is not None:
                     self.source_modify_time = source_modify_time
+                if source_hash is not None:
+                    self.source_hash = source_hash
         else:
             # save meta file
             self.changed = True
@@ -169,6 +241,7 @@ class MetaData:
                     resource_modify_time=self.resource_modify_time,
                     source_filepath=self.source_filepath,
                     source_modify_time=self.source_modify_time,
+                    source_hash=self.source_hash,
                 )
                 pprint.pprint(save_data, f)
             self.changed = False
@@ -187,12 +260,25 @@ class Resource:
         self.type_name = resource_type_name
         self.data = None
         self.meta_data = None
+        self.is_placeholder = False
+        self.loaded_callbacks = []
 
     def get_resource_info(self):
-        return self.name, self.type_name, self.data is not None
+        return self.name, self.type_name, self.data is not None and not self.is_placeholder
 
     def is_need_to_load(self):
-        return self.data is None or self.meta_data.is_resource_file_changed()
+        return self.data is None or self.is_placeholder or self.meta_data.is_resource_file_changed()
+
+    def set_placeholder(self, data):
+        """
+        The placeholder is used until the resource is loaded asynchronously.
+        set_data replaces the contents of the placeholder, so the references of the placeholder get the loaded data.
+        """
+        self.data = data
+        self.is_placeholder = True
+
+    def add_loaded_callback(self, callback):
+        self.loaded_callbacks.append(callback)
 
     def set_data(self, data):
         if self.data is None:
@@ -202,18 +288,30 @@ class Resource:
             if type(data) in (dict, types.ModuleType):
                 self.data = data
             else:
+                if self.is_placeholder:
+                    self.data.__class__ = data.__class__
                 self.data.__dict__ = data.__dict__
 
+        if self.is_placeholder:
+            self.is_placeholder = False
+            loaded_callbacks = self.loaded_callbacks
+            self.loaded_callbacks = []
+            for loaded_callback in loaded_callbacks:
+                loaded_callback()
+
         # Notify that data has been loaded.
         ResourceManager.instance().core_manager.send_resource_info(self.get_resource_info())
 
     def delete_data(self):
-        if self.data is not None and hasattr(self.data, 'delete'):
+        # the placeholder shares the OpenGL objects of the default resource.
+        if self.data is not None and not self.is_placeholder and hasattr(self.data, 'delete'):
             self.data.delete()
-        self.data = None
+        self.clear_data()
 
     def clear_data(self):
         self.data = None
+        self.is_placeholder = False
+        self.loaded_callbacks = []
 
     def get_data(self):
         if self.is_need_to_load():
@@ -261,6 +359,9 @@ class ResourceLoader(object):
     external_dir_names = []  # example : Externals/Fonts, Externals/Meshes
     externalFileExt = {}  # example, { 'WaveFront': '.obj' }
     USE_FILE_COMPRESS_TO_SAVE = True
+    USE_BINARY_CONTAINER = False  # save as the memory-mapped binary container. see BinaryContainer.py
+    USE_CONVERT_WORKER = False  # convert_source_data can run in the worker process.
+    USE_ASYNC_LOADING = False  # load_resource_data can run in the loading thread. see create_resource_data
 
     def __init__(self, core_manager, root_path):
         self.core_manager = core_manager
@@ -286,15 +387,49 @@ class ResourceLoader(object):
         resource_name = resource_name.replace(os.sep, ".")
         return resource_name if make_lower else resource_name
 
+    @classmethod
+    def get_import_options(cls):
+        """
+        :return: dict of the options which change the converted result, they are a part of the conversion cache key.
+        """
+        return {}
+
+    def get_conversion_key(self, source_hash):
+        return ConversionCache.get_key(source_hash, self.name, self.resource_version, self.get_import_options())
+
     def is_new_external_data(self, meta_data, source_filepath):
         if os.path.exists(source_filepath):
             # Refresh the resource from external file.
-            source_modify_time = get_modify_time_of_file(source_filepath)
-            return meta_data.resource_version != self.resource_version or \
-                (meta_data.source_filepath == source_filepath and meta_data.source_modify_time != source_modify_time)
-        else:
+            if meta_data.resource_version != self.resource_version:
+                return True
+            if meta_data.source_filepath == source_filepath and \
+                    meta_data.source_modify_time != get_modify_time_of_file(source_filepath):
+                # a clone, a checkout or a touch changes the modify time only, so compare the contents.
+                if meta_data.source_hash and meta_data.source_hash == ConversionCache.get_source_hash(source_filepath):
+                    meta_data.set_source_meta_data(source_filepath)
+                    return False
+                return True
+        return False
+
+    def load_converted_cache(self, resource, source_filepath, source_hash=None):
+        """
+        Copy the converted resource file of the same source contents from the conversion cache.
+        :return: True if the resource file is copied, so it does not need to be converted.
+        """
+        conversion_cache = self.resource_manager.conversion_cache
+        if conversion_cache is None or not conversion_cache.is_enabled():
             return False
 
+        if source_hash is None:
+            source_hash = ConversionCache.get_source_hash(source_filepath)
+        save_filepath = self.get_save_filepath(resource.name)
+        if source_hash and conversion_cache.load(self.get_conversion_key(source_hash), save_filepath):
+            logger.info("Use the converted cache : %s" % source_filepath)
+            resource.delete_data()
+            self.refresh_meta_data(resource, save_filepath, source_filepath, source_hash)
+            return True
+        return False
+
     def initialize(self):
         logger.info("initialize " + GetClassName(self))
 
@@ -317,6 +452,7 @@ class ResourceLoader(object):
                         self.add_convert_source_file(source_filepath)
 
                 # convert external file to rsource file.
+                convert_list = []
                 for source_filepath in self.externalFileList:
                     resource_name = self.get_resource_name(external_path, source_filepath)
                     resource = self.get_resource(resource_name, noWarn=True)
@@ -325,10 +461,11 @@ class ResourceLoader(object):
                     if resource is None:
                         logger.info("Create the new resource from %s." % source_filepath)
                         resource = self.create_resource(resource_name)
-                        self.convert_resource(resource, source_filepath)
+                        convert_list.append((resource, source_filepath))
                     elif meta_data and self.is_new_external_data(meta_data, source_filepath):
-                        self.convert_resource(resource, source_filepath)
+                        convert_list.append((resource, source_filepath))
                         logger.info("Refresh the new resource from %s." % source_filepath)
+                self.convert_resources(convert_list)
             # clear list
             self.externalFileList = []
 
@@ -369,6 +506,68 @@ class ResourceLoader(object):
     def convert_resource(self, resource, source_filepath):
         logger.warn("convert_resource is not implemented in %s." % self.name)
 
+    @classmethod
+    def convert_source_data(cls, source_filepath):
+        """
+        Convert the external file to the save data. It runs in the worker process, so do not use OpenGL here.
+        """
+        return None
+
+    def convert_resources(self, convert_list):
+        """
+        Convert the external files. The worker processes convert and save the files,
+        and the resources will be loaded on the main thread when they are used.
+        :param convert_list: [(resource, source_filepath), ...]
+        """
+        conversion_cache = self.resource_manager.conversion_cache
+        if conversion_cache is None or not conversion_cache.is_enabled():
+            self.convert_source_files(convert_list)
+            return
+
+        # the unchanged source contents are copied from the conversion cache,
+        # and the identical source files in the list are converted only once.
+        source_hashes = set()
+        unique_list = []
+        duplicated_list = []
+        for resource, source_filepath in convert_list:
+            source_hash = ConversionCache.get_source_hash(source_filepath)
+            if self.load_converted_cache(resource, source_filepath, source_hash):
+                continue
+            if source_hash and source_hash in source_hashes:
+                duplicated_list.append((resource, source_filepath))
+            else:
+                source_hashes.add(source_hash)
+                unique_list.append((resource, source_filepath))
+
+        self.convert_source_files(unique_list)
+
+        for resource, source_filepath in duplicated_list:
+            if not self.load_converted_cache(resource, source_filepath):
+                self.convert_resource(resource, source_filepath)
+
+    def convert_source_files(self, convert_list):
+        worker_count = self.resource_manager.get_convert_worker_count()
+        progress_callback = self.resource_manager.convert_progress_callback
+
+        if not self.USE_CONVERT_WORKER or worker_count < 2 or len(convert_list) < 2:
+            for i, (resource, source_filepath) in enumerate(convert_list):
+                self.convert_resource(resource, source_filepath)
+                if progress_callback is not None:
+                    progress_callback(i + 1, len(convert_list), source_filepath)
+            return
+
+        convert_jobs = [(self.__class__, source_filepath, self.get_save_filepath(resource.name))
+                        for resource, source_filepath in convert_list]
+        results = convert_external_files(convert_jobs, worker_count, progress_callback)
+
+        for (resource, source_filepath), convert_job, result in zip(convert_list, convert_jobs, results):
+            if result:
+                # refresh meta data because resource file saved.
+                resource.delete_data()
+                self.refresh_meta_data(resource, convert_job[2], source_filepath)
+            else:
+                logger.info("Failed to convert resource : %s" % source_filepath)
+
     def hasResource(self, resource_name):
         return resource_name in self.resources
 
@@ -383,6 +582,26 @@ class ResourceLoader(object):
         resource = self.get_resource(resource_name, noWarn)
         return resource.get_data() if resource else None
 
+    def get_resource_data_async(self, resource_name, default_data=None, priority=LoadingPriority.NORMAL, noWarn=False):
+        """
+        Request the asynchronous loading and return the resource data without waiting.
+        :param default_data: the copy of default_data is returned as the placeholder until the resource is loaded.
+        :return: the resource data, the placeholder or None
+        """
+        resource = self.get_resource(resource_name, noWarn)
+        if resource is None:
+            return None
+
+        if (resource.data is None or resource.is_placeholder) and self.can_load_async(resource):
+            if resource.data is None and default_data is not None:
+                placeholder = copy.copy(default_data)
+                if hasattr(placeholder, 'name'):
+                    placeholder.name = resource.name
+                resource.set_placeholder(placeholder)
+            self.resource_manager.request_loading(self, resource, priority)
+            return resource.data
+        return resource.get_data()
+
     def get_resource_list(self):
         return list(self.resources.values())
 
@@ -465,8 +684,40 @@ class ResourceLoader(object):
                     self.delete_resource(resource_name)
                 logger.info("rename_resource : %s to %s" % (resource_name, new_name))
 
+    def can_load_async(self, resource):
+        return self.USE_ASYNC_LOADING and self.resource_manager.async_loading
+
+    def load_resource_async(self, resource_name, priority=LoadingPriority.NORMAL):
+        resource = self.get_resource(resource_name)
+        if resource is not None and resource.is_need_to_load():
+            if self.can_load_async(resource):
+                self.resource_manager.request_loading(self, resource, priority)
+            else:
+                self.load_resource(resource_name)
+
     def load_resource(self, resource_name):
-        logger.warn("load_resource is not implemented in %s." % self.name)
+        resource = self.get_resource(resource_name)
+        if resource:
+            # take over the loaded data of the loading thread.
+            load_data = self.resource_manager.take_loading_request(self, resource)
+            if load_data is not None:
+                load_data = self.migrate_if_required(resource, load_data)
+            else:
+                load_data = self.load_resource_data(resource)
+
+            if load_data is not None and self.create_resource_data(resource, load_data):
+                return True
+        logger.error('%s failed to load %s' % (self.name, resource_name))
+        return False
+
+    def create_resource_data(self, resource, load_data):
+        """
+        Create the resource data from the result of load_resource_data and set it to the resource.
+        This is called on the main thread, because OpenGL objects are created here.
+        :return: True if succeeded.
+        """
+        logger.warn("create_resource_data is not implemented in %s." % self.name)
+        return False
 
     def unload_resource(self, resource_name):
         logger.warn("unload_resource is not implemented in %s." % self.name)
@@ -496,47 +747,97 @@ class ResourceLoader(object):
         logger.warn("save_resource is not implemented in %s." % self.name)
         return False
 
-    @staticmethod
-    def load_resource_data(resource):
+    def load_resource_data(self, resource, migrate=True):
+        """
+        :param migrate: False on the loading thread, then migrate_if_required is called on the main thread.
+        """
         filePath = ''
         if resource is not None:
             filePath = resource.meta_data.resource_filepath
             try:
                 if os.path.exists(filePath):
                     # Load data (deserialize)
-                    if is_gz_compressed_file(filePath):
+                    if is_binary_container_file(filePath):
+                        load_data = load_binary_container(filePath)
+                    elif is_gz_compressed_file(filePath):
                         with gzip.open(filePath, 'rb') as f:
                             load_data = pickle.load(f)
                     else:
                         # human readable data
                         with open(filePath, 'r') as f:
                             load_data = eval(f.read())
+
+                    if migrate:
+                        load_data = self.migrate_if_required(resource, load_data)
                     return load_data
             except:
                 logger.error(traceback.format_exc())
         logger.error("file open error : %s" % filePath)
         return None
 
+    def migrate_if_required(self, resource, load_data):
+        """
+        Migrate the resource file of the previous resource version or format.
+        This writes the resource file, the meta data and the conversion cache, so it is called on the main thread.
+        :return: the load data
+        """
+        filePath = resource.meta_data.resource_filepath
+        if self.USE_BINARY_CONTAINER and load_data is not None and \
+                (resource.meta_data.resource_version != self.resource_version or
+                 not is_binary_container_file(filePath)):
+            # release the memory-mapped file before it is rewritten.
+            load_data = copy_mapped_arrays(load_data)
+            self.migrate_resource_data(resource, load_data)
+        return load_data
+
+    def migrate_resource_data(self, resource, load_data):
+        """
+        Rewrite the resource file saved by the previous resource version.
+        """
+        logger.info("Migrate %s : resource version %s to %s" % (resource.name,
+                                                                 str(resource.meta_data.resource_version),
+                                                                 str(self.resource_version)))
+        self.save_resource_data(resource, load_data, resource.meta_data.source_filepath)
+
+    def get_save_filepath(self, resource_name):
+        save_filepath = resource_name.replace('.', os.sep)
+        return os.path.join(self.resource_path, save_filepath) + self.fileExt
+
+    def refresh_meta_data(self, resource, save_filepath, source_filepath, source_hash=None):
+        """
+        :param source_hash: the hash of the source file if save_filepath is copied from the conversion cache,
+            otherwise save_filepath is the new converted file and it is stored in the conversion cache.
+        """
+        resource.meta_data.set_resource_meta_data(save_filepath, save=False)
+        resource.meta_data.set_source_meta_data(source_filepath, save=False)
+        resource.meta_data.set_resource_version(self.resource_version, save=False)
+        if source_filepath and os.path.exists(source_filepath):
+            conversion_cache = self.resource_manager.conversion_cache
+            if source_hash is None:
+                source_hash = ConversionCache.get_source_hash(source_filepath)
+                if source_hash and conversion_cache is not None:
+                    conversion_cache.save(self.get_conversion_key(source_hash), save_filepath)
+            resource.meta_data.set_source_hash(source_hash, save=False)
+        resource.meta_data.save_meta_file()
+
     def save_resource_data(self, resource, save_data, source_filepath=""):
-        # save_filepath = os.path.join(self.resource_path, resource.name) + self.fileExt
-        save_filepath = resource.name.replace('.', os.sep)
-        save_filepath = os.path.join(self.resource_path, save_filepath) + self.fileExt
+        save_filepath = self.get_save_filepath(resource.name)
         save_dir = os.path.dirname(save_filepath)
         if not os.path.exists(save_dir):
             os.makedirs(save_dir)
 
         if self.save_data_to_file(save_filepath, save_data):
             # refresh meta data because resource file saved.
-            resource.meta_data.set_resource_meta_data(save_filepath, save=False)
-            resource.meta_data.set_source_meta_data(source_filepath, save=False)
-            resource.meta_data.set_resource_version(self.resource_version, save=False)
-            resource.meta_data.save_meta_file()
+            self.refresh_meta_data(resource, save_filepath, source_filepath)
 
-    def save_data_to_file(self, save_filepath, save_data):
+    @classmethod
+    def save_data_to_file(cls, save_filepath, save_data):
         logger.info("Save : %s" % save_filepath)
         try:
             # store data, serialize
-            if self.USE_FILE_COMPRESS_TO_SAVE:
+            if cls.USE_BINARY_CONTAINER:
+                save_binary_container(save_filepath, save_data)
+            elif cls.USE_FILE_COMPRESS_TO_SAVE:
                 with gzip.open(save_filepath, 'wb') as f:
                     pickle.dump(save_data, f, protocol=pickle.HIGHEST_PROTOCOL)
             else:
@@ -607,7 +908,8 @@ class ShaderLoader(ResourceLoader):
                                                                                     shader_name=resource_name,
                                                                                     macros={})
 
-    def save_data_to_file(self, save_filepath, save_data):
+    @classmethod
+    def save_data_to_file(cls, save_filepath, save_data):
         logger.info("Save : %s" % save_filepath)
         try:
             # human readable data
@@ -629,10 +931,140 @@ class MaterialLoader(ResourceLoader):
     fileExt = '.mat'
     resource_version = 0.6
     USE_FILE_COMPRESS_TO_SAVE = False
+    USE_ASYNC_LOADING = True
 
     def __init__(self, core_manager, root_path):
         ResourceLoader.__init__(self, core_manager, root_path)
         # self.linked_material_map = {}
+        self.program_binary_cache = ProgramBinaryCache(os.path.join(root_path, 'ProgramBinaryCache'),
+                                                       self.resource_manager.program_binary_cache_size)
+        # If it is True, the new materials are compiled in the background and the default material is rendered
+        # until they are ready. see update
+        self.async_compile = False
+        self.sync_compile_count = 0  # see begin_sync_compile
+        self.compiling_materials = OrderedDict()  # { material_name : (material, material_datas, macros) }
+        # the permutations requested in the sessions, they are compiled before the first frame. see warm_up
+        self.permutation_manifest = ShaderPermutationManifest(os.path.join(root_path, 'ShaderPermutations.json'))
+        self.warm_up_permutations = []
+        self.warm_up_count = 0
+
+    def initialize(self):
+        ResourceLoader.initialize(self)
+
+        if self.resource_manager.shader_warm_up:
+            self.warm_up_permutations = self.permutation_manifest.get_permutations()
+            self.warm_up_count = len(self.warm_up_permutations)
+
+    def is_warming_up(self):
+        return 0 < len(self.warm_up_permutations)
+
+    def warm_up(self, time_budget):
+        """
+        Compile or load the program binaries of the recorded permutations within the time budget.
+        :return: the number of the compiled permutations
+        """
+        start_time = time.perf_counter()
+        while self.warm_up_permutations:
+            material_name, shader_name, macros = self.warm_up_permutations.pop(0)
+            if self.get_resource_data(material_name, noWarn=True) is None:
+                self.generate_new_material(material_name, shader_name, default_compile_option, macros=macros)
+
+            if time_budget < (time.perf_counter() - start_time):
+                break
+
+        if not self.warm_up_permutations:
+            logger.info("Warmed up %d shader permutations." % self.warm_up_count)
+        return self.warm_up_count - len(self.warm_up_permutations)
+
+    def save_permutation_manifest(self):
+        report = self.permutation_manifest.get_unused_report(self.get_resource_name_list())
+        if report:
+            report_filepath = os.path.splitext(self.permutation_manifest.filepath)[0] + '_unused.txt'
+            try:
+                with open(report_filepath, 'w') as f:
+                    f.write("\n".join(report))
+                logger.info("%d shader permutations are not used in this session. see %s" % (len(report),
+                                                                                           report_filepath))
+            except BaseException:
+                logger.error(traceback.format_exc())
+        self.permutation_manifest.save()
+
+    @staticmethod
+    def get_driver_info():
+        return tuple(getattr(OpenGLContext, name, '') for name in ('GL_VENDOR', 'GL_RENDERER', 'GL_VERSION'))
+
+    def create_material(self, material_name, material_datas, placeholder=None):
+        """
+        Create the material with the cached program binary, the binary is cached if it is compiled from the sources.
+        :param placeholder: If it is not None and there is no cached binary, the material is compiled asynchronously.
+        """
+        shader_codes = material_datas.get('shader_codes')
+        if not self.program_binary_cache.is_enabled() or not shader_codes:
+            return Material(material_name, material_datas, placeholder=placeholder)
+
+        key = self.program_binary_cache.get_key(shader_codes, self.get_driver_info())
+        binary_format, binary_data = self.program_binary_cache.load(key)
+        material = Material(material_name, dict(material_datas, binary_format=binary_format, binary_data=binary_data),
+                            placeholder=placeholder)
+
+        if material.placeholder is not None:
+            # the binary is saved when the compile is finished.
+            if binary_data is not None:
+                self.program_binary_cache.remove(key)
+        elif material.valid and not material.is_compiled_from_binary:
+            # the binary is not cached or is rejected by the driver.
+            binary_format, binary_data = material.save_to_binary()
+            self.program_binary_cache.save(key, binary_format, binary_data)
+        elif not material.valid and binary_data is not None:
+            self.program_binary_cache.remove(key)
+        return material
+
+    def save_program_binary(self, material, shader_codes):
+        if self.program_binary_cache.is_enabled():
+            key = self.program_binary_cache.get_key(shader_codes, self.get_driver_info())
+            binary_format, binary_data = material.save_to_binary()
+            self.program_binary_cache.save(key, binary_format, binary_data)
+
+    def begin_sync_compile(self):
+        """
+        Compile the materials synchronously until end_sync_compile, and finish the compiling materials.
+        The passes which are rendered once must not use the placeholder. ex) the light probe, the precompute
+        """
+        if 0 == self.sync_compile_count:
+            self.update(wait=True)
+        self.sync_compile_count += 1
+
+    def end_sync_compile(self):
+        self.sync_compile_count -= 1
+
+    def update(self, wait=False):
+        """
+        Finish the compiled materials and swap them into the material instances which render the placeholder.
+        :param wait: finish all compiling materials.
+        """
+        for material_name in list(self.compiling_materials.keys()):
+            material, material_datas, macros = self.compiling_materials[material_name]
+            if not wait and not material.is_compile_completed():
+                continue
+
+            self.compiling_materials.pop(material_name)
+            if material.finish_compile():
+                self.save_program_binary(material, material_datas['shader_codes'])
+                self.regist_material(material, material_datas)
+            else:
+                material.delete()
+                if ShaderCompileMessage.TEXTURE_NO_MATCHING_OVERLOADED_FUNCTION in material.compile_message:
+                    logger.error("Recompile %s material cause global_texture_function_error." % material_name)
+                    compile_option = []  # pop USE_GLOBAL_TEXTURE_FUNCTION compile option.
+                    material = self.generate_new_material(material_name, material_datas['shader_name'],
+                                                          compile_option, macros=macros)
+                else:
+                    logger.error("Failed to generate_new_material %s." % material_name)
+                    material = None
+
+            # the material instances keep the placeholder if the compile is failed.
+            if material is not None:
+                self.resource_manager.material_instance_loader.swap_material(material)
 
     def action_resource(self, resource_name):
         material = self.get_resource_data(resource_name)
@@ -664,32 +1096,32 @@ class MaterialLoader(ResourceLoader):
         for shader_name in reload_shader_names:
             self.resource_manager.material_instance_loader.reload_material_instances(shader_name)
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            material_datas = self.load_resource_data(resource)
-            if material_datas:
-                meta_data = resource.meta_data
-                generate_new_material = False
-                if self.is_new_external_data(meta_data, meta_data.source_filepath):
+    def create_resource_data(self, resource, material_datas):
+        if material_datas:
+            meta_data = resource.meta_data
+            generate_new_material = False
+            if self.is_new_external_data(meta_data, meta_data.source_filepath):
+                generate_new_material = True
+
+            # set include files meta datas
+            meta_data.include_files = material_datas.get('include_files', {})
+            for include_file in meta_data.include_files:
+                if get_modify_time_of_file(include_file) != meta_data.include_files[include_file]:
                     generate_new_material = True
+                    break
 
-                # set include files meta datas
-                meta_data.include_files = material_datas.get('include_files', {})
-                for include_file in meta_data.include_files:
-                    if get_modify_time_of_file(include_file) != meta_data.include_files[include_file]:
-                        generate_new_material = True
-                        break
-
-                if generate_new_material:
-                    shader_name = material_datas.get('shader_name')
-                    macros = material_datas.get('macros', {})
-                    self.generate_new_material(resource.name, shader_name, default_compile_option, macros)
-                else:
-                    material = Material(resource.name, material_datas)
-                    resource.set_data(material)
-                return True
-        logger.error('%s failed to load %s' % (self.name, resource_name))
+            if generate_new_material:
+                shader_name = material_datas.get('shader_name')
+                macros = material_datas.get('macros', {})
+                self.generate_new_material(resource.name, shader_name, default_compile_option, macros)
+            else:
+                # the program binaries of the old material files are ignored, see ProgramBinaryCache.
+                material_datas.pop('binary_format', None)
+                material_datas.pop('binary_data', None)
+                material = self.create_material(resource.name, material_datas)
+                resource.set_data(material)
+                self.scene_manager.update_material_version()
+            return True
         return False
 
     @staticmethod
@@ -700,7 +1132,48 @@ class MaterialLoader(ResourceLoader):
             shader_name += "_" + str(uuid.uuid3(uuid.NAMESPACE_DNS, "_".join(add_name))).replace("-", "_")
         return shader_name
 
-    def generate_new_material(self, material_name, shader_name, compile_option, macros={}):
+    @staticmethod
+    def is_mesh_material(shader, shader_codes):
+        """
+        :return: True if the material has the stages of the placeholder, the mesh vertex and the fragment shader.
+        """
+        return {GL_VERTEX_SHADER, GL_FRAGMENT_SHADER} == set(shader_codes.keys()) and \
+            any('default_vs.glsl' == os.path.basename(include_file) for include_file in shader.include_files)
+
+    def get_placeholder_material(self, macros):
+        """
+        :return: the compiled default material which is rendered until the new material is compiled.
+        """
+        # the material of the loaded default material instance, the instance is not loaded here to avoid recursion.
+        material_instance_name = 'default_skeletal' if 1 == macros.get('SKELETAL', 0) else 'default'
+        resource = self.resource_manager.material_instance_loader.get_resource(material_instance_name, noWarn=True)
+        material_instance = resource.data if resource is not None and not resource.is_placeholder else None
+        placeholder = material_instance.material if material_instance is not None else None
+        if placeholder is not None and placeholder.valid and placeholder.placeholder is None:
+            return placeholder
+        return None
+
+    def regist_material(self, material, material_datas):
+        resource = self.get_resource(material.name, noWarn=True)
+        if resource is None:
+            resource = self.create_resource(material.name)
+
+        # set include files meta datas
+        resource.meta_data.include_files = material_datas.get('include_files', {})
+
+        # write material to file, and regist to resource manager
+        shader_meta_data = self.resource_manager.shader_loader.get_meta_data(material.shader_name)
+        if shader_meta_data:
+            source_filepath = shader_meta_data.resource_filepath
+        else:
+            source_filepath = ""
+
+        # Done : save material data
+        self.save_resource_data(resource, material_datas, source_filepath)
+        resource.set_data(material)
+        self.scene_manager.update_material_version()
+
+    def generate_new_material(self, material_name, shader_name, compile_option, macros={}, async_compile=False):
         logger.info("Generate new material : %s" % material_name)
         shader = self.resource_manager.get_shader(shader_name)
         shader_version = self.resource_manager.get_shader_version()
@@ -732,44 +1205,33 @@ class MaterialLoader(ResourceLoader):
                     include_files=include_files,
                     uniforms=uniforms,
                     material_components=material_components,
-                    binary_data=None,
-                    binary_format=None,
                     macros=final_macros
                 )
-                # create material
-                material = Material(final_material_name, material_datas)
 
-                if material:
-                    if material.valid:
-                        resource = self.get_resource(final_material_name, noWarn=True)
-                        if resource is None:
-                            resource = self.create_resource(final_material_name)
-
-                        # set include files meta datas
-                        resource.meta_data.include_files = material_datas.get('include_files', {})
-
-                        # write material to file, and regist to resource manager
-                        shader_meta_data = self.resource_manager.shader_loader.get_meta_data(shader_name)
-                        if shader_meta_data:
-                            source_filepath = shader_meta_data.resource_filepath
-                        else:
-                            source_filepath = ""
+                # the compute and the post-process materials are compiled synchronously.
+                placeholder = None
+                if async_compile and self.is_mesh_material(shader, shader_codes):
+                    placeholder = self.get_placeholder_material(macros)
+                if placeholder is not None and placeholder.name == final_material_name:
+                    placeholder = None
 
-                        # save binary data of shader.
-                        binary_format, binary_data = material.save_to_binary()
-                        if binary_format is not None and binary_data is not None:
-                            material_datas['binary_format'] = binary_format
-                            material_datas['binary_data'] = binary_data
+                # create material
+                material = self.create_material(final_material_name, material_datas, placeholder=placeholder)
 
-                        # Done : save material data
-                        self.save_resource_data(resource, material_datas, source_filepath)
-                        resource.set_data(material)
+                if material:
+                    if material.placeholder is not None:
+                        # render the placeholder until the material is compiled. see update
+                        self.compiling_materials[final_material_name] = (material, material_datas, macros)
+                        return material
+                    elif material.valid:
+                        self.regist_material(material, material_datas)
                         return material
                     else:
                         if ShaderCompileMessage.TEXTURE_NO_MATCHING_OVERLOADED_FUNCTION in material.compile_message:
                             logger.error("Recompile %s material cause global_texture_function_error." % material_name)
                             compile_option = []  # pop USE_GLOBAL_TEXTURE_FUNCTION compile option.
-                            self.generate_new_material(material_name, shader_name, compile_option, macros=macros)
+                            return self.generate_new_material(material_name, shader_name, compile_option,
+                                                              macros=macros)
         logger.error("Failed to generate_new_material %s." % material_name)
         return None
 
@@ -779,14 +1241,18 @@ class MaterialLoader(ResourceLoader):
             return None
 
         material_name = self.generate_material_name(shader_name, macros)
+        self.permutation_manifest.record(material_name, shader_name, macros)
 
         # Due to options such as macros, actual material names may differ. That's why we use link maps.
         # if material_name in self.linked_material_map:
         #     material_name = self.linked_material_map[material_name]
 
         material = self.get_resource_data(material_name)
+        if material is None and material_name in self.compiling_materials:
+            material = self.compiling_materials[material_name][0]
         if material is None:
-            material = self.generate_new_material(material_name, shader_name, default_compile_option, macros=macros)
+            material = self.generate_new_material(material_name, shader_name, default_compile_option, macros=macros,
+                                                  async_compile=self.async_compile and 0 == self.sync_compile_count)
         return material
 
 
@@ -799,25 +1265,23 @@ class MaterialInstanceLoader(ResourceLoader):
     resource_type_name = 'MaterialInstance'
     fileExt = '.matinst'
     USE_FILE_COMPRESS_TO_SAVE = False
+    USE_ASYNC_LOADING = True
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            material_instance_data = self.load_resource_data(resource)
-            if material_instance_data:
-                shader_name = material_instance_data.get('shader_name', 'default')
-                macros = material_instance_data.get('macros', {})
-                material = self.resource_manager.get_material(shader_name, macros)
-                material_instance_data['material'] = material
-
-                material_instance = MaterialInstance(resource.name, **material_instance_data)
-                if material_instance.valid:
-                    resource.set_data(material_instance)
-                    if material_instance.isNeedToSave:
-                        self.save_resource(resource_name)
-                        material_instance.isNeedToSave = False
-                return material_instance.valid
-        logger.error('%s failed to load %s' % (self.name, resource_name))
+    def create_resource_data(self, resource, material_instance_data):
+        if material_instance_data:
+            shader_name = material_instance_data.get('shader_name', 'default')
+            macros = material_instance_data.get('macros', {})
+            material = self.resource_manager.get_material(shader_name, macros)
+            material_instance_data['material'] = material
+
+            material_instance = MaterialInstance(resource.name, **material_instance_data)
+            if material_instance.valid:
+                resource.set_data(material_instance)
+                self.scene_manager.update_material_version()
+                if material_instance.isNeedToSave:
+                    self.save_resource(resource.name)
+                    material_instance.isNeedToSave = False
+            return material_instance.valid
         return False
 
     def action_resource(self, resource_name):
@@ -851,6 +1315,16 @@ class MaterialInstanceLoader(ResourceLoader):
         logger.error('Failed to %s material instance.' % resource_name)
         return False
 
+    def swap_material(self, material):
+        """
+        Link the compiled material to the material instances which render the placeholder of it.
+        """
+        for resource in self.resources.values():
+            material_instance = resource.data
+            if material_instance is not None and material_instance.pending_material is not None and \
+                    material_instance.pending_material.name == material.name:
+                material_instance.set_material(material)
+
     def get_material_instance(self, name, shader_name='', macros={}):
         material_instance = self.get_resource_data(name)
         if material_instance is None:
@@ -876,8 +1350,11 @@ class TextureLoader(ResourceLoader):
     name = "TextureLoader"
     resource_dir_name = 'Textures'
     resource_type_name = 'Texture'
-    resource_version = 2
+    resource_version = 3
     USE_FILE_COMPRESS_TO_SAVE = True
+    USE_BINARY_CONTAINER = True
+    USE_CONVERT_WORKER = True
+    USE_ASYNC_LOADING = True
     external_dir_names = [os.path.join('Externals', 'Textures'), ]
     fileExt = '.texture'
     externalFileExt = dict(GIF=".gif", JPG=".jpg", JPEG=".jpeg", PNG=".png", BMP=".bmp", TGA=".tga", TIF=".tif",
@@ -897,35 +1374,49 @@ class TextureLoader(ResourceLoader):
     def action_resource(self, resource_name):
         self.core_manager.request(COMMAND.VIEW_TEXTURE, resource_name)
 
+    def save_resource_data(self, resource, save_data, source_filepath=""):
+        # the texture datas are read back from the gpu.
+        if not OpenGLContext.support_read_back:
+            logger.info("Skip to save %s, the texture can not be read back." % resource.name)
+            return
+        ResourceLoader.save_resource_data(self, resource, save_data, source_filepath)
+
+    def can_load_async(self, resource):
+        # the external file is converted with OpenGL on the main thread.
+        meta_data = resource.meta_data
+        return ResourceLoader.can_load_async(self, resource) and \
+            not self.is_new_external_data(meta_data, meta_data.source_filepath)
+
     def load_resource(self, resource_name):
         resource = self.get_resource(resource_name)
         if resource:
             meta_data = resource.meta_data
-            if self.is_new_external_data(meta_data, meta_data.source_filepath):
+            if self.is_new_external_data(meta_data, meta_data.source_filepath) and \
+                    not self.load_converted_cache(resource, meta_data.source_filepath):
                 self.convert_resource(resource, meta_data.source_filepath)
-
-            texture_datas = self.load_resource_data(resource)
-            if texture_datas:
-                texture_type = texture_datas.get('texture_type')
-                if TextureCube == texture_type or TextureCube.__name__ == texture_type:
-                    default_texture = self.resource_manager.get_default_texture()
-                    texture_datas['texture_positive_x'] = self.get_resource_data(
-                        texture_datas['texture_positive_x']) or default_texture
-                    texture_datas['texture_negative_x'] = self.get_resource_data(
-                        texture_datas['texture_negative_x']) or default_texture
-                    texture_datas['texture_positive_y'] = self.get_resource_data(
-                        texture_datas['texture_positive_y']) or default_texture
-                    texture_datas['texture_negative_y'] = self.get_resource_data(
-                        texture_datas['texture_negative_y']) or default_texture
-                    texture_datas['texture_positive_z'] = self.get_resource_data(
-                        texture_datas['texture_positive_z']) or default_texture
-                    texture_datas['texture_negative_z'] = self.get_resource_data(
-                        texture_datas['texture_negative_z']) or default_texture
-
-                texture = CreateTexture(name=resource.name, **texture_datas)
-                resource.set_data(texture)
-                return True
-        logger.error('%s failed to load %s' % (self.name, resource_name))
+        return ResourceLoader.load_resource(self, resource_name)
+
+    def create_resource_data(self, resource, texture_datas):
+        if texture_datas:
+            texture_type = texture_datas.get('texture_type')
+            if TextureCube == texture_type or TextureCube.__name__ == texture_type:
+                default_texture = self.resource_manager.get_default_texture()
+                texture_datas['texture_positive_x'] = self.get_resource_data(
+                    texture_datas['texture_positive_x']) or default_texture
+                texture_datas['texture_negative_x'] = self.get_resource_data(
+                    texture_datas['texture_negative_x']) or default_texture
+                texture_datas['texture_positive_y'] = self.get_resource_data(
+                    texture_datas['texture_positive_y']) or default_texture
+                texture_datas['texture_negative_y'] = self.get_resource_data(
+                    texture_datas['texture_negative_y']) or default_texture
+                texture_datas['texture_positive_z'] = self.get_resource_data(
+                    texture_datas['texture_positive_z']) or default_texture
+                texture_datas['texture_negative_z'] = self.get_resource_data(
+                    texture_datas['texture_negative_z']) or default_texture
+
+            texture = CreateTexture(name=resource.name, **texture_datas)
+            resource.set_data(texture)
+            return True
         return False
 
     def generate_cube_textures(self):
@@ -979,6 +1470,13 @@ class TextureLoader(ResourceLoader):
 
     @staticmethod
     def create_texture_from_file(texture_name, source_filepath):
+        texture_datas = TextureLoader.load_texture_datas(source_filepath)
+        if texture_datas is not None:
+            return CreateTexture(name=texture_name, **texture_datas)
+        return None
+
+    @staticmethod
+    def load_texture_datas(source_filepath):
         if os.path.exists(source_filepath):
             image = Image.open(source_filepath)
             width, height = image.size
@@ -1008,9 +1506,23 @@ class TextureLoader(ResourceLoader):
                 height=height,
                 data=data
             )
-            return CreateTexture(name=texture_name, **texture_datas)
+            return texture_datas
         return None
 
+    @classmethod
+    def convert_source_data(cls, source_filepath):
+        texture_datas = cls.load_texture_datas(source_filepath)
+        if texture_datas is not None:
+            texture_datas['texture_type'] = Texture2D.__name__
+            texture_datas['data'] = np.frombuffer(texture_datas['data'], dtype=np.uint8)
+        return texture_datas
+
+    def convert_resources(self, convert_list):
+        for resource, source_filepath in convert_list:
+            if resource not in self.new_texture_list:
+                self.new_texture_list.append(resource)
+        ResourceLoader.convert_resources(self, convert_list)
+
     def convert_resource(self, resource, source_filepath):
         try:
             logger.info("Convert Resource : %s" % source_filepath)
@@ -1036,6 +1548,7 @@ class ProceduralTextureLoader(ResourceLoader):
     resource_type_name = 'ProceduralTexture'
     resource_version = 0
     USE_FILE_COMPRESS_TO_SAVE = False
+    USE_ASYNC_LOADING = True
     fileExt = '.ptexture'
 
     def initialize(self):
@@ -1051,16 +1564,10 @@ class ProceduralTextureLoader(ResourceLoader):
         create_procedural_texture("VectorFieldTexture3D", VectorFieldTexture3D)
         create_procedural_texture("NoiseTexture3D", NoiseTexture3D)
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            data = self.load_resource_data(resource)
-            if data is not None:
-                resource_data = CreateProceduralTexture(**data)
-                resource.set_data(resource_data)
-                return True
-        logger.error('%s failed to load %s' % (self.name, resource_name))
-        return False
+    def create_resource_data(self, resource, data):
+        resource_data = CreateProceduralTexture(**data)
+        resource.set_data(resource_data)
+        return True
 
     def action_resource(self, resource_name):
         texture = self.get_resource_data(resource_name)
@@ -1073,13 +1580,16 @@ class ProceduralTextureLoader(ResourceLoader):
 # -----------------------#
 class MeshLoader(ResourceLoader):
     name = "MeshLoader"
-    resource_version = 0
+    resource_version = 2
     resource_dir_name = 'Meshes'
     resource_type_name = 'Mesh'
     fileExt = '.mesh'
     externalFileExt = dict(WaveFront='.obj', Collada='.dae')
     external_dir_names = [os.path.join('Externals', 'Meshes'), ]
     USE_FILE_COMPRESS_TO_SAVE = True
+    USE_BINARY_CONTAINER = True
+    USE_CONVERT_WORKER = True
+    USE_ASYNC_LOADING = True
 
     def initialize(self):
         # load and regist resource
@@ -1091,32 +1601,86 @@ class MeshLoader(ResourceLoader):
         self.create_resource("Cube", Cube("Cube"))
         self.create_resource("Plane", Plane("Plane", width=4, height=4, xz_plane=True))
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            mesh_data = self.load_resource_data(resource)
-            if mesh_data:
-                mesh = Mesh(resource.name, **mesh_data)
-                resource.set_data(mesh)
-                return True
-        logger.error('%s failed to load %s' % (self.name, resource_name))
+    def create_mesh(self, mesh_name, mesh_data):
+        mesh = Mesh(mesh_name, **mesh_data)
+        for animation in mesh.animations:
+            if animation:
+                animation.set_pose_cache_sample_rate(self.resource_manager.pose_cache_sample_rate)
+        return mesh
+
+    def create_resource_data(self, resource, mesh_data):
+        if mesh_data:
+            mesh = self.create_mesh(resource.name, mesh_data)
+            resource.set_data(mesh)
+            return True
         return False
 
-    def convert_resource(self, resoure, source_filepath):
-        logger.info("Convert Resource : %s" % source_filepath)
+    @classmethod
+    def get_import_options(cls):
+        return dict(obj_scale=1, obj_swap_yz=True, optimize_mesh=True, vertex_cache_size=VERTEX_CACHE_SIZE,
+                    overdraw_threshold=OVERDRAW_THRESHOLD)
+
+    @classmethod
+    def prepare_geometry_datas(cls, mesh_data, import_options):
+        """
+        Convert the vertex arrays to numpy arrays, precompute the tangents and optimize the geometries.
+        """
+        for geometry_data in mesh_data.get('geometry_datas', []):
+            is_triangle_mode = (GL_TRIANGLES == geometry_data.get('mode', GL_TRIANGLES))
+
+            # vertex arrays are saved as the raw arrays of the binary container.
+            for key, dtype in (('positions', np.float32), ('normals', np.float32), ('colors', np.float32),
+                               ('texcoords', np.float32), ('indices', np.uint32), ('bone_indicies', np.float32),
+                               ('bone_weights', np.float32)):
+                if key in geometry_data and not isinstance(geometry_data[key], np.ndarray):
+                    geometry_data[key] = np.array(geometry_data[key], dtype=dtype)
+
+            # precompute tangents
+            positions = geometry_data.get('positions', [])
+            normals = geometry_data.get('normals', [])
+            texcoords = geometry_data.get('texcoords', [])
+            indices = geometry_data.get('indices', [])
+            if 0 == len(geometry_data.get('tangents', [])) and 0 < len(positions) and \
+                    len(positions) == len(normals) == len(texcoords):
+                geometry_data['tangents'] = compute_tangent(is_triangle_mode, positions, texcoords, normals, indices)
+
+            # reorder for the vertex cache, the overdraw and the vertex fetch, and use 16-bit indices if possible.
+            if import_options['optimize_mesh']:
+                statistics = optimize_geometry_data(geometry_data, is_triangle_mode,
+                                                    import_options['vertex_cache_size'],
+                                                    import_options['overdraw_threshold'])
+                if statistics:
+                    logger.info("Optimize %s : ACMR %.3f -> %.3f, ATVR %.3f -> %.3f, %s indices" % (
+                        geometry_data.get('name', ''), statistics['acmr'][0], statistics['acmr'][1],
+                        statistics['atvr'][0], statistics['atvr'][1], statistics['index_type']))
+
+    @classmethod
+    def convert_source_data(cls, source_filepath):
+        import_options = cls.get_import_options()
         file_ext = os.path.splitext(source_filepath)[1]
-        if file_ext == self.externalFileExt.get('WaveFront'):
-            mesh = OBJ(source_filepath, 1, True)
+        if file_ext == cls.externalFileExt.get('WaveFront'):
+            mesh = OBJ(source_filepath, import_options['obj_scale'], import_options['obj_swap_yz'])
             mesh_data = mesh.get_mesh_data()
-        elif file_ext == self.externalFileExt.get('Collada'):
+        elif file_ext == cls.externalFileExt.get('Collada'):
             mesh = Collada(source_filepath)
             mesh_data = mesh.get_mesh_data()
         else:
-            return
+            return None
 
+        cls.prepare_geometry_datas(mesh_data, import_options)
+        return mesh_data
+
+    def migrate_resource_data(self, resource, load_data):
+        # the meshes of the previous resource version are optimized as well as the new imported meshes.
+        self.prepare_geometry_datas(load_data, self.get_import_options())
+        super(MeshLoader, self).migrate_resource_data(resource, load_data)
+
+    def convert_resource(self, resoure, source_filepath):
+        logger.info("Convert Resource : %s" % source_filepath)
+        mesh_data = self.convert_source_data(source_filepath)
         if mesh_data:
             # create mesh
-            mesh = Mesh(resoure.name, **mesh_data)
+            mesh = self.create_mesh(resoure.name, mesh_data)
             resoure.set_data(mesh)
             self.save_resource_data(resoure, mesh_data, source_filepath)
 
@@ -1136,6 +1700,7 @@ class ModelLoader(ResourceLoader):
     fileExt = '.model'
     externalFileExt = dict(Mesh='.mesh')
     USE_FILE_COMPRESS_TO_SAVE = False
+    USE_ASYNC_LOADING = True
 
     def initialize(self):
         # load and regist resource
@@ -1151,18 +1716,22 @@ class ModelLoader(ResourceLoader):
         resource.set_data(model)
         self.save_resource(resource.name)
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            object_data = self.load_resource_data(resource)
-            if object_data:
-                mesh = self.resource_manager.get_mesh(object_data.get('mesh'))
-                material_instances = [self.resource_manager.get_material_instance(material_instance_name)
-                                      for material_instance_name in object_data.get('material_instances', [])]
-                obj = Model(resource.name, mesh=mesh, material_instances=material_instances)
-                resource.set_data(obj)
-                return True
-        logger.error('%s failed to load %s' % (self.name, resource_name))
+    def create_resource_data(self, resource, object_data):
+        if object_data:
+            mesh = self.resource_manager.get_mesh(object_data.get('mesh'))
+            material_instances = [self.resource_manager.get_material_instance(material_instance_name)
+                                  for material_instance_name in object_data.get('material_instances', [])]
+            obj = Model(resource.name, mesh=mesh, material_instances=material_instances)
+            resource.set_data(obj)
+
+            mesh_resource = self.resource_manager.mesh_loader.get_resource(mesh.name, noWarn=True) if mesh else None
+            if mesh_resource is not None and mesh_resource.is_placeholder:
+                def rebuild_model():
+                    # the material instances depend on the geometries, so rebuild the model with the loaded mesh.
+                    resource.set_data(Model(resource.name, mesh=mesh, material_instances=material_instances))
+                    self.scene_manager.update_model_actor_bounds(obj)
+                mesh_resource.add_loaded_callback(rebuild_model)
+            return True
         return False
 
     def action_resource(self, resource_name):
@@ -1202,7 +1771,11 @@ class SceneLoader(ResourceLoader):
                         object_data['model'] = self.resource_manager.get_model(object_data.get('model'))
 
                     for object_data in scene_datas.get('skeleton_actors', []):
-                        object_data['model'] = self.resource_manager.get_model(object_data.get('model'))
+                        model = self.resource_manager.get_model(object_data.get('model'))
+                        if model is not None and model.mesh is not None:
+                            # skeleton actor needs the skeletons of the mesh, do not wait for the loading thread.
+                            self.resource_manager.mesh_loader.get_resource_data(model.mesh.name, noWarn=True)
+                        object_data['model'] = model
 
                     self.scene_manager.open_scene(resource_name, scene_datas)
                     resource.set_data(scene_datas)
@@ -1226,6 +1799,7 @@ class FontLoader(ResourceLoader):
     resource_type_name = 'Font'
     resource_version = 2
     fileExt = '.font'
+    USE_ASYNC_LOADING = True
     external_dir_names = [os.path.join('Externals', 'Fonts'), ]
     externalFileExt = dict(TTF='.ttf', OTF='.otf')
 
@@ -1234,17 +1808,23 @@ class FontLoader(ResourceLoader):
         Hangul_Syllables=(0xAC00, 0xD7AF),  # 44032 ~ 55215
     )
 
+    @classmethod
+    def get_import_options(cls):
+        return dict(distance_field_font=False, anti_aliasing=True, font_size=20, padding=1,
+                    unicode_blocks=sorted(cls.unicode_blocks.items()))
+
     def check_font_data(self, font_datas, resoure, source_filepath):
         chaneged = False
+        import_options = self.get_import_options()
         for unicode_block_name in self.unicode_blocks:
             if unicode_block_name not in font_datas:
                 range_min, range_max = self.unicode_blocks[unicode_block_name]
                 font_data = generate_font_data(
                     resource_name=resoure.name,
-                    distance_field_font=False,
-                    anti_aliasing=True,
-                    font_size=20,
-                    padding=1,
+                    distance_field_font=import_options['distance_field_font'],
+                    anti_aliasing=import_options['anti_aliasing'],
+                    font_size=import_options['font_size'],
+                    padding=import_options['padding'],
                     unicode_block_name=unicode_block_name,
                     range_min=range_min,
                     range_max=range_max,
@@ -1263,35 +1843,29 @@ class FontLoader(ResourceLoader):
         font_datas = {}
         self.check_font_data(font_datas, resoure, source_filepath)
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            meta_data = resource.meta_data
-            font_datas = self.load_resource_data(resource)
-            if font_datas is not None:
-                font_datas = self.check_font_data(font_datas, resource, meta_data.source_filepath)
-
-                for unicode_block_name in font_datas:
-                    font_data = font_datas[unicode_block_name]
-
-                    if font_data is not None:
-                        texture_datas = dict(
-                            texture_type=Texture2D,
-                            image_mode=font_data.get('image_mode'),
-                            width=font_data.get('image_width'),
-                            height=font_data.get('image_height'),
-                            data=font_data.get('image_data'),
-                            min_filter=GL_LINEAR,
-                            mag_filter=GL_LINEAR,
-                        )
-                        texture_name = "_".join([resource_name, font_data.get('unicode_block_name')])
-                        font_data['texture'] = CreateTexture(name=texture_name, **texture_datas)
-                        font_datas[unicode_block_name] = FontData(unicode_block_name, font_data)
-
-                resource.set_data(font_datas)
-                return True
-        logger.error('%s failed to load %s' % (self.name, resource_name))
-        return False
+    def create_resource_data(self, resource, font_datas):
+        meta_data = resource.meta_data
+        font_datas = self.check_font_data(font_datas, resource, meta_data.source_filepath)
+
+        for unicode_block_name in font_datas:
+            font_data = font_datas[unicode_block_name]
+
+            if font_data is not None:
+                texture_datas = dict(
+                    texture_type=Texture2D,
+                    image_mode=font_data.get('image_mode'),
+                    width=font_data.get('image_width'),
+                    height=font_data.get('image_height'),
+                    data=font_data.get('image_data'),
+                    min_filter=GL_LINEAR,
+                    mag_filter=GL_LINEAR,
+                )
+                texture_name = "_".join([resource.name, font_data.get('unicode_block_name')])
+                font_data['texture'] = CreateTexture(name=texture_name, **texture_datas)
+                font_datas[unicode_block_name] = FontData(unicode_block_name, font_data)
+
+        resource.set_data(font_datas)
+        return True
 
 
 # -----------------------#
@@ -1303,6 +1877,7 @@ class EffectLoader(ResourceLoader):
     resource_type_name = 'Effect'
     fileExt = '.effect'
     USE_FILE_COMPRESS_TO_SAVE = False
+    USE_ASYNC_LOADING = True
 
     def create_effect(self, particle_info=None):
         resource = self.create_resource('effect')
@@ -1314,21 +1889,15 @@ class EffectLoader(ResourceLoader):
         resource.set_data(effect)
         self.save_resource(resource.name)
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            effect_info = self.load_resource_data(resource)
-            if effect_info is not None:
-                particle_infos = []
-                for particle_name in effect_info.get('particle_infos', []):
-                    particle_info = self.resource_manager.get_particle(particle_name)
-                    particle_infos.append(particle_info)
-                effect_info['particle_infos'] = particle_infos
-                effect_info = EffectInfo(resource_name, **effect_info)
-                resource.set_data(effect_info)
-                return True
-        logger.error('%s failed to load %s' % (self.name, resource_name))
-        return False
+    def create_resource_data(self, resource, effect_info):
+        particle_infos = []
+        for particle_name in effect_info.get('particle_infos', []):
+            particle_info = self.resource_manager.get_particle(particle_name)
+            particle_infos.append(particle_info)
+        effect_info['particle_infos'] = particle_infos
+        effect_info = EffectInfo(resource.name, **effect_info)
+        resource.set_data(effect_info)
+        return True
 
     def action_resource(self, resource_name):
         self.scene_manager.add_effect_here(name=resource_name, effect_info=resource_name)
@@ -1343,6 +1912,7 @@ class ParticleLoader(ResourceLoader):
     resource_type_name = 'Particle'
     fileExt = '.particle'
     USE_FILE_COMPRESS_TO_SAVE = False
+    USE_ASYNC_LOADING = True
 
     def create_particle(self):
         resource = self.create_resource('particle')
@@ -1350,19 +1920,13 @@ class ParticleLoader(ResourceLoader):
         resource.set_data(effect)
         self.save_resource(resource.name)
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            particle_info = self.load_resource_data(resource)
-            particle_info['mesh'] = self.resource_manager.get_mesh(particle_info.get('mesh'))
-            particle_info['material_instance'] = self.resource_manager.get_material_instance(particle_info.get('material_instance'))
-            particle_info['texture_diffuse'] = self.resource_manager.get_texture(particle_info.get('texture_diffuse'))
-            particle_info = ParticleInfo(resource_name, **particle_info)
-            resource.set_data(particle_info)
-            return True
-
-        logger.error('%s failed to load %s' % (self.name, resource_name))
-        return False
+    def create_resource_data(self, resource, particle_info):
+        particle_info['mesh'] = self.resource_manager.get_mesh(particle_info.get('mesh'))
+        particle_info['material_instance'] = self.resource_manager.get_material_instance(particle_info.get('material_instance'))
+        particle_info['texture_diffuse'] = self.resource_manager.get_texture_async(particle_info.get('texture_diffuse'))
+        particle_info = ParticleInfo(resource.name, **particle_info)
+        resource.set_data(particle_info)
+        return True
 
     def action_resource(self, resource_name):
         particle_info = self.get_resource_data(resource_name)
@@ -1462,7 +2026,30 @@ class ResourceManager(Singleton):
         self.script_loader = None
         self.model_loader = None
         self.procedural_texture_loader = None
-        # self.loading_thread = LoadingThread(self)
+        self.convert_worker_count = 0  # 0 is cpu count
+        self.convert_progress_callback = None
+
+        # asynchronous loading
+        self.async_loading = True
+        self.loading_thread_count = 2
+        self.loading_time_budget = 0.004  # second, time to create the loaded resources per frame.
+        self.loading_threads = []
+        self.loading_queue = queue.PriorityQueue()
+        self.complete_queue = queue.PriorityQueue()
+        self.loading_requests = {}  # { (resource_type_name, resource_name) : LoadingRequest }
+        self.loading_sequence = 0
+
+        # baked poses of the animations per second, 0 is disabled.
+        self.pose_cache_sample_rate = 0.0
+        self.program_binary_cache_size = 256 * 1024 * 1024  # bytes, 0 is disabled
+        self.conversion_cache = None
+        self.conversion_cache_path = ""  # "" is the user cache directory, see ConversionCache
+        self.conversion_cache_size = 1024 * 1024 * 1024  # bytes, 0 is disabled
+        # compile the new materials in the background after the first frame, see MaterialLoader.update
+        self.async_material_compile = True
+        self.async_material_compile_ready = False  # set after the first light probe is rendered, see CoreManager
+        # compile the shader permutations of ShaderPermutations.json on the loading screen
+        self.shader_warm_up = True
 
         sys.path.append(os.path.join(self.PathResources, ScriptLoader.resource_dir_name))
 
@@ -1478,6 +2065,23 @@ class ResourceManager(Singleton):
         self.root_path = root_path or self.PathResources
         check_directory_and_mkdir(self.root_path)
 
+        project_config = core_manager.project_manager.config
+        if project_config is not None:
+            self.convert_worker_count = project_config.getValue("Resource", "convert_worker_count", 0)
+            self.async_loading = project_config.getValue("Resource", "async_loading", True)
+            self.loading_thread_count = project_config.getValue("Resource", "loading_thread_count", 2)
+            self.loading_time_budget = project_config.getValue("Resource", "loading_time_budget", 4.0) * 0.001
+            self.pose_cache_sample_rate = project_config.getValue("Animation", "pose_cache_sample_rate", 0.0)
+            program_binary_cache_size = project_config.getValue("Resource", "program_binary_cache_size", 256)
+            self.program_binary_cache_size = int(program_binary_cache_size * 1024 * 1024)
+            self.conversion_cache_path = project_config.getValue("Resource", "conversion_cache_path", "")
+            conversion_cache_size = project_config.getValue("Resource", "conversion_cache_size", 1024)
+            self.conversion_cache_size = int(conversion_cache_size * 1024 * 1024)
+            self.async_material_compile = project_config.getValue("Resource", "async_material_compile", True)
+            self.shader_warm_up = project_config.getValue("Resource", "shader_warm_up", True)
+
+        self.conversion_cache = ConversionCache(self.conversion_cache_path, self.conversion_cache_size)
+
         # Be careful with the initialization order.
         self.font_loader = self.regist_loader(FontLoader)
         self.texture_loader = self.regist_loader(TextureLoader)
@@ -1493,8 +2097,12 @@ class ResourceManager(Singleton):
         self.model_loader = self.regist_loader(ModelLoader)
         self.procedural_texture_loader = self.regist_loader(ProceduralTextureLoader)
 
-        # start loading thread
-        # self.loading_thread.start()
+        # start loading threads
+        if self.async_loading:
+            for i in range(max(1, self.loading_thread_count)):
+                loading_thread = LoadingThread(self.loading_queue, self.complete_queue)
+                loading_thread.start()
+                self.loading_threads.append(loading_thread)
 
         # initialize
         for resource_loader in self.resource_loaders:
@@ -1503,11 +2111,110 @@ class ResourceManager(Singleton):
         logger.info("Resource register done.")
 
     def update(self):
-        pass
-        # self.loading_thread.set_data()
+        self.material_loader.async_compile = self.async_material_compile and self.async_material_compile_ready
+        self.material_loader.update()
+
+        # create the loaded resources on the main thread within the time budget.
+        start_time = time.perf_counter()
+        while not self.complete_queue.empty():
+            request = self.complete_queue.get()
+            if request.canceled:
+                continue
+
+            resource_loader = request.resource_loader
+            resource = request.resource
+            self.loading_requests.pop((resource_loader.resource_type_name, resource.name), None)
+
+            # the request must not keep the mapped arrays while the resource file is migrated.
+            load_data = request.load_data
+            request.load_data = None
+            try:
+                load_data = resource_loader.migrate_if_required(resource, load_data)
+                if load_data is None or not resource_loader.create_resource_data(resource, load_data):
+                    logger.error('%s failed to load %s' % (resource_loader.name, resource.name))
+            except:
+                logger.error(traceback.format_exc())
+
+            if self.loading_time_budget < (time.perf_counter() - start_time):
+                break
+
+    def is_warming_up(self):
+        return self.material_loader.is_warming_up()
+
+    def warm_up(self, time_budget=0.1):
+        """
+        :param time_budget: second, the loading screen is updated at this interval.
+        :return: the progress text of the loading screen
+        """
+        count = self.material_loader.warm_up(time_budget)
+        return "Compiling shaders... %d / %d" % (count, self.material_loader.warm_up_count)
 
     def close(self):
-        pass
+        if self.material_loader is not None:
+            self.material_loader.save_permutation_manifest()
+
+        for request in self.loading_requests.values():
+            request.canceled = True
+        self.loading_requests = {}
+
+        for loading_thread in self.loading_threads:
+            # request to stop the loading thread.
+            self.loading_queue.put(LoadingRequest(None, None, LoadingPriority.HIGH, 0))
+        for loading_thread in self.loading_threads:
+            loading_thread.join()
+        self.loading_threads = []
+
+    def request_loading(self, resource_loader, resource, priority=LoadingPriority.NORMAL):
+        key = (resource_loader.resource_type_name, resource.name)
+        request = self.loading_requests.get(key)
+        if request is not None:
+            if request.started or request.priority.value <= priority.value:
+                return request
+            # raise the priority of the waiting request.
+            request.canceled = True
+
+        if not self.loading_threads:
+            resource_loader.load_resource(resource.name)
+            return None
+
+        self.loading_sequence += 1
+        request = LoadingRequest(resource_loader, resource, priority, self.loading_sequence)
+        self.loading_requests[key] = request
+        self.loading_queue.put(request)
+        return request
+
+    def take_loading_request(self, resource_loader, resource):
+        """
+        Cancel the request of the resource and wait for it if the loading thread is already loading it.
+        The request does not keep the load data, because the resource file may be migrated with it.
+        :return: the load data that has been loaded by the loading thread or None
+        """
+        request = self.loading_requests.pop((resource_loader.resource_type_name, resource.name), None)
+        if request is not None:
+            request.canceled = True
+            if request.started:
+                request.complete_event.wait()
+                load_data = request.load_data
+                request.load_data = None
+                return load_data
+        return None
+
+    def cancel_loading(self, resource_name, resource_type_name):
+        request = self.loading_requests.pop((resource_type_name, resource_name), None)
+        if request is not None:
+            request.canceled = True
+
+    def get_loading_count(self):
+        return len(self.loading_requests)
+
+    def get_convert_worker_count(self):
+        return self.convert_worker_count or os.cpu_count() or 1
+
+    def set_convert_progress_callback(self, progress_callback):
+        """
+        :param progress_callback: progress_callback(completed_count, total_count, source_filepath)
+        """
+        self.convert_progress_callback = progress_callback
 
     def prepare_project_directory(self, new_project_dir):
         check_directory_and_mkdir(new_project_dir)
@@ -1530,6 +2237,8 @@ class ResourceManager(Singleton):
                                parent_info, attribute_index):
         resource_loader = self.find_resource_loader(resource_type_name)
         if resource_loader:
+            # the material instances of the model can be changed.
+            self.scene_manager.update_material_version()
             return resource_loader.set_resource_attribute(resource_name, attribute_name, attribute_value,
                                                           parent_info, attribute_index)
         return None
@@ -1569,6 +2278,11 @@ class ResourceManager(Singleton):
         if resource_loader:
             resource_loader.load_resource(resource_name)
 
+    def load_resource_async(self, resource_name, resource_type_name, priority=LoadingPriority.NORMAL):
+        resource_loader = self.find_resource_loader(resource_type_name)
+        if resource_loader:
+            resource_loader.load_resource_async(resource_name, priority)
+
     def action_resource(self, resource_name, resource_type_name):
         resource_loader = self.find_resource_loader(resource_type_name)
         if resource_loader:
@@ -1636,10 +2350,11 @@ class ResourceManager(Singleton):
         return self.material_instance_loader.get_material_instance('effect.particle_ps')
 
     def get_default_mesh(self):
-        return self.get_mesh('Quad')
+        return self.mesh_loader.get_resource_data('Quad')
 
     def get_mesh(self, mesh_name):
-        return self.mesh_loader.get_resource_data(mesh_name) or self.get_default_mesh()
+        # the placeholder of the default mesh is returned while loading.
+        return self.mesh_loader.get_resource_data_async(mesh_name, self.get_default_mesh()) or self.get_default_mesh()
 
     def get_procedural_texture(self, texture_name):
         return self.procedural_texture_loader.get_resource_data(texture_name)
@@ -1652,6 +2367,11 @@ class ResourceManager(Singleton):
             return self.texture_loader.get_resource_data(texture_name) or self.get_default_texture()
         return self.texture_loader.get_resource_data(texture_name)
 
+    def get_texture_async(self, texture_name, default_texture_name='common.flat_white', priority=LoadingPriority.NORMAL):
+        default_texture = self.texture_loader.get_resource_data(default_texture_name, noWarn=True) or \
+                          self.get_default_texture()
+        return self.texture_loader.get_resource_data_async(texture_name, default_texture, priority) or default_texture
+
     def get_texture_or_none(self, texture_name):
         return self.texture_loader.get_resource_data(texture_name)
 
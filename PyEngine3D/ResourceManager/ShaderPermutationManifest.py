@@ -0,0 +1,115 @@
+"""
+Manifest of the shader permutations (shader_name, macros) which are requested by MaterialLoader.get_material.
+
+The permutations recorded in the previous sessions are compiled or loaded from the program binaries when the
+project is opened, so the first request of a permutation does not hitch.
+
+    { "version": 1,
+      "session_count": 3,
+      "permutations": { material_name : { "shader_name", "macros", "use_count", "unused_session_count" } } }
+
+The permutations which are not requested in a session are reported, see get_unused_report.
+"""
+
+from collections import OrderedDict
+import json
+import os
+import traceback
+
+from PyEngine3D.Common import logger
+
+
+SHADER_PERMUTATION_MANIFEST_VERSION = 1
+
+
+class ShaderPermutationManifest:
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.session_count = 0
+        self.permutations = OrderedDict()
+        self.used_permutations = OrderedDict()  # { material_name : use count } of this session
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.filepath):
+            return
+
+        try:
+            with open(self.filepath, 'r') as f:
+                manifest = json.load(f, object_pairs_hook=OrderedDict)
+            if SHADER_PERMUTATION_MANIFEST_VERSION == manifest.get('version'):
+                self.session_count = manifest.get('session_count', 0)
+                self.permutations = manifest.get('permutations', OrderedDict())
+            else:
+                logger.warn("%s is an old version of the shader permutation manifest." % self.filepath)
+        except BaseException:
+            logger.error(traceback.format_exc())
+
+    def save(self):
+        """
+        Merge the permutations of this session and write the manifest.
+        """
+        for material_name, permutation in self.permutations.items():
+            if material_name in self.used_permutations:
+                permutation['use_count'] = permutation.get('use_count', 0) + self.used_permutations[material_name]
+                permutation['unused_session_count'] = 0
+            else:
+                permutation['unused_session_count'] = permutation.get('unused_session_count', 0) + 1
+
+        manifest = OrderedDict(
+            version=SHADER_PERMUTATION_MANIFEST_VERSION,
+            session_count=self.session_count + 1,
+            permutations=self.permutations
+        )
+
+        try:
+            temp_filepath = self.filepath + '.tmp'
+            with open(temp_filepath, 'w') as f:
+                json.dump(manifest, f, indent=4)
+            os.replace(temp_filepath, self.filepath)
+        except BaseException:
+            logger.error(traceback.format_exc())
+            return False
+
+        self.session_count += 1
+        self.used_permutations = OrderedDict()
+        return True
+
+    def record(self, material_name, shader_name, macros):
+        if material_name in self.used_permutations:
+            self.used_permutations[material_name] += 1
+            return
+
+        self.used_permutations[material_name] = 1
+        if material_name not in self.permutations:
+            self.permutations[material_name] = OrderedDict(
+                shader_name=shader_name,
+                macros=OrderedDict(sorted(macros.items())) if macros else OrderedDict(),
+                use_count=0,
+                unused_session_count=0
+            )
+
+    def get_permutations(self):
+        """
+        :return: [(material_name, shader_name, macros), ] recorded in the previous sessions.
+        """
+        return [(material_name, permutation['shader_name'], permutation['macros'])
+                for material_name, permutation in self.permutations.items()]
+
+    def get_unused_report(self, material_names=()):
+        """
+        :param material_names: the names of the .mat resources
+        :return: the lines of the permutations which are not requested in this session,
+            and the .mat resources which are not in the manifest.
+        """
+        report = []
+        for material_name, permutation in self.permutations.items():
+            if material_name not in self.used_permutations:
+                report.append("unused : %s %s %s (unused for %d sessions, %d uses)" % (
+                    material_name, permutation['shader_name'], dict(permutation['macros']),
+                    permutation.get('unused_session_count', 0) + 1, permutation.get('use_count', 0)))
+
+        for material_name in material_names:
+            if material_name not in self.permutations:
+                report.append("not in manifest : %s" % material_name)
+        return report
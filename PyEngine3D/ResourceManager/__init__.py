@@ -1,5 +1,11 @@
+from .BinaryContainer import is_binary_container_file, load_binary_container, save_binary_container, \
+    copy_mapped_arrays
 from .ColladaLoader import Collada
+from .ConversionCache import ConversionCache
 from .DDSLoader import loadDDS
 from .ObjLoader import OBJ
 from .FontLoader import generate_font_data
+from .MeshOptimizer import get_vertex_cache_statistics, optimize_geometry_data
+from .ProgramBinaryCache import ProgramBinaryCache
+from .ShaderPermutationManifest import ShaderPermutationManifest
 from .ResourceManager import ResourceManager
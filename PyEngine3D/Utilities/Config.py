@@ -14,7 +14,7 @@ def evaluation(value):
     # find value type
     try:
         evalValue = eval(value)
-        if type(evalValue) in [int, float, list, tuple, dict]:
+        if type(evalValue) in [bool, int, float, list, tuple, dict]:
             return evalValue
     except:
         return value
@@ -0,0 +1,218 @@
+import json
+import time
+from collections import deque
+
+from .Singleton import Singleton
+
+
+class ProfileSample:
+    __slots__ = ('name', 'depth', 'cpu_begin', 'cpu_end', 'gpu_begin_query', 'gpu_end_query', 'gpu_begin', 'gpu_end')
+
+    def __init__(self, name, depth, cpu_begin):
+        self.name = name
+        self.depth = depth
+        self.cpu_begin = cpu_begin
+        self.cpu_end = cpu_begin
+        self.gpu_begin_query = None
+        self.gpu_end_query = None
+        # seconds of the gpu timestamps on the perf_counter clock, None if the scope is not measured by gpu.
+        self.gpu_begin = None
+        self.gpu_end = None
+
+    def get_cpu_time(self):
+        return (self.cpu_end - self.cpu_begin) * 1000.0  # millisecond
+
+    def get_gpu_time(self):
+        if self.gpu_begin is None:
+            return 0.0
+        return (self.gpu_end - self.gpu_begin) * 1000.0  # millisecond
+
+
+class ProfileFrame:
+    def __init__(self, frame_index, cpu_begin, gpu_timestamp):
+        self.frame_index = frame_index
+        self.cpu_begin = cpu_begin
+        # gpu clock at cpu_begin, the gpu timestamps are converted to the perf_counter clock with it.
+        self.gpu_timestamp = gpu_timestamp
+        self.samples = []
+
+
+class ProfileScope:
+    __slots__ = ('profiler', 'name', 'gpu')
+
+    def __init__(self, profiler, name, gpu):
+        self.profiler = profiler
+        self.name = name
+        self.gpu = gpu
+
+    def __enter__(self):
+        self.profiler.begin_scope(self.name, self.gpu)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.end_scope()
+
+
+class FrameProfiler(Singleton):
+    """
+    Hierarchical profiler of the named scopes of a frame.
+
+    usage)
+        with frame_profiler.scope("GBuffer"):
+            render_gbuffer()
+
+    The cpu time is measured by perf_counter and the gpu time by the timestamp queries of the gpu timer.
+    The gpu results are available after GPUTimer.buffer_count frames,
+    so a frame goes to the history of the last history_count frames when its gpu results are resolved.
+    """
+
+    def __init__(self):
+        self.enable = True
+        self.gpu_timer = None
+        self.history_count = 120
+        self.history = deque(maxlen=self.history_count)
+        self.pending_frames = deque()
+        self.current_frame = None
+        self.scope_stack = []
+        self.frame_index = 0
+        # [(name, depth, cpu ms, gpu ms), ] averages of the history, see update_summary
+        self.summary = []
+        self.gpu_frame_time = 0.0
+
+    def initialize(self, gpu_timer=None):
+        """
+        :param gpu_timer: GPUTimer, the gpu times are not measured if it is None.
+        """
+        self.gpu_timer = gpu_timer
+
+    def close(self):
+        if self.gpu_timer is not None:
+            self.gpu_timer.delete()
+            self.gpu_timer = None
+
+    def set_enable(self, enable):
+        self.enable = enable
+        if not enable:
+            self.current_frame = None
+            self.scope_stack = []
+            self.pending_frames.clear()
+            if self.gpu_timer is not None:
+                # release the queries of the frames in flight.
+                for i in range(self.gpu_timer.buffer_count):
+                    self.gpu_timer.next_frame()
+
+    def set_history_count(self, history_count):
+        self.history_count = history_count
+        self.history = deque(self.history, maxlen=history_count)
+
+    def scope(self, name, gpu=True):
+        """
+        :param gpu: measure the gpu time of the scope too. it should be False for the scopes which have no gl calls.
+        """
+        return ProfileScope(self, name, gpu)
+
+    def begin_frame(self):
+        if not self.enable:
+            return
+        gpu_timestamp = self.gpu_timer.get_current_timestamp() if self.gpu_timer is not None else 0
+        self.current_frame = ProfileFrame(self.frame_index, time.perf_counter(), gpu_timestamp)
+        self.frame_index += 1
+        self.scope_stack = []
+        self.begin_scope("Frame")
+
+    def end_frame(self):
+        if self.current_frame is None:
+            return
+
+        while self.scope_stack:
+            self.end_scope()
+
+        if self.gpu_timer is not None:
+            self.pending_frames.append(self.current_frame)
+            results = self.gpu_timer.next_frame()
+            if self.gpu_timer.buffer_count <= len(self.pending_frames):
+                self.resolve_frame(self.pending_frames.popleft(), results)
+        else:
+            self.history.append(self.current_frame)
+        self.current_frame = None
+
+    def resolve_frame(self, frame, results):
+        for sample in frame.samples:
+            if sample.gpu_begin_query is not None:
+                gpu_begin = results.get(sample.gpu_begin_query, frame.gpu_timestamp)
+                gpu_end = results.get(sample.gpu_end_query, gpu_begin)
+                sample.gpu_begin = frame.cpu_begin + (gpu_begin - frame.gpu_timestamp) * 1e-9
+                sample.gpu_end = frame.cpu_begin + (gpu_end - frame.gpu_timestamp) * 1e-9
+        if frame.samples:
+            self.gpu_frame_time = frame.samples[0].get_gpu_time()
+        self.history.append(frame)
+
+    def begin_scope(self, name, gpu=True):
+        if self.current_frame is None:
+            return
+        sample = ProfileSample(name, len(self.scope_stack), time.perf_counter())
+        if gpu and self.gpu_timer is not None:
+            sample.gpu_begin_query = self.gpu_timer.query_timestamp()
+        self.current_frame.samples.append(sample)
+        self.scope_stack.append(sample)
+
+    def end_scope(self):
+        if self.current_frame is None or not self.scope_stack:
+            return
+        sample = self.scope_stack.pop()
+        if sample.gpu_begin_query is not None:
+            sample.gpu_end_query = self.gpu_timer.query_timestamp()
+        sample.cpu_end = time.perf_counter()
+
+    def update_summary(self):
+        """
+        Average the times of the scopes in the history. The scopes are ordered by the first appearance.
+        """
+        summary = {}
+        for frame in self.history:
+            for sample in frame.samples:
+                key = (sample.name, sample.depth)
+                if key not in summary:
+                    summary[key] = [0.0, 0.0]
+                summary[key][0] += sample.get_cpu_time()
+                summary[key][1] += sample.get_gpu_time()
+
+        frame_count = max(1, len(self.history))
+        self.summary = [(name, depth, cpu_time / frame_count, gpu_time / frame_count)
+                        for (name, depth), (cpu_time, gpu_time) in summary.items()]
+
+    def get_summary_texts(self, max_depth=2):
+        return ["%s%s : cpu %.2f ms, gpu %.2f ms" % ("  " * depth, name, cpu_time, gpu_time)
+                for name, depth, cpu_time, gpu_time in self.summary if depth <= max_depth]
+
+    def get_chrome_trace(self):
+        """
+        :return: trace events of the history, it can be loaded in chrome://tracing
+        """
+        trace_events = []
+        for frame in self.history:
+            for sample in frame.samples:
+                trace_events.append(dict(name=sample.name,
+                                         cat="CPU",
+                                         ph="X",
+                                         pid=0,
+                                         tid=0,
+                                         ts=sample.cpu_begin * 1000000.0,
+                                         dur=(sample.cpu_end - sample.cpu_begin) * 1000000.0,
+                                         args=dict(frame=frame.frame_index)))
+                if sample.gpu_begin is not None:
+                    trace_events.append(dict(name=sample.name,
+                                             cat="GPU",
+                                             ph="X",
+                                             pid=0,
+                                             tid=1,
+                                             ts=sample.gpu_begin * 1000000.0,
+                                             dur=(sample.gpu_end - sample.gpu_begin) * 1000000.0,
+                                             args=dict(frame=frame.frame_index)))
+        trace_events.append(dict(name="thread_name", ph="M", pid=0, tid=0, args=dict(name="CPU")))
+        trace_events.append(dict(name="thread_name", ph="M", pid=0, tid=1, args=dict(name="GPU")))
+        return dict(traceEvents=trace_events, displayTimeUnit="ms")
+
+    def export_chrome_trace(self, filepath):
+        with open(filepath, 'w') as f:
+            json.dump(self.get_chrome_trace(), f)
@@ -76,6 +76,14 @@ def normalize(v):
     return v / m
 
 
+def normalize_array(vectors):
+    """
+    normalize the rows of vectors, the zero length rows are not changed.
+    """
+    lengths = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(0.0 == lengths, 1.0, lengths)
+
+
 def dot_arrays(*array_list):
     return reduce(np.dot, array_list)
 
@@ -103,6 +111,25 @@ def matrix_rotation(rotation_matrix, rx, ry, rz):
     rotation_matrix[:, 2] = [-sh*ca, sh*sa*cb + ch*sb, -sh*sa*sb + ch*cb, 0.0]
 
 
+def matrix_rotation_array(rotation_matrices, rotations):
+    """
+    matrix_rotation of the arrays. rotation_matrices : (n, 4, 4), rotations : (n, 3)
+    """
+    cb, ch, ca = np.cos(rotations).T
+    sb, sh, sa = np.sin(rotations).T
+    rotation_matrices[:, 0, 0] = ch * ca
+    rotation_matrices[:, 1, 0] = sh * sb - ch * sa * cb
+    rotation_matrices[:, 2, 0] = ch * sa * sb + sh * cb
+    rotation_matrices[:, 0, 1] = sa
+    rotation_matrices[:, 1, 1] = ca * cb
+    rotation_matrices[:, 2, 1] = -ca * sb
+    rotation_matrices[:, 0, 2] = -sh * ca
+    rotation_matrices[:, 1, 2] = sh * sa * cb + ch * sb
+    rotation_matrices[:, 2, 2] = -sh * sa * sb + ch * cb
+    rotation_matrices[:, 0:3, 3] = 0.0
+    rotation_matrices[:, 3, :] = [0.0, 0.0, 0.0, 1.0]
+
+
 def matrix_to_vectors(rotation_matrix, axis_x, axis_y, axis_z):
     axis_x[:] = rotation_matrix[0, 0:3]
     axis_y[:] = rotation_matrix[1, 0:3]
@@ -189,6 +216,34 @@ def matrix_to_quaternion(matrix):
     return normalize(Float4(qw, qx, qy, qz))
 
 
+def matrices_to_quaternions(matrices):
+    """
+    matrix_to_quaternion of the arrays. matrices : (n, 4, 4), return : (n, 4)
+    """
+    m = np.asarray(matrices, dtype=np.float64)
+    m00, m01, m02 = m[..., 0, 0], m[..., 0, 1], m[..., 0, 2]
+    m10, m11, m12 = m[..., 1, 0], m[..., 1, 1], m[..., 1, 2]
+    m20, m21, m22 = m[..., 2, 0], m[..., 2, 1], m[..., 2, 2]
+
+    tr = m00 + m11 + m22
+    case_w = tr > 0.0
+    case_x = np.logical_and(np.logical_not(case_w), np.logical_and(m00 > m11, m00 > m22))
+    case_y = np.logical_and(np.logical_not(np.logical_or(case_w, case_x)), m11 > m22)
+    conditions = [case_w, case_x, case_y]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        S = np.sqrt(np.select(conditions, [tr + 1.0, 1.0 + m00 - m11 - m22, 1.0 + m11 - m00 - m22],
+                              1.0 + m22 - m00 - m11)) * 2.0
+        # the diagonal term is 0.25 * S, the others are divided by S.
+        SS = 0.25 * S * S
+        quaternions = np.stack([np.select(conditions, [SS, m12 - m21, m20 - m02], m01 - m10),
+                                np.select(conditions, [m12 - m21, SS, m10 + m01], m20 + m02),
+                                np.select(conditions, [m20 - m02, m10 + m01, SS], m21 + m12),
+                                np.select(conditions, [m01 - m10, m20 + m02, m21 + m12], SS)], axis=-1)
+        quaternions /= S[..., np.newaxis]
+    return normalize_array(quaternions).astype(np.float32)
+
+
 def quaternion_to_matrix(quat, rotation_matrix):
     qw, qx, qy, qz = quat[:]
     # inhomogeneous expression
@@ -248,6 +303,49 @@ def slerp(quaternion1, quaternion2, amount):
     return (num3 * quaternion1) + (num2 * quaternion2)
 
 
+def slerp_array(quaternions1, quaternions2, amount):
+    """
+    slerp of the arrays of quaternions at once. quaternions : (n, 4)
+    """
+    d = np.sum(quaternions1 * quaternions2, axis=-1)
+    flip = d < 0.0
+    d = np.abs(d)
+    linear = d > 0.999999
+    theta = np.arccos(np.where(linear, 0.0, d))
+    inv_sin_theta = 1.0 / np.where(linear, 1.0, np.sin(theta))
+    weight1 = np.where(linear, 1.0 - amount, np.sin((1.0 - amount) * theta) * inv_sin_theta)
+    weight2 = np.where(linear, amount, np.sin(amount * theta) * inv_sin_theta)
+    weight2 = np.where(flip, -weight2, weight2)
+    return quaternions1 * weight1[..., np.newaxis] + quaternions2 * weight2[..., np.newaxis]
+
+
+def quaternions_to_matrices(quaternions, rotation_matrices):
+    """
+    quaternion_to_matrix of the arrays. quaternions : (n, 4), rotation_matrices : (n, 4, 4)
+    """
+    qw, qx, qy, qz = quaternions[..., 0], quaternions[..., 1], quaternions[..., 2], quaternions[..., 3]
+    qxqx = qx * qx * 2.0
+    qxqy = qx * qy * 2.0
+    qxqz = qx * qz * 2.0
+    qxqw = qx * qw * 2.0
+    qyqy = qy * qy * 2.0
+    qyqz = qy * qz * 2.0
+    qyqw = qy * qw * 2.0
+    qzqw = qz * qw * 2.0
+    qzqz = qz * qz * 2.0
+    rotation_matrices[..., 0, 0] = 1.0 - qyqy - qzqz
+    rotation_matrices[..., 0, 1] = qxqy + qzqw
+    rotation_matrices[..., 0, 2] = qxqz - qyqw
+    rotation_matrices[..., 1, 0] = qxqy - qzqw
+    rotation_matrices[..., 1, 1] = 1.0 - qxqx - qzqz
+    rotation_matrices[..., 1, 2] = qyqz + qxqw
+    rotation_matrices[..., 2, 0] = qxqz + qyqw
+    rotation_matrices[..., 2, 1] = qyqz - qxqw
+    rotation_matrices[..., 2, 2] = 1.0 - qxqx - qyqy
+    rotation_matrices[..., 0:3, 3] = 0.0
+    rotation_matrices[..., 3, :] = [0.0, 0.0, 0.0, 1.0]
+
+
 def set_identity_matrix(M):
     M[...] = [[1.0, 0.0, 0.0, 0.0],
             [0.0, 1.0, 0.0, 0.0],
@@ -436,6 +534,22 @@ def extract_rotation(matrix):
     return matrix_to_quaternion(rotation)
 
 
+def extract_locations(matrices):
+    """
+    extract_location of the arrays. matrices : (n, 4, 4), return : (n, 3)
+    """
+    return np.array(matrices[..., 3, 0:3], dtype=np.float32)
+
+
+def extract_rotations(matrices):
+    """
+    extract_rotation of the arrays. matrices : (n, 4, 4), return : (n, 4) quaternions
+    """
+    matrices = np.asarray(matrices, dtype=np.float32)
+    scales = np.linalg.norm(matrices[..., 0:3, :], axis=-1)
+    return matrices_to_quaternions(matrices[..., 0:3, :] / scales[..., np.newaxis])
+
+
 def extract_scale(matrix):
     sX = np.linalg.norm(matrix[0, :])
     sY = np.linalg.norm(matrix[1, :])
@@ -549,59 +663,64 @@ def compute_tangent(is_triangle_mode, positions, texcoords, normals, indices):
 
     Equation of N:
         N = cross(T, B)
-    """
 
-    tangents = np.array([[1.0, 0.0, 0.0], ] * len(normals), dtype=np.float32)
-    # binormals = np.array([[0.0, 0.0, 1.0], ] * len(normals), dtype=np.float32)
-
-    if is_triangle_mode:
-        for i in range(0, len(indices), 3):
-            i0, i1, i2 = indices[i:i + 3]
-            deltaPos_0_1 = positions[i1] - positions[i0]
-            deltaPos_0_2 = positions[i2] - positions[i0]
-            deltaUV_0_1 = texcoords[i1] - texcoords[i0]
-            deltaUV_0_2 = texcoords[i2] - texcoords[i0]
-            r = deltaUV_0_1[0] * deltaUV_0_2[1] - deltaUV_0_1[1] * deltaUV_0_2[0]
-            r = (1.0 / r) if r != 0.0 else 0.0
-
-            tangent = (deltaPos_0_1 * deltaUV_0_2[1] - deltaPos_0_2 * deltaUV_0_1[1]) * r
-            tangent = normalize(tangent)
-            # binormal = (deltaPos_0_2 * deltaUV_0_1[0]   - deltaPos_0_1 * deltaUV_0_2[0]) * r
-            # binormal = normalize(binormal)
-
-            # invalid tangent
-            if 0.0 == np.dot(tangent, tangent):
-                avg_normal = normalize(normals[i0] + normals[i1] + normals[i2])
-                tangent = np.cross(avg_normal, WORLD_UP)
-
-            tangents[indices[i]] = tangent
-            tangents[indices[i + 1]] = tangent
-            tangents[indices[i + 2]] = tangent
-
-            # binormals[indices[i]] = binormal
-            # binormals[indices[i+1]] = binormal
-            # binormals[indices[i+2]] = binormal
-    else:
-        for i in range(0, len(indices), 4):
-            i0, i1, i2, i3 = indices[i:i + 4]
-            deltaPos_0_1 = positions[i1] - positions[i0]
-            deltaPos_0_2 = positions[i2] - positions[i0]
-            deltaUV_0_1 = texcoords[i1] - texcoords[i0]
-            deltaUV_0_2 = texcoords[i2] - texcoords[i0]
-            r = deltaUV_0_1[0] * deltaUV_0_2[1] - deltaUV_0_1[1] * deltaUV_0_2[0]
-            r = (1.0 / r) if r != 0.0 else 0.0
-
-            tangent = (deltaPos_0_1 * deltaUV_0_2[1] - deltaPos_0_2 * deltaUV_0_1[1]) * r
-            tangent = normalize(tangent)
-
-            # invalid tangent
-            if 0.0 == np.dot(tangent, tangent):
-                avg_normal = normalize(normals[i0] + normals[i1] + normals[i2])
-                tangent = np.cross(avg_normal, WORLD_UP)
-
-            tangents[indices[i]] = tangent
-            tangents[indices[i + 1]] = tangent
-            tangents[indices[i + 2]] = tangent
-            tangents[indices[i + 3]] = tangent
-    # return tangents, binormals
-    return tangents
+    The tangents of all the faces are computed at once and accumulated to the vertices weighted by the face areas.
+    A vertex has one handedness, so the tangents of the faces which have the mirrored uv to the most of the faces
+    around the vertex are flipped before the accumulation. Then the tangents are orthonormalized to the normals
+    by Gram-Schmidt. The faces of the degenerate uv use the tangent of cross(normal, WORLD_UP).
+    The polygons of GL_QUADS use the first triangle.
+    """
+    positions = np.asarray(positions, dtype=np.float32)
+    texcoords = np.asarray(texcoords, dtype=np.float32)
+    normals = normalize_array(np.asarray(normals, dtype=np.float32).reshape(-1, 3).astype(np.float64))
+    vertex_count = len(normals)
+    polygon_size = 3 if is_triangle_mode else 4
+    polygons = np.asarray(indices, dtype=np.int64)
+    polygons = polygons[:len(polygons) // polygon_size * polygon_size].reshape(-1, polygon_size)
+
+    tangents = np.zeros((vertex_count, 3), dtype=np.float64)
+    if 0 < len(polygons):
+        i0, i1, i2 = polygons[:, 0], polygons[:, 1], polygons[:, 2]
+        deltaPos_0_1 = (positions[i1] - positions[i0]).astype(np.float64)
+        deltaPos_0_2 = (positions[i2] - positions[i0]).astype(np.float64)
+        deltaUV_0_1 = (texcoords[i1] - texcoords[i0]).astype(np.float64)
+        deltaUV_0_2 = (texcoords[i2] - texcoords[i0]).astype(np.float64)
+        r = deltaUV_0_1[:, 0] * deltaUV_0_2[:, 1] - deltaUV_0_1[:, 1] * deltaUV_0_2[:, 0]
+        face_signs = np.where(r < 0.0, -1.0, 1.0)
+        r = np.divide(1.0, r, out=np.zeros_like(r), where=(0.0 != r))
+
+        face_tangents = (deltaPos_0_1 * deltaUV_0_2[:, 1:2] - deltaPos_0_2 * deltaUV_0_1[:, 1:2]) * r[:, np.newaxis]
+        face_tangents = normalize_array(face_tangents)
+
+        # invalid tangent
+        invalid = 0.0 == np.einsum('ij,ij->i', face_tangents, face_tangents)
+        if np.any(invalid):
+            avg_normals = normalize_array(np.sum(normals[polygons[invalid, 0:3]], axis=1))
+            face_tangents[invalid] = np.cross(avg_normals, WORLD_UP)
+            face_signs[invalid] = 0.0
+
+        face_areas = np.linalg.norm(np.cross(deltaPos_0_1, deltaPos_0_2), axis=1)
+        # the faces of zero area still give the tangents to their vertices.
+        face_weights = face_areas + np.where(0.0 < face_areas, 0.0, 1e-20)
+
+        # handedness of the vertices
+        corners = polygons.reshape(-1)
+        vertex_signs = np.zeros(vertex_count, dtype=np.float64)
+        np.add.at(vertex_signs, corners, np.repeat(face_signs * face_weights, polygon_size))
+        vertex_signs = np.where(vertex_signs < 0.0, -1.0, 1.0)
+
+        corner_signs = np.repeat(np.where(0.0 == face_signs, 1.0, face_signs), polygon_size) * vertex_signs[corners]
+        corner_tangents = np.repeat(face_tangents * face_weights[:, np.newaxis], polygon_size, axis=0)
+        np.add.at(tangents, corners, corner_tangents * corner_signs[:, np.newaxis])
+
+    # Gram-Schmidt
+    tangents -= normals * np.einsum('ij,ij->i', normals, tangents)[:, np.newaxis]
+    tangents = normalize_array(tangents)
+
+    # the vertices without the valid tangent
+    invalid = 0.0 == np.einsum('ij,ij->i', tangents, tangents)
+    if np.any(invalid):
+        tangents[invalid] = normalize_array(np.cross(normals[invalid], WORLD_UP))
+        invalid = 0.0 == np.einsum('ij,ij->i', tangents, tangents)
+        tangents[invalid] = [1.0, 0.0, 0.0]
+    return tangents.astype(np.float32)
@@ -1,10 +1,12 @@
 from .AutoEnum import AutoEnum
 from .Attribute import Attribute, Attributes
 from .Config import Config
+from .FrameProfiler import FrameProfiler
 from .ImageProcessing import *
 from .Logger import *
 from .RangeVariable import RangeVariable
 from .Singleton import Singleton
+from .Spline import *
 from .Transform import *
 from .TransformObject import TransformObject
 from .Utility import GetClassName, is_gz_compressed_file, check_directory_and_mkdir, get_modify_time_of_file
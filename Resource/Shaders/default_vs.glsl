@@ -3,14 +3,25 @@
 #include "scene_constants.glsl"
 #include "default_material.glsl"
 
-uniform bool is_instancing;
-uniform mat4 model;
+// referene : Renderer.bind_draw_datas
+struct DRAW_DATA
+{
+    mat4 model;
+    int is_instancing;
+    int bone_offset;
+    int prev_bone_offset;
+    int DRAW_DATA_DUMMY_0;
+};
+
+layout(std430, binding=2) buffer draw_data_buffer { DRAW_DATA draw_datas[]; };
 
 #if 1 == SKELETAL
-uniform mat4 bone_matrices[MAX_BONES];
-uniform mat4 prev_bone_matrices[MAX_BONES];
+layout(std430, binding=3) buffer bone_matrices_buffer { mat4 bone_matrices[]; };
 #endif
 
+// index of the draw data of this draw call.
+uniform int draw_index;
+
 struct VERTEX_OUTPUT
 {
     vec3 world_position;
@@ -43,14 +54,17 @@ void main() {
     vec4 prev_position = vec4(0.0, 0.0, 0.0, 0.0);
     vec3 vertex_normal = vec3(0.0, 0.0, 0.0);
     vec3 vertex_tangent = vec3(0.0, 0.0, 0.0);
+    DRAW_DATA draw_data = draw_datas[draw_index];
 
 #if 1 == SKELETAL
     for(int i=0; i<MAX_BONES_PER_VERTEX; ++i)
     {
-        prev_position += (prev_bone_matrices[int(vs_in_bone_indicies[i])] * vec4(vs_in_position, 1.0)) * vs_in_bone_weights[i];
-        position += (bone_matrices[int(vs_in_bone_indicies[i])] * vec4(vs_in_position, 1.0)) * vs_in_bone_weights[i];
-        vertex_normal += (bone_matrices[int(vs_in_bone_indicies[i])] * vec4(vs_in_normal, 0.0)).xyz * vs_in_bone_weights[i];
-        vertex_tangent += (bone_matrices[int(vs_in_bone_indicies[i])] * vec4(vs_in_tangent, 0.0)).xyz * vs_in_bone_weights[i];
+        int bone_index = draw_data.bone_offset + int(vs_in_bone_indicies[i]);
+        int prev_bone_index = draw_data.prev_bone_offset + int(vs_in_bone_indicies[i]);
+        prev_position += (bone_matrices[prev_bone_index] * vec4(vs_in_position, 1.0)) * vs_in_bone_weights[i];
+        position += (bone_matrices[bone_index] * vec4(vs_in_position, 1.0)) * vs_in_bone_weights[i];
+        vertex_normal += (bone_matrices[bone_index] * vec4(vs_in_normal, 0.0)).xyz * vs_in_bone_weights[i];
+        vertex_tangent += (bone_matrices[bone_index] * vec4(vs_in_tangent, 0.0)).xyz * vs_in_bone_weights[i];
     }
     position /= position.w;
     prev_position /= prev_position.w;
@@ -64,7 +78,7 @@ void main() {
     vertex_normal = normalize(vertex_normal);
     vertex_tangent = normalize(vertex_tangent);
 
-    mat4 local_matrix = is_instancing ? model * vs_in_isntance_matrix : model;
+    mat4 local_matrix = (0 != draw_data.is_instancing) ? draw_data.model * vs_in_isntance_matrix : draw_data.model;
 
     vs_output.world_position = (local_matrix * position).xyz;
     vs_output.vertex_normal = vertex_normal;
@@ -0,0 +1,182 @@
+"""
+Compare the list based Collada geometry importer with the streaming, vectorized ResourceManager.ColladaLoader.
+
+    python -m benchmarks.collada_loader --triangles 500000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.ResourceManager.ColladaLoader import *
+from PyEngine3D.Utilities import *
+
+
+def legacy_parsing_source_data(xml_element):
+    sources = {}
+    for xml_source in xml_element.findall('source'):
+        source_id = get_xml_attrib(xml_source, 'id')
+        stride = get_xml_attrib(xml_source.find('technique_common/accessor'), 'stride')
+        stride = convert_int(stride, 0)
+        source_data = None
+        for tag, data_type in [('float_array', float), ('Name_array', str)]:
+            xml_array = xml_source.find(tag)
+            if xml_array is not None:
+                source_text = get_xml_text(xml_array)
+                if source_text:
+                    source_data = convert_list(source_text, data_type, stride)
+                break
+        sources[source_id] = source_data
+    return sources
+
+
+class LegacyColladaGeometry:
+    """ The list based importer of the triangles which was replaced by the vectorized ColladaGeometry. """
+    def __init__(self, xml_geometry, controller):
+        self.controller = controller
+        self.positions = []
+        self.bone_indicies = []
+        self.bone_weights = []
+        self.normals = []
+        self.colors = []
+        self.texcoords = []
+        self.indices = []
+
+        xml_mesh = xml_geometry.find('mesh')
+        sources = legacy_parsing_source_data(xml_mesh)
+        position_source_id = ""
+        for xml_position in xml_mesh.findall('vertices/input'):
+            if get_xml_attrib(xml_position, 'semantic') == 'POSITION':
+                position_source_id = get_xml_attrib(xml_position, 'source')[1:]
+                break
+
+        xml_polygons = xml_mesh.find('triangles')
+        semantics = parsing_sematic(xml_polygons)
+        semantic_stride = len(semantics)
+        vertex_index_list = convert_list(get_xml_text(xml_polygons.find('p')), int)
+        self.build(sources, position_source_id, semantics, semantic_stride, vertex_index_list)
+
+    def build(self, sources, position_source_id, semantics, semantic_stride, vertex_index_list):
+        indexMap = {}
+        for i in range(int(len(vertex_index_list) / semantic_stride)):
+            vertIndices = tuple(vertex_index_list[i * semantic_stride: i * semantic_stride + semantic_stride])
+            if vertIndices in indexMap:
+                self.indices.append(indexMap[vertIndices])
+            else:
+                self.indices.append(len(indexMap))
+                indexMap[vertIndices] = len(indexMap)
+
+                if 'VERTEX' in semantics:
+                    offset = semantics['VERTEX']['offset']
+                    self.positions.append(sources[position_source_id][vertIndices[offset]])
+                    if self.controller:
+                        self.bone_indicies.append(self.controller.bone_indicies[vertIndices[offset]])
+                        self.bone_weights.append(self.controller.bone_weights[vertIndices[offset]])
+
+                for semantic, data_list in (('NORMAL', self.normals), ('COLOR', self.colors),
+                                            ('TEXCOORD', self.texcoords)):
+                    if semantic in semantics:
+                        source_id = semantics[semantic]['source']
+                        offset = semantics[semantic]['offset']
+                        data_list.append(sources[source_id][vertIndices[offset]])
+
+
+def join_array(array):
+    return ' '.join(map(str, np.asarray(array).reshape(-1).tolist()))
+
+
+def generate_collada_file(filepath, triangle_count):
+    """
+    Grid of the triangles skinned by two joints along x axis. The positions and texcoords are shared by
+    the neighbour triangles and the normal is shared by all, so the index tuples are deduplicated.
+    """
+    width = int(np.ceil(np.sqrt(triangle_count / 2.0)))
+    height = int(np.ceil(triangle_count / 2.0 / width))
+    grid_x, grid_z = np.meshgrid(np.arange(width + 1, dtype=np.float32), np.arange(height + 1, dtype=np.float32))
+    vertex_count = grid_x.size
+    positions = np.stack([grid_x.reshape(-1), np.zeros(vertex_count, dtype=np.float32), grid_z.reshape(-1)], axis=1)
+    texcoords = np.stack([grid_x.reshape(-1) / width, grid_z.reshape(-1) / height], axis=1)
+
+    quad_x, quad_z = np.meshgrid(np.arange(width), np.arange(height))
+    first = (quad_z * (width + 1) + quad_x).reshape(-1)
+    triangles = np.stack([first, first + width + 1, first + 1, first + 1, first + width + 1, first + width + 2], axis=1)
+    triangles = triangles.reshape(-1, 3)[:triangle_count]
+    # VERTEX, NORMAL, TEXCOORD
+    p = np.stack([triangles, np.zeros_like(triangles), triangles], axis=2)
+
+    weights = np.round(positions[:, 0] / width, 3)
+    weights = np.stack([1.0 - weights, weights], axis=1)
+    v = np.stack([np.zeros(vertex_count, dtype=np.int64), np.arange(vertex_count) * 2,
+                  np.ones(vertex_count, dtype=np.int64), np.arange(vertex_count) * 2 + 1], axis=1)
+
+    with open(filepath, 'w') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        f.write('<COLLADA xmlns="http://www.collada.org/2005/11/COLLADASchema" version="1.4.1">\n')
+        f.write('<asset><up_axis>Y_UP</up_axis></asset>\n')
+        f.write('<library_controllers><controller id="grid-skin" name="grid"><skin source="#grid-mesh">\n')
+        f.write('<bind_shape_matrix>1 0 0 0 0 1 0 0 0 0 1 0 0 0 0 1</bind_shape_matrix>\n')
+        f.write('<source id="grid-joints"><Name_array count="2">root tip</Name_array>'
+                '<technique_common><accessor count="2" stride="1"/></technique_common></source>\n')
+        f.write('<source id="grid-weights"><float_array count="%d">%s</float_array>'
+                '<technique_common><accessor count="%d" stride="1"/></technique_common></source>\n' %
+                (weights.size, join_array(weights), weights.size))
+        f.write('<joints><input semantic="JOINT" source="#grid-joints"/></joints>\n')
+        f.write('<vertex_weights count="%d"><input semantic="JOINT" source="#grid-joints" offset="0"/>'
+                '<input semantic="WEIGHT" source="#grid-weights" offset="1"/>' % vertex_count)
+        f.write('<vcount>%s</vcount><v>%s</v></vertex_weights>\n' %
+                (join_array(np.full(vertex_count, 2)), join_array(v)))
+        f.write('</skin></controller></library_controllers>\n')
+
+        f.write('<library_geometries><geometry id="grid-mesh" name="grid"><mesh>\n')
+        for name, data in (('positions', positions), ('normals', np.array([[0.0, 1.0, 0.0]])),
+                           ('texcoords', texcoords)):
+            f.write('<source id="grid-%s"><float_array count="%d">%s</float_array>'
+                    '<technique_common><accessor count="%d" stride="%d"/></technique_common></source>\n' %
+                    (name, data.size, join_array(data), len(data), data.shape[1]))
+        f.write('<vertices id="grid-vertices"><input semantic="POSITION" source="#grid-positions"/></vertices>\n')
+        f.write('<triangles count="%d"><input semantic="VERTEX" source="#grid-vertices" offset="0"/>'
+                '<input semantic="NORMAL" source="#grid-normals" offset="1"/>'
+                '<input semantic="TEXCOORD" source="#grid-texcoords" offset="2" set="0"/>' % len(triangles))
+        f.write('<p>%s</p></triangles>\n' % join_array(p))
+        f.write('</mesh></geometry></library_geometries>\n')
+        f.write('</COLLADA>\n')
+
+
+def benchmark(triangle_count, skip_legacy=False):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filepath = os.path.join(temp_dir, 'grid.dae')
+        generate_collada_file(filepath, triangle_count)
+        print('%s : %d triangles, %.1fMB' % (filepath, triangle_count, os.path.getsize(filepath) / 1048576.0))
+
+        start_time = time.perf_counter()
+        xml_root, arrays = load_collada_xml(filepath)
+        controllers = [ColladaContoller(xml_controller, arrays) for xml_controller in
+                       xml_root.findall('library_controllers/controller')]
+        geometry = ColladaGeometry(xml_root.find('library_geometries/geometry'), arrays, controllers, [])
+        elapsed_time = time.perf_counter() - start_time
+        print('ColladaGeometry : %.2fs, %d vertices' % (elapsed_time, len(geometry.positions)))
+
+        if not skip_legacy:
+            start_time = time.perf_counter()
+            xml_root = load_xml(filepath)
+            controller = ColladaContoller(xml_root.find('library_controllers/controller'), {})
+            legacy_geometry = LegacyColladaGeometry(xml_root.find('library_geometries/geometry'), controller)
+            legacy_elapsed_time = time.perf_counter() - start_time
+            print('LegacyColladaGeometry : %.2fs ( x%.1f )' % (legacy_elapsed_time, legacy_elapsed_time / elapsed_time))
+
+            for key in ('positions', 'normals', 'texcoords', 'bone_indicies', 'bone_weights'):
+                assert np.allclose(getattr(geometry, key), getattr(legacy_geometry, key))
+            assert np.array_equal(geometry.indices, legacy_geometry.indices)
+            print('The results are identical.')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--triangles', type=int, default=500000)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+    benchmark(args.triangles, args.skip_legacy)
@@ -0,0 +1,78 @@
+"""
+Convert a directory of synthetic meshes and textures with the convert worker pool of ResourceLoader.
+It runs without a window and OpenGL context.
+
+    python -m benchmarks.convert_pool --meshes 16 --faces 100000 --textures 32 --texture-size 1024
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.Common import logger
+from PyEngine3D.Utilities import Logger
+from PyEngine3D.ResourceManager.ResourceManager import MeshLoader, TextureLoader, convert_external_files
+from benchmarks.obj_loader import generate_obj_file
+
+
+def generate_texture_file(filepath, size):
+    """ Write a noise image. Noise is hard to compress, so this is the worst case of decoding. """
+    data = np.random.randint(0, 256, (size, size, 4), dtype=np.uint8)
+    Image.fromarray(data, 'RGBA').save(filepath)
+
+
+def benchmark(mesh_count, face_count, texture_count, texture_size, worker_counts):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_dir = os.path.join(temp_dir, 'Externals')
+        os.makedirs(source_dir)
+
+        source_files = []
+        for i in range(mesh_count):
+            source_filepath = os.path.join(source_dir, 'mesh_%d.obj' % i)
+            generate_obj_file(source_filepath, face_count)
+            source_files.append((MeshLoader, source_filepath))
+
+        for i in range(texture_count):
+            source_filepath = os.path.join(source_dir, 'texture_%d.png' % i)
+            generate_texture_file(source_filepath, texture_size)
+            source_files.append((TextureLoader, source_filepath))
+
+        print('%d meshes ( %d faces ), %d textures ( %dx%d )' % (mesh_count, face_count, texture_count,
+                                                                 texture_size, texture_size))
+
+        elapsed_times = []
+        for worker_count in worker_counts:
+            save_dir = os.path.join(temp_dir, 'Converted_%d' % worker_count)
+            convert_jobs = []
+            for loader_class, source_filepath in source_files:
+                resource_name = os.path.splitext(os.path.basename(source_filepath))[0]
+                save_filepath = os.path.join(save_dir, resource_name) + loader_class.fileExt
+                convert_jobs.append((loader_class, source_filepath, save_filepath))
+
+            def progress_callback(completed_count, total_count, source_filepath):
+                print('\r    %d / %d' % (completed_count, total_count), end='')
+
+            start_time = time.perf_counter()
+            results = convert_external_files(convert_jobs, worker_count, progress_callback)
+            elapsed_time = time.perf_counter() - start_time
+            elapsed_times.append(elapsed_time)
+            assert all(results)
+            print('\r%2d workers : %.2fs ( x%.2f )' % (worker_count, elapsed_time, elapsed_times[0] / elapsed_time))
+
+
+if __name__ == '__main__':
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--meshes', type=int, default=16)
+    parser.add_argument('--faces', type=int, default=100000)
+    parser.add_argument('--textures', type=int, default=32)
+    parser.add_argument('--texture-size', type=int, default=1024)
+    parser.add_argument('--workers', type=int, nargs='*', default=sorted({1, 2, 4, cpu_count}))
+    args = parser.parse_args()
+    logger.setLevel(Logger.WARNING)
+    benchmark(args.meshes, args.faces, args.textures, args.texture_size, args.workers)
@@ -0,0 +1,140 @@
+"""
+Compare the per geometry culling functions with the batched culling of GeometryBounds.
+
+    python -m benchmarks.culling --actors 5000 --moving-ratio 0.1
+"""
+
+import argparse
+import math
+import time
+import types
+
+import numpy as np
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.Common import logger
+from PyEngine3D.Render import StaticActor, MainLight, Geometry, GeometryBounds
+from PyEngine3D.Render import gather_render_infos, view_frustum_culling_geometry, shadow_culling
+from PyEngine3D.Utilities import *
+
+
+class BenchmarkMaterialInstance:
+    def __init__(self, translucent):
+        self.material = None
+        self.translucent = translucent
+
+    def is_translucent(self):
+        return self.translucent
+
+
+def create_actors(actor_count, geometry_count, scene_size):
+    materials = [BenchmarkMaterialInstance(False), BenchmarkMaterialInstance(True)]
+    geometries = []
+    for i in range(geometry_count):
+        bound_min = Float3(-1.0, 0.0, -1.0) * (i + 1)
+        bound_max = Float3(1.0, 2.0, 1.0) * (i + 1)
+        radius = length(np.maximum(abs(bound_min), abs(bound_max)))
+        geometries.append(Geometry(index=i, boundMin=bound_min, boundMax=bound_max, radius=radius))
+    model = types.SimpleNamespace(name='model',
+                                  mesh=types.SimpleNamespace(geometries=geometries, radius=geometries[-1].radius),
+                                  material_instances=[materials[i % 2] for i in range(geometry_count)])
+
+    rand = np.random.RandomState(0)
+    actors = []
+    for i in range(actor_count):
+        actor = StaticActor('actor_%d' % i,
+                            model=model,
+                            pos=((rand.rand(3) - 0.5) * (scene_size, 10.0, scene_size)).tolist(),
+                            rot=(rand.rand(3) * TWO_PI).tolist(),
+                            scale=(rand.rand(3) + 0.5).tolist())
+        actor.update(0.0)
+        actors.append(actor)
+    return actors
+
+
+def create_camera(fov, aspect):
+    half_fov_y = math.radians(fov) * 0.5
+    half_fov_x = math.atan(math.tan(half_fov_y) * aspect)
+    camera = types.SimpleNamespace(transform=TransformObject())
+    # outward normals of the left, right, top and bottom planes. the camera looks at -z.
+    camera.frustum_vectors = np.array([(-math.cos(half_fov_x), 0.0, math.sin(half_fov_x)),
+                                       (math.cos(half_fov_x), 0.0, math.sin(half_fov_x)),
+                                       (0.0, math.cos(half_fov_y), math.sin(half_fov_y)),
+                                       (0.0, -math.cos(half_fov_y), math.sin(half_fov_y))], dtype=np.float32)
+    return camera
+
+
+def legacy_culling(camera, light, actors):
+    solid_render_infos = []
+    translucent_render_infos = []
+    shadow_render_infos = []
+    gather_render_infos(view_frustum_culling_geometry, camera, light, actors, solid_render_infos,
+                        translucent_render_infos)
+    gather_render_infos(shadow_culling, camera, light, actors, shadow_render_infos, None)
+    return solid_render_infos, translucent_render_infos, shadow_render_infos
+
+
+def batched_culling(camera, light, actors, bounds):
+    solid_render_infos = []
+    translucent_render_infos = []
+    shadow_render_infos = []
+    bounds.update(actors)
+    bounds.gather_render_infos(bounds.view_frustum_culling(camera), solid_render_infos, translucent_render_infos)
+    bounds.gather_render_infos(bounds.shadow_culling(light), shadow_render_infos, None)
+    return solid_render_infos, translucent_render_infos, shadow_render_infos
+
+
+def get_keys(render_infos):
+    return set((id(render_info.actor), render_info.geometry.index) for render_info in render_infos)
+
+
+def benchmark(actor_count, geometry_count, moving_ratio, frame_count, scene_size):
+    actors = create_actors(actor_count, geometry_count, scene_size)
+    camera = create_camera(fov=60.0, aspect=16.0 / 9.0)
+    light = MainLight('main_light', rot=[-1.0, 0.5, 0.0])
+    light.update(camera)
+    bounds = GeometryBounds()
+    moving_count = int(actor_count * moving_ratio)
+
+    legacy_time = 0.0
+    batched_time = 0.0
+    mismatch_count = 0
+    visible_count = 0
+    for frame in range(frame_count):
+        for actor in actors[:moving_count]:
+            actor.transform.move_x(0.1)
+        for actor in actors:
+            actor.update(0.0)
+
+        start_time = time.perf_counter()
+        legacy_results = legacy_culling(camera, light, actors)
+        legacy_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        batched_results = batched_culling(camera, light, actors, bounds)
+        batched_time += time.perf_counter() - start_time
+
+        for legacy_render_infos, batched_render_infos in zip(legacy_results, batched_results):
+            mismatch_count += len(get_keys(legacy_render_infos) ^ get_keys(batched_render_infos))
+        visible_count += sum(len(render_infos) for render_infos in batched_results)
+
+    print("actors : %d, geometries : %d, moving actors : %d" % (actor_count, actor_count * geometry_count,
+                                                                moving_count))
+    print("average render infos per frame : %d, mismatched render infos : %d" % (visible_count // frame_count,
+                                                                                mismatch_count))
+    print("per geometry culling : %.2f ms/frame" % (legacy_time * 1000.0 / frame_count))
+    print("batched culling : %.2f ms/frame" % (batched_time * 1000.0 / frame_count))
+    print("speed up : x%.1f" % (legacy_time / batched_time))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--actors', type=int, default=5000)
+    parser.add_argument('--geometries', type=int, default=2)
+    parser.add_argument('--moving-ratio', type=float, default=0.1)
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--scene-size', type=float, default=1000.0)
+    args = parser.parse_args()
+
+    logger.setLevel(Logger.WARNING)
+    benchmark(args.actors, args.geometries, args.moving_ratio, args.frames, args.scene_size)
@@ -0,0 +1,93 @@
+"""
+Play a camera flythrough at the fixed timestep and report the frame time statistics.
+Without a recording, an orbit around the origin is generated. Record one in the app with the key 5.
+It runs on a temporary copy of the project, see headless_frame.temporary_project.
+
+    python -m benchmarks.flythrough --project Resource/default.project --recording Flythrough_sponza_scene.json
+    python -m benchmarks.flythrough --null --orbit-radius 20 --orbit-seconds 10
+"""
+
+import argparse
+import json
+import math
+import os
+import tempfile
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.App.GameBackend import GameBackNames
+from PyEngine3D.Common import logger
+from PyEngine3D.Utilities import *
+from .headless_frame import temporary_project
+
+
+def create_orbit_recording(filepath, scene_name, radius, height, seconds, key_interval=0.5):
+    keys = []
+    key_count = int(seconds / key_interval) + 1
+    for i in range(key_count):
+        key_time = i * key_interval
+        angle = key_time / seconds * math.pi * 2.0
+        # look at the origin from the orbit.
+        pitch = math.atan2(height, radius)
+        keys.append([key_time, math.sin(angle) * radius, height, math.cos(angle) * radius, pitch, angle, 0.0])
+    with open(filepath, 'w') as f:
+        json.dump(dict(version=1, scene=scene_name, keys=keys, events=[]), f)
+
+
+def benchmark(project_filename, recording, fixed_delta, use_null, orbit_radius, orbit_height, orbit_seconds):
+    if recording:
+        recording = os.path.abspath(recording)
+    with temporary_project(project_filename) as temp_project_filename:
+        return play_flythrough(temp_project_filename, recording, fixed_delta, use_null,
+                               orbit_radius, orbit_height, orbit_seconds)
+
+
+def play_flythrough(project_filename, recording, fixed_delta, use_null, orbit_radius, orbit_height, orbit_seconds):
+    core_manager = CoreManager.instance()
+    game_backend = GameBackNames.NULL if use_null else None
+    if not core_manager.initialize(None, None, None, project_filename, game_backend=game_backend):
+        raise RuntimeError("Failed to initialize the core manager.")
+
+    # load the resources before the playback.
+    while core_manager.resource_manager.is_warming_up():
+        core_manager.game_backend.update_event()
+        core_manager.update()
+
+    temp_recording = ""
+    if not recording:
+        temp_recording = recording = os.path.join(tempfile.gettempdir(), "Flythrough_orbit.json")
+        create_orbit_recording(recording, core_manager.scene_manager.get_current_scene_name(),
+                               orbit_radius, orbit_height, orbit_seconds)
+
+    flythrough = core_manager.camera_flythrough
+    if not flythrough.start_playback(recording, fixed_delta, quit_after_playback=True):
+        raise RuntimeError("Failed to play %s." % recording)
+
+    # run until the playback closes the app.
+    core_manager.run()
+
+    if temp_recording:
+        os.remove(temp_recording)
+    return flythrough.last_result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--project', type=str, default="")
+    parser.add_argument('--recording', type=str, default="", help="json file recorded by the camera flythrough")
+    parser.add_argument('--fixed-delta', type=float, default=1.0 / 60.0)
+    parser.add_argument('--null', action='store_true', help="run on the null game backend without the gpu")
+    parser.add_argument('--orbit-radius', type=float, default=20.0)
+    parser.add_argument('--orbit-height', type=float, default=5.0)
+    parser.add_argument('--orbit-seconds', type=float, default=10.0)
+    args = parser.parse_args()
+
+    logger.setLevel(Logger.WARNING)
+    result = benchmark(args.project, args.recording, args.fixed_delta, args.null,
+                       args.orbit_radius, args.orbit_height, args.orbit_seconds)
+
+    print("frames : %d, hitch : %.1f x median" % (result['frame_count'], result['hitch_ratio']))
+    for name in ('frame_time', 'cpu_time', 'gpu_time'):
+        stats = result[name]
+        print("%s : mean %.3f ms, p95 %.3f ms, p99 %.3f ms, worst %.3f ms (frame %d), hitches %d" % (
+            name, stats['mean'], stats['p95'], stats['p99'], stats['worst'], stats['worst_frame'],
+            stats['hitch_count']))
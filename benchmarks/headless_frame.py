@@ -0,0 +1,116 @@
+"""
+Run CoreManager.update with the null game backend, which has no window and no gpu,
+and report the cpu time of the frame scopes and the recorded gl calls.
+The results are saved as json to compare the frame cpu time across the commits.
+The engine writes the converted resources, the meta files and config.ini, so it runs on a temporary copy
+of the project in the temporary working directory.
+
+    python -m benchmarks.headless_frame --frames 300 --output headless_frame.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.App.GameBackend import GameBackNames
+from PyEngine3D.Common import logger
+from PyEngine3D.OpenGLContext import GLRecorder
+from PyEngine3D.ResourceManager import ResourceManager
+from PyEngine3D.Utilities import *
+
+
+@contextlib.contextmanager
+def temporary_project(project_filename):
+    """
+    Copy the project directory into a temporary directory, which is the working directory in the context.
+    :return: the project filename in the copy
+    """
+    project_filename = os.path.abspath(project_filename or ResourceManager.DefaultProjectFile)
+    project_dir, project_basename = os.path.split(project_filename)
+    working_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_project_dir = os.path.join(temp_dir, os.path.basename(project_dir))
+        shutil.copytree(project_dir, temp_project_dir)
+        os.chdir(temp_dir)
+        try:
+            yield os.path.join(temp_project_dir, project_basename)
+        finally:
+            os.chdir(working_dir)
+
+
+def benchmark(project_filename, frame_count, warmup_frame_count, top_count):
+    with temporary_project(project_filename) as temp_project_filename:
+        return run_frames(temp_project_filename, frame_count, warmup_frame_count, top_count)
+
+
+def run_frames(project_filename, frame_count, warmup_frame_count, top_count):
+    core_manager = CoreManager.instance()
+    if not core_manager.initialize(None, None, None, project_filename, game_backend=GameBackNames.NULL):
+        raise RuntimeError("Failed to initialize the core manager.")
+
+    game_backend = core_manager.game_backend
+    frame_profiler = core_manager.frame_profiler
+    frame_profiler.set_history_count(frame_count)
+
+    for frame in range(warmup_frame_count):
+        game_backend.update_event()
+        core_manager.update()
+
+    GLRecorder.total_calls.clear()
+    frame_profiler.history.clear()
+
+    start_time = time.perf_counter()
+    for frame in range(frame_count):
+        game_backend.update_event()
+        core_manager.update()
+    elapsed_time = time.perf_counter() - start_time
+
+    frame_profiler.update_summary()
+    frame_times = sorted(frame.samples[0].get_cpu_time() for frame in frame_profiler.history if frame.samples)
+    gl_call_count = sum(GLRecorder.total_calls.values())
+
+    result = dict(
+        frames=frame_count,
+        frame_time=elapsed_time * 1000.0 / frame_count,
+        frame_time_median=frame_times[len(frame_times) // 2] if frame_times else 0.0,
+        frame_time_max=frame_times[-1] if frame_times else 0.0,
+        gl_calls_per_frame=gl_call_count / frame_count,
+        gl_calls=dict(GLRecorder.total_calls.most_common(top_count)),
+        scopes=[dict(name=name, depth=depth, cpu_time=cpu_time) for name, depth, cpu_time, gpu_time in
+                frame_profiler.summary],
+    )
+
+    core_manager.exit()
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--project', type=str, default="")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--warmup-frames', type=int, default=30)
+    parser.add_argument('--top', type=int, default=20, help="the number of the gl functions to report")
+    parser.add_argument('--output', type=str, default="", help="json file of the results")
+    args = parser.parse_args()
+
+    logger.setLevel(Logger.WARNING)
+    result = benchmark(args.project, args.frames, args.warmup_frames, args.top)
+
+    print("frames : %d" % result['frames'])
+    print("frame cpu time : %.3f ms/frame, median %.3f ms, max %.3f ms" % (
+        result['frame_time'], result['frame_time_median'], result['frame_time_max']))
+    print("gl calls : %d/frame" % result['gl_calls_per_frame'])
+    for name, count in result['gl_calls'].items():
+        print("    %s : %.1f/frame" % (name, count / result['frames']))
+    print("scopes :")
+    for scope in result['scopes']:
+        print("    %s%s : %.3f ms" % ("  " * scope['depth'], scope['name'], scope['cpu_time']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=4)
@@ -0,0 +1,75 @@
+"""
+Report the vertex cache statistics of the meshes before and after ResourceManager.MeshOptimizer on the cpu.
+The triangles of the generated grid are shuffled, the external meshes are imported as MeshLoader does.
+
+    python -m benchmarks.mesh_optimizer --triangles 200000 --cache-size 16
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.Common import logger
+from PyEngine3D.ResourceManager import Collada, OBJ, optimize_geometry_data
+from PyEngine3D.Utilities import *
+
+
+def generate_geometry_data(triangle_count, seed=0):
+    width = int(np.ceil(np.sqrt(triangle_count / 2.0)))
+    height = int(np.ceil(triangle_count / 2.0 / width))
+    grid_x, grid_z = np.meshgrid(np.arange(width + 1, dtype=np.float32), np.arange(height + 1, dtype=np.float32))
+    positions = np.stack([grid_x.reshape(-1), np.zeros(grid_x.size, dtype=np.float32), grid_z.reshape(-1)], axis=1)
+
+    quad_x, quad_z = np.meshgrid(np.arange(width), np.arange(height))
+    first = (quad_z * (width + 1) + quad_x).reshape(-1)
+    triangles = np.stack([first, first + width + 1, first + 1, first + 1, first + width + 1, first + width + 2], axis=1)
+    triangles = triangles.reshape(-1, 3)[:triangle_count]
+    triangles = triangles[np.random.default_rng(seed).permutation(len(triangles))]
+    return dict(name='shuffled_grid', positions=positions, indices=triangles.reshape(-1).astype(np.uint32))
+
+
+def get_external_geometry_datas(mesh_path):
+    geometry_datas = []
+    for filepath in sorted(glob.glob(os.path.join(mesh_path, '**', '*.*'), recursive=True)):
+        file_ext = os.path.splitext(filepath)[1]
+        if file_ext == '.obj':
+            geometry_datas += OBJ(filepath, 1, True).get_geometry_data()
+        elif file_ext == '.dae':
+            geometry_datas += Collada(filepath).get_geometry_data()
+    return geometry_datas
+
+
+def benchmark(triangle_count, mesh_path, cache_size):
+    geometry_datas = [generate_geometry_data(triangle_count), ]
+    if mesh_path:
+        geometry_datas += get_external_geometry_datas(mesh_path)
+
+    print('%-24s %10s %10s %18s %18s %8s %8s' % ('geometry', 'triangles', 'vertices', 'ACMR', 'ATVR', 'indices',
+                                                 'time'))
+    for geometry_data in geometry_datas:
+        triangle_count = len(geometry_data['indices']) // 3
+        vertex_count = len(geometry_data['positions'])
+        start_time = time.perf_counter()
+        statistics = optimize_geometry_data(geometry_data, True, cache_size)
+        elapsed_time = time.perf_counter() - start_time
+        if statistics is None:
+            continue
+        print('%-24s %10d %10d %8.3f -> %5.3f %8.3f -> %5.3f %8s %7.2fs' % (
+            geometry_data['name'][:24], triangle_count, vertex_count, statistics['acmr'][0], statistics['acmr'][1],
+            statistics['atvr'][0], statistics['atvr'][1], statistics['index_type'], elapsed_time))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--triangles', type=int, default=200000)
+    parser.add_argument('--mesh-path', type=str, default=os.path.join('Resource', 'Externals', 'Meshes'),
+                        help="the obj and dae files in the path are optimized too")
+    parser.add_argument('--cache-size', type=int, default=16)
+    args = parser.parse_args()
+
+    logger.setLevel(Logger.WARNING)
+    benchmark(args.triangles, args.mesh_path, args.cache_size)
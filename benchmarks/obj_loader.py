@@ -0,0 +1,165 @@
+"""
+Compare the line by line OBJ importer with the vectorized ResourceManager.ObjLoader.OBJ.
+
+    python -m benchmarks.obj_loader --faces 1000000
+"""
+
+import argparse
+import copy
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.ResourceManager.ObjLoader import OBJ, defaultTexCoord, defaultNormal
+from PyEngine3D.Utilities import *
+
+
+class LegacyOBJ:
+    """ The line by line importer which was replaced by the vectorized OBJ. """
+    def __init__(self, filename, scale):
+        self.meshes = []
+        self.positions = []
+        self.normals = []
+        self.texcoords = []
+        self.filename = filename
+
+        default_name = os.path.splitext(os.path.split(filename)[-1])[0]
+        preFix = None
+        mesh_object = None
+        for line in open(filename, "r"):
+            line = line.strip()
+            if line == '' or line.startswith('#'):
+                continue
+
+            values = [value.strip() for value in line.split()]
+            if len(values) < 2:
+                continue
+
+            if mesh_object is None or (preFix == 'f' and values[0] not in ('f', 's')):
+                mesh_object = dict(name=default_name, indices=[])
+                self.meshes.append(mesh_object)
+
+            preFix = values[0]
+            values = values[1:]
+
+            if preFix == 'o':
+                mesh_object['name'] = ' '.join(values)
+            elif preFix == 'v' and len(values) >= 3:
+                self.positions.append(list(map(lambda x: float(x) * scale, values[:3])))
+            elif preFix == 'vn' and len(values) >= 3:
+                self.normals.append(list(map(float, values[:3])))
+            elif preFix == 'vt' and len(values) >= 2:
+                self.texcoords.append(list(map(float, values[:2])))
+            elif preFix == 'f':
+                pos_indices = []
+                normal_indices = []
+                tex_indices = []
+
+                if len(self.texcoords) < 1:
+                    self.texcoords.append(copy.copy(defaultTexCoord))
+                if len(self.normals) < 1:
+                    self.normals.append(copy.copy(defaultNormal))
+
+                for indices in values:
+                    pos_index, tex_index, normal_index = list(
+                        map(lambda x: int(x) - 1 if x else 0, indices.split('/')))
+                    pos_indices.append(pos_index)
+                    tex_indices.append(tex_index)
+                    normal_indices.append(normal_index)
+
+                if len(pos_indices) == 3:
+                    mesh_object['indices'].append((pos_indices, normal_indices, tex_indices))
+                elif len(pos_indices) == 4:
+                    mesh_object['indices'].append((pos_indices[:3], normal_indices[:3], tex_indices[:3]))
+                    mesh_object['indices'].append(([pos_indices[2], pos_indices[3], pos_indices[0]],
+                                                   [normal_indices[2], normal_indices[3], normal_indices[0]],
+                                                   [tex_indices[2], tex_indices[3], tex_indices[0]]))
+
+    def get_geometry_data(self):
+        geometry_datas = []
+        for mesh in self.meshes:
+            positions = []
+            normals = []
+            texcoords = []
+            indices = []
+            indexMap = {}
+            for postionIndicies, normalIndicies, texcoordIndicies in mesh['indices']:
+                for i in range(len(postionIndicies)):
+                    index_key = (postionIndicies[i], normalIndicies[i], texcoordIndicies[i])
+                    if index_key in indexMap:
+                        indices.append(indexMap[index_key])
+                    else:
+                        indices.append(len(indexMap))
+                        indexMap[index_key] = len(indexMap)
+                        positions.append(self.positions[postionIndicies[i]])
+                        normals.append(self.normals[normalIndicies[i]])
+                        texcoords.append(self.texcoords[texcoordIndicies[i]])
+            if positions:
+                geometry_datas.append(dict(name=mesh['name'],
+                                           positions=copy.deepcopy(positions),
+                                           normals=copy.deepcopy(normals),
+                                           texcoords=copy.deepcopy(texcoords),
+                                           indices=copy.deepcopy(indices)))
+        return geometry_datas
+
+
+def generate_obj_file(filepath, face_count):
+    """ Write a grid of quads with position, texcoord and normal. """
+    width = int(np.ceil(np.sqrt(face_count)))
+    height = int(np.ceil(face_count / width))
+    x, z = np.meshgrid(np.arange(width + 1, dtype=np.float32), np.arange(height + 1, dtype=np.float32))
+    x = x.reshape(-1)
+    z = z.reshape(-1)
+    y = np.sin(x * 0.1) * np.cos(z * 0.1)
+    positions = np.stack([x, y, z], axis=1)
+    texcoords = np.stack([x / width, z / height], axis=1)
+    normals = np.tile(np.array([0.0, 1.0, 0.0], dtype=np.float32), (len(x), 1))
+
+    quad_x, quad_z = np.meshgrid(np.arange(width), np.arange(height))
+    first = (quad_z * (width + 1) + quad_x).reshape(-1)[:face_count] + 1
+    quads = np.stack([first, first + width + 1, first + width + 2, first + 1], axis=1)
+
+    with open(filepath, 'w') as f:
+        f.write('o grid\n')
+        np.savetxt(f, positions, fmt='v %.6f %.6f %.6f')
+        np.savetxt(f, texcoords, fmt='vt %.6f %.6f')
+        np.savetxt(f, normals, fmt='vn %.6f %.6f %.6f')
+        f.write('usemtl default\n')
+        np.savetxt(f, np.repeat(quads, 3, axis=1), fmt='f' + ' %d/%d/%d' * 4)
+
+
+def benchmark(face_count, skip_legacy=False):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filepath = os.path.join(temp_dir, 'grid.obj')
+        generate_obj_file(filepath, face_count)
+        print('%s : %d faces, %.1fMB' % (filepath, face_count, os.path.getsize(filepath) / 1048576.0))
+
+        start_time = time.perf_counter()
+        geometry_datas = OBJ(filepath, 1, True).get_geometry_data()
+        elapsed_time = time.perf_counter() - start_time
+        print('OBJ : %.2fs' % elapsed_time)
+
+        if not skip_legacy:
+            start_time = time.perf_counter()
+            legacy_geometry_datas = LegacyOBJ(filepath, 1).get_geometry_data()
+            legacy_elapsed_time = time.perf_counter() - start_time
+            print('LegacyOBJ : %.2fs ( x%.1f )' % (legacy_elapsed_time, legacy_elapsed_time / elapsed_time))
+
+            assert len(geometry_datas) == len(legacy_geometry_datas)
+            for geometry_data, legacy_geometry_data in zip(geometry_datas, legacy_geometry_datas):
+                assert geometry_data['name'] == legacy_geometry_data['name']
+                for key in ('positions', 'normals', 'texcoords'):
+                    assert np.allclose(geometry_data[key], legacy_geometry_data[key])
+                assert np.array_equal(geometry_data['indices'], legacy_geometry_data['indices'])
+            print('The results are identical.')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--faces', type=int, default=1000000)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+    benchmark(args.faces, args.skip_legacy)
@@ -0,0 +1,353 @@
+"""
+Compare the per particle simulation of the cpu particles with the arrays of Emitter.
+
+    python -m benchmarks.particles --frames 60 --spawn-count 50
+"""
+
+import argparse
+import math
+import time
+import types
+
+import numpy as np
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.Common import logger
+from PyEngine3D.Render.Effect import Effect, Emitter, ParticleInfo, AlignMode, SpawnVolume, VelocityType
+from PyEngine3D.Utilities import *
+
+
+class LegacyParticle:
+    """
+    The cpu particle object before the arrays of Emitter.
+    """
+    def __init__(self, parent_effect, particle_info):
+        self.parent_effect = parent_effect
+        self.particle_info = particle_info
+        self.alive = False
+        self.elapsed_time = 0.0
+        self.total_cell_count = 0
+        self.sequence_uv = [0.0, 0.0]
+        self.next_sequence_uv = [0.0, 0.0]
+        self.sequence_ratio = 0.0
+        self.sequence_index = 0
+        self.next_sequence_index = 0
+        self.delay = 0.0
+        self.life_time = 0.0
+        self.velocity_position = Float3()
+        self.velocity_rotation = Float3()
+        self.velocity_scale = Float3()
+        self.has_velocity_position = False
+        self.has_velocity_rotation = False
+        self.has_velocity_scale = False
+        self.final_opacity = 1.0
+        self.force = Float3()
+        self.transform = TransformObject()
+        self.parent_matrix = MATRIX4_IDENTITY.copy()
+
+    def spawn(self):
+        particle_info = self.particle_info
+        self.total_cell_count = particle_info.cell_count[0] * particle_info.cell_count[1]
+        self.delay = particle_info.delay.get_uniform()
+        self.life_time = particle_info.life_time.get_uniform()
+
+        random_factor = np.array([np.random.uniform() for i in range(4)], dtype=np.float32)
+        spawn_position = particle_info.spawn_volume_info * (random_factor[0:3] - 0.5)
+        spawn_position[...] = np.dot([spawn_position[0], spawn_position[1], spawn_position[2], 1.0],
+                                     particle_info.spawn_volume_transform.matrix)[:3]
+
+        self.transform.set_pos(spawn_position)
+        self.transform.set_rotation(particle_info.transform_rotation.get_uniform())
+        self.transform.set_scale(particle_info.transform_scale.get_uniform())
+        self.parent_matrix[...] = self.parent_effect.transform.matrix
+        self.force[...] = np.dot([0.0, -particle_info.force_gravity, 0.0],
+                                 self.parent_effect.transform.inverse_matrix[0:3, 0:3])
+        self.velocity_position[...] = abs(particle_info.velocity_position.get_uniform()) * normalize(spawn_position)
+        self.velocity_rotation[...] = particle_info.velocity_rotation.get_uniform()
+        self.velocity_scale[...] = particle_info.velocity_scale.get_uniform()
+        self.set_flags()
+        self.final_opacity = particle_info.opacity
+
+        self.alive = True
+        self.elapsed_time = 0.0
+        self.sequence_ratio = 0.0
+        self.sequence_index = 0
+        self.next_sequence_index = 0
+
+    def set_flags(self):
+        self.has_velocity_position = any([v != 0.0 for v in self.velocity_position]) or \
+                                     self.particle_info.force_gravity != 0.0
+        self.has_velocity_rotation = any([v != 0.0 for v in self.velocity_rotation])
+        self.has_velocity_scale = any([v != 0.0 for v in self.velocity_scale])
+
+    def update_sequence(self, life_ratio):
+        if 1 < self.total_cell_count and 0 < self.particle_info.play_speed:
+            ratio = life_ratio * self.particle_info.play_speed
+            ratio = (self.total_cell_count - 1) * (ratio - math.floor(ratio))
+            index = math.floor(ratio)
+            next_index = min(index + 1, self.total_cell_count - 1)
+            self.sequence_ratio = ratio - index
+
+            if next_index == self.next_sequence_index:
+                return
+
+            cell_count = self.particle_info.cell_count
+            self.sequence_index = self.next_sequence_index
+            self.sequence_uv[0] = self.next_sequence_uv[0]
+            self.sequence_uv[1] = self.next_sequence_uv[1]
+            self.next_sequence_index = next_index
+            self.next_sequence_uv[0] = (next_index % cell_count[0]) / cell_count[0]
+            self.next_sequence_uv[1] = (cell_count[1] - 1 - int(math.floor(next_index / cell_count[0]))) / cell_count[1]
+
+    def update(self, dt):
+        if 0.0 < self.delay:
+            self.delay -= dt
+            if self.delay < 0.0:
+                self.elapsed_time += abs(self.delay)
+                self.delay = 0.0
+            else:
+                return
+
+        if self.life_time < self.elapsed_time:
+            self.alive = False
+            return
+
+        life_ratio = 0.0
+        if 0.0 < self.life_time:
+            life_ratio = min(1.0, self.elapsed_time / self.life_time)
+        left_life_time = self.life_time - self.elapsed_time
+        self.elapsed_time += dt
+
+        self.update_sequence(life_ratio)
+
+        particle_info = self.particle_info
+        if particle_info.force_gravity != 0.0:
+            self.velocity_position += self.force * dt
+
+        if self.has_velocity_position:
+            if any(self.velocity_position != 0.0) and 0.0 != particle_info.velocity_acceleration:
+                velocity_length = length(self.velocity_position)
+                self.velocity_position /= velocity_length
+                velocity_length += particle_info.velocity_acceleration * dt
+                if 0.0 < particle_info.velocity_limit.value[1]:
+                    velocity_length = min(velocity_length, particle_info.velocity_limit.value[1])
+                velocity_length = max(velocity_length, particle_info.velocity_limit.value[0])
+                self.velocity_position *= velocity_length
+            self.transform.move(self.velocity_position * dt)
+
+        if self.has_velocity_rotation:
+            self.transform.rotation(self.velocity_rotation * dt)
+
+        if self.has_velocity_scale:
+            self.transform.scaling(self.velocity_scale * dt)
+
+        self.transform.update_transform()
+
+        if 0.0 != particle_info.fade_in or 0.0 != particle_info.fade_out:
+            self.final_opacity = particle_info.opacity
+            if 0.0 < particle_info.fade_in and self.life_time < particle_info.fade_in:
+                self.final_opacity *= self.life_time / particle_info.fade_in
+            if 0.0 < particle_info.fade_out and left_life_time < particle_info.fade_out:
+                self.final_opacity *= left_life_time / particle_info.fade_out
+
+
+def legacy_update(particles, alive_count, dt):
+    # Emitter.update with the swap of the dead particles
+    index = 0
+    for n in range(alive_count):
+        particle = particles[index]
+        particle.update(dt)
+        if not particle.alive:
+            alive_count -= 1
+            if index != alive_count:
+                particles[index] = particles[alive_count]
+                particles[alive_count] = particle
+                continue
+        index += 1
+    return alive_count
+
+
+def legacy_render(particles, alive_count, particle_info, main_camera):
+    # EffectManager.render of the cpu particles
+    draw_count = 0
+    camera_position = main_camera.transform.get_pos()
+    for particle in particles[:alive_count]:
+        if particle.delay <= 0.0:
+            if AlignMode.BILLBOARD == particle_info.align_mode:
+                particle_info.world_matrix_data[draw_count][...] = np.dot(particle.transform.matrix, main_camera.inv_view_origin)
+                particle_info.world_matrix_data[draw_count][3][...] = np.dot(particle.transform.matrix, particle.parent_matrix)[3]
+            elif AlignMode.VELOCITY_ALIGN == particle_info.align_mode:
+                world_velocity = np.dot(particle.velocity_position, particle.parent_matrix[0:3, 0:3])
+                velocity_length = length(world_velocity)
+                world_matrix = particle_info.world_matrix_data[draw_count]
+                world_matrix[...] = np.dot(particle.transform.matrix, particle.parent_matrix)
+                if 0.0 < velocity_length:
+                    direction = normalize(particle.parent_matrix[3][0:3] - camera_position)
+                    world_velocity /= velocity_length
+                    world_matrix[0][0:3] = np.cross(world_velocity, direction)
+                    world_matrix[1][0:3] = world_velocity * (1.0 + velocity_length * particle_info.velocity_stretch * 0.1)
+                    world_matrix[2][0:3] = np.cross(world_matrix[0][0:3], world_velocity)
+            else:
+                particle_info.world_matrix_data[draw_count][...] = np.dot(particle.transform.matrix, particle.parent_matrix)
+            particle_info.uvs_data[draw_count][0:2] = particle.sequence_uv
+            particle_info.uvs_data[draw_count][2:4] = particle.next_sequence_uv
+            particle_info.sequence_opacity_data[draw_count][0] = particle.sequence_ratio
+            particle_info.sequence_opacity_data[draw_count][1] = particle.final_opacity
+            draw_count += 1
+    return draw_count
+
+
+def copy_to_legacy_particles(emitter, effect, particle_info):
+    particles = []
+    for i in range(emitter.alive_particle_count):
+        particle = LegacyParticle(effect, particle_info)
+        particle.id = i
+        particle.alive = True
+        particle.total_cell_count = particle_info.cell_count[0] * particle_info.cell_count[1]
+        particle.delay = float(emitter.delay[i])
+        particle.life_time = float(emitter.life_time[i])
+        particle.elapsed_time = float(emitter.particle_elapsed_time[i])
+        particle.transform.set_pos(emitter.position[i])
+        particle.transform.set_rotation(emitter.rotation[i])
+        particle.transform.set_scale(emitter.scale[i])
+        particle.transform.update_transform(force_update=True)
+        particle.velocity_position[...] = emitter.velocity_position[i]
+        particle.velocity_rotation[...] = emitter.velocity_rotation[i]
+        particle.velocity_scale[...] = emitter.velocity_scale[i]
+        particle.force[...] = emitter.force[i]
+        particle.parent_matrix[...] = emitter.parent_matrix[i]
+        particle.final_opacity = float(emitter.opacity[i])
+        particle.sequence_ratio = float(emitter.sequence_ratio[i])
+        particle.sequence_index = int(emitter.sequence_index[i])
+        particle.next_sequence_index = int(emitter.next_sequence_index[i])
+        particle.sequence_uv = emitter.sequence_uv[i].tolist()
+        particle.next_sequence_uv = emitter.next_sequence_uv[i].tolist()
+        particle.set_flags()
+        particles.append(particle)
+    return particles
+
+
+def get_instance_data(particle_info, draw_count):
+    return np.hstack([particle_info.world_matrix_data[:draw_count].reshape(draw_count, 16),
+                      particle_info.uvs_data[:draw_count],
+                      particle_info.sequence_opacity_data[:draw_count]])
+
+
+def create_particle_info(spawn_count, align_mode):
+    # the meshes, materials and textures are not used by the simulation.
+    CoreManager.instance().resource_manager = types.SimpleNamespace(get_default_mesh=lambda: None,
+                                                                    get_default_effect_material_instance=lambda: None,
+                                                                    get_texture=lambda name: None,
+                                                                    get_texture_or_none=lambda name: None)
+    particle_info = ParticleInfo('particle',
+                                 enable_gpu_particle=False,
+                                 spawn_count=spawn_count,
+                                 spawn_term=0.01,
+                                 align_mode=align_mode.value,
+                                 cell_count=[4, 4],
+                                 play_speed=1.0,
+                                 fade_in=0.5,
+                                 fade_out=0.5,
+                                 delay=dict(min_value=0.0, max_value=0.2),
+                                 life_time=dict(min_value=1.0, max_value=2.0),
+                                 spawn_volume_type=SpawnVolume.BOX.value,
+                                 spawn_volume_info=Float3(10.0, 2.0, 10.0),
+                                 transform_rotation=dict(min_value=Float3(0.0, 0.0, 0.0), max_value=Float3(1.0, 2.0, 3.0)),
+                                 transform_scale=dict(min_value=Float3(0.5, 0.5, 0.5), max_value=Float3(2.0, 2.0, 2.0)),
+                                 velocity_type=VelocityType.SPAWN_DIRECTION.value,
+                                 velocity_acceleration=-1.0,
+                                 velocity_limit=dict(min_value=0.5, max_value=20.0),
+                                 velocity_position=dict(min_value=Float3(1.0, 1.0, 1.0), max_value=Float3(5.0, 5.0, 5.0)),
+                                 velocity_rotation=dict(min_value=Float3(-3.0, -3.0, -3.0), max_value=Float3(3.0, 3.0, 3.0)),
+                                 velocity_scale=dict(min_value=Float3(-0.1, -0.1, -0.1), max_value=Float3(0.1, 0.1, 0.1)),
+                                 force_gravity=9.8)
+    particle_info.spawn_volume_transform.set_pos(Float3(1.0, 2.0, 3.0))
+    particle_info.spawn_volume_transform.update_transform()
+    return particle_info
+
+
+def create_camera():
+    transform = TransformObject()
+    transform.set_pos(Float3(10.0, 20.0, 30.0))
+    transform.set_rotation(Float3(0.3, 0.5, 0.0))
+    transform.update_transform(update_inverse_matrix=True)
+    inv_view_origin = transform.rotationMatrix.T.copy()
+    return types.SimpleNamespace(transform=transform, inv_view_origin=inv_view_origin)
+
+
+def benchmark(frame_count, spawn_count, align_mode):
+    np.random.seed(0)
+    particle_info = create_particle_info(spawn_count, align_mode)
+    main_camera = create_camera()
+    effect = Effect(name='effect', pos=(5.0, 0.0, -5.0), rot=(0.0, 0.7, 0.0), scale=(2.0, 2.0, 2.0))
+    effect.transform.update_transform(update_inverse_matrix=True, force_update=True)
+    emitter = Emitter(effect, particle_info)
+    emitter.play()
+
+    dt = 1.0 / 60.0
+    # fill the emitter
+    for frame in range(150):
+        emitter.update(dt)
+
+    # spawn
+    spawn_total = particle_info.max_particle_count
+    legacy_particles = [LegacyParticle(effect, particle_info) for i in range(spawn_total)]
+    start_time = time.perf_counter()
+    for particle in legacy_particles:
+        particle.spawn()
+    legacy_spawn_time = time.perf_counter() - start_time
+
+    spawn_emitter = Emitter(effect, particle_info)
+    spawn_emitter.create_particle_data(spawn_total)
+    start_time = time.perf_counter()
+    spawn_emitter.spawn_particle_data(0, spawn_total)
+    spawn_time = time.perf_counter() - start_time
+
+    # update and render the same particles
+    particles = copy_to_legacy_particles(emitter, effect, particle_info)
+    legacy_alive_count = len(particles)
+    legacy_time = 0.0
+    array_time = 0.0
+    max_error = 0.0
+    mismatch_count = 0
+    total_draw_count = 0
+    for frame in range(frame_count):
+        start_time = time.perf_counter()
+        legacy_alive_count = legacy_update(particles, legacy_alive_count, dt)
+        legacy_draw_count = legacy_render(particles, legacy_alive_count, particle_info, main_camera)
+        legacy_time += time.perf_counter() - start_time
+        # the order of the swapped particles is restored to compare with the kept order of the arrays.
+        particles[:legacy_alive_count] = sorted(particles[:legacy_alive_count], key=lambda x: x.id)
+        legacy_render(particles, legacy_alive_count, particle_info, main_camera)
+        legacy_data = get_instance_data(particle_info, legacy_draw_count)
+
+        start_time = time.perf_counter()
+        emitter.update_particle_data(dt)
+        draw_count = emitter.update_instance_data(main_camera)
+        array_time += time.perf_counter() - start_time
+        array_data = get_instance_data(particle_info, draw_count)
+
+        total_draw_count += draw_count
+        if legacy_alive_count != emitter.alive_particle_count or legacy_draw_count != draw_count:
+            mismatch_count += 1
+        else:
+            max_error = max(max_error, float(np.max(np.abs(legacy_data - array_data))) if draw_count else 0.0)
+
+    print("align mode : %s, max particles : %d, average draw count : %d" % (
+        align_mode.name, particle_info.max_particle_count, total_draw_count // frame_count))
+    print("mismatched frames : %d, max difference of the instance data : %g" % (mismatch_count, max_error))
+    print("spawn %d particles : %.2f ms -> %.2f ms, x%.1f" % (
+        spawn_total, legacy_spawn_time * 1000.0, spawn_time * 1000.0, legacy_spawn_time / spawn_time))
+    print("update and render : %.2f ms/frame -> %.2f ms/frame, x%.1f" % (
+        legacy_time * 1000.0 / frame_count, array_time * 1000.0 / frame_count, legacy_time / array_time))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=60)
+    parser.add_argument('--spawn-count', type=int, default=50)
+    parser.add_argument('--align-mode', default='BILLBOARD', choices=[mode.name for mode in AlignMode])
+    args = parser.parse_args()
+
+    logger.setLevel(Logger.WARNING)
+    benchmark(args.frames, args.spawn_count, AlignMode[args.align_mode])
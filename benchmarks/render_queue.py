@@ -0,0 +1,159 @@
+"""
+Compare gathering and sorting the render infos every frame with the persistent RenderQueue,
+and count the draw calls after the instancing batches.
+
+    python -m benchmarks.render_queue --actors 5000 --frames 50 --moving-ratio 0.01
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.Common import logger
+from PyEngine3D.Render import GeometryBounds, RenderQueue
+from PyEngine3D.Render.RenderInfo import SortIdMap
+from PyEngine3D.Utilities import *
+from .culling import create_actors, create_camera
+
+
+def legacy_render_infos(bounds, geometry_indices):
+    solid_render_infos = []
+    translucent_render_infos = []
+    bounds.gather_render_infos(geometry_indices, solid_render_infos, translucent_render_infos)
+    solid_render_infos.sort(key=lambda x: (id(x.geometry), id(x.material)))
+    translucent_render_infos.sort(key=lambda x: (id(x.geometry), id(x.material)))
+    return solid_render_infos, translucent_render_infos
+
+
+def get_batches(render_infos):
+    """
+    :return: { (geometry, material) : sorted world matrices }, None if the render infos of a batch are not contiguous.
+    """
+    batches = {}
+    last_key = None
+    for render_info in render_infos:
+        key = (id(render_info.geometry), id(render_info.material))
+        if key != last_key:
+            if key in batches:
+                return None
+            batches[key] = []
+            last_key = key
+        if 0 < render_info.instance_count:
+            batches[key].extend(matrix.tobytes() for matrix in render_info.instance_matrices)
+        else:
+            batches[key].append(render_info.actor.transform.matrix.tobytes())
+    for matrices in batches.values():
+        matrices.sort()
+    return batches
+
+
+def benchmark(actor_count, geometry_count, moving_ratio, frame_count, scene_size, rotate_camera):
+    actors = create_actors(actor_count, geometry_count, scene_size)
+    camera = create_camera(fov=60.0, aspect=16.0 / 9.0)
+    bounds = GeometryBounds()
+    bounds.build(actors)
+    render_queue = RenderQueue(bounds, use_instancing=True)
+    moving_count = int(actor_count * moving_ratio)
+
+    legacy_time = 0.0
+    queue_time = 0.0
+    mismatch_count = 0
+    visible_count = 0
+    draw_count = 0
+    for frame in range(frame_count):
+        # move the actors in the place, so the visible geometries are not changed.
+        for actor in actors[:moving_count]:
+            actor.transform.move_y(0.1 if frame % 2 else -0.1)
+            actor.update(0.0)
+        bounds.update_world_bounds(actors[:moving_count])
+
+        if rotate_camera:
+            camera.transform.rotation_yaw(0.01)
+            camera.transform.update_transform()
+            matrix = camera.transform.rotationMatrix[0:3, 0:3]
+            camera.frustum_vectors = np.dot(create_camera(fov=60.0, aspect=16.0 / 9.0).frustum_vectors, matrix)
+        geometry_indices = bounds.view_frustum_culling(camera)
+
+        start_time = time.perf_counter()
+        legacy_results = legacy_render_infos(bounds, geometry_indices)
+        legacy_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        render_queue.update(geometry_indices, 0)
+        queue_time += time.perf_counter() - start_time
+
+        queue_results = (render_queue.solid_render_infos, render_queue.translucent_render_infos)
+        for legacy_render_infos_, queue_render_infos in zip(legacy_results, queue_results):
+            queue_batches = get_batches(queue_render_infos)
+            if queue_batches is None or get_batches(legacy_render_infos_) != queue_batches:
+                mismatch_count += 1
+        visible_count += len(geometry_indices)
+        draw_count += render_queue.get_draw_count()
+
+    print("actors : %d, geometries : %d, moving actors : %d, camera : %s" % (
+        actor_count, actor_count * geometry_count, moving_count, 'rotating' if rotate_camera else 'static'))
+    print("average render infos per frame : %d, mismatched queues : %d, sorted frames : %d / %d" % (
+        visible_count // frame_count, mismatch_count, render_queue.sort_count, frame_count))
+    print("draw calls per frame : %d before batching, %d after batching" % (visible_count // frame_count,
+                                                                          draw_count // frame_count))
+    print("gather and sort : %.3f ms/frame" % (legacy_time * 1000.0 / frame_count))
+    print("render queue : %.3f ms/frame" % (queue_time * 1000.0 / frame_count))
+    print("speed up : x%.1f" % (legacy_time / queue_time))
+
+
+def check_sort_id_overflow(actor_count, geometry_count, frame_count, scene_size):
+    """
+    The geometries of the rotating camera are refreshed while the geometry field has a few more ids than the visible
+    geometries, so the sort ids are released instead of overflowing the field. The material version is changed too.
+    """
+    actors = create_actors(actor_count, geometry_count, scene_size)
+    camera = create_camera(fov=60.0, aspect=16.0 / 9.0)
+    frustum_vectors = camera.frustum_vectors
+    bounds = GeometryBounds()
+    bounds.build(actors)
+    render_queue = RenderQueue(bounds, use_instancing=True)
+    max_visible_count = max(len(bounds.view_frustum_culling(camera)), 1)
+    bits = int(max_visible_count * 2).bit_length()
+    bounds.geometry_sort_ids = SortIdMap(bits)
+
+    mismatch_count = 0
+    refreshed_geometries = set()
+    for frame in range(frame_count):
+        camera.transform.rotation_yaw(0.1)
+        camera.transform.update_transform()
+        camera.frustum_vectors = np.dot(frustum_vectors, camera.transform.rotationMatrix[0:3, 0:3])
+        geometry_indices = bounds.view_frustum_culling(camera)
+        if (1 << bits) < len(geometry_indices):
+            continue
+        version = frame // 10
+        render_queue.update(geometry_indices, version)
+
+        legacy_results = legacy_render_infos(bounds, geometry_indices)
+        queue_results = (render_queue.solid_render_infos, render_queue.translucent_render_infos)
+        for legacy_render_infos_, queue_render_infos in zip(legacy_results, queue_results):
+            if get_batches(legacy_render_infos_) != get_batches(queue_render_infos):
+                mismatch_count += 1
+        assert len(bounds.geometry_sort_ids.ids) <= (1 << bits)
+        refreshed_geometries.update(geometry_indices.tolist())
+
+    print("sort id overflow : %d bits of geometry ids, %d refreshed geometries, mismatched queues : %d" % (
+        bits, len(refreshed_geometries), mismatch_count))
+    assert (1 << bits) < len(refreshed_geometries), "The sort ids have not been released."
+    assert 0 == mismatch_count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--actors', type=int, default=5000)
+    parser.add_argument('--geometries', type=int, default=2)
+    parser.add_argument('--moving-ratio', type=float, default=0.01)
+    parser.add_argument('--frames', type=int, default=50)
+    parser.add_argument('--scene-size', type=float, default=1000.0)
+    parser.add_argument('--rotate-camera', action='store_true')
+    args = parser.parse_args()
+
+    logger.setLevel(Logger.WARNING)
+    benchmark(args.actors, args.geometries, args.moving_ratio, args.frames, args.scene_size, args.rotate_camera)
+    check_sort_id_overflow(args.actors, args.geometries, args.frames, args.scene_size)
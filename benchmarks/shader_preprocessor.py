@@ -0,0 +1,304 @@
+"""
+Compare the shader preprocessor without caches with the memoized preprocessor of Shader,
+generating all shader permutations used by Resource/MaterialInstances.
+
+    python -m benchmarks.shader_preprocessor --repeat 3
+"""
+
+import argparse
+import codecs
+from collections import OrderedDict
+import os
+import re
+import time
+import traceback
+import types
+import uuid
+
+from numpy import array, float32
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.Common import logger
+from PyEngine3D.OpenGLContext import Shader
+from PyEngine3D.OpenGLContext.Shader import *
+from PyEngine3D.OpenGLContext.Shader import clear_shader_caches, shader_types
+from PyEngine3D.Utilities import Logger
+
+
+def legacy_parsing_final_code(shader, shader_type_name, shader_version, compile_option, external_macros={}):
+    if shader.shader_code == "" or shader.shader_code is None:
+        return ""
+
+    # remove comment block
+    shader_code = re.sub(reComment, "", shader.shader_code)
+    code_lines = shader_code.splitlines()
+
+    # combine macro
+    combined_macros = OrderedDict()
+    # default macro
+    for macro in shader.default_macros:
+        combined_macros[macro] = shader.default_macros[macro]
+    # shader type macro
+    combined_macros[shader_type_name] = "1"
+
+    # external macro
+    if external_macros is None:
+        external_macros = {}
+
+    for macro in external_macros:
+        if external_macros[macro] is None or external_macros[macro] == '':
+            combined_macros[macro] = 0
+        else:
+            combined_macros[macro] = external_macros[macro]
+
+    # insert shader version - ex) #version 430 core
+    final_code_lines = [shader_version, "# extension GL_EXT_texture_array : enable"]
+
+    # insert defines to final code
+    for macro in combined_macros:
+        final_code_lines.append("#define %s %s" % (macro, str(combined_macros[macro])))
+
+    # global texture function
+    if ShaderCompileOption.USE_GLOBAL_TEXTURE_FUNCTION in compile_option:
+        final_code_lines.append("#if __VERSION__ >= 130")
+        # ex) replace texture2D -> texutre, textureCubeLod -> textureLod
+        for texture_target in texture_targets:
+            if "Lod" in texture_target:
+                final_code_lines.append("#define %s textureLod" % texture_target)
+            elif "Grad" in texture_target:
+                final_code_lines.append("#define %s textureGrad" % texture_target)
+            else:
+                final_code_lines.append("#define %s texture" % texture_target)
+        final_code_lines.append("#endif")
+
+    # insert version as comment
+    include_files = dict()  # { 'filename': uuid }
+    resource_manager = CoreManager.instance().resource_manager
+    shader_file_dir = resource_manager.shader_loader.resource_path
+
+    # do parsing
+    line_num = 0
+    macro_depth = 0
+    macro_result = [True, ]
+    macro_code_remove = True
+    while line_num < len(code_lines):
+        code = code_lines[line_num]
+        line_num += 1
+
+        # remove comment
+        if "//" in code:
+            code = code.split("//")[0]
+
+        # macro parsing
+        m = re.search(reMacroStart, code)
+        if m is not None:
+            macro, expression = m.groups()
+            expression = expression.strip()
+            if macro == 'define' or macro == 'undef':
+                define_expression = expression.split('(')[0].strip()
+                if ' ' in define_expression:
+                    define_name, define_value = define_expression.split(' ', 1)
+                else:
+                    define_name, define_value = define_expression, None
+
+                # check external macro
+                if macro == 'define' and define_name in external_macros:
+                    continue  # ignore legacy macro
+
+                if macro == 'define' and define_name not in combined_macros:
+                    combined_macros[define_name] = define_value
+                elif macro == 'undef' and define_name in combined_macros:
+                    combined_macros.pop(define_name)
+            elif macro == 'ifdef':
+                macro_depth += 1
+                if expression in combined_macros:
+                    macro_result.append(True)
+                else:
+                    macro_result.append(False)
+            elif macro == 'ifndef':
+                macro_depth += 1
+                if expression not in combined_macros:
+                    macro_result.append(True)
+                else:
+                    macro_result.append(False)
+            elif macro == 'if' or macro == 'elif' and not macro_result[macro_depth]:
+                variables = re.findall(reVariable, expression)
+                variables.sort(key=lambda x: len(x), reverse=True)
+                for variable in variables:
+                    if variable in combined_macros:
+                        while True:
+                            final_value = combined_macros[variable]
+                            if final_value not in combined_macros:
+                                break
+                            variable = final_value
+                        expression = re.sub(reVariable, str(final_value), expression, 1)
+                expression = expression.replace('&&', ' and ')
+                expression = expression.replace('||', ' or ')
+                # expression = re.sub('\!?!\=', 'not ', expression)
+                # Important : To avoid errors, convert the undecalred variables to zero.
+                expression = re.sub(reVariable, '0', expression)
+                result = True if eval(expression) else False
+                if macro == 'if':
+                    macro_depth += 1
+                    macro_result.append(result)
+                elif macro == 'elif':
+                    macro_result[macro_depth] = result
+            elif macro == 'else':
+                macro_result[macro_depth] = not macro_result[macro_depth]
+            elif macro == 'endif':
+                macro_depth -= 1
+                macro_result.pop()
+        # be in failed macro block. continue
+        elif not macro_result[macro_depth]:
+            if not macro_code_remove:
+                # make comment
+                final_code_lines.append("// " + code)
+            continue
+
+        # is version code?
+        m = re.search(reVersion, code)
+        if m is not None:
+            version_code = m.groups()[0].strip()
+            if final_code_lines[0] == "" or version_code > final_code_lines[0]:
+                final_code_lines[0] = version_code
+            continue
+
+        # find include block
+        m = re.search(reInclude, code)
+        if m is not None:
+            valid = False
+            include_file = os.path.join(shader_file_dir, m.groups()[0])
+
+            # insert include code
+            if os.path.exists(include_file):
+                try:
+                    f = codecs.open(include_file, mode='r', encoding='utf-8')
+                    include_source = f.read()
+                    # remove comment block
+                    include_source = re.sub(reComment, "", include_source)
+                    include_code_lines = include_source.splitlines()
+                    f.close()
+                    valid = True
+                except BaseException:
+                    logger.error(traceback.format_exc())
+
+                if valid:
+                    if include_file in include_files:
+                        unique_id = include_files[include_file]
+                    else:
+                        unique_id = "UUID_" + str(uuid.uuid3(uuid.NAMESPACE_DNS, include_file)).replace("-", "_")
+                        include_files[include_file] = unique_id
+
+                        if include_file not in shader.include_files:
+                            shader.include_files.append(include_file)
+                    # insert included code
+                    final_code_lines.append("//------------ INCLUDE -------------//")
+                    final_code_lines.append("// " + code)  # include comment
+                    include_code_lines.insert(0, "#ifndef %s" % unique_id)
+                    include_code_lines.insert(1, "#define %s" % unique_id)
+                    include_code_lines.append("#endif /* %s */" % unique_id)
+                    code_lines = include_code_lines + code_lines[line_num:]
+                    line_num = 0
+
+            if not valid:
+                logger.error("Shader parsing error.\n\t--> Cannot open %s file." % include_file)
+            continue
+        # append code block
+        final_code_lines.append(code)
+    return '\n'.join(final_code_lines)
+
+
+def load_permutations(resource_path):
+    """
+    :return: [(shader name, macros), ]
+    """
+    permutations = []
+    for dirpath, dirnames, filenames in os.walk(os.path.join(resource_path, 'MaterialInstances')):
+        for filename in sorted(filenames):
+            if filename.endswith('.matinst'):
+                with open(os.path.join(dirpath, filename)) as f:
+                    material_instance_data = eval(f.read())
+                permutation = (material_instance_data.get('shader_name', 'default'),
+                               material_instance_data.get('macros', OrderedDict()))
+                if permutation not in permutations:
+                    permutations.append(permutation)
+    return permutations
+
+
+def load_shader(shader_path, shader_name):
+    filepath = os.path.join(shader_path, *shader_name.split('.')) + '.glsl'
+    with codecs.open(filepath, mode='r', encoding='utf-8') as f:
+        return Shader(shader_name, f.read())
+
+
+def generate_all(shaders, permutations, parsing_func):
+    shader_codes = []
+    for shader_name, macros in permutations:
+        shader = shaders[shader_name]
+        for shader_type_name in shader_types:
+            shader_codes.append(parsing_func(shader, shader_type_name, "#version 430 core", default_compile_option, macros))
+    return shader_codes
+
+
+def benchmark(resource_path, repeat):
+    shader_path = os.path.join(resource_path, 'Shaders')
+    # the preprocessor only needs the path of the shader files.
+    CoreManager.instance().resource_manager = types.SimpleNamespace(
+        shader_loader=types.SimpleNamespace(resource_path=shader_path))
+
+    permutations = load_permutations(resource_path)
+    shaders = {shader_name: load_shader(shader_path, shader_name) for shader_name, macros in permutations}
+
+    def parsing_func(shader, *args):
+        return shader.__parsing_final_code__(*args)
+
+    legacy_time = 0.0
+    for i in range(repeat):
+        start_time = time.perf_counter()
+        legacy_codes = generate_all(shaders, permutations, legacy_parsing_final_code)
+        legacy_time += time.perf_counter() - start_time
+    legacy_time /= repeat
+
+    cold_time = 0.0
+    warm_time = 0.0
+    edit_time = 0.0
+    for i in range(repeat):
+        clear_shader_caches()
+        for shader in shaders.values():
+            shader.code_tokens = None
+            shader.final_code_cache = {}
+
+        start_time = time.perf_counter()
+        codes = generate_all(shaders, permutations, parsing_func)
+        cold_time += time.perf_counter() - start_time
+        assert codes == legacy_codes, "The preprocessed codes are different."
+
+        start_time = time.perf_counter()
+        codes = generate_all(shaders, permutations, parsing_func)
+        warm_time += time.perf_counter() - start_time
+        assert codes == legacy_codes, "The memoized codes are different."
+
+        # edit of a shader file, the final codes are generated again with the cached include files.
+        for shader in shaders.values():
+            shader.final_code_cache = {}
+        start_time = time.perf_counter()
+        codes = generate_all(shaders, permutations, parsing_func)
+        edit_time += time.perf_counter() - start_time
+        assert codes == legacy_codes, "The regenerated codes are different."
+
+    print("permutations : %d, shaders : %d, stages : %d, identical output" % (
+        len(permutations), len(shaders), len(legacy_codes)))
+    print("legacy : %.2f ms" % (legacy_time * 1000.0))
+    for name, elapsed_time in (('cold caches', cold_time), ('memoized', warm_time), ('after shader edit', edit_time)):
+        elapsed_time /= repeat
+        print("%s : %.2f ms, x%.1f" % (name, elapsed_time * 1000.0, legacy_time / elapsed_time))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resource-path', default='Resource')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    logger.setLevel(Logger.WARNING)
+    benchmark(args.resource_path, args.repeat)
@@ -0,0 +1,113 @@
+"""
+Compare the per bone animation sampling with the batched sampling and the baked poses of Animation.
+
+    python -m benchmarks.skeletal_animation --actors 500 --frames 30
+"""
+
+import argparse
+import math
+import os
+import time
+import types
+
+import numpy as np
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.Common import logger
+from PyEngine3D.Render import Animation, Skeleton, SkeletonActor
+from PyEngine3D.Render.Animation import MAX_BAKED_ROTATION_ANGLE
+from PyEngine3D.ResourceManager.ColladaLoader import Collada
+from PyEngine3D.Utilities import *
+
+
+def create_animation(filepath):
+    mesh_data = Collada(filepath).get_mesh_data()
+    skeleton = Skeleton(index=0, **mesh_data['skeleton_datas'][0])
+    return Animation(name='animation', index=0, skeleton=skeleton, animation_data=mesh_data['animation_datas'][0])
+
+
+def legacy_get_animation_transforms(animation, frame, animation_transforms):
+    for i, node in enumerate(animation.nodes):
+        animation_transforms[i][...] = node.get_transform(frame)
+
+
+def legacy_update(actor, animation, dt):
+    # SkeletonActor.update with the per bone sampling
+    actor.transform.update_transform()
+    actor.animation_time = math.fmod(actor.animation_time + dt, animation.animation_length)
+    frame = animation.get_time_to_frame(actor.animation_time)
+    actor.prev_animation_buffers[0][...] = actor.animation_buffers[0]
+    legacy_get_animation_transforms(animation, frame, actor.animation_buffers[0])
+
+
+def create_actors(animation, actor_count):
+    model = types.SimpleNamespace(name='model', mesh=types.SimpleNamespace(animations=[animation, ]))
+    rand = np.random.RandomState(0)
+    actors = []
+    for i in range(actor_count):
+        actor = SkeletonActor('actor_%d' % i, model=model)
+        actor.animation_time = rand.rand() * animation.animation_length
+        actors.append(actor)
+    return actors
+
+
+def benchmark(filepath, actor_count, frame_count, sample_rate):
+    animation = create_animation(filepath)
+    bone_count = len(animation.nodes)
+
+    # the batched sampling must be equal to the per bone sampling.
+    legacy_transforms = np.zeros_like(animation.animation_transforms)
+    max_error = 0.0
+    for frame in np.linspace(0.0, animation.frame_count - 1.0, 97):
+        legacy_get_animation_transforms(animation, frame, legacy_transforms)
+        max_error = max(max_error, np.max(np.abs(legacy_transforms - animation.get_animation_transforms(frame))))
+
+    # the interpolated baked poses must be within the error bound of the exact poses, see MAX_BAKED_ROTATION_ANGLE.
+    animation.set_pose_cache_sample_rate(sample_rate)
+    exact_transforms = np.zeros_like(animation.animation_transforms)
+    baked_error = 0.0
+    for animation_time in np.linspace(0.0, animation.animation_length, 997):
+        animation.sample_transforms(animation.get_time_to_frame(animation_time), exact_transforms)
+        baked_error = max(baked_error, np.max(np.abs(animation.get_pose(animation_time) - exact_transforms)))
+    bone_distance = max(1.0, np.max(np.linalg.norm(animation.inv_bind_matrices[:, 3, 0:3], axis=1)))
+    baked_error_bound = bone_distance * (1.0 - math.cos(MAX_BAKED_ROTATION_ANGLE * 0.5)) + bone_distance * 1e-5
+
+    dt = 1.0 / 60.0
+    results = []
+    for mode in ('per bone', 'batched', 'baked'):
+        animation.set_pose_cache_sample_rate(sample_rate if 'baked' == mode else 0.0)
+        actors = create_actors(animation, actor_count)
+        start_time = time.perf_counter()
+        for frame in range(frame_count):
+            for actor in actors:
+                if 'per bone' == mode:
+                    legacy_update(actor, animation, dt)
+                else:
+                    actor.update(dt)
+        elapsed_time = (time.perf_counter() - start_time) * 1000.0 / frame_count
+        results.append((mode, elapsed_time, [actor.get_animation_buffer(0).copy() for actor in actors]))
+
+    print("actors : %d, bones : %d, animation frames : %d, animation length : %.2f sec" % (
+        actor_count, bone_count, animation.frame_count, animation.animation_length))
+    print("max error of the batched sampling : %g" % max_error)
+    print("max error of the baked poses : %g, error bound : %g, baked poses : %d" % (
+        baked_error, baked_error_bound, len(animation.baked_times)))
+    assert baked_error <= baked_error_bound, "The baked poses exceed the error bound."
+    legacy_time = results[0][1]
+    for mode, elapsed_time, buffers in results:
+        error = max(np.max(np.abs(a - b)) for a, b in zip(buffers, results[0][2]))
+        print("%s : %.2f ms/frame, x%.1f, max difference : %g%s" % (
+            mode, elapsed_time, legacy_time / elapsed_time, error,
+            ' (%g poses per second, interpolated linearly)' % sample_rate if 'baked' == mode else ''))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mesh', default=os.path.join('Resource', 'Externals', 'Meshes', 'skeletal.dae'))
+    parser.add_argument('--actors', type=int, default=500)
+    parser.add_argument('--frames', type=int, default=30)
+    parser.add_argument('--sample-rate', type=float, default=30.0)
+    args = parser.parse_args()
+
+    logger.setLevel(Logger.WARNING)
+    benchmark(args.mesh, args.actors, args.frames, args.sample_rate)
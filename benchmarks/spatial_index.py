@@ -0,0 +1,149 @@
+"""
+Compare the culling of all static actors with the culling of the actors in the visible nodes of LooseOctree.
+
+    python -m benchmarks.spatial_index --actors 20000 --moving-ratio 0.01
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.Common import logger
+from PyEngine3D.Render import MainLight, GeometryBounds, LooseOctree
+from PyEngine3D.Utilities import *
+from .culling import create_actors, create_camera, get_keys
+
+
+def scan_culling(camera, light, actors, bounds):
+    solid_render_infos = []
+    translucent_render_infos = []
+    shadow_render_infos = []
+    bounds.update(actors)
+    bounds.gather_render_infos(bounds.view_frustum_culling(camera), solid_render_infos, translucent_render_infos)
+    bounds.gather_render_infos(bounds.shadow_culling(light), shadow_render_infos, None)
+    return solid_render_infos, translucent_render_infos, shadow_render_infos
+
+
+def octree_culling(camera, light, updated_actors, bounds, octree):
+    solid_render_infos = []
+    translucent_render_infos = []
+    shadow_render_infos = []
+    bounds.update_actors(updated_actors)
+    for actor in updated_actors:
+        octree.update_object(actor, *bounds.get_actor_bound(actor))
+
+    actors = octree.query_frustum(camera.transform.pos, camera.frustum_vectors)
+    geometry_indices = bounds.view_frustum_culling(camera, bounds.get_geometry_indices(actors))
+    bounds.gather_render_infos(geometry_indices, solid_render_infos, translucent_render_infos)
+
+    actors = octree.query_view_projection(light.shadow_view_projection)
+    geometry_indices = bounds.shadow_culling(light, bounds.get_geometry_indices(actors))
+    bounds.gather_render_infos(geometry_indices, shadow_render_infos, None)
+    return solid_render_infos, translucent_render_infos, shadow_render_infos
+
+
+def brute_force_pick(actors, bounds, ray_origin, ray_direction):
+    nearest_actor = None
+    nearest_t = np.inf
+    for actor in actors:
+        bound_min, bound_max = bounds.get_actor_bound(actor)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t0 = (bound_min - ray_origin) / ray_direction
+            t1 = (bound_max - ray_origin) / ray_direction
+        t_near = np.nanmax(np.minimum(t0, t1))
+        t_far = np.nanmin(np.maximum(t0, t1))
+        if t_near <= t_far and 0.0 <= t_far and max(t_near, 0.0) < nearest_t:
+            nearest_t = max(t_near, 0.0)
+            nearest_actor = actor
+    return nearest_actor
+
+
+def octree_pick(octree, bounds, ray_origin, ray_direction):
+    return brute_force_pick(octree.query_ray(ray_origin, ray_direction), bounds, ray_origin, ray_direction)
+
+
+def benchmark(actor_count, geometry_count, moving_ratio, frame_count, scene_size, pick_count):
+    actors = create_actors(actor_count, geometry_count, scene_size)
+    camera = create_camera(fov=60.0, aspect=16.0 / 9.0)
+    light = MainLight('main_light', rot=[-1.0, 0.5, 0.0])
+    light.update(camera)
+    moving_count = int(actor_count * moving_ratio)
+
+    scan_bounds = GeometryBounds()
+    bounds = GeometryBounds()
+    octree = LooseOctree()
+
+    start_time = time.perf_counter()
+    for actor in actors:
+        bounds.add_actor(actor)
+        octree.add_object(actor, *bounds.get_actor_bound(actor))
+    print("build octree : %.2f ms" % ((time.perf_counter() - start_time) * 1000.0))
+
+    scan_time = 0.0
+    octree_time = 0.0
+    mismatch_count = 0
+    visible_count = 0
+    for frame in range(frame_count):
+        for actor in actors[:moving_count]:
+            actor.transform.move_x(0.1)
+        updated_actors = []
+        for actor in actors:
+            actor.update(0.0)
+            if actor.transform.updated:
+                updated_actors.append(actor)
+
+        start_time = time.perf_counter()
+        scan_results = scan_culling(camera, light, actors, scan_bounds)
+        scan_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        octree_results = octree_culling(camera, light, updated_actors, bounds, octree)
+        octree_time += time.perf_counter() - start_time
+
+        for scan_render_infos, octree_render_infos in zip(scan_results, octree_results):
+            mismatch_count += len(get_keys(scan_render_infos) ^ get_keys(octree_render_infos))
+        visible_count += sum(len(render_infos) for render_infos in octree_results)
+
+    rand = np.random.RandomState(1)
+    pick_mismatch_count = 0
+    brute_force_time = 0.0
+    octree_pick_time = 0.0
+    for i in range(pick_count):
+        ray_origin = Float3(*((rand.rand(3) - 0.5) * (scene_size, 10.0, scene_size)))
+        ray_direction = normalize(rand.rand(3) - 0.5)
+
+        start_time = time.perf_counter()
+        expected_actor = brute_force_pick(actors, bounds, ray_origin, ray_direction)
+        brute_force_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        picked_actor = octree_pick(octree, bounds, ray_origin, ray_direction)
+        octree_pick_time += time.perf_counter() - start_time
+        pick_mismatch_count += int(expected_actor is not picked_actor)
+
+    print("actors : %d, geometries : %d, moving actors : %d" % (actor_count, actor_count * geometry_count,
+                                                                moving_count))
+    print("average render infos per frame : %d, mismatched render infos : %d" % (visible_count // frame_count,
+                                                                                mismatch_count))
+    print("scan culling : %.2f ms/frame" % (scan_time * 1000.0 / frame_count))
+    print("octree culling : %.2f ms/frame" % (octree_time * 1000.0 / frame_count))
+    print("speed up : x%.1f" % (scan_time / octree_time))
+    print("ray picking : brute force %.2f ms, octree %.2f ms, mismatched picks : %d / %d" % (
+        brute_force_time * 1000.0 / pick_count, octree_pick_time * 1000.0 / pick_count, pick_mismatch_count,
+        pick_count))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--actors', type=int, default=20000)
+    parser.add_argument('--geometries', type=int, default=2)
+    parser.add_argument('--moving-ratio', type=float, default=0.01)
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--scene-size', type=float, default=4000.0)
+    parser.add_argument('--picks', type=int, default=20)
+    args = parser.parse_args()
+
+    logger.setLevel(Logger.WARNING)
+    benchmark(args.actors, args.geometries, args.moving_ratio, args.frames, args.scene_size, args.picks)
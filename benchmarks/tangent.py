@@ -0,0 +1,140 @@
+"""
+Compare the per face compute_tangent with the vectorized Utilities.Transform.compute_tangent.
+
+    python -m benchmarks.tangent --triangles 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from OpenGL.GL import GL_TRIANGLES, GL_QUADS
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.Render.Mesh import Cube, Plane
+from PyEngine3D.Utilities import *
+
+
+def legacy_compute_tangent(is_triangle_mode, positions, texcoords, normals, indices):
+    """ The per face implementation which was replaced by the vectorized compute_tangent. """
+    tangents = np.array([[1.0, 0.0, 0.0], ] * len(normals), dtype=np.float32)
+    polygon_size = 3 if is_triangle_mode else 4
+    for i in range(0, len(indices), polygon_size):
+        i0, i1, i2 = indices[i:i + 3]
+        deltaPos_0_1 = positions[i1] - positions[i0]
+        deltaPos_0_2 = positions[i2] - positions[i0]
+        deltaUV_0_1 = texcoords[i1] - texcoords[i0]
+        deltaUV_0_2 = texcoords[i2] - texcoords[i0]
+        r = deltaUV_0_1[0] * deltaUV_0_2[1] - deltaUV_0_1[1] * deltaUV_0_2[0]
+        r = (1.0 / r) if r != 0.0 else 0.0
+
+        tangent = (deltaPos_0_1 * deltaUV_0_2[1] - deltaPos_0_2 * deltaUV_0_1[1]) * r
+        tangent = normalize(tangent)
+
+        # invalid tangent
+        if 0.0 == np.dot(tangent, tangent):
+            avg_normal = normalize(normals[i0] + normals[i1] + normals[i2])
+            tangent = np.cross(avg_normal, WORLD_UP)
+
+        for j in range(polygon_size):
+            tangents[indices[i + j]] = tangent
+    return tangents
+
+
+def generate_mesh(triangle_count, unshared=False):
+    """
+    Wavy grid whose right half has the mirrored uv, and a strip of the degenerate uv on the first row.
+    :param unshared: every triangle has its own vertices and the face normal.
+    """
+    width = int(np.ceil(np.sqrt(triangle_count / 2.0)))
+    height = int(np.ceil(triangle_count / 2.0 / width))
+    grid_x, grid_z = np.meshgrid(np.linspace(-1.0, 1.0, width + 1), np.linspace(-1.0, 1.0, height + 1))
+    grid_y = np.sin(grid_x * 5.0) * np.cos(grid_z * 3.0) * 0.1
+    positions = np.stack([grid_x, grid_y, grid_z], axis=-1).reshape(-1, 3).astype(np.float32)
+    texcoords = np.stack([np.abs(grid_x), grid_z * 0.5 + 0.5], axis=-1).reshape(-1, 2).astype(np.float32)
+    texcoords[:width + 1, 1] = 0.0
+
+    quad_x, quad_z = np.meshgrid(np.arange(width), np.arange(height))
+    first = (quad_z * (width + 1) + quad_x).reshape(-1)
+    indices = np.stack([first, first + width + 1, first + 1, first + 1, first + width + 1, first + width + 2], axis=1)
+    indices = indices.reshape(-1)[:triangle_count * 3].astype(np.uint32)
+
+    triangles = positions[indices.reshape(-1, 3)]
+    face_normals = normalize_array(np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]))
+    if unshared:
+        positions = positions[indices]
+        texcoords = texcoords[indices]
+        normals = np.repeat(face_normals, 3, axis=0).astype(np.float32)
+        indices = np.arange(len(indices), dtype=np.uint32)
+    else:
+        normals = np.zeros_like(positions)
+        np.add.at(normals, indices, np.repeat(face_normals, 3, axis=0))
+        normals = normalize_array(normals).astype(np.float32)
+    return positions, texcoords, normals, indices
+
+
+def check_tangents(tangents, normals):
+    assert np.allclose(np.linalg.norm(tangents, axis=1), 1.0, atol=1e-5)
+    assert np.abs(np.einsum('ij,ij->i', tangents, normals)).max() < 1e-4
+
+
+def get_plane_geometry_data(mode):
+    # Plane.get_geometry_datas without creating the vertex buffers
+    plane = Plane.__new__(Plane)
+    plane.width, plane.height, plane.xz_plane, plane.mode = 16, 16, True, mode
+    return plane.get_geometry_datas()[0]
+
+
+def check_correctness():
+    # the flat meshes and the unshared vertices give the same tangents as the per face implementation
+    mesh_data = dict(zip(('positions', 'texcoords', 'normals', 'indices'), generate_mesh(20000, unshared=True)))
+    for is_triangle_mode, geometry_data in ((True, Cube.get_geometry_datas(None)[0]),
+                                            (True, get_plane_geometry_data(GL_TRIANGLES)),
+                                            (False, get_plane_geometry_data(GL_QUADS)),
+                                            (True, mesh_data)):
+        positions, texcoords, normals = [np.array(geometry_data[key], dtype=np.float32) for key in
+                                         ('positions', 'texcoords', 'normals')]
+        indices = np.array(geometry_data['indices'], dtype=np.uint32)
+        tangents = compute_tangent(is_triangle_mode, positions, texcoords, normals, indices)
+        legacy_tangents = legacy_compute_tangent(is_triangle_mode, positions, texcoords, normals, indices)
+        # the fallback tangents of the degenerate uv were not normalized.
+        assert np.allclose(tangents, normalize_array(legacy_tangents), atol=1e-4)
+        check_tangents(tangents, normals)
+
+    # the shared vertices average the faces, they are orthonormal and close to the faces.
+    positions, texcoords, normals, indices = generate_mesh(20000)
+    tangents = compute_tangent(True, positions, texcoords, normals, indices)
+    legacy_tangents = legacy_compute_tangent(True, positions, texcoords, normals, indices)
+    check_tangents(tangents, normals)
+    # the signs differ on the mirror seam, the last face decided the handedness of the per face implementation.
+    cosines = np.einsum('ij,ij->i', tangents, normalize_array(legacy_tangents))
+    angles = np.degrees(np.arccos(np.clip(np.abs(cosines), 0.0, 1.0)))
+    print('shared vertices : max %.2f degrees, mean %.2f degrees from the last face, %d flipped on the mirror seam' %
+          (angles.max(), angles.mean(), np.count_nonzero(cosines < 0.0)))
+    print('The results are correct.')
+
+
+def benchmark(triangle_count, skip_legacy=False):
+    check_correctness()
+
+    positions, texcoords, normals, indices = generate_mesh(triangle_count)
+    print('mesh : %d triangles, %d vertices' % (len(indices) // 3, len(positions)))
+
+    start_time = time.perf_counter()
+    compute_tangent(True, positions, texcoords, normals, indices)
+    elapsed_time = time.perf_counter() - start_time
+    print('compute_tangent : %.3fs' % elapsed_time)
+
+    if not skip_legacy:
+        start_time = time.perf_counter()
+        legacy_compute_tangent(True, positions, texcoords, normals, indices)
+        legacy_elapsed_time = time.perf_counter() - start_time
+        print('legacy_compute_tangent : %.2fs ( x%.1f )' % (legacy_elapsed_time, legacy_elapsed_time / elapsed_time))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--triangles', type=int, default=1000000)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+    benchmark(args.triangles, args.skip_legacy)